@@ -0,0 +1,229 @@
+"""Admission control for the estimation pipeline.
+
+At most ``ADMISSION_MAX_IN_FLIGHT`` estimates run at once. Requests beyond
+that wait in a per-lane queue: ``interactive`` for people waiting on a
+response, ``batch`` for bulk callers and background jobs. Freed slots go
+to the waiting lanes in proportion to their weights (weighted fair
+queueing), and a lane can be capped below the global limit so it never
+holds every slot. A request whose lane queue is full is rejected at once
+with ``Overloaded``, which the API turns into a 429 with a ``Retry-After``
+estimate.
+
+Lanes come from ``ADMISSION_LANES``: ``name:weight:max_queue[:max_in_flight]``
+entries separated by commas.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from .config import settings
+
+log = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+
+class Overloaded(Exception):
+    """Raised when a lane's queue is full; retry after ``retry_after`` seconds."""
+
+    def __init__(self, lane: str, retry_after: int):
+        super().__init__(f"Lane {lane!r} is full; retry in {retry_after}s")
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+class Lane:
+    """One priority lane: its queue, share of slots and counters."""
+
+    __slots__ = ("name", "weight", "max_queue", "max_in_flight", "waiting", "in_flight",
+                 "pass_", "admitted", "rejected")
+
+    def __init__(self, name: str, weight: float = 1.0, max_queue: int = 100,
+                 max_in_flight: int = 0):
+        self.name = name
+        self.weight = max(weight, 0.01)
+        self.max_queue = max_queue
+        self.max_in_flight = max_in_flight  # 0: up to the global limit
+        self.waiting: Deque[_Waiter] = deque()
+        self.in_flight = 0
+        self.pass_ = 0.0  # virtual start time of its next admission
+        self.admitted = 0
+        self.rejected = 0
+
+    @property
+    def eligible(self) -> bool:
+        return bool(self.waiting) and not (self.max_in_flight and self.in_flight >= self.max_in_flight)
+
+
+class _Waiter:
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, future: asyncio.Future):
+        self.loop = loop
+        self.future = future
+        self.granted = False
+
+
+def parse_lanes(spec: Optional[str]) -> Dict[str, Lane]:
+    """``"name:weight:max_queue[:max_in_flight],..."`` to lanes; malformed entries are skipped."""
+    lanes: Dict[str, Lane] = {}
+    for part in (spec or "").split(","):
+        fields = [f.strip() for f in part.split(":")]
+        if len(fields) < 3 or not fields[0]:
+            continue
+        try:
+            limit = int(fields[3]) if len(fields) > 3 else 0
+            lanes[fields[0]] = Lane(fields[0], float(fields[1]), int(fields[2]), limit)
+        except ValueError:
+            continue
+    return lanes
+
+
+class AdmissionController:
+    """Bounded in-flight estimates with weighted fair queueing between lanes.
+
+    Thread-safe: the API runs sync endpoints in worker threads and the CLI
+    starts a loop per call, so waiters are woken on their own loop.
+    """
+
+    def __init__(self, max_in_flight: int = 8, lanes: Optional[Dict[str, Lane]] = None,
+                 default_lane: str = INTERACTIVE):
+        self.max_in_flight = max(1, max_in_flight)
+        self.lanes = lanes or {INTERACTIVE: Lane(INTERACTIVE, 4, 64), BATCH: Lane(BATCH, 1, 256)}
+        self.default_lane = default_lane if default_lane in self.lanes else next(iter(self.lanes))
+        self.in_flight = 0
+        self._vtime = 0.0
+        self._service = 1.0  # moving average of seconds per estimate
+        self._lock = threading.Lock()
+
+    def lane(self, name: Optional[str]) -> Lane:
+        return self.lanes.get(name or "", self.lanes[self.default_lane])
+
+    def retry_after(self, lane: Lane) -> int:
+        """Seconds until a request joining ``lane`` now would likely be served."""
+        ahead = len(lane.waiting) + self.in_flight
+        return max(1, math.ceil(ahead * self._service / self.max_in_flight))
+
+    def _next_lane(self) -> Optional[Lane]:
+        eligible = [lane for lane in self.lanes.values() if lane.eligible]
+        if not eligible:
+            return None
+        # Smallest virtual finish time of the next admission, as in WFQ
+        return min(eligible, key=lambda lane: lane.pass_ + 1.0 / lane.weight)
+
+    def _dispatch(self) -> None:
+        # Hand out free slots; called with the lock held
+        while self.in_flight < self.max_in_flight:
+            lane = self._next_lane()
+            if lane is None:
+                return
+            waiter = lane.waiting.popleft()
+            waiter.granted = True
+            self.in_flight += 1
+            lane.in_flight += 1
+            lane.admitted += 1
+            self._vtime = lane.pass_
+            lane.pass_ += 1.0 / lane.weight
+            waiter.loop.call_soon_threadsafe(_wake, waiter.future)
+
+    def _release(self, lane: Lane, seconds: Optional[float] = None) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            lane.in_flight -= 1
+            if seconds is not None:
+                self._service += 0.2 * (seconds - self._service)
+            self._dispatch()
+
+    async def _acquire(self, lane: Lane, bounded: bool) -> None:
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(loop, loop.create_future())
+        with self._lock:
+            if not lane.waiting:
+                # An idle lane must not bank credit for the time it was idle
+                lane.pass_ = max(lane.pass_, self._vtime)
+            lane.waiting.append(waiter)
+            self._dispatch()
+            if bounded and not waiter.granted and len(lane.waiting) > lane.max_queue:
+                lane.waiting.pop()
+                lane.rejected += 1
+                raise Overloaded(lane.name, self.retry_after(lane))
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    lane.waiting.remove(waiter)
+            if granted:
+                self._release(lane)
+            raise
+
+    @asynccontextmanager
+    async def slot(self, lane: Optional[str] = None, bounded: bool = True) -> AsyncIterator[Lane]:
+        """Hold one in-flight slot of ``lane`` for the block.
+
+        Raises ``Overloaded`` when the lane's queue is full, unless
+        ``bounded`` is false (callers with a queue of their own).
+        """
+        chosen = self.lane(lane)
+        await self._acquire(chosen, bounded)
+        start = time.perf_counter()
+        try:
+            yield chosen
+        finally:
+            self._release(chosen, time.perf_counter() - start)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {
+                lane.name: {
+                    "waiting": len(lane.waiting),
+                    "in_flight": lane.in_flight,
+                    "admitted": lane.admitted,
+                    "rejected": lane.rejected,
+                }
+                for lane in self.lanes.values()
+            }
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+# Global admission controller instance
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """The controller configured by the settings, or None when admission control is off."""
+    global _controller
+    if not settings.ADMISSION_ENABLED:
+        return None
+    if _controller is None:
+        _controller = AdmissionController(
+            max_in_flight=settings.ADMISSION_MAX_IN_FLIGHT,
+            lanes=parse_lanes(settings.ADMISSION_LANES) or None,
+            default_lane=settings.ADMISSION_DEFAULT_LANE,
+        )
+    return _controller
+
+
+@asynccontextmanager
+async def admitted(lane: Optional[str] = None, bounded: bool = True) -> AsyncIterator[None]:
+    """``slot`` of the global controller; a no-op when admission control is off."""
+    controller = get_admission_controller()
+    if controller is None:
+        yield
+        return
+    async with controller.slot(lane, bounded):
+        yield
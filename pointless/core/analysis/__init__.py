@@ -0,0 +1,33 @@
+"""Static analysis of local source code.
+
+Per-file metrics (cyclomatic complexity, function and class counts, import
+fan-in/fan-out, size) are computed by pluggable language analyzers, in a
+process pool for large repositories, and cached by content hash.
+"""
+
+from .languages import FileMetrics, LanguageAnalyzer, PythonAnalyzer, analyzer_for, register_analyzer
+from .repo import (
+    RepoAnalysis,
+    analyze_files,
+    analyze_local_codebase,
+    analyze_repo,
+    codebase_analysis,
+    complexity_indicators,
+)
+from .store import MetricsStore, get_metrics_store
+
+__all__ = [
+    "FileMetrics",
+    "LanguageAnalyzer",
+    "MetricsStore",
+    "PythonAnalyzer",
+    "RepoAnalysis",
+    "analyze_files",
+    "analyze_local_codebase",
+    "analyze_repo",
+    "analyzer_for",
+    "codebase_analysis",
+    "complexity_indicators",
+    "get_metrics_store",
+    "register_analyzer",
+]
@@ -0,0 +1,70 @@
+"""Thin wrappers around the ``git`` command line for incremental analysis.
+
+All paths are relative to the directory passed in, which may be a
+subdirectory of the work tree. Every helper returns ``None`` when the
+directory is not a git checkout or git fails, so callers can fall back to a
+full scan.
+"""
+
+from __future__ import annotations
+
+import logging
+import subprocess
+from typing import List, Optional, Set
+
+log = logging.getLogger(__name__)
+
+_TIMEOUT = 30
+
+
+def _git(root: str, *args: str) -> Optional[str]:
+    try:
+        proc = subprocess.run(
+            ["git", "-C", root, *args],
+            capture_output=True, text=True, timeout=_TIMEOUT, check=False,
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        log.debug("git %s failed in %s: %s", args[0], root, e)
+        return None
+    if proc.returncode != 0:
+        return None
+    return proc.stdout
+
+
+def _paths(output: Optional[str]) -> Optional[List[str]]:
+    if output is None:
+        return None
+    return [path for path in output.split("\0") if path]
+
+
+def head_commit(root: str) -> Optional[str]:
+    out = _git(root, "rev-parse", "--verify", "HEAD")
+    return out.strip() if out else None
+
+
+def has_commit(root: str, commit: str) -> bool:
+    return _git(root, "cat-file", "-e", f"{commit}^{{commit}}") is not None
+
+
+def tracked_paths(root: str) -> Optional[List[str]]:
+    """Tracked and untracked-but-not-ignored files."""
+    return _paths(_git(root, "ls-files", "-z", "--cached", "--others", "--exclude-standard"))
+
+
+def changed_paths(root: str, since: str, until: str) -> Optional[Set[str]]:
+    """Files added, modified or deleted between two commits."""
+    if since == until:
+        return set()
+    if not has_commit(root, since):
+        return None  # rewritten history or garbage-collected
+    paths = _paths(_git(root, "diff", "-z", "--name-only", "--relative", "--no-renames", since, until))
+    return None if paths is None else set(paths)
+
+
+def dirty_paths(root: str) -> Optional[Set[str]]:
+    """Files whose working-tree content differs from HEAD, plus untracked files."""
+    modified = _paths(_git(root, "diff", "-z", "--name-only", "--relative", "--no-renames", "HEAD"))
+    untracked = _paths(_git(root, "ls-files", "-z", "--others", "--exclude-standard"))
+    if modified is None or untracked is None:
+        return None
+    return set(modified) | set(untracked)
@@ -0,0 +1,156 @@
+"""Per-language source analyzers.
+
+An analyzer turns the source of one file into ``FileMetrics``. Python is
+analyzed with the standard library ``ast`` module; other languages plug in by
+subclassing ``LanguageAnalyzer`` and calling ``register_analyzer`` at import
+time (worker processes import this module, not the caller's).
+"""
+
+from __future__ import annotations
+
+import ast
+import os
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass
+class FileMetrics:
+    """Size, complexity and import metrics of one source file.
+
+    Everything except ``path`` and ``fan_in`` depends only on the file
+    content, which is what makes the metrics cacheable by content hash.
+    """
+
+    language: str
+    lines: int = 0
+    functions: int = 0
+    classes: int = 0
+    complexity: int = 0  # cyclomatic complexity summed over the file
+    max_complexity: int = 0  # most complex single function
+    imports: Tuple[str, ...] = ()  # as written; relative imports keep their dots
+    error: Optional[str] = None
+    path: str = ""
+    fan_in: int = 0  # files in the same repo importing this one
+
+    @property
+    def fan_out(self) -> int:
+        return len(self.imports)
+
+    @property
+    def score(self) -> float:
+        """Complexity in [0, 1], e.g. for ``GitHubFile.complexity_score``."""
+        score = (
+            0.6 * min(self.max_complexity / 20.0, 1.0)
+            + 0.2 * min(self.fan_in / 20.0, 1.0)
+            + 0.2 * min(self.lines / 1000.0, 1.0)
+        )
+        return round(score, 2)
+
+    def to_dict(self) -> Dict:
+        """Content-derived fields only."""
+        data = asdict(self)
+        data.pop("path")
+        data.pop("fan_in")
+        data["imports"] = list(self.imports)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "FileMetrics":
+        return cls(**{**data, "imports": tuple(data.get("imports", ()))})
+
+
+class LanguageAnalyzer:
+    """Base class for per-language analyzers."""
+
+    language = ""
+    extensions: Tuple[str, ...] = ()
+    # Bump when the metrics change so cached results are recomputed
+    version = 1
+
+    def analyze(self, source: str) -> FileMetrics:
+        raise NotImplementedError
+
+
+def _count_lines(source: str) -> int:
+    return sum(1 for line in source.splitlines() if line.strip())
+
+
+_FUNCTIONS = (ast.FunctionDef, ast.AsyncFunctionDef)
+_SCOPES = _FUNCTIONS + (ast.ClassDef, ast.Lambda)
+_BRANCHES = (
+    ast.If, ast.IfExp, ast.For, ast.AsyncFor, ast.While, ast.ExceptHandler, ast.Assert,
+) + ((ast.match_case,) if hasattr(ast, "match_case") else ())
+
+
+def _cyclomatic(node: ast.AST) -> int:
+    """McCabe complexity of a scope, not descending into nested scopes."""
+    total = 1
+    stack = list(ast.iter_child_nodes(node))
+    while stack:
+        child = stack.pop()
+        if isinstance(child, _SCOPES):
+            continue
+        if isinstance(child, _BRANCHES):
+            total += 1
+        elif isinstance(child, ast.BoolOp):
+            total += len(child.values) - 1
+        elif isinstance(child, ast.comprehension):
+            total += 1 + len(child.ifs)
+        stack.extend(ast.iter_child_nodes(child))
+    return total
+
+
+class PythonAnalyzer(LanguageAnalyzer):
+    language = "Python"
+    extensions = (".py", ".pyi")
+
+    def analyze(self, source: str) -> FileMetrics:
+        lines = _count_lines(source)
+        try:
+            tree = ast.parse(source)
+        except (SyntaxError, ValueError) as e:
+            return FileMetrics(language=self.language, lines=lines, error=type(e).__name__)
+
+        functions: List[int] = []
+        classes = 0
+        imports: List[str] = []
+        for node in ast.walk(tree):
+            if isinstance(node, _FUNCTIONS):
+                functions.append(_cyclomatic(node))
+            elif isinstance(node, ast.ClassDef):
+                classes += 1
+            elif isinstance(node, ast.Import):
+                imports.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                prefix = "." * node.level
+                if node.module:
+                    imports.append(prefix + node.module)
+                else:
+                    imports.extend(prefix + alias.name for alias in node.names)
+
+        return FileMetrics(
+            language=self.language,
+            lines=lines,
+            functions=len(functions),
+            classes=classes,
+            complexity=_cyclomatic(tree) + sum(functions),
+            max_complexity=max(functions, default=0),
+            imports=tuple(dict.fromkeys(imports)),
+        )
+
+
+_analyzers: Dict[str, LanguageAnalyzer] = {}
+
+
+def register_analyzer(analyzer: LanguageAnalyzer) -> None:
+    """Handle files with ``analyzer.extensions`` using ``analyzer``."""
+    for ext in analyzer.extensions:
+        _analyzers[ext.lower()] = analyzer
+
+
+def analyzer_for(path: str) -> Optional[LanguageAnalyzer]:
+    return _analyzers.get(os.path.splitext(path)[1].lower())
+
+
+register_analyzer(PythonAnalyzer())
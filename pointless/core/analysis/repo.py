@@ -0,0 +1,384 @@
+"""Repository-wide analysis on top of the per-language analyzers.
+
+Files are hashed in the calling process and only files whose content hash is
+not in the ``MetricsStore`` are parsed. Parsing is CPU-bound, so large batches
+are spread over a process pool; small ones run inline to skip pool start-up.
+In git checkouts only the paths changed since the last analyzed commit are
+hashed at all, so steady-state cost follows churn rather than repo size.
+"""
+
+from __future__ import annotations
+
+import atexit
+import hashlib
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field, replace
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from ..config import settings
+from ..connectors.mcp_github import GitHubCodebaseAnalysis, GitHubFile, GitHubRepository
+from . import git
+from .languages import FileMetrics, LanguageAnalyzer, analyzer_for
+from .store import MetricsStore, get_metrics_store
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+SKIP_DIRS = frozenset({"node_modules", "__pycache__", "venv", "build", "dist", "site-packages"})
+# Below this many files to parse, a process pool costs more than it saves
+PARALLEL_MIN_FILES = 64
+
+# Indicator thresholds
+COMPLEX_FUNCTION = 15
+HIGH_FAN_IN = 10
+LARGE_CODEBASE_LINES = 100_000
+
+
+def content_key(analyzer: LanguageAnalyzer, data: bytes) -> str:
+    """Cache key for a file's content as seen by ``analyzer``."""
+    digest = hashlib.sha256(f"{analyzer.language}:{analyzer.version}\0".encode())
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def iter_source_files(root: str) -> Iterator[str]:
+    """Relative paths under ``root`` that some analyzer handles."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS and not d.startswith("."))
+        for fname in sorted(filenames):
+            if analyzer_for(fname) is not None:
+                yield os.path.relpath(os.path.join(dirpath, fname), root)
+
+
+def _hash_file(path: str) -> Optional[str]:
+    analyzer = analyzer_for(path)
+    try:
+        with open(path, "rb") as fh:
+            return content_key(analyzer, fh.read())
+    except OSError:
+        return None
+
+
+def _analyze_path(path: str) -> Optional[Tuple[str, FileMetrics]]:
+    """Worker: parse one file and return its content key and metrics."""
+    analyzer = analyzer_for(path)
+    try:
+        with open(path, "rb") as fh:
+            data = fh.read()
+    except OSError:
+        return None
+    metrics = analyzer.analyze(data.decode("utf-8", errors="replace"))
+    return content_key(analyzer, data), metrics
+
+
+# Global worker pool (file analysis and code search indexing), created on first
+# use and kept for later calls
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _worker_context() -> multiprocessing.context.BaseContext:
+    # Never fork: the API process already runs threads (log listener, Jira
+    # write-back, ...) and a forked child can inherit one of their locks held
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=_worker_context())
+            _pool_workers = workers
+        return _pool
+
+
+@atexit.register
+def shutdown_pool() -> None:
+    """Stop the processes of the shared worker pool, if any were started."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
+def map_in_workers(fn: Callable[[str], T], paths: List[str], workers: int) -> List[T]:
+    """``[fn(path) for path in paths]``, in the shared worker pool when it pays off.
+
+    Falls back to the calling process if a worker dies (OOM kill, crash);
+    the next call starts a fresh pool.
+    """
+    if workers <= 1 or len(paths) < PARALLEL_MIN_FILES:
+        return [fn(path) for path in paths]
+    chunksize = max(1, len(paths) // (workers * 4))
+    try:
+        return list(_get_pool(workers).map(fn, paths, chunksize=chunksize))
+    except BrokenProcessPool:
+        log.warning("Worker pool broke; processing %d files in-process", len(paths))
+        shutdown_pool()
+        return [fn(path) for path in paths]
+
+
+def _analyze_paths(paths: List[str], workers: int) -> List[Optional[Tuple[str, FileMetrics]]]:
+    return map_in_workers(_analyze_path, paths, workers)
+
+
+def _analyze_keys(
+    root: str,
+    paths: Iterable[str],
+    workers: Optional[int],
+    store: Optional[MetricsStore],
+) -> Tuple[Dict[str, str], Dict[str, FileMetrics]]:
+    """Content key per readable path, and metrics per content key."""
+    workers = workers or settings.ANALYSIS_WORKERS or os.cpu_count() or 1
+    keys: Dict[str, str] = {}
+    for rel in paths:
+        if analyzer_for(rel) is None:
+            continue
+        key = _hash_file(os.path.join(root, rel))
+        if key is not None:
+            keys[rel] = key
+
+    known = store.get_many(keys.values()) if store is not None else {}
+    missing = [rel for rel, key in keys.items() if key not in known]
+    computed: Dict[str, FileMetrics] = {}
+    for rel, item in zip(missing, _analyze_paths([os.path.join(root, r) for r in missing], workers)):
+        if item is None:
+            keys.pop(rel)
+            continue
+        key, metrics = item
+        keys[rel] = key  # the file may have changed since it was hashed
+        computed[key] = metrics
+    if store is not None and computed:
+        store.put_many(computed)
+    log.info(
+        "Analyzed %d files under %s (%d parsed, %d from cache)",
+        len(keys), root, len(computed), len(keys) - len(missing),
+    )
+
+    known.update(computed)
+    return keys, known
+
+
+def analyze_files(
+    root: str,
+    paths: Iterable[str],
+    workers: Optional[int] = None,
+    store: Optional[MetricsStore] = None,
+) -> Dict[str, FileMetrics]:
+    """Metrics for ``paths`` (relative to ``root``); unreadable files are skipped."""
+    keys, metrics = _analyze_keys(root, paths, workers, store)
+    return {rel: replace(metrics[key], path=rel) for rel, key in keys.items()}
+
+
+def module_names(path: str) -> List[str]:
+    """Dotted module names a file can be imported as."""
+    stem = os.path.splitext(path)[0].replace(os.sep, ".").replace("/", ".")
+    if stem.endswith(".__init__"):
+        stem = stem[: -len(".__init__")]
+    names = [stem]
+    for prefix in ("src.", "lib."):
+        if stem.startswith(prefix):
+            names.append(stem[len(prefix):])
+    return names
+
+
+def _resolve(importer: str, name: str, modules: Dict[str, str]) -> Optional[str]:
+    """Path of the repo file ``name`` refers to when imported from ``importer``."""
+    level = len(name) - len(name.lstrip("."))
+    if level:
+        package = module_names(importer)[0].split(".")
+        if not importer.endswith("__init__.py"):
+            package = package[:-1]
+        if level > 1:
+            package = package[: -(level - 1)] if level - 1 <= len(package) else []
+        rest = name[level:]
+        name = ".".join(package + ([rest] if rest else []))
+    parts = name.split(".")
+    for end in range(len(parts), 0, -1):
+        path = modules.get(".".join(parts[:end]))
+        if path is not None:
+            return path
+    return None
+
+
+def link_imports(files: Dict[str, FileMetrics]) -> None:
+    """Fill in ``fan_in``: how many other repo files import each file."""
+    modules: Dict[str, str] = {}
+    for path in files:
+        for name in module_names(path):
+            modules.setdefault(name, path)
+    importers: Dict[str, set] = {}
+    for path, metrics in files.items():
+        for name in metrics.imports:
+            target = _resolve(path, name, modules)
+            if target is not None and target != path:
+                importers.setdefault(target, set()).add(path)
+    for path, metrics in files.items():
+        metrics.fan_in = len(importers.get(path, ()))
+
+
+@dataclass
+class RepoAnalysis:
+    """Metrics of every analyzed file in a local repository."""
+
+    root: str
+    files: Dict[str, FileMetrics] = field(default_factory=dict)
+
+    @property
+    def total_lines(self) -> int:
+        return sum(m.lines for m in self.files.values())
+
+    @property
+    def languages(self) -> List[str]:
+        return sorted({m.language for m in self.files.values()})
+
+
+def _wanted(path: str) -> bool:
+    parts = path.replace(os.sep, "/").split("/")
+    return analyzer_for(path) is not None and not any(
+        part in SKIP_DIRS or part.startswith(".") for part in parts[:-1]
+    )
+
+
+def _limited(paths: Iterable[str]) -> List[str]:
+    limit = settings.ANALYSIS_MAX_FILES
+    return list(itertools.islice(paths, limit) if limit else paths)
+
+
+def _analyze_incremental(
+    root: str, workers: Optional[int], store: MetricsStore
+) -> Optional[RepoAnalysis]:
+    """Re-analyze only paths changed since the last analyzed commit.
+
+    Returns None when ``root`` is not a git checkout.
+    """
+    head = git.head_commit(root)
+    dirty = git.dirty_paths(root) if head else None
+    if dirty is None:
+        return None
+
+    repo_key = os.path.realpath(root)
+    state = store.repo_state(repo_key)
+    changed = git.changed_paths(root, state[0], head) if state else None
+    if changed is None:
+        # First analysis, or the recorded commit is gone: start from scratch
+        tracked = git.tracked_paths(root)
+        if tracked is None:
+            return None
+        candidates = _limited(path for path in sorted(tracked) if _wanted(path))
+        previous: Dict[str, str] = {}
+    else:
+        # Paths dirty last time are re-checked too: they may have been reverted
+        candidates = sorted(p for p in changed | dirty | set(state[1]) if _wanted(p))
+        previous = store.repo_files(repo_key)
+
+    keys, metrics = _analyze_keys(root, candidates, workers, store)
+    removed = [path for path in candidates if path not in keys]
+    store.save_repo(repo_key, head, dirty, keys, removed, replace=changed is None)
+
+    hashes = {**previous, **keys}
+    for path in removed:
+        hashes.pop(path, None)
+    unchanged = [key for path, key in hashes.items() if path not in keys]
+    metrics.update(store.get_many(unchanged))
+    lost = [path for path, key in hashes.items() if key not in metrics]
+    if lost:
+        # Recorded hashes whose metrics were evicted from the store
+        lost_keys, lost_metrics = _analyze_keys(root, lost, workers, store)
+        hashes.update(lost_keys)
+        metrics.update(lost_metrics)
+    files = {
+        path: replace(metrics[key], path=path) for path, key in hashes.items() if key in metrics
+    }
+    log.info(
+        "Incremental analysis of %s at %s: %d of %d files re-checked",
+        root, head[:12], len(candidates), len(files),
+    )
+    link_imports(files)
+    return RepoAnalysis(root=root, files=files)
+
+
+def analyze_repo(
+    root: str,
+    workers: Optional[int] = None,
+    store: Optional[MetricsStore] = None,
+) -> RepoAnalysis:
+    """Analyze every supported source file under ``root``.
+
+    With a ``store``, git checkouts are analyzed incrementally: only files
+    changed since the last analyzed commit (or in the working tree) are read.
+    """
+    if store is not None:
+        analysis = _analyze_incremental(root, workers, store)
+        if analysis is not None:
+            return analysis
+    files = analyze_files(root, _limited(iter_source_files(root)), workers=workers, store=store)
+    link_imports(files)
+    return RepoAnalysis(root=root, files=files)
+
+
+def complexity_indicators(analysis: RepoAnalysis, relevant: Sequence[str] = ()) -> List[str]:
+    """Human-readable complexity findings, focused on ``relevant`` files when given."""
+    scope = [analysis.files[p] for p in relevant if p in analysis.files]
+    scope = scope or list(analysis.files.values())
+    indicators: List[str] = []
+    for m in sorted(scope, key=lambda m: m.max_complexity, reverse=True)[:3]:
+        if m.max_complexity >= COMPLEX_FUNCTION:
+            indicators.append(
+                f"High cyclomatic complexity in {m.path} (max {m.max_complexity} per function)"
+            )
+    for m in sorted(scope, key=lambda m: m.fan_in, reverse=True)[:3]:
+        if m.fan_in >= HIGH_FAN_IN:
+            indicators.append(f"Widely imported module {m.path} (fan-in {m.fan_in})")
+    total = analysis.total_lines
+    if total >= LARGE_CODEBASE_LINES:
+        indicators.append(f"Large codebase ({total} lines of code in {len(analysis.files)} files)")
+    errors = sum(1 for m in analysis.files.values() if m.error)
+    if errors:
+        indicators.append(f"{errors} source files could not be parsed")
+    return indicators
+
+
+def codebase_analysis(analysis: RepoAnalysis, relevant: Sequence[str] = ()) -> GitHubCodebaseAnalysis:
+    """Present a local ``RepoAnalysis`` in the shape of a GitHub analysis."""
+    root = os.path.abspath(analysis.root)
+    relevant_files = []
+    for path in relevant:
+        metrics = analysis.files.get(path)
+        relevant_files.append(GitHubFile.from_local(
+            os.path.join(root, path),
+            path,
+            language=metrics.language if metrics else "",
+            complexity_score=metrics.score if metrics else 0.0,
+        ))
+    return GitHubCodebaseAnalysis(
+        repository=GitHubRepository(name=os.path.basename(root), full_name=root),
+        total_files=len(analysis.files),
+        languages=analysis.languages,
+        complexity_indicators=complexity_indicators(analysis, relevant),
+        relevant_files=relevant_files,
+    )
+
+
+def analyze_local_codebase(
+    root: Optional[str], relevant: Sequence[str] = ()
+) -> Optional[GitHubCodebaseAnalysis]:
+    """Analyze a local checkout with the shared metrics store; None if there is nothing to analyze."""
+    if not root or not os.path.isdir(root):
+        return None
+    analysis = analyze_repo(root, store=get_metrics_store())
+    if not analysis.files:
+        return None
+    return codebase_analysis(analysis, relevant)
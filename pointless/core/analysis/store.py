@@ -0,0 +1,127 @@
+"""Persistent cache of file metrics keyed by content hash.
+
+For git checkouts the store also remembers, per repository, the last
+analyzed commit and the content hash of every analyzed path, so the next
+analysis only has to look at files that changed since.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..config import settings
+from .languages import FileMetrics
+
+# Keep IN (...) lists well below SQLite's bound-parameter limit
+_CHUNK = 500
+
+
+class MetricsStore:
+    """SQLite tables of ``FileMetrics`` per content hash and per-repo state."""
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS metrics (hash TEXT PRIMARY KEY, data TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS repos ("
+        " root TEXT PRIMARY KEY, commit_sha TEXT NOT NULL, dirty TEXT NOT NULL,"
+        " analyzed_at REAL NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS repo_files ("
+        " root TEXT NOT NULL, path TEXT NOT NULL, hash TEXT NOT NULL,"
+        " PRIMARY KEY (root, path))",
+    )
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        for statement in self._SCHEMA:
+            conn.execute(statement)
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, hashes: Iterable[str]) -> Dict[str, FileMetrics]:
+        keys = list(dict.fromkeys(hashes))
+        found: Dict[str, FileMetrics] = {}
+        conn = self._conn()
+        for start in range(0, len(keys), _CHUNK):
+            chunk = keys[start:start + _CHUNK]
+            rows = conn.execute(
+                f"SELECT hash, data FROM metrics WHERE hash IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for key, data in rows:
+                found[key] = FileMetrics.from_dict(json.loads(data))
+        return found
+
+    def put_many(self, items: Dict[str, FileMetrics]) -> None:
+        rows: List[tuple] = [(key, json.dumps(m.to_dict())) for key, m in items.items()]
+        with self._conn() as conn:
+            conn.executemany("INSERT OR REPLACE INTO metrics (hash, data) VALUES (?, ?)", rows)
+
+    def repo_state(self, root: str) -> Optional[Tuple[str, List[str]]]:
+        """Last analyzed commit of ``root`` and the paths that were dirty then."""
+        row = self._conn().execute(
+            "SELECT commit_sha, dirty FROM repos WHERE root = ?", (root,)
+        ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def repo_files(self, root: str) -> Dict[str, str]:
+        """Content hash per analyzed path of ``root``."""
+        rows = self._conn().execute("SELECT path, hash FROM repo_files WHERE root = ?", (root,))
+        return dict(rows)
+
+    def save_repo(
+        self,
+        root: str,
+        commit: str,
+        dirty: Iterable[str],
+        files: Dict[str, str],
+        removed: Iterable[str] = (),
+        replace: bool = False,
+    ) -> None:
+        """Record an analysis of ``root`` at ``commit``.
+
+        ``files`` maps re-analyzed paths to content hashes and ``removed`` lists
+        paths that no longer exist; ``replace`` drops every other path first.
+        """
+        with self._conn() as conn:
+            if replace:
+                conn.execute("DELETE FROM repo_files WHERE root = ?", (root,))
+            conn.executemany(
+                "DELETE FROM repo_files WHERE root = ? AND path = ?",
+                [(root, path) for path in removed],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO repo_files (root, path, hash) VALUES (?, ?, ?)",
+                [(root, path, key) for path, key in files.items()],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO repos (root, commit_sha, dirty, analyzed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (root, commit, json.dumps(sorted(dirty)), time.time()),
+            )
+
+
+# Global store instance
+_store: Optional[MetricsStore] = None
+
+
+def get_metrics_store() -> MetricsStore:
+    """Get the global metrics store under ``settings.DATA_DIR``."""
+    global _store
+    path = settings.ANALYSIS_CACHE_PATH or os.path.join(settings.DATA_DIR, "analysis.sqlite3")
+    if _store is None or _store.path != path:
+        _store = MetricsStore(path)
+    return _store
@@ -0,0 +1,265 @@
+"""Result cache shared by all API workers on a host.
+
+``POINTLESS_CACHE_BACKEND`` selects the backend:
+
+- ``none`` (default): no caching.
+- ``memory``: per-process dictionary of at most ``CACHE_MAX_ENTRIES``
+  entries, least recently used first out; useful for the CLI and single
+  workers.
+- ``sqlite``: a local SQLite database in WAL mode, outside the worker heap.
+  Every uvicorn worker opens the same file, so one worker's Jira or GitHub
+  fetch is reused by all the others.
+
+``get_or_compute`` is atomic across processes for the SQLite backend: the
+first caller takes a short lease on the key, renewed while it computes the
+value, and other callers wait for it to appear instead of repeating the
+upstream call.
+
+Values are pickled, so every ``get`` returns an independent copy.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from .config import settings
+
+_MISSING = object()
+
+
+class Cache:
+    """No-op cache; base class for the real backends."""
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return default
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        pass
+
+    def delete(self, key: str) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[Any]], ttl: Optional[float] = None
+    ) -> Any:
+        """Return the cached value or compute, store and return it.
+
+        ``None`` results are returned but never cached.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = await compute()
+        if value is not None:
+            self.set(key, value, ttl)
+        return value
+
+
+class MemoryCache(Cache):
+    """Per-process cache with expiry, bounded to ``maxsize`` entries (LRU)."""
+
+    # Drop expired entries roughly once per this many writes
+    _PURGE_EVERY = 256
+
+    def __init__(self, default_ttl: float = 3600.0, maxsize: int = 10000):
+        self.default_ttl = default_ttl
+        self.maxsize = max(1, maxsize)
+        self._data: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            blob, expires_at = item
+            if expires_at < time.time():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+        return pickle.loads(blob)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        blob = pickle.dumps(value)
+        with self._lock:
+            now = time.time()
+            self._data[key] = (blob, now + ttl)
+            self._data.move_to_end(key)
+            self._writes += 1
+            if self._writes % self._PURGE_EVERY == 0:
+                for old in [k for k, (_, expires_at) in self._data.items() if expires_at < now]:
+                    del self._data[old]
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCache(Cache):
+    """Cross-process cache backed by a SQLite database in WAL mode."""
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS entries ("
+        " key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS leases ("
+        " key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)",
+    )
+    # Purge expired rows roughly once per this many writes
+    _PURGE_EVERY = 256
+
+    def __init__(
+        self, path: str, default_ttl: float = 3600.0, lease_ttl: float = 60.0,
+        poll_interval: float = 0.02,
+    ):
+        self.path = path
+        self.default_ttl = default_ttl
+        self.lease_ttl = lease_ttl
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        self._writes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        for statement in self._SCHEMA:
+            conn.execute(statement)
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str, default: Any = None) -> Any:
+        row = self._conn().execute(
+            "SELECT value FROM entries WHERE key = ? AND expires_at >= ?",
+            (key, time.time()),
+        ).fetchone()
+        return pickle.loads(row[0]) if row else default
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, pickle.dumps(value), time.time() + ttl),
+        )
+        self._writes += 1
+        if self._writes % self._PURGE_EVERY == 0:
+            conn.execute("DELETE FROM entries WHERE expires_at < ?", (time.time(),))
+
+    def delete(self, key: str) -> None:
+        self._conn().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        conn = self._conn()
+        conn.execute("DELETE FROM entries")
+        conn.execute("DELETE FROM leases")
+
+    def _acquire(self, key: str, owner: str) -> bool:
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, "
+            "expires_at = excluded.expires_at WHERE leases.expires_at < ?",
+            (key, owner, now + self.lease_ttl, now),
+        )
+        row = conn.execute("SELECT owner FROM leases WHERE key = ?", (key,)).fetchone()
+        return bool(row) and row[0] == owner
+
+    def _release(self, key: str, owner: str) -> None:
+        self._conn().execute(
+            "DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner)
+        )
+
+    def _renew(self, key: str, owner: str) -> None:
+        self._conn().execute(
+            "UPDATE leases SET expires_at = ? WHERE key = ? AND owner = ?",
+            (time.time() + self.lease_ttl, key, owner),
+        )
+
+    async def _keep_lease(self, key: str, owner: str) -> None:
+        # Long computations (a large GitHub analysis) outlive one lease
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            self._renew(key, owner)
+
+    def _lease_held(self, key: str) -> bool:
+        row = self._conn().execute(
+            "SELECT 1 FROM leases WHERE key = ? AND expires_at >= ?", (key, time.time())
+        ).fetchone()
+        return row is not None
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[Any]], ttl: Optional[float] = None
+    ) -> Any:
+        owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+        while True:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            if self._acquire(key, owner):
+                renewal = asyncio.ensure_future(self._keep_lease(key, owner))
+                try:
+                    value = await compute()
+                    if value is not None:
+                        self.set(key, value, ttl)
+                    return value
+                finally:
+                    renewal.cancel()
+                    self._release(key, owner)
+            # Another worker is computing this key: wait for its lease to go
+            # away, then re-check. If it failed or produced nothing cacheable
+            # the next loop iteration takes the lease and computes.
+            while self._lease_held(key):
+                await asyncio.sleep(self.poll_interval)
+
+
+# Global cache instance
+_cache: Optional[Cache] = None
+
+
+def _create_cache() -> Cache:
+    backend = settings.CACHE_BACKEND
+    if backend == "memory":
+        return MemoryCache(default_ttl=settings.CACHE_TTL, maxsize=settings.CACHE_MAX_ENTRIES)
+    if backend == "sqlite":
+        path = settings.CACHE_PATH or os.path.join(settings.DATA_DIR, "cache.sqlite3")
+        return SQLiteCache(path, default_ttl=settings.CACHE_TTL)
+    return Cache()
+
+
+def get_cache() -> Cache:
+    """Get the global cache for ``settings.CACHE_BACKEND``."""
+    global _cache
+    if _cache is None:
+        _cache = _create_cache()
+    return _cache
+
+
+def set_cache(cache: Optional[Cache]) -> None:
+    """Override the global cache (tests); ``None`` re-reads the settings."""
+    global _cache
+    _cache = cache
@@ -0,0 +1,356 @@
+"""Online per-team/per-project calibration.
+
+Every recorded actual updates running statistics of the ratio
+``actual_hours / estimated_hours`` for the ticket's team and project:
+Welford mean/variance of the log ratio and P² streaming quantiles of the
+ratio. Each observation is an O(1) update; nothing is ever refit.
+
+At estimate time the most specific bucket with enough samples scales
+``estimated_hours`` by its (shrunk) geometric-mean bias and blends
+``confidence`` towards how consistent past estimates were.
+
+Buckets are stored in SQLite (``CALIBRATION_PATH``), so API workers and
+CLI runs on one host share them.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .config import settings
+from .models import ActualRecord, CalibrationStats, EstimationRequest, EstimationResponse
+from .tenants import cache_namespace
+
+log = logging.getLogger(__name__)
+
+QUANTILES = (0.1, 0.5, 0.9)
+
+
+class P2Quantile:
+    """Streaming quantile estimator (Jain & Chlamtac P² algorithm)."""
+
+    def __init__(self, p: float):
+        self.p = p
+        self.heights: List[float] = []
+        # 1-based marker positions, desired positions and their increments
+        self.positions = [1.0, 2.0, 3.0, 4.0, 5.0]
+        self.desired = [1.0, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5.0]
+        self.increments = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def add(self, x: float) -> None:
+        q = self.heights
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+
+        n = self.positions
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                step = 1 if d > 0 else -1
+                candidate = q[i] + step / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < candidate < q[i + 1]:
+                    candidate = q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+                q[i] = candidate
+                n[i] += step
+
+    def value(self) -> Optional[float]:
+        q = self.heights
+        if not q:
+            return None
+        if len(q) < 5:
+            return q[min(len(q) - 1, int(round(self.p * (len(q) - 1))))]
+        return q[2]
+
+    def to_dict(self) -> dict:
+        return {
+            "p": self.p,
+            "heights": self.heights,
+            "positions": self.positions,
+            "desired": self.desired,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "P2Quantile":
+        sketch = cls(data["p"])
+        sketch.heights = list(data["heights"])
+        sketch.positions = list(data["positions"])
+        sketch.desired = list(data["desired"])
+        return sketch
+
+
+class RunningStats:
+    """Running bias/variance/quantiles of actual-to-estimate ratios."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean_log = 0.0
+        self.m2_log = 0.0
+        self.quantiles = {p: P2Quantile(p) for p in QUANTILES}
+
+    def add(self, estimated_hours: float, actual_hours: float) -> None:
+        ratio = actual_hours / estimated_hours
+        x = math.log(ratio)
+        self.count += 1
+        delta = x - self.mean_log
+        self.mean_log += delta / self.count
+        self.m2_log += delta * (x - self.mean_log)
+        for sketch in self.quantiles.values():
+            sketch.add(ratio)
+
+    @property
+    def bias(self) -> float:
+        """Geometric-mean ratio of actual to estimated hours."""
+        return math.exp(self.mean_log)
+
+    @property
+    def std_log(self) -> float:
+        return math.sqrt(self.m2_log / (self.count - 1)) if self.count > 1 else 0.0
+
+    def summary(self, key: str) -> CalibrationStats:
+        return CalibrationStats(
+            key=key,
+            count=self.count,
+            bias=round(self.bias, 4),
+            std_log_ratio=round(self.std_log, 4),
+            ratio_p10=self.quantiles[0.1].value(),
+            ratio_p50=self.quantiles[0.5].value(),
+            ratio_p90=self.quantiles[0.9].value(),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_log": self.mean_log,
+            "m2_log": self.m2_log,
+            "quantiles": [s.to_dict() for s in self.quantiles.values()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RunningStats":
+        stats = cls()
+        stats.count = data["count"]
+        stats.mean_log = data["mean_log"]
+        stats.m2_log = data["m2_log"]
+        for item in data["quantiles"]:
+            sketch = P2Quantile.from_dict(item)
+            stats.quantiles[sketch.p] = sketch
+        return stats
+
+
+def project_from_ticket(ticket_id: Optional[str]) -> Optional[str]:
+    """Jira project key from a ticket ID (``PROJ-123`` -> ``PROJ``)."""
+    if ticket_id and "-" in ticket_id:
+        return ticket_id.rsplit("-", 1)[0].upper()
+    return None
+
+
+def bucket_keys(team: Optional[str], project: Optional[str]) -> List[str]:
+    """Calibration buckets for a ticket, most specific first.
+
+    Buckets of a tenant live under its cache namespace, ``global`` included.
+    """
+    keys = []
+    if team and project:
+        keys.append(f"team:{team.lower()}/project:{project}")
+    if team:
+        keys.append(f"team:{team.lower()}")
+    if project:
+        keys.append(f"project:{project}")
+    namespace = cache_namespace()
+    return [namespace + key for key in keys + ["global"]]
+
+
+class CalibrationStore:
+    """Calibration buckets in SQLite, one row per bucket.
+
+    A recorded actual updates its buckets in one write transaction (a
+    per-bucket UPSERT), so several processes can record concurrently without
+    losing each other's observations. Lookups are served from memory and
+    reload the buckets whenever another process has committed changes.
+    """
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS buckets ("
+        " key TEXT PRIMARY KEY, stats TEXT NOT NULL, updated_at REAL NOT NULL)"
+    )
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._stats: Dict[str, RunningStats] = {}
+        self._lock = threading.Lock()
+        self._data_version: Optional[int] = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # One connection behind the lock: PRAGMA data_version is per connection
+        self._conn = sqlite3.connect(
+            path or ":memory:", timeout=5.0, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(self._SCHEMA)
+        self._refresh()
+
+    def _refresh(self) -> None:
+        # Called with the lock held (or from __init__)
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return
+        try:
+            rows = self._conn.execute("SELECT key, stats FROM buckets").fetchall()
+            self._stats = {key: RunningStats.from_dict(json.loads(blob)) for key, blob in rows}
+        except (ValueError, KeyError) as e:
+            log.warning("Ignoring unreadable calibration data in %s: %s", self.path, e)
+        self._data_version = version
+
+    def record(self, record: ActualRecord) -> List[CalibrationStats]:
+        """Add one observation to every bucket it belongs to."""
+        project = record.project or project_from_ticket(record.jira_ticket_id)
+        keys = bucket_keys(record.team, project)
+        with self._lock:
+            # The write lock is taken before reading, so concurrent recorders
+            # each start from the other's committed state
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                marks = ", ".join("?" * len(keys))
+                stored = dict(self._conn.execute(
+                    f"SELECT key, stats FROM buckets WHERE key IN ({marks})", keys
+                ).fetchall())
+                now = time.time()
+                for key in keys:
+                    blob = stored.get(key)
+                    stats = RunningStats.from_dict(json.loads(blob)) if blob else RunningStats()
+                    stats.add(record.estimated_hours, record.actual_hours)
+                    self._conn.execute(
+                        "INSERT INTO buckets VALUES (?, ?, ?) ON CONFLICT(key) DO UPDATE"
+                        " SET stats = excluded.stats, updated_at = excluded.updated_at",
+                        (key, json.dumps(stats.to_dict()), now),
+                    )
+                    self._stats[key] = stats
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                self._data_version = None  # memory may be ahead of the database
+                raise
+            namespace = cache_namespace()
+            return [self._stats[k].summary(k[len(namespace):]) for k in keys]
+
+    def get(self, key: str) -> Optional[RunningStats]:
+        with self._lock:
+            self._refresh()
+            return self._stats.get(key)
+
+    def summaries(self) -> List[CalibrationStats]:
+        """Buckets of the current tenant (or of no tenant), without the namespace."""
+        namespace = cache_namespace()
+        with self._lock:
+            self._refresh()
+            items = sorted(self._stats.items())
+        return [
+            stats.summary(key[len(namespace):])
+            for key, stats in items
+            if key.startswith(namespace) and (namespace or not key.startswith("tenant:"))
+        ]
+
+    def lookup(
+        self, team: Optional[str], project: Optional[str]
+    ) -> Tuple[Optional[str], Optional[RunningStats]]:
+        """Most specific bucket with enough samples, as ``(key, stats)``."""
+        with self._lock:
+            self._refresh()
+            found = self._stats
+        for key in bucket_keys(team, project):
+            stats = found.get(key)
+            if stats is not None and stats.count >= settings.CALIBRATION_MIN_SAMPLES:
+                return key, stats
+        return None, None
+
+
+def apply_calibration(
+    store: CalibrationStore, req: EstimationRequest, result: EstimationResponse
+) -> EstimationResponse:
+    """Scale hours and blend confidence using the matching calibration bucket."""
+    key, stats = store.lookup(req.team, project_from_ticket(req.jira_ticket_id))
+    if stats is None:
+        return result
+
+    # Shrink towards "no adjustment" while a bucket is still small
+    weight = stats.count / (stats.count + settings.CALIBRATION_PRIOR_WEIGHT)
+    factor = stats.bias ** weight
+    consistency = math.exp(-stats.std_log)
+
+    result.uncalibrated_hours = result.estimated_hours
+    result.estimated_hours = max(0.1, round(result.estimated_hours * factor, 1))
+    result.confidence = round(
+        min(1.0, max(0.0, (1 - weight) * result.confidence + weight * consistency)), 2
+    )
+    result.factors.append(
+        f"Calibrated on {stats.count} past tickets ({key}): x{factor:.2f}"
+    )
+    return result
+
+
+# Global store instance
+_calibration_store: Optional[CalibrationStore] = None
+
+
+def get_calibration_store() -> CalibrationStore:
+    """Get the global calibration store instance."""
+    global _calibration_store
+    path = settings.CALIBRATION_PATH or os.path.join(settings.DATA_DIR, "calibration.sqlite3")
+    if _calibration_store is None or _calibration_store.path != path:
+        _calibration_store = CalibrationStore(path)
+    return _calibration_store
+
+
+def record_actual(record: ActualRecord) -> List[CalibrationStats]:
+    """Convenience function to record actual hours for a past estimate."""
+    return get_calibration_store().record(record)
+
+
+def calibrate(req: EstimationRequest, result: EstimationResponse) -> EstimationResponse:
+    """Convenience function to apply calibration to a fresh estimate.
+
+    An unusable store (unwritable ``DATA_DIR``, corrupt database) leaves the
+    estimate uncalibrated rather than failing it.
+    """
+    try:
+        store = get_calibration_store()
+        return apply_calibration(store, req, result)
+    except (OSError, sqlite3.Error) as e:
+        log.warning("Calibration store unavailable, estimate left uncalibrated: %s", e)
+        return result
+
+
+def calibration_state(req: EstimationRequest) -> str:
+    """Bucket and sample count that would calibrate ``req``; empty when none would."""
+    if not settings.CALIBRATION_ENABLED:
+        return ""
+    try:
+        key, stats = get_calibration_store().lookup(req.team, project_from_ticket(req.jira_ticket_id))
+    except (OSError, sqlite3.Error):
+        return ""  # calibrate() logs it
+    return f"{key}#{stats.count}" if stats is not None else ""
@@ -0,0 +1,589 @@
+"""Local code search over checked-out repositories.
+
+Each repository gets a trigram inverted index under
+``SEARCH_INDEX_DIR/<hash of the checkout path>``:
+
+- ``manifest.json`` lists the segments and every indexed path with its doc
+  id, size and mtime. Paths that are gone from the manifest are tombstoned:
+  their ids are simply no longer live.
+- ``<segment>.lex`` (sorted uint32 trigrams), ``<segment>.off`` (uint64
+  offsets) and ``<segment>.post`` (uint32 doc ids) hold one immutable
+  segment. Segments are memory-mapped and binary-searched, so a query never
+  loads the index into memory.
+
+``update`` stats the checkout and indexes only new or modified files into a
+new segment; once more than half of the indexed ids are dead the index is
+rebuilt. Queries (literal or regex) are turned into a trigram AND/OR filter,
+and the candidate files are verified with the real pattern, then ranked by
+match density.
+
+Content is lowercased (ASCII) before indexing so the same index serves
+case-sensitive and case-insensitive queries.
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import threading
+import time
+import uuid
+from array import array
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+
+try:  # Python 3.11+
+    from re import _parser as sre_parse  # type: ignore
+except ImportError:  # pragma: no cover - older Pythons
+    import sre_parse  # type: ignore
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from .analysis.languages import analyzer_for
+from .analysis.repo import SKIP_DIRS, map_in_workers
+from .config import settings
+from .connectors.mcp_github import GitHubFile
+
+log = logging.getLogger(__name__)
+
+_VERSION = 1
+# Source bytes per segment while building, to bound memory
+_SEGMENT_BYTES = 64 * 1024 * 1024
+_BINARY_SNIFF = 8192
+_SNIPPET_LINES = 3
+
+# A trigram filter: a set of trigrams that must all occur, an ("and"|"or", children)
+# node, or None for "no constraint"
+Query = Union[None, frozenset, Tuple[str, list]]
+
+
+def _trigrams(data: bytes) -> bytes:
+    """Sorted unique trigrams of lowercased ``data`` as packed uint32."""
+    data = data.lower()
+    if len(data) < 3:
+        return b""
+    if np is not None:
+        arr = np.frombuffer(data, dtype=np.uint8).astype(np.uint32)
+        tri = (arr[:-2] << 16) | (arr[1:-1] << 8) | arr[2:]
+        return np.unique(tri).astype(np.uint32).tobytes()
+    unique = {data[i:i + 3] for i in range(len(data) - 2)}
+    return array("I", sorted(int.from_bytes(t, "big") for t in unique)).tobytes()
+
+
+def _literal_trigrams(text: str) -> frozenset:
+    # Non-ASCII characters break runs: the index only folds ASCII case
+    found = set()
+    for run in re.split(r"[^\x00-\x7f]+", text):
+        data = run.encode().lower()
+        found.update(int.from_bytes(data[i:i + 3], "big") for i in range(len(data) - 2))
+    return frozenset(found)
+
+
+def _combine(kind: str, children: List[Query]) -> Query:
+    if kind == "or":
+        if any(child is None for child in children):
+            return None
+    else:
+        children = [child for child in children if child is not None]
+        if not children:
+            return None
+    return children[0] if len(children) == 1 else (kind, children)
+
+
+def _sequence_query(items) -> Query:
+    required: List[Query] = []
+    run: List[str] = []
+
+    def flush() -> None:
+        if len(run) >= 3:
+            required.append(_literal_trigrams("".join(run)) or None)
+        run.clear()
+
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            run.append(chr(av))
+            continue
+        flush()
+        if op is sre_parse.SUBPATTERN:
+            required.append(_sequence_query(av[-1]))
+        elif op is sre_parse.BRANCH:
+            required.append(_combine("or", [_sequence_query(branch) for branch in av[1]]))
+        elif op in _REPEATS and av[0] >= 1:
+            required.append(_sequence_query(av[2]))
+    flush()
+    return _combine("and", required)
+
+
+_REPEATS = tuple(
+    getattr(sre_parse, name)
+    for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")
+    if hasattr(sre_parse, name)
+)
+
+
+def plan_query(pattern: str, regex: bool = False) -> Query:
+    """Trigram filter every file matching ``pattern`` must pass."""
+    if not regex:
+        return _literal_trigrams(pattern) or None
+    try:
+        return _sequence_query(sre_parse.parse(pattern))
+    except Exception:
+        return None  # let re.compile report the error; no filtering
+
+
+def _index_file(path: str) -> Optional[bytes]:
+    """Worker: trigrams of one file, or None if it is unreadable or binary."""
+    try:
+        with open(path, "rb") as fh:
+            data = fh.read()
+    except OSError:
+        return None
+    if b"\0" in data[:_BINARY_SNIFF]:
+        return None
+    return _trigrams(data)
+
+
+def _index_files(paths: List[str], workers: int) -> List[Optional[bytes]]:
+    return map_in_workers(_index_file, paths, workers)
+
+
+class _Segment:
+    """One immutable, memory-mapped posting segment."""
+
+    def __init__(self, base: str):
+        self.base = base
+        self._maps = []
+        self.lex = self._open(".lex", "I")
+        self.off = self._open(".off", "Q")
+        self.post = self._open(".post", "I")
+
+    def _open(self, suffix: str, fmt: str) -> memoryview:
+        with open(self.base + suffix, "rb") as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                return memoryview(b"").cast(fmt)
+            mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return memoryview(mapped).cast(fmt)
+
+    def postings(self, trigram: int) -> memoryview:
+        i = bisect.bisect_left(self.lex, trigram)
+        if i == len(self.lex) or self.lex[i] != trigram:
+            return self.post[0:0]
+        return self.post[self.off[i]:self.off[i + 1]]
+
+    def close(self) -> None:
+        try:
+            for view in (self.lex, self.off, self.post):
+                view.release()
+            for mapped in self._maps:
+                mapped.close()
+        except BufferError:
+            pass  # a reader still holds a slice; the mapping goes with it
+
+    @staticmethod
+    def write(base: str, docs: List[Tuple[int, bytes]]) -> None:
+        if np is not None:
+            arrays = [np.frombuffer(tris, dtype=np.uint32) for _, tris in docs]
+            tris = np.concatenate(arrays) if arrays else np.zeros(0, np.uint32)
+            ids = np.concatenate(
+                [np.full(len(a), doc_id, np.uint32) for (doc_id, _), a in zip(docs, arrays)]
+            ) if arrays else np.zeros(0, np.uint32)
+            order = np.argsort(tris, kind="stable")
+            tris, ids = tris[order], ids[order]
+            lex, starts = np.unique(tris, return_index=True)
+            offsets = np.append(starts, len(tris)).astype(np.uint64)
+            parts = (lex.astype(np.uint32).tobytes(), offsets.tobytes(), ids.tobytes())
+        else:
+            postings: Dict[int, List[int]] = {}
+            for doc_id, packed in docs:
+                for trigram in array("I", packed):
+                    postings.setdefault(trigram, []).append(doc_id)
+            lex = sorted(postings)
+            offsets = array("Q", [0])
+            ids = array("I")
+            for trigram in lex:
+                ids.extend(postings[trigram])
+                offsets.append(len(ids))
+            parts = (array("I", lex).tobytes(), offsets.tobytes(), ids.tobytes())
+        for suffix, blob in zip((".lex", ".off", ".post"), parts):
+            with open(base + suffix, "wb") as fh:
+                fh.write(blob)
+
+
+class _Snapshot:
+    """One published manifest and its open segments; never modified.
+
+    Readers ``acquire`` it for the duration of a query. A replaced snapshot
+    is retired, and its segments are closed once its last reader is done.
+    """
+
+    def __init__(self, docs: Optional[Dict[str, List[int]]] = None, next_id: int = 0,
+                 segment_names: Optional[List[str]] = None,
+                 segments: Optional[List[_Segment]] = None, version: float = 0.0):
+        self.docs = docs or {}  # path -> [doc id (-1: not indexed), size, mtime_ns]
+        self.next_id = next_id
+        self.segment_names = segment_names or []
+        self.segments = segments or []
+        self.paths = {doc[0]: path for path, doc in self.docs.items() if doc[0] >= 0}
+        self.version = version
+        self._readers = 0
+        self._retired = False
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """Register a reader; False once retired (read the newer snapshot)."""
+        with self._lock:
+            if self._retired:
+                return False
+            self._readers += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._readers -= 1
+            done = self._retired and not self._readers
+        if done:
+            self._close()
+
+    def retire(self) -> None:
+        with self._lock:
+            self._retired = True
+            done = not self._readers
+        if done:
+            self._close()
+
+    def _close(self) -> None:
+        for segment in self.segments:
+            segment.close()
+
+
+class CodeSearchIndex:
+    """Trigram index of one checkout; see the module docstring.
+
+    Thread-safe: updates and reloads of one index are serialized, so two
+    threads never build segments from the same snapshot of the manifest.
+    Searches read an immutable ``_Snapshot`` without taking the lock, and
+    an update never closes segments a search is still reading.
+    """
+
+    def __init__(self, root: str, index_dir: str):
+        self.root = os.path.realpath(root)
+        self.index_dir = index_dir
+        self._snapshot = _Snapshot()
+        self.refreshed_at = 0.0
+        self._lock = threading.RLock()
+        os.makedirs(index_dir, exist_ok=True)
+        self._load()
+
+    @property
+    def docs(self) -> Dict[str, List[int]]:
+        return self._snapshot.docs
+
+    @property
+    def next_id(self) -> int:
+        return self._snapshot.next_id
+
+    @property
+    def segment_names(self) -> List[str]:
+        return self._snapshot.segment_names
+
+    @property
+    def version(self) -> float:
+        return self._snapshot.version
+
+    @contextmanager
+    def _reading(self) -> Iterator[_Snapshot]:
+        while True:
+            snapshot = self._snapshot
+            if snapshot.acquire():
+                break
+        try:
+            yield snapshot
+        finally:
+            snapshot.release()
+
+    @property
+    def _manifest(self) -> str:
+        return os.path.join(self.index_dir, "manifest.json")
+
+    def _load(self) -> None:
+        try:
+            version = os.path.getmtime(self._manifest)
+            with open(self._manifest, "r", encoding="utf-8") as fh:
+                manifest = json.load(fh)
+        except (OSError, ValueError):
+            return
+        if manifest.get("version") != _VERSION:
+            return
+        names = manifest["segments"]
+        with self._lock:
+            old, self._snapshot = self._snapshot, _Snapshot(
+                manifest["docs"], manifest["next_id"], names,
+                [_Segment(os.path.join(self.index_dir, n)) for n in names], version,
+            )
+        old.retire()
+
+    def reload_if_changed(self) -> None:
+        """Pick up updates written by another process."""
+        with self._lock:
+            try:
+                if os.path.getmtime(self._manifest) != self.version:
+                    self._load()
+            except OSError:
+                pass
+
+    def _walk(self) -> Iterator[Tuple[str, os.stat_result]]:
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS and not d.startswith(".")]
+            for fname in filenames:
+                path = os.path.join(dirpath, fname)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield os.path.relpath(path, self.root), st
+
+    def update(self, workers: Optional[int] = None) -> int:
+        """Index new and modified files; returns how many files were (re)indexed."""
+        with self._lock:
+            # Another process may have updated the index since we loaded it
+            self.reload_if_changed()
+            return self._update(workers)
+
+    def _update(self, workers: Optional[int]) -> int:
+        workers = workers or settings.ANALYSIS_WORKERS or os.cpu_count() or 1
+        seen: Dict[str, Tuple[int, int]] = {}
+        changed: List[str] = []
+        for rel, st in self._walk():
+            seen[rel] = (st.st_size, st.st_mtime_ns)
+            doc = self.docs.get(rel)
+            if doc is None or (doc[1], doc[2]) != seen[rel]:
+                changed.append(rel)
+        removed = [rel for rel in self.docs if rel not in seen]
+        if not changed and not removed:
+            self.refreshed_at = time.time()
+            return 0
+
+        docs = {rel: doc for rel, doc in self.docs.items() if rel in seen and rel not in changed}
+        live = sum(1 for doc in docs.values() if doc[0] >= 0)
+        rebuild = not self.segment_names or live < (self.next_id - live)
+        if rebuild:
+            # Too many dead ids: re-index everything into fresh segments
+            changed = sorted(seen)
+            docs = {}
+            next_id = 0
+        else:
+            next_id = self.next_id
+
+        names: List[str] = [] if rebuild else list(self.segment_names)
+        batch: List[Tuple[int, bytes]] = []
+        batch_bytes = 0
+        limit = settings.SEARCH_MAX_FILE_BYTES
+        eligible = [rel for rel in changed if seen[rel][0] <= limit]
+        for rel in changed:
+            docs[rel] = [-1, *seen[rel]]
+        for start in range(0, len(eligible), 4096):
+            chunk = eligible[start:start + 4096]
+            results = _index_files([os.path.join(self.root, rel) for rel in chunk], workers)
+            for rel, tris in zip(chunk, results):
+                if tris is None:
+                    continue
+                docs[rel][0] = next_id
+                batch.append((next_id, tris))
+                batch_bytes += seen[rel][0]
+                next_id += 1
+                if batch_bytes >= _SEGMENT_BYTES:
+                    names.append(self._write_segment(batch))
+                    batch, batch_bytes = [], 0
+        if batch:
+            names.append(self._write_segment(batch))
+
+        self._write_manifest(docs, next_id, names)
+        log.info(
+            "Code search index for %s: %d files indexed, %d removed (%s)",
+            self.root, len(eligible), len(removed), "rebuilt" if rebuild else "incremental",
+        )
+        self.refreshed_at = time.time()
+        return len(eligible)
+
+    def _write_segment(self, batch: List[Tuple[int, bytes]]) -> str:
+        name = f"seg-{uuid.uuid4().hex[:12]}"
+        _Segment.write(os.path.join(self.index_dir, name), batch)
+        return name
+
+    def _write_manifest(self, docs: Dict[str, List[int]], next_id: int, names: List[str]) -> None:
+        stale = set(self.segment_names) - set(names)
+        tmp = f"{self._manifest}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(
+                {"version": _VERSION, "root": self.root, "next_id": next_id,
+                 "segments": names, "docs": docs},
+                fh,
+            )
+        os.replace(tmp, self._manifest)
+        self._load()
+        for name in stale:
+            for suffix in (".lex", ".off", ".post"):
+                try:
+                    os.remove(os.path.join(self.index_dir, name + suffix))
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _postings(snapshot: _Snapshot, trigram: int) -> Set[int]:
+        found: Set[int] = set()
+        for segment in snapshot.segments:
+            found.update(segment.postings(trigram))
+        return found
+
+    def _evaluate(self, snapshot: _Snapshot, query: Query) -> Optional[Set[int]]:
+        if query is None:
+            return None
+        if isinstance(query, frozenset):
+            result: Optional[Set[int]] = None
+            for trigram in query:
+                ids = self._postings(snapshot, trigram)
+                result = ids if result is None else result & ids
+                if not result:
+                    return set()
+            return result
+        kind, children = query
+        sets = [self._evaluate(snapshot, child) for child in children]
+        if kind == "or":
+            if any(s is None for s in sets):
+                return None
+            return set().union(*sets)
+        known = [s for s in sets if s is not None]
+        if not known:
+            return None
+        return set.intersection(*sorted(known, key=len))
+
+    def candidates(self, query: Query) -> List[str]:
+        """Live paths that pass the trigram filter."""
+        with self._reading() as snapshot:
+            ids = self._evaluate(snapshot, query)
+            paths = snapshot.paths
+            if ids is None:
+                return sorted(paths.values())
+            return sorted(paths[i] for i in ids if i in paths)
+
+    def search(
+        self, pattern: str, regex: bool = False, case_sensitive: bool = False,
+        max_results: int = 10,
+    ) -> List[GitHubFile]:
+        """Files matching ``pattern``, densest matches first."""
+        scored = self.scored_search(pattern, regex, case_sensitive, max_results)
+        return [item[3] for item in scored]
+
+    def scored_search(
+        self, pattern: str, regex: bool = False, case_sensitive: bool = False,
+        max_results: int = 10,
+    ) -> List[Tuple[float, int, str, GitHubFile]]:
+        """``search`` as ``(match density, matches, path, file)``, best first."""
+        flags = 0 if case_sensitive else re.IGNORECASE
+        compiled = re.compile(pattern if regex else re.escape(pattern), flags | re.MULTILINE)
+        paths = self.candidates(plan_query(pattern, regex))[: settings.SEARCH_MAX_CANDIDATES]
+
+        scored: List[Tuple[float, int, str, GitHubFile]] = []
+        for rel in paths:
+            try:
+                with open(os.path.join(self.root, rel), "rb") as fh:
+                    text = fh.read().decode("utf-8", errors="replace")
+            except OSError:
+                continue
+            matches = 0
+            snippet: List[str] = []
+            for m in compiled.finditer(text):
+                matches += 1
+                if len(snippet) < _SNIPPET_LINES:
+                    line_no = text.count("\n", 0, m.start()) + 1
+                    start = text.rfind("\n", 0, m.start()) + 1
+                    end = text.find("\n", m.end())
+                    snippet.append(f"{line_no}: {text[start:end if end >= 0 else None].strip()}")
+            if not matches:
+                continue
+            lines = text.count("\n") + 1
+            analyzer = analyzer_for(rel)
+            scored.append((matches / lines, matches, rel, GitHubFile(
+                path=rel,
+                content="\n".join(snippet),
+                size=len(text),
+                language=analyzer.language if analyzer else "",
+            )))
+        scored.sort(key=_rank)
+        return scored[:max_results]
+
+
+def _rank(item: Tuple[float, int, str, GitHubFile]) -> Tuple[float, int, str]:
+    return -item[0], -item[1], item[2]
+
+
+def index_dir_for(root: str) -> str:
+    base = settings.SEARCH_INDEX_DIR or os.path.join(settings.DATA_DIR, "codesearch")
+    digest = hashlib.sha1(os.path.realpath(root).encode()).hexdigest()[:16]
+    return os.path.join(base, digest)
+
+
+# Open indexes by checkout path
+_indexes: Dict[str, CodeSearchIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_code_index(root: str, refresh: bool = True) -> CodeSearchIndex:
+    """Open (building if needed) the index of ``root``.
+
+    With ``refresh``, the checkout is re-scanned at most once per
+    ``SEARCH_REFRESH_INTERVAL`` seconds.
+    """
+    key = os.path.realpath(root)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = CodeSearchIndex(key, index_dir_for(key))
+    index.reload_if_changed()
+    if refresh and time.time() - index.refreshed_at >= settings.SEARCH_REFRESH_INTERVAL:
+        index.update()
+    return index
+
+
+def search_repos() -> Dict[str, str]:
+    """``owner/repo`` -> local checkout, from ``SEARCH_REPOS``."""
+    repos: Dict[str, str] = {}
+    for entry in (settings.SEARCH_REPOS or "").split(","):
+        name, sep, path = entry.strip().partition("=")
+        if sep and name.strip() and path.strip():
+            repos[name.strip()] = os.path.expanduser(path.strip())
+    return repos
+
+
+def local_checkout(owner: Optional[str], repo: Optional[str]) -> Optional[str]:
+    if not owner or not repo:
+        return None
+    return search_repos().get(f"{owner}/{repo}")
+
+
+def search_local(
+    pattern: str, repos: Dict[str, str], regex: bool = False, max_results: int = 10
+) -> List[GitHubFile]:
+    """Search ``owner/repo`` -> checkout mappings.
+
+    With more than one repository, paths are prefixed with ``owner/repo:``
+    and the best matches of all of them are returned, densest first.
+    """
+    scored: List[Tuple[float, int, str, GitHubFile]] = []
+    for name, root in repos.items():
+        found = get_code_index(root).scored_search(pattern, regex=regex, max_results=max_results)
+        for density, matches, path, item in found:
+            if len(repos) > 1:
+                item.path = path = f"{name}:{path}"
+            scored.append((density, matches, path, item))
+    scored.sort(key=_rank)
+    return [item[3] for item in scored[:max_results]]
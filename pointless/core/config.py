@@ -12,7 +12,7 @@ def _getenv(key: str, default: str | None = None) -> str | None:
     return os.getenv(f"POINTLESS_{key}", default)
 
 class Settings:
-    # estimator mode: "heuristic" now, "llm" later
+    # estimator mode: "heuristic", "llm" or "knn"
     ESTIMATOR: str = (_getenv("ESTIMATOR", "heuristic") or "heuristic").lower()
 
     # placeholders for upcoming features (unused today, but ready)
@@ -24,17 +24,149 @@ class Settings:
     CONFIDENCE_THRESHOLD: float = float(_getenv("CONFIDENCE_THRESHOLD", "0.7"))
     MAX_FILES: int = int(_getenv("MAX_FILES", "20"))
 
+    # local state (calibration, caches, indexes) lives under this directory
+    DATA_DIR: str = _getenv("DATA_DIR") or os.path.join(os.path.expanduser("~"), ".pointless")
+
+    # LLM estimator settings (used when ESTIMATOR=llm)
+    LLM_MODEL: str = _getenv("LLM_MODEL", "gpt-4o-mini") or "gpt-4o-mini"
+    LLM_TIMEOUT: int = int(_getenv("LLM_TIMEOUT", "60"))
+    LLM_MAX_CONCURRENCY: int = int(_getenv("LLM_MAX_CONCURRENCY", "4"))
+    LLM_CACHE_SIZE: int = int(_getenv("LLM_CACHE_SIZE", "1024"))
+    LLM_FAKE_LATENCY_MS: int = int(_getenv("LLM_FAKE_LATENCY_MS", "0"))
+
+    # kNN estimator over completed tickets (used when ESTIMATOR=knn)
+    KNN_INDEX_DIR: str | None = _getenv("KNN_INDEX_DIR")  # default: DATA_DIR/history
+    KNN_K: int = int(_getenv("KNN_K", "10"))
+    KNN_MIN_SIMILARITY: float = float(_getenv("KNN_MIN_SIMILARITY", "0.2"))
+    KNN_LSH_MIN_ROWS: int = int(_getenv("KNN_LSH_MIN_ROWS", "1000000"))
+    KNN_RELOAD_INTERVAL: float = float(_getenv("KNN_RELOAD_INTERVAL", "5"))  # seconds between CURRENT checks
+
+    # Static analysis of local repositories (codebase_context)
+    ANALYSIS_ENABLED: bool = _getenv("ANALYSIS_ENABLED", "false").lower() == "true"
+    ANALYSIS_WORKERS: int = int(_getenv("ANALYSIS_WORKERS", "0"))  # 0: one per CPU
+    ANALYSIS_MAX_FILES: int = int(_getenv("ANALYSIS_MAX_FILES", "20000"))
+    ANALYSIS_CACHE_PATH: str | None = _getenv("ANALYSIS_CACHE_PATH")  # default: DATA_DIR/analysis.sqlite3
+
+    # Local code search (backs MCPGitHubClient.search_code)
+    SEARCH_REPOS: str | None = _getenv("SEARCH_REPOS")  # "owner/repo=/path/to/checkout,..."
+    SEARCH_INDEX_DIR: str | None = _getenv("SEARCH_INDEX_DIR")  # default: DATA_DIR/codesearch
+    SEARCH_REFRESH_INTERVAL: int = int(_getenv("SEARCH_REFRESH_INTERVAL", "60"))
+    SEARCH_MAX_FILE_BYTES: int = int(_getenv("SEARCH_MAX_FILE_BYTES", "1000000"))
+    SEARCH_MAX_CANDIDATES: int = int(_getenv("SEARCH_MAX_CANDIDATES", "2000"))
+
+    # BM25 ranking of files relevant to a task (top MAX_FILES)
+    RELEVANCE_REFRESH_INTERVAL: int = int(_getenv("RELEVANCE_REFRESH_INTERVAL", "60"))
+    RELEVANCE_LOCAL_INDEXES: int = int(_getenv("RELEVANCE_LOCAL_INDEXES", "8"))  # checkouts kept in memory
+    RELEVANCE_MAX_FILE_BYTES: int = int(_getenv("RELEVANCE_MAX_FILE_BYTES", "262144"))  # read per file
+    # Share of the task's words a local file must match to count as a hit
+    RELEVANCE_MIN_MATCH: float = float(_getenv("RELEVANCE_MIN_MATCH", "0.3"))
+
+    # File content held by connector records
+    FILE_CONTENT_MAX_BYTES: int = int(_getenv("FILE_CONTENT_MAX_BYTES", "65536"))  # head/tail sampled beyond
+    FILE_CONTENT_INLINE_BYTES: int = int(_getenv("FILE_CONTENT_INLINE_BYTES", "4096"))
+    BLOB_DIR: str | None = _getenv("BLOB_DIR")  # default: DATA_DIR/blobs
+    BLOB_MAX_BYTES: int = int(_getenv("BLOB_MAX_BYTES", "1073741824"))  # LRU eviction beyond; 0: unbounded
+
+    # Result cache for connector fetches and estimates: "none", "memory" or "sqlite"
+    CACHE_BACKEND: str = (_getenv("CACHE_BACKEND", "none") or "none").lower()
+    CACHE_PATH: str | None = _getenv("CACHE_PATH")  # default: DATA_DIR/cache.sqlite3
+    CACHE_TTL: int = int(_getenv("CACHE_TTL", "3600"))  # connector results
+    CACHE_ESTIMATE_TTL: int = int(_getenv("CACHE_ESTIMATE_TTL", "600"))
+    CACHE_MAX_ENTRIES: int = int(_getenv("CACHE_MAX_ENTRIES", "10000"))  # memory backend, LRU beyond
+
+    # API warm-up: /healthz reports ready once it finished or timed out
+    WARMUP_ENABLED: bool = _getenv("WARMUP_ENABLED", "false").lower() == "true"
+    WARMUP_TIMEOUT: float = float(_getenv("WARMUP_TIMEOUT", "30"))
+    WARMUP_REPOS: str | None = _getenv("WARMUP_REPOS")  # "owner/repo,..." snapshots to prefetch
+    WARMUP_JIRA_JQL: str | None = _getenv("WARMUP_JIRA_JQL")  # e.g. "updated >= -1d"
+    WARMUP_JIRA_MAX: int = int(_getenv("WARMUP_JIRA_MAX", "50"))
+
+    # Logging: records are queued and written by a background thread
+    LOG_LEVEL: str = _getenv("LOG_LEVEL", "INFO") or "INFO"
+    LOG_FORMAT: str = (_getenv("LOG_FORMAT", "text") or "text").lower()  # "text" or "json"
+    LOG_SAMPLING: str | None = _getenv("LOG_SAMPLING")  # "logger=rate,...", info/debug only
+    LOG_QUEUE_SIZE: int = int(_getenv("LOG_QUEUE_SIZE", "10000"))  # records beyond are dropped
+
+    # On-demand profiles (pointless estimate --profile, X-Pointless-Profile header)
+    PROFILING_ENABLED: bool = _getenv("PROFILING_ENABLED", "false").lower() == "true"  # API header
+    PROFILE_DIR: str | None = _getenv("PROFILE_DIR")  # default: DATA_DIR/profiles
+    PROFILE_INTERVAL_MS: float = float(_getenv("PROFILE_INTERVAL_MS", "1"))
+    PROFILE_TRACEMALLOC_FRAMES: int = int(_getenv("PROFILE_TRACEMALLOC_FRAMES", "25"))
+
+    # Jira webhooks (POST /webhooks/jira) and precomputed ticket estimates
+    WEBHOOKS_ENABLED: bool = _getenv("WEBHOOKS_ENABLED", "false").lower() == "true"
+    WEBHOOK_SECRET: str | None = _getenv("WEBHOOK_SECRET")  # verifies X-Hub-Signature when set
+    WEBHOOK_DEBOUNCE_SECONDS: float = float(_getenv("WEBHOOK_DEBOUNCE_SECONDS", "5"))
+    WEBHOOK_MAX_DELAY_SECONDS: float = float(_getenv("WEBHOOK_MAX_DELAY_SECONDS", "60"))
+    WEBHOOK_CONCURRENCY: int = int(_getenv("WEBHOOK_CONCURRENCY", "2"))
+    ESTIMATE_STORE_PATH: str | None = _getenv("ESTIMATE_STORE_PATH")  # default: DATA_DIR/estimates.sqlite3
+    ESTIMATE_MAX_AGE: int = int(_getenv("ESTIMATE_MAX_AGE", "60"))  # Cache-Control of GET /estimate/{id}
+
+    # Write-back of estimates to Jira (batched, in the background)
+    JIRA_WRITEBACK_ENABLED: bool = _getenv("JIRA_WRITEBACK_ENABLED", "false").lower() == "true"
+    JIRA_WRITEBACK_FIELD: str = _getenv("JIRA_WRITEBACK_FIELD", "timetracking") or "timetracking"
+    JIRA_WRITEBACK_BATCH_SIZE: int = int(_getenv("JIRA_WRITEBACK_BATCH_SIZE", "50"))
+    JIRA_WRITEBACK_INTERVAL: float = float(_getenv("JIRA_WRITEBACK_INTERVAL", "5"))
+    JIRA_WRITEBACK_MAX_ATTEMPTS: int = int(_getenv("JIRA_WRITEBACK_MAX_ATTEMPTS", "5"))
+    JIRA_WRITEBACK_BACKOFF: float = float(_getenv("JIRA_WRITEBACK_BACKOFF", "1"))
+    JIRA_WRITEBACK_DRAIN_TIMEOUT: float = float(_getenv("JIRA_WRITEBACK_DRAIN_TIMEOUT", "10"))
+
+    # Asynchronous estimation jobs (POST /jobs/estimate)
+    JOB_WORKERS: int = int(_getenv("JOB_WORKERS", "4"))
+    JOB_QUEUE_SIZE: int = int(_getenv("JOB_QUEUE_SIZE", "1000"))
+    JOB_RESULT_TTL: int = int(_getenv("JOB_RESULT_TTL", "3600"))
+
+    # Admission control in front of the estimation pipeline
+    ADMISSION_ENABLED: bool = _getenv("ADMISSION_ENABLED", "false").lower() == "true"
+    ADMISSION_MAX_IN_FLIGHT: int = int(_getenv("ADMISSION_MAX_IN_FLIGHT", "8"))
+    # name:weight:max_queue[:max_in_flight], comma separated
+    ADMISSION_LANES: str = _getenv("ADMISSION_LANES", "interactive:4:64,batch:1:256:6")
+    ADMISSION_DEFAULT_LANE: str = _getenv("ADMISSION_DEFAULT_LANE", "interactive")
+
+    # Sharded, resumable re-estimation sweeps (pointless sweep)
+    SWEEP_SHARD_SIZE: int = int(_getenv("SWEEP_SHARD_SIZE", "500"))
+    SWEEP_WORKERS: int = int(_getenv("SWEEP_WORKERS", "0"))  # 0: one per CPU
+    SWEEP_LEASE_SECONDS: float = float(_getenv("SWEEP_LEASE_SECONDS", "600"))  # idle lease is taken over
+
+    # Near-duplicate ticket cache in front of the estimator
+    SIMILARITY_CACHE_ENABLED: bool = _getenv("SIMILARITY_CACHE_ENABLED", "false").lower() == "true"
+    SIMILARITY_THRESHOLD: float = float(_getenv("SIMILARITY_THRESHOLD", "0.8"))
+    SIMILARITY_CACHE_SIZE: int = int(_getenv("SIMILARITY_CACHE_SIZE", "100000"))
+
+    # Online calibration from recorded actuals
+    CALIBRATION_ENABLED: bool = _getenv("CALIBRATION_ENABLED", "true").lower() == "true"
+    CALIBRATION_PATH: str | None = _getenv("CALIBRATION_PATH")  # default: DATA_DIR/calibration.sqlite3
+    CALIBRATION_MIN_SAMPLES: int = int(_getenv("CALIBRATION_MIN_SAMPLES", "5"))
+    CALIBRATION_PRIOR_WEIGHT: float = float(_getenv("CALIBRATION_PRIOR_WEIGHT", "5"))
+
     # MCP (Model Context Protocol) settings for Atlassian integration
     MCP_ENABLED: bool = _getenv("MCP_ENABLED", "false").lower() == "true"
     MCP_ATLASSIAN_SERVER_URL: str | None = _getenv("MCP_ATLASSIAN_SERVER_URL")
     MCP_ATLASSIAN_API_TOKEN: str | None = _getenv("MCP_ATLASSIAN_API_TOKEN")
     MCP_ATLASSIAN_EMAIL: str | None = _getenv("MCP_ATLASSIAN_EMAIL")
     MCP_TIMEOUT: int = int(_getenv("MCP_TIMEOUT", "30"))
+    JIRA_BULK_SIZE: int = int(_getenv("JIRA_BULK_SIZE", "100"))  # keys per `key in (...)` search
+    JIRA_BATCH_WINDOW_MS: float = float(_getenv("JIRA_BATCH_WINDOW_MS", "5"))  # merge concurrent lookups
     
     # MCP GitHub integration settings
     MCP_GITHUB_ENABLED: bool = _getenv("MCP_GITHUB_ENABLED", "false").lower() == "true"
     MCP_GITHUB_SERVER_URL: str | None = _getenv("MCP_GITHUB_SERVER_URL")
     MCP_GITHUB_TOKEN: str | None = _getenv("MCP_GITHUB_TOKEN")
     MCP_GITHUB_TIMEOUT: int = int(_getenv("MCP_GITHUB_TIMEOUT", "30"))
+    GITHUB_HEAD_TTL: int = int(_getenv("GITHUB_HEAD_TTL", "60"))  # seconds before re-checking the tree SHA
+    GITHUB_SNAPSHOT_CACHE_SIZE: int = int(_getenv("GITHUB_SNAPSHOT_CACHE_SIZE", "32"))
+    GITHUB_CONTENT_FILES: int = int(_getenv("GITHUB_CONTENT_FILES", "10"))  # contents fetched per analysis
+
+    # Record/replay of Jira and GitHub connector calls: "off", "record" or "replay"
+    CASSETTE_MODE: str = (_getenv("CASSETTE_MODE", "off") or "off").lower()
+    CASSETTE_PATH: str | None = _getenv("CASSETTE_PATH")  # default: DATA_DIR/cassette.pkl.gz
+    CASSETTE_LATENCY: float = float(_getenv("CASSETTE_LATENCY", "0"))  # x recorded latency on replay
+
+    # Tenant-scoped connectors (see pointless.core.tenants)
+    TENANTS_PATH: str | None = _getenv("TENANTS_PATH")  # JSON file of tenants; unset: single tenant
+    TENANT_MAX_ACTIVE: int = int(_getenv("TENANT_MAX_ACTIVE", "64"))  # tenants with live connectors
+    TENANT_IDLE_SECONDS: float = float(_getenv("TENANT_IDLE_SECONDS", "900"))
+    TENANT_MAX_CONCURRENCY: int = int(_getenv("TENANT_MAX_CONCURRENCY", "4"))  # per connector, 0: unlimited
+    TENANT_RATE_LIMIT: float = float(_getenv("TENANT_RATE_LIMIT", "0"))  # calls/s per connector, 0: unlimited
 
 settings = Settings()
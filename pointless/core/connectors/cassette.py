@@ -0,0 +1,244 @@
+"""Record/replay of connector traffic.
+
+Connector methods that talk to Jira or GitHub are wrapped with
+``@recorded(name)``. With ``CASSETTE_MODE=record`` every call is made for
+real and its arguments, response and latency are appended to the cassette
+at ``CASSETTE_PATH`` (gzip-compressed pickles, like the shared cache's
+values). With ``CASSETTE_MODE=replay`` the cassette is loaded into memory
+once and calls are answered from it without touching the network, each
+after its recorded latency times ``CASSETTE_LATENCY`` (0: no delay).
+
+Bulk lookups (``@recorded_each``) are recorded one item per key, so a
+replay finds every item however the calls happen to be batched: a key
+recorded in one bulk call can be replayed on its own or in another batch.
+
+Repeated identical calls replay their recordings in order, then keep
+returning the last one. A call that was never recorded raises
+``CassetteMiss``. In replay mode the clients count as configured, so runs
+need no credentials.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import functools
+import gzip
+import inspect
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from ..config import settings
+
+log = logging.getLogger(__name__)
+
+
+class CassetteMiss(KeyError):
+    """Raised in replay mode for a call that is not on the cassette."""
+
+
+def call_key(name: str, params: Dict[str, Any]) -> str:
+    """Identifies a call: connector method plus its canonical arguments."""
+    return f"{name}:{json.dumps(params, sort_keys=True, separators=(',', ':'), default=str)}"
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode)
+    return open(path, mode)
+
+
+class Cassette:
+    """One cassette file, either being recorded or replayed."""
+
+    def __init__(self, path: str, mode: str, latency: float = 0.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.recorded = 0
+        self._lock = threading.Lock()
+        self._fh = None
+        # key -> recordings not yet replayed: (latency seconds, pickled response)
+        self._tapes: Dict[str, Deque[Tuple[float, bytes]]] = {}
+        if mode == "replay":
+            self._load()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def __len__(self) -> int:
+        return sum(len(tape) for tape in self._tapes.values())
+
+    def _load(self) -> None:
+        try:
+            fh = _open(self.path, "rb")
+        except FileNotFoundError:
+            log.warning("Cassette %s not found; every call will miss", self.path)
+            return
+        with fh:
+            while True:
+                try:
+                    key, seconds, blob = pickle.load(fh)
+                except (EOFError, pickle.UnpicklingError):
+                    break  # end of file, or a recording cut short
+                self._tapes.setdefault(key, deque()).append((seconds, blob))
+        log.info("Loaded %d recorded calls from %s", len(self), self.path)
+
+    def _append(self, key: str, seconds: float, result: Any) -> None:
+        record = pickle.dumps((key, seconds, pickle.dumps(result)), protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            if self._fh is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._fh = _open(self.path, "ab")
+            self._fh.write(record)
+            self._fh.flush()
+            self.recorded += 1
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    async def call(
+        self, name: str, params: Dict[str, Any], fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        key = call_key(name, params)
+        if self.mode == "record":
+            start = time.perf_counter()
+            result = await fetch()
+            self._append(key, time.perf_counter() - start, result)
+            return result
+
+        with self._lock:
+            seconds, blob = self._take(key)
+        if self.latency > 0:
+            await asyncio.sleep(seconds * self.latency)
+        # Unpickled per call: callers may mutate what they get back
+        return pickle.loads(blob)
+
+    async def call_each(
+        self, name: str, params: Dict[str, Any], keys: List[str],
+        key_of: Callable[[Any], str], fetch: Callable[[], Awaitable[List[Any]]],
+    ) -> List[Any]:
+        """``call`` for a bulk lookup, recorded and replayed per key.
+
+        Keys the upstream did not return are recorded as not found.
+        """
+        calls = [call_key(name, {**params, "key": key}) for key in keys]
+        if self.mode == "record":
+            start = time.perf_counter()
+            items = await fetch()
+            seconds = time.perf_counter() - start
+            found = {key_of(item): item for item in items}
+            for key, call in zip(keys, calls):
+                self._append(call, seconds, found.get(key))
+            return items
+
+        with self._lock:
+            taken = [self._take(call) for call in calls]
+        if self.latency > 0 and taken:
+            # One bulk request: as slow as its slowest recorded key
+            await asyncio.sleep(max(seconds for seconds, _ in taken) * self.latency)
+        items = (pickle.loads(blob) for _, blob in taken)
+        return [item for item in items if item is not None]
+
+    def _take(self, key: str) -> Tuple[float, bytes]:
+        # Called with the lock held
+        tape = self._tapes.get(key)
+        if not tape:
+            raise CassetteMiss(key)
+        return tape.popleft() if len(tape) > 1 else tape[0]
+
+
+# Global cassette instance
+_cassette: Optional[Cassette] = None
+
+
+def get_cassette() -> Optional[Cassette]:
+    """The cassette configured by ``CASSETTE_MODE``, or None when off."""
+    global _cassette
+    mode = str(settings.CASSETTE_MODE).lower()
+    if mode not in ("record", "replay"):
+        return None
+    path = settings.CASSETTE_PATH or os.path.join(settings.DATA_DIR, "cassette.pkl.gz")
+    if _cassette is None or (_cassette.path, _cassette.mode) != (path, mode):
+        if _cassette is not None:
+            _cassette.close()
+        _cassette = Cassette(path, mode)
+    _cassette.latency = float(settings.CASSETTE_LATENCY)
+    return _cassette
+
+
+def replaying() -> bool:
+    cassette = get_cassette()
+    return cassette is not None and cassette.replaying
+
+
+def _call_params(signature: inspect.Signature, instance: Any, args, kwargs) -> Dict[str, Any]:
+    bound = signature.bind(instance, *args, **kwargs)
+    bound.apply_defaults()
+    params = dict(list(bound.arguments.items())[1:])  # without self
+    if getattr(instance, "tenant_id", None):
+        params["tenant"] = instance.tenant_id
+    return params
+
+
+def recorded(name: str):
+    """Record or replay calls to an async connector method under ``name``."""
+
+    def decorate(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            cassette = get_cassette()
+            if cassette is None:
+                return await method(self, *args, **kwargs)
+            params = _call_params(signature, self, args, kwargs)
+            return await cassette.call(name, params, lambda: method(self, *args, **kwargs))
+
+        return wrapper
+
+    return decorate
+
+
+def recorded_each(name: str, keys: str, key_of: Callable[[Any], str]):
+    """``recorded`` for a bulk lookup, one recording per key.
+
+    The method's ``keys`` argument is the list of keys; it returns the items
+    found, each identified by ``key_of(item)``.
+    """
+
+    def decorate(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            cassette = get_cassette()
+            if cassette is None:
+                return await method(self, *args, **kwargs)
+            params = _call_params(signature, self, args, kwargs)
+            wanted = list(params.pop(keys))
+            return await cassette.call_each(
+                name, params, wanted, key_of, lambda: method(self, *args, **kwargs)
+            )
+
+        return wrapper
+
+    return decorate
+
+
+@atexit.register
+def _close() -> None:
+    if _cassette is not None:
+        _cassette.close()
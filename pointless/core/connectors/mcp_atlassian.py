@@ -3,10 +3,19 @@
 from __future__ import annotations
 
 import asyncio
+import atexit
 import logging
-from typing import Any, Dict, List, Optional
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set
 
+from ..cache import get_cache
 from ..config import settings
+from ..content import Slotted
+from ..tenants import UNLIMITED, RateLimiter, TenantConfig, cache_namespace, tenant_connectors
+from .cassette import CassetteMiss, recorded, recorded_each, replaying
 
 # Note: This is a simplified MCP client implementation
 # In a real implementation, you would use the official mcp library
@@ -15,31 +24,121 @@ from ..config import settings
 log = logging.getLogger(__name__)
 
 
-class JiraTicket:
+class JiraTicket(Slotted):
     """Represents a Jira ticket retrieved via MCP."""
-    
+
+    __slots__ = ("key", "summary", "description", "status", "priority", "issue_type", "labels")
+
     def __init__(self, key: str, summary: str, description: str = "", 
-                 status: str = "", priority: str = "", issue_type: str = ""):
+                 status: str = "", priority: str = "", issue_type: str = "",
+                 labels: Optional[List[str]] = None):
         self.key = key
         self.summary = summary
         self.description = description
         self.status = status
         self.priority = priority
         self.issue_type = issue_type
+        self.labels = list(labels or [])
+
+
+def key_in_jql(keys: Iterable[str]) -> str:
+    """JQL matching the given issue keys, each quoted."""
+    quoted = ('"' + k.replace("\\", "\\\\").replace('"', '\\"') + '"' for k in keys)
+    return f"key in ({', '.join(quoted)})"
+
+
+class _TicketBatcher:
+    """Merges single-ticket lookups into bulk ``get_tickets`` calls.
+
+    The first lookup opens a window of ``window`` seconds; every key
+    requested before it closes (or until ``max_size`` keys are waiting) is
+    fetched by one call, and each caller gets its own ticket. Keys already
+    being fetched join that request instead of opening a new one.
+    """
+
+    def __init__(self, client: "MCPAtlassianClient", window: float, max_size: int):
+        self.client = client
+        self.window = window
+        self.max_size = max_size
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+        self._inflight: Dict[str, List[asyncio.Future]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def load(self, key: str) -> "asyncio.Future[Optional[JiraTicket]]":
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if key in self._inflight:
+            self._inflight[key].append(future)
+            return future
+        self._waiters.setdefault(key, []).append(future)
+        if len(self._waiters) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        waiters, self._waiters = self._waiters, {}
+        self._inflight.update(waiters)
+        if waiters:
+            task = asyncio.ensure_future(self._resolve(waiters))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, waiters: Dict[str, List[asyncio.Future]]) -> None:
+        error: Optional[CassetteMiss] = None
+        try:
+            found = await self.client.get_tickets(list(waiters))
+        except CassetteMiss as e:
+            # A replay that was never recorded must fail loudly, not look like a missing ticket
+            error, found = e, {}
+        except Exception as e:
+            log.error("Failed to retrieve %d tickets via MCP: %s", len(waiters), e)
+            found = {}
+        for key, futures in waiters.items():
+            if self._inflight.get(key) is futures:
+                del self._inflight[key]
+            for future in futures:
+                if future.done():  # the caller may have been cancelled
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(found.get(key))
 
 
 class MCPAtlassianClient:
     """MCP client for connecting to Atlassian/Jira servers."""
     
-    def __init__(self):
-        self.server_url = settings.MCP_ATLASSIAN_SERVER_URL
-        self.api_token = settings.MCP_ATLASSIAN_API_TOKEN
-        self.email = settings.MCP_ATLASSIAN_EMAIL
+    def __init__(self, tenant: Optional[TenantConfig] = None, limiter: Optional[RateLimiter] = None):
+        if tenant is None:
+            self.server_url = settings.MCP_ATLASSIAN_SERVER_URL
+            self.api_token = settings.MCP_ATLASSIAN_API_TOKEN
+            self.email = settings.MCP_ATLASSIAN_EMAIL
+            self.enabled = settings.MCP_ENABLED
+        else:
+            # Only the tenant's own credentials, never the global ones
+            self.server_url = tenant.jira.get("server_url")
+            self.api_token = tenant.jira.get("api_token")
+            self.email = tenant.jira.get("email")
+            self.enabled = bool(tenant.jira.get("enabled", True))
+        self.tenant_id = tenant.tenant_id if tenant is not None else None
+        self.limiter = limiter or UNLIMITED
         self.timeout = settings.MCP_TIMEOUT
-        self.enabled = settings.MCP_ENABLED
+        self.bulk_size = max(1, int(settings.JIRA_BULK_SIZE))
+        self.batch_window = float(settings.JIRA_BATCH_WINDOW_MS) / 1000.0
+        self._batchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _TicketBatcher]" = (
+            weakref.WeakKeyDictionary()
+        )
         
     def is_configured(self) -> bool:
-        """Check if MCP client is properly configured."""
+        """Check if MCP client is properly configured (always, when replaying a cassette)."""
+        if replaying():
+            return True
         return (
             self.enabled and 
             self.server_url is not None and 
@@ -48,36 +147,79 @@ class MCPAtlassianClient:
         )
     
     async def get_ticket(self, ticket_id: str) -> Optional[JiraTicket]:
-        """Retrieve a Jira ticket via MCP."""
+        """Retrieve a Jira ticket via MCP.
+
+        Calls made concurrently on one event loop within ``JIRA_BATCH_WINDOW_MS``
+        are merged into a single ``get_tickets`` request.
+        """
         if not self.is_configured():
             log.warning("MCP Atlassian client not configured, skipping ticket retrieval")
             return None
             
         if not ticket_id:
             return None
-            
+
+        return await self._batcher().load(ticket_id)
+
+    async def get_tickets(self, ticket_ids: Iterable[str]) -> Dict[str, JiraTicket]:
+        """Retrieve many Jira tickets, ``JIRA_BULK_SIZE`` per upstream call.
+
+        Returns the tickets that were found, by key.
+        """
+        if not self.is_configured():
+            log.warning("MCP Atlassian client not configured, skipping ticket retrieval")
+            return {}
+
+        keys = list(dict.fromkeys(k for k in ticket_ids if k))
+        chunks = [keys[i:i + self.bulk_size] for i in range(0, len(keys), self.bulk_size)]
+        found: Dict[str, JiraTicket] = {}
+        for tickets in await asyncio.gather(*(self._fetch_tickets(c) for c in chunks)):
+            for ticket in tickets:
+                found[ticket.key] = ticket
+        return found
+
+    # Recorded per ticket, so replays do not depend on how lookups were batched
+    @recorded_each("jira.ticket", "keys", lambda ticket: ticket.key)
+    async def _fetch_tickets(self, keys: List[str]) -> List[JiraTicket]:
+        """One upstream search for ``key in (...)``."""
+        jql = key_in_jql(keys)
         try:
             # TODO: Implement actual MCP protocol communication
-            # For now, return a mock ticket for demonstration
-            log.info(f"Retrieving Jira ticket {ticket_id} via MCP")
+            # For now, return mock tickets for demonstration
+            log.info("Retrieving %d Jira tickets via MCP with JQL: %s", len(keys), jql)
             
-            # This is a placeholder - real implementation would use MCP protocol
-            # to communicate with an Atlassian MCP server
-            await asyncio.sleep(0.1)  # Simulate network call
+            # This is a placeholder - real implementation would run the JQL
+            # search (maxResults=len(keys)) on an Atlassian MCP server
+            async with self.limiter:
+                await asyncio.sleep(0.1)  # Simulate network call
             
-            return JiraTicket(
-                key=ticket_id,
-                summary=f"Mock ticket for {ticket_id}",
-                description="This is a placeholder description retrieved via MCP",
-                status="To Do",
-                priority="Medium",
-                issue_type="Task"
-            )
+            return [
+                JiraTicket(
+                    key=key,
+                    summary=f"Mock ticket for {key}",
+                    description="This is a placeholder description retrieved via MCP",
+                    status="To Do",
+                    priority="Medium",
+                    issue_type="Task"
+                )
+                for key in keys
+            ]
             
         except Exception as e:
-            log.error(f"Failed to retrieve ticket {ticket_id} via MCP: {e}")
-            return None
+            log.error("Failed to retrieve %d tickets via MCP: %s", len(keys), e)
+            return []
+
+    def _batcher(self) -> "_TicketBatcher":
+        # Futures are bound to a loop, and the sync entry points run a fresh
+        # loop per call, so keep one batcher per running loop.
+        loop = asyncio.get_running_loop()
+        batcher = self._batchers.get(loop)
+        if batcher is None:
+            batcher = _TicketBatcher(self, self.batch_window, self.bulk_size)
+            self._batchers[loop] = batcher
+        return batcher
     
+    @recorded("jira.search_tickets")
     async def search_tickets(self, jql: str, max_results: int = 50) -> List[JiraTicket]:
         """Search for Jira tickets using JQL via MCP."""
         if not self.is_configured():
@@ -85,32 +227,283 @@ class MCPAtlassianClient:
             return []
             
         try:
-            log.info(f"Searching Jira tickets via MCP with JQL: {jql}")
+            log.info("Searching Jira tickets via MCP with JQL: %s", jql)
             
             # TODO: Implement actual MCP protocol communication
             # This is a placeholder implementation
-            await asyncio.sleep(0.1)  # Simulate network call
+            async with self.limiter:
+                await asyncio.sleep(0.1)  # Simulate network call
             
             return []  # Return empty list for now
             
         except Exception as e:
-            log.error(f"Failed to search tickets via MCP: {e}")
+            log.error("Failed to search tickets via MCP: %s", e)
             return []
 
+    @recorded("jira.update_tickets")
+    async def update_tickets(self, updates: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+        """Write field updates for many tickets in one call.
+
+        Returns an error message per ticket that could not be updated.
+        """
+        if not self.is_configured():
+            return {key: "MCP Atlassian client not configured" for key in updates}
+
+        try:
+            log.info("Updating %d Jira tickets via MCP", len(updates))
+
+            # TODO: Implement actual MCP protocol communication
+            # This is a placeholder implementation
+            async with self.limiter:
+                await asyncio.sleep(0.1)  # Simulate network call
+
+            return {}
+
+        except Exception as e:
+            log.error("Failed to update tickets via MCP: %s", e)
+            return {key: str(e) for key in updates}
+
 
 # Global client instance
 _mcp_client: Optional[MCPAtlassianClient] = None
 
 
 def get_mcp_client() -> MCPAtlassianClient:
-    """Get the global MCP Atlassian client instance."""
+    """Get the MCP Atlassian client of the current tenant, or the global one."""
     global _mcp_client
+    connectors = tenant_connectors()
+    if connectors is not None:
+        return connectors.jira
     if _mcp_client is None:
         _mcp_client = MCPAtlassianClient()
     return _mcp_client
 
 
+def _ticket_cache_key(ticket_id: str) -> str:
+    return f"{cache_namespace()}jira:ticket:{ticket_id}"
+
+
 async def get_jira_ticket_info(ticket_id: str) -> Optional[JiraTicket]:
-    """Convenience function to get Jira ticket info via MCP."""
+    """Convenience function to get Jira ticket info via MCP (shared-cache backed)."""
     client = get_mcp_client()
-    return await client.get_ticket(ticket_id)
\ No newline at end of file
+    if not ticket_id:
+        return None
+    return await get_cache().get_or_compute(
+        _ticket_cache_key(ticket_id), lambda: client.get_ticket(ticket_id)
+    )
+
+
+async def get_jira_tickets(ticket_ids: Iterable[str]) -> Dict[str, JiraTicket]:
+    """Jira tickets by key; cache misses are fetched in bulk by the batcher."""
+    keys = list(dict.fromkeys(k for k in ticket_ids if k))
+    tickets = await asyncio.gather(*(get_jira_ticket_info(k) for k in keys))
+    return {key: ticket for key, ticket in zip(keys, tickets) if ticket is not None}
+
+
+async def prime_jira_tickets(jql: str, limit: int = 50) -> int:
+    """Cache the tickets matching ``jql`` so their first lookups are hits."""
+    tickets = await get_mcp_client().search_tickets(jql, max_results=limit)
+    cache = get_cache()
+    for ticket in tickets:
+        cache.set(_ticket_cache_key(ticket.key), ticket)
+    return len(tickets)
+
+
+def estimate_fields(hours: float) -> Dict[str, Any]:
+    """Jira field updates recording an estimate of ``hours``."""
+    field = settings.JIRA_WRITEBACK_FIELD
+    if field == "timetracking":
+        return {"timetracking": {"originalEstimate": f"{max(1, round(hours * 60))}m"}}
+    return {field: round(hours, 1)}
+
+
+class _Write:
+    """Pending field updates for one ticket."""
+
+    __slots__ = ("fields", "queued_at", "attempts", "not_before")
+
+    def __init__(self, fields: Dict[str, Any], queued_at: float):
+        self.fields = fields
+        self.queued_at = queued_at
+        self.attempts = 0
+        self.not_before = 0.0
+
+
+class JiraWriteBackQueue:
+    """Asynchronous, coalescing write-back of ticket fields to Jira.
+
+    ``enqueue`` only records the update, so callers never wait on Jira.
+    Repeated writes to one ticket are merged (last write wins per field).
+    A background thread sends pending updates through
+    ``MCPAtlassianClient.update_tickets`` once ``batch_size`` tickets are
+    waiting or the oldest has waited ``flush_interval`` seconds. Failed
+    tickets are retried with exponential backoff up to ``max_attempts``
+    times, and ``stop`` drains what is left.
+    """
+
+    def __init__(
+        self,
+        client: Optional[Any] = None,
+        batch_size: int = 50,
+        flush_interval: float = 5.0,
+        max_attempts: int = 5,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+    ):
+        self.client = client
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.sent = 0
+        self.dropped = 0
+        self._pending: "OrderedDict[str, _Write]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._deadline = float("inf")  # drain deadline once stopping
+
+    @property
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def enqueue(self, ticket_id: str, fields: Dict[str, Any]) -> None:
+        """Queue field updates for a ticket; returns immediately."""
+        with self._cond:
+            write = self._pending.get(ticket_id)
+            if write is None:
+                self._pending[ticket_id] = _Write(dict(fields), time.monotonic())
+            else:
+                write.fields.update(fields)
+            if self._thread is None:
+                self._start()
+            self._cond.notify()
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is None:
+                self._start()
+
+    def _start(self) -> None:
+        self._stopping = False
+        self._deadline = float("inf")
+        self._thread = threading.Thread(target=self._run, name="jira-writeback", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Send everything still queued (for up to ``timeout`` seconds) and stop."""
+        with self._cond:
+            thread = self._thread
+            if thread is None:
+                return
+            self._stopping = True
+            self._deadline = time.monotonic() + timeout
+            self._cond.notify()
+        thread.join(timeout + 1.0)
+        with self._cond:
+            self._thread = None
+            if self._pending:
+                log.warning("Dropped %d unsent Jira write-backs at shutdown", len(self._pending))
+                self.dropped += len(self._pending)
+                self._pending.clear()
+
+    def _wait_time(self, now: float) -> Optional[float]:
+        """Seconds until the next batch is due, 0 if due now, None if idle."""
+        due = [w for w in self._pending.values() if w.not_before <= now]
+        if self._stopping:
+            if due or now >= self._deadline:
+                return 0.0
+        elif len(due) >= self.batch_size:
+            return 0.0
+        wake = [w.not_before for w in self._pending.values() if w.not_before > now]
+        wake += [w.queued_at + self.flush_interval for w in due]
+        if self._stopping:
+            wake.append(self._deadline)
+        if not wake:
+            return None
+        return max(0.0, min(wake) - now)
+
+    def _take_batch(self, now: float) -> Dict[str, _Write]:
+        batch: Dict[str, _Write] = {}
+        for key, write in list(self._pending.items()):
+            if write.not_before <= now:
+                batch[key] = self._pending.pop(key)
+                if len(batch) >= self.batch_size:
+                    break
+        return batch
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        try:
+            while True:
+                with self._cond:
+                    while True:
+                        now = time.monotonic()
+                        if self._stopping and (not self._pending or now >= self._deadline):
+                            return
+                        wait = self._wait_time(now)
+                        if wait == 0.0:
+                            break
+                        self._cond.wait(wait)
+                    batch = self._take_batch(now)
+                if batch:
+                    self._send(loop, batch)
+        finally:
+            loop.close()
+
+    def _send(self, loop: asyncio.AbstractEventLoop, batch: Dict[str, _Write]) -> None:
+        client = self.client or get_mcp_client()
+        updates = {key: write.fields for key, write in batch.items()}
+        try:
+            errors = loop.run_until_complete(client.update_tickets(updates))
+        except Exception as e:
+            errors = {key: str(e) for key in updates}
+        now = time.monotonic()
+        with self._cond:
+            self.sent += len(batch) - len(errors)
+            for key, error in errors.items():
+                write = batch[key]
+                write.attempts += 1
+                newer = self._pending.get(key)
+                if newer is not None:
+                    # Fields written since this batch was taken take precedence
+                    write.fields.update(newer.fields)
+                if write.attempts >= self.max_attempts:
+                    log.warning("Giving up Jira write-back for %s: %s", key, error)
+                    self._pending.pop(key, None)
+                    self.dropped += 1
+                    continue
+                delay = min(self.max_backoff, self.backoff * 2 ** (write.attempts - 1))
+                write.not_before = now + delay
+                self._pending[key] = write
+                log.info("Jira write-back for %s failed (%s); retrying in %.1fs", key, error, delay)
+
+
+# Global write-back queue
+_writeback_queue: Optional[JiraWriteBackQueue] = None
+
+
+def new_writeback_queue(client: Optional[MCPAtlassianClient] = None) -> JiraWriteBackQueue:
+    """A write-back queue from the settings, drained at interpreter exit."""
+    queue = JiraWriteBackQueue(
+        client=client,
+        batch_size=settings.JIRA_WRITEBACK_BATCH_SIZE,
+        flush_interval=settings.JIRA_WRITEBACK_INTERVAL,
+        max_attempts=settings.JIRA_WRITEBACK_MAX_ATTEMPTS,
+        backoff=settings.JIRA_WRITEBACK_BACKOFF,
+    )
+    atexit.register(queue.stop, settings.JIRA_WRITEBACK_DRAIN_TIMEOUT)
+    return queue
+
+
+def get_writeback_queue() -> JiraWriteBackQueue:
+    """Get the Jira write-back queue of the current tenant, or the global one."""
+    global _writeback_queue
+    connectors = tenant_connectors()
+    if connectors is not None:
+        return connectors.writeback
+    if _writeback_queue is None:
+        _writeback_queue = new_writeback_queue()
+    return _writeback_queue
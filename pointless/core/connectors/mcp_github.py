@@ -14,11 +14,20 @@ Key features:
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import logging
-from typing import Any, Dict, List, Optional
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
+from ..cache import get_cache
 from ..config import settings
+from ..content import ContentSource, LocalFileSource, Slotted, get_blob_store
+from ..tenants import UNLIMITED, RateLimiter, TenantConfig, cache_namespace, tenant_connectors
+from .cassette import recorded, replaying
 
 # Note: This is a simplified MCP client implementation for GitHub
 # In a real implementation, you would use the official mcp library with GitHub MCP server
@@ -27,30 +36,94 @@ from ..config import settings
 log = logging.getLogger(__name__)
 
 
-@dataclass
-class GitHubRepository:
+class GitHubRepository(Slotted):
     """Represents a GitHub repository retrieved via MCP."""
-    
-    name: str
-    full_name: str
-    description: str = ""
-    language: str = ""
-    size: int = 0
-    stars: int = 0
-    forks: int = 0
-    open_issues: int = 0
-    default_branch: str = "main"
-
-
-@dataclass 
-class GitHubFile:
-    """Represents a file in a GitHub repository."""
-    
-    path: str
-    content: str = ""
-    size: int = 0
-    language: str = ""
-    complexity_score: float = 0.0
+
+    __slots__ = (
+        "name", "full_name", "description", "language", "size", "stars", "forks",
+        "open_issues", "default_branch",
+    )
+
+    def __init__(self, name: str, full_name: str, description: str = "", language: str = "",
+                 size: int = 0, stars: int = 0, forks: int = 0, open_issues: int = 0,
+                 default_branch: str = "main"):
+        self.name = name
+        self.full_name = full_name
+        self.description = description
+        self.language = language
+        self.size = size
+        self.stars = stars
+        self.forks = forks
+        self.open_issues = open_issues
+        self.default_branch = default_branch
+
+
+class GitHubFile(Slotted):
+    """Represents a file in a GitHub repository.
+
+    ``content`` is loaded lazily from ``source`` (a local file or a blob in
+    the blob cache) and capped at ``FILE_CONTENT_MAX_BYTES`` with head/tail
+    sampling. Inline content larger than ``FILE_CONTENT_INLINE_BYTES`` is
+    moved to the blob cache by ``spill`` (``spill_files`` for async callers).
+    """
+
+    __slots__ = ("path", "size", "language", "complexity_score", "_content", "_source")
+
+    def __init__(self, path: str, content: str = "", size: int = 0, language: str = "",
+                 complexity_score: float = 0.0, source: Optional[ContentSource] = None):
+        self.path = path
+        self.size = size
+        self.language = language
+        self.complexity_score = complexity_score
+        self._content = content
+        self._source = source
+
+    def spill(self) -> None:
+        """Move large inline content to the blob cache; kept inline if that fails."""
+        if self._source is not None or len(self._content) <= settings.FILE_CONTENT_INLINE_BYTES:
+            return
+        data = self._content.encode("utf-8")
+        try:
+            self._source = get_blob_store().put(data)
+        except OSError as e:
+            log.warning("Keeping %s in memory, blob cache not writable: %s", self.path, e)
+            return
+        self.size = self.size or len(data)
+        self._content = ""
+
+    @classmethod
+    def from_local(cls, local_path: str, path: str, **kwargs: Any) -> "GitHubFile":
+        """A file whose content is read from ``local_path`` on demand."""
+        if "size" not in kwargs:
+            try:
+                kwargs["size"] = os.path.getsize(local_path)
+            except OSError:
+                kwargs["size"] = 0
+        return cls(path, source=LocalFileSource(local_path), **kwargs)
+
+    @property
+    def content(self) -> str:
+        if self._source is not None:
+            return self._source.read(settings.FILE_CONTENT_MAX_BYTES)
+        return self._content
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # Pickled (cassettes, the shared cache) with the content itself: a
+        # blob or local path means nothing on another machine or once evicted
+        return type(self), (self.path, self.content, self.size, self.language,
+                            self.complexity_score)
+
+
+async def spill_files(files: List[GitHubFile]) -> List[GitHubFile]:
+    """``GitHubFile.spill`` for each file, in an executor so the loop never waits on disk."""
+    if any(not f._source and len(f._content) > settings.FILE_CONTENT_INLINE_BYTES for f in files):
+        await asyncio.get_running_loop().run_in_executor(None, _spill_all, files)
+    return files
+
+
+def _spill_all(files: List[GitHubFile]) -> None:
+    for file in files:
+        file.spill()
 
 
 @dataclass
@@ -75,23 +148,119 @@ class GitHubCodebaseAnalysis:
             self.architecture_patterns = []
 
 
+# Extension to GitHub language name, for labelling files in a snapshot
+_EXTENSION_LANGUAGES = {
+    ".py": "Python", ".pyi": "Python", ".ts": "TypeScript", ".tsx": "TypeScript",
+    ".js": "JavaScript", ".jsx": "JavaScript", ".go": "Go", ".java": "Java",
+    ".kt": "Kotlin", ".rb": "Ruby", ".rs": "Rust", ".cs": "C#", ".php": "PHP",
+    ".swift": "Swift", ".scala": "Scala", ".c": "C", ".h": "C", ".cpp": "C++",
+    ".sql": "SQL", ".sh": "Shell",
+}
+
+
+def language_for_path(path: str) -> str:
+    return _EXTENSION_LANGUAGES.get(os.path.splitext(path)[1].lower(), "")
+
+
+class RepositorySnapshot(Slotted):
+    """Repository metadata, recursive file tree and language breakdown at one tree SHA.
+
+    Fetched in one request and shared by every analysis of the repository
+    until its default branch moves to a different tree.
+    """
+
+    __slots__ = ("repository", "tree_sha", "paths", "sizes", "languages")
+
+    def __init__(self, repository: GitHubRepository, tree_sha: str,
+                 paths: Tuple[str, ...] = (), sizes: Tuple[int, ...] = (),
+                 languages: Optional[Dict[str, int]] = None):
+        self.repository = repository
+        self.tree_sha = tree_sha
+        self.paths = tuple(paths)
+        self.sizes = tuple(sizes)
+        self.languages = dict(languages or {})  # name -> bytes
+
+    @property
+    def total_files(self) -> int:
+        return len(self.paths)
+
+    def language_names(self) -> List[str]:
+        """Languages by share of the codebase, largest first."""
+        return [name for name, _ in sorted(self.languages.items(), key=lambda kv: (-kv[1], kv[0]))]
+
+
+_TERM = re.compile(r"[A-Za-z_][A-Za-z0-9_]{3,}")
+_STOPWORDS = frozenset({
+    "this", "that", "with", "from", "into", "when", "should", "would", "need", "needs",
+    "make", "have", "will", "add", "update", "support", "allow", "using", "each", "every",
+})
+
+
+def _task_terms(task_description: str, limit: int = 5) -> List[str]:
+    """Distinctive words of a task description, longest first, for code search."""
+    terms = {w.lower() for w in _TERM.findall(task_description)} - _STOPWORDS
+    return sorted(terms, key=lambda w: (-len(w), w))[:limit]
+
+
+def _rank_paths(snapshot: RepositorySnapshot, task_description: str, limit: int) -> List[int]:
+    """Indexes of the ``limit`` snapshot paths most relevant to the task (BM25)."""
+    from ..relevance import snapshot_index
+    index = snapshot_index(f"{snapshot.repository.full_name}@{snapshot.tree_sha}", snapshot.paths)
+    position = {path: i for i, path in enumerate(snapshot.paths)}
+    return [position[path] for path, _ in index.search(task_description, limit)]
+
+
+# Path segments that reveal an architecture: (segments, indicator, pattern)
+_LAYOUT_SIGNALS = (
+    ({"api", "routes", "endpoints", "handlers"}, "REST API endpoints present", "REST API architecture"),
+    ({"models", "migrations", "schema"}, "Database models present", "ORM pattern"),
+    ({"components"}, "React components with TypeScript", "Component-based frontend"),
+)
+
+
+def _layout_signals(paths: List[str]) -> Tuple[List[str], List[str]]:
+    indicators: List[str] = []
+    patterns: List[str] = []
+    segments = {part.lower() for path in paths for part in path.split("/")[:-1]}
+    for names, indicator, pattern in _LAYOUT_SIGNALS:
+        if segments & names:
+            indicators.append(indicator)
+            patterns.append(pattern)
+    return indicators, patterns
+
+
 class MCPGitHubClient:
     """MCP client for connecting to GitHub servers."""
     
-    def __init__(self):
-        self.server_url = settings.MCP_GITHUB_SERVER_URL
-        self.token = settings.MCP_GITHUB_TOKEN
+    def __init__(self, tenant: Optional[TenantConfig] = None, limiter: Optional[RateLimiter] = None):
+        if tenant is None:
+            self.server_url = settings.MCP_GITHUB_SERVER_URL
+            self.token = settings.MCP_GITHUB_TOKEN
+            self.enabled = settings.MCP_GITHUB_ENABLED
+        else:
+            # Only the tenant's own credentials, never the global ones
+            self.server_url = tenant.github.get("server_url")
+            self.token = tenant.github.get("token")
+            self.enabled = bool(tenant.github.get("enabled", True))
+        self.tenant_id = tenant.tenant_id if tenant is not None else None
+        self.limiter = limiter or UNLIMITED
         self.timeout = settings.MCP_GITHUB_TIMEOUT
-        self.enabled = settings.MCP_GITHUB_ENABLED
+        # Snapshots by (full name, tree SHA), least recently used first
+        self._snapshots: "OrderedDict[Tuple[str, str], RepositorySnapshot]" = OrderedDict()
+        # Last seen tree SHA of each repository's default branch, and when
+        self._heads: Dict[str, Tuple[str, float]] = {}
         
     def is_configured(self) -> bool:
-        """Check if MCP GitHub client is properly configured."""
+        """Check if MCP GitHub client is properly configured (always, when replaying a cassette)."""
+        if replaying():
+            return True
         return (
             self.enabled and 
             self.server_url is not None and 
             self.token is not None
         )
     
+    @recorded("github.repository")
     async def get_repository(self, owner: str, repo: str) -> Optional[GitHubRepository]:
         """Retrieve repository information via MCP."""
         if not self.is_configured():
@@ -102,11 +271,12 @@ class MCPGitHubClient:
             return None
             
         try:
-            log.info(f"Retrieving GitHub repository {owner}/{repo} via MCP")
+            log.info("Retrieving GitHub repository %s/%s via MCP", owner, repo)
             
             # TODO: Implement actual MCP protocol communication
             # For now, return a mock repository for demonstration
-            await asyncio.sleep(0.1)  # Simulate network call
+            async with self.limiter:
+                await asyncio.sleep(0.1)  # Simulate network call
             
             return GitHubRepository(
                 name=repo,
@@ -121,70 +291,165 @@ class MCPGitHubClient:
             )
             
         except Exception as e:
-            log.error(f"Failed to retrieve repository {owner}/{repo} via MCP: {e}")
+            log.error("Failed to retrieve repository %s/%s via MCP: %s", owner, repo, e)
             return None
     
+    async def get_snapshot(self, owner: str, repo: str) -> Optional[RepositorySnapshot]:
+        """Repository metadata, tree and languages, cached by tree SHA.
+
+        Within ``GITHUB_HEAD_TTL`` seconds of the last check the cached
+        snapshot is used without a request. After that one request asks for
+        the snapshot unless the tree is still the cached one.
+        """
+        if not self.is_configured():
+            log.warning("MCP GitHub client not configured, skipping snapshot retrieval")
+            return None
+
+        if not owner or not repo:
+            return None
+
+        full_name = f"{owner}/{repo}"
+        now = time.monotonic()
+        head = self._heads.get(full_name)
+        cached = self._snapshots.get((full_name, head[0])) if head else None
+        if cached is not None and now - head[1] < settings.GITHUB_HEAD_TTL:
+            self._snapshots.move_to_end((full_name, cached.tree_sha))
+            return cached
+
+        try:
+            tree_sha, snapshot = await self._fetch_snapshot(
+                owner, repo, cached.tree_sha if cached else None
+            )
+        except Exception as e:
+            log.error("Failed to retrieve snapshot of %s via MCP: %s", full_name, e)
+            return cached
+        if snapshot is None:
+            snapshot = self._snapshots.get((full_name, tree_sha))
+            if snapshot is None:
+                return None
+        self._heads[full_name] = (tree_sha, now)
+        self._snapshots[(full_name, tree_sha)] = snapshot
+        self._snapshots.move_to_end((full_name, tree_sha))
+        while len(self._snapshots) > max(1, settings.GITHUB_SNAPSHOT_CACHE_SIZE):
+            self._snapshots.popitem(last=False)
+        return snapshot
+
+    @recorded("github.snapshot")
+    async def _fetch_snapshot(
+        self, owner: str, repo: str, known_tree_sha: Optional[str]
+    ) -> Tuple[str, Optional[RepositorySnapshot]]:
+        """One batched request for metadata, recursive tree and languages.
+
+        Returns the current tree SHA, and no snapshot when it is still
+        ``known_tree_sha``.
+        """
+        log.info("Retrieving snapshot of GitHub repository %s/%s via MCP", owner, repo)
+
+        # TODO: Implement actual MCP protocol communication
+        # A real implementation sends one batched request (repository,
+        # git/trees/<branch>?recursive=1 and languages) and skips the tree
+        # when the branch still points at known_tree_sha
+        async with self.limiter:
+            await asyncio.sleep(0.1)  # Simulate network call
+
+        tree_sha = hashlib.sha1(f"{owner}/{repo}".encode()).hexdigest()
+        if tree_sha == known_tree_sha:
+            return tree_sha, None
+        tree = [
+            ("README.md", 2048), ("pyproject.toml", 900),
+            ("src/__init__.py", 0), ("src/api/__init__.py", 0),
+            ("src/api/routes.py", 500), ("src/api/client.py", 1200),
+            ("src/models/__init__.py", 0), ("src/models/user.py", 300),
+            ("src/services/monitor.py", 900), ("tests/test_routes.py", 700),
+            ("frontend/src/components/App.tsx", 800), ("frontend/src/index.ts", 200),
+        ]
+        repository = GitHubRepository(
+            name=repo,
+            full_name=f"{owner}/{repo}",
+            description=f"Mock repository for {owner}/{repo}",
+            language="Python",
+            size=1024,
+            stars=42,
+            forks=7,
+            open_issues=3,
+            default_branch="main"
+        )
+        return tree_sha, RepositorySnapshot(
+            repository,
+            tree_sha,
+            paths=[path for path, _ in tree],
+            sizes=[size for _, size in tree],
+            languages={"Python": 3600, "TypeScript": 1000},
+        )
+
+    @recorded("github.file_contents")
+    async def get_file_contents(self, owner: str, repo: str, paths: List[str],
+                                ref: Optional[str] = None) -> List[GitHubFile]:
+        """Contents of several files at ``ref`` in one batched request."""
+        if not self.is_configured() or not paths:
+            return []
+
+        try:
+            log.info("Retrieving %d files of %s/%s via MCP", len(paths), owner, repo)
+
+            # TODO: Implement actual MCP protocol communication (one batched
+            # request for all blobs, e.g. a GraphQL query with one alias per path)
+            async with self.limiter:
+                await asyncio.sleep(0.1)  # Simulate network call
+
+            return [
+                GitHubFile(path=path, content=f"# {path}\n", language=language_for_path(path))
+                for path in paths
+            ]
+
+        except Exception as e:
+            log.error("Failed to retrieve files of %s/%s via MCP: %s", owner, repo, e)
+            return []
+
     async def analyze_codebase_for_task(self, owner: str, repo: str, task_description: str, 
                                         max_files: int = 20) -> Optional[GitHubCodebaseAnalysis]:
-        """Analyze codebase to understand complexity and patterns relevant to a task."""
+        """Analyze codebase to understand complexity and patterns relevant to a task.
+
+        Uses the cached repository snapshot: candidates are ranked locally
+        and only the top ``GITHUB_CONTENT_FILES`` are fetched, in one request.
+        """
         if not self.is_configured():
             log.warning("MCP GitHub client not configured, skipping codebase analysis")
             return None
             
         try:
-            log.info(f"Analyzing GitHub codebase {owner}/{repo} for task relevance via MCP")
+            log.info("Analyzing GitHub codebase %s/%s for task relevance via MCP", owner, repo)
+            from ..codesearch import local_checkout
             
-            # Get repository info first
-            repository = await self.get_repository(owner, repo)
-            if not repository:
+            snapshot = await self.get_snapshot(owner, repo)
+            if not snapshot:
                 return None
-            
-            # TODO: Implement actual MCP protocol communication for code analysis
-            # This would involve:
-            # 1. Searching for relevant files based on task description
-            # 2. Analyzing code complexity
-            # 3. Identifying architecture patterns
-            # 4. Determining technologies and frameworks used
-            
-            await asyncio.sleep(0.2)  # Simulate analysis time
-            
-            # Mock analysis results
-            task_lower = task_description.lower()
-            
-            # Simulate finding relevant files based on task
+            repository = snapshot.repository
+
+            ranked = _rank_paths(snapshot, task_description, max_files)
+            top = [snapshot.paths[i] for i in ranked[:settings.GITHUB_CONTENT_FILES]]
+            fetched = {f.path: f for f in await spill_files(await self.get_file_contents(
+                owner, repo, top, ref=snapshot.tree_sha
+            ))}
             relevant_files = []
-            complexity_indicators = []
-            architecture_patterns = []
-            
-            if "api" in task_lower or "endpoint" in task_lower:
-                relevant_files.append(GitHubFile(
-                    path="src/api/routes.py",
-                    size=500,
-                    language="Python",
-                    complexity_score=0.6
-                ))
-                complexity_indicators.append("REST API endpoints present")
-                architecture_patterns.append("REST API architecture")
-            
-            if "database" in task_lower or "model" in task_lower:
-                relevant_files.append(GitHubFile(
-                    path="src/models/user.py",
-                    size=300,
-                    language="Python", 
-                    complexity_score=0.4
-                ))
-                complexity_indicators.append("Database models present")
-                architecture_patterns.append("ORM pattern")
-            
-            if "frontend" in task_lower or "ui" in task_lower:
-                relevant_files.append(GitHubFile(
-                    path="frontend/src/components/App.tsx",
-                    size=800,
-                    language="TypeScript",
-                    complexity_score=0.7
-                ))
-                complexity_indicators.append("React components with TypeScript")
-                architecture_patterns.append("Component-based frontend")
+            for i in ranked:
+                path = snapshot.paths[i]
+                file = fetched.get(path) or GitHubFile(path=path, language=language_for_path(path))
+                file.size = snapshot.sizes[i]
+                relevant_files.append(file)
+
+            # Files matching the task's terms in a local checkout, if there is one
+            if local_checkout(owner, repo):
+                for term in _task_terms(task_description):
+                    known = {f.path for f in relevant_files}
+                    for found in await self.search_code(term, owner, repo, max_results=max_files):
+                        if found.path not in known and len(relevant_files) < max_files:
+                            relevant_files.append(found)
+                            known.add(found.path)
+
+            complexity_indicators, architecture_patterns = _layout_signals(
+                [f.path for f in relevant_files]
+            )
                 
             # Add general complexity indicators based on repo analysis
             if repository.size > 5000:
@@ -194,34 +459,60 @@ class MCPGitHubClient:
                 
             return GitHubCodebaseAnalysis(
                 repository=repository,
-                total_files=len(relevant_files) * 10,  # Simulate total file count
-                languages=["Python", "TypeScript", "JavaScript"],
+                total_files=snapshot.total_files,
+                languages=snapshot.language_names(),
                 complexity_indicators=complexity_indicators,
                 relevant_files=relevant_files,
                 architecture_patterns=architecture_patterns
             )
             
         except Exception as e:
-            log.error(f"Failed to analyze codebase {owner}/{repo} via MCP: {e}")
+            log.error("Failed to analyze codebase %s/%s via MCP: %s", owner, repo, e)
             return None
     
     async def search_code(self, query: str, owner: str = None, repo: str = None, 
-                         max_results: int = 10) -> List[GitHubFile]:
-        """Search for code across repositories via MCP."""
+                         max_results: int = 10, regex: bool = False) -> List[GitHubFile]:
+        """Search for code across repositories.
+
+        Repositories with a local checkout in ``SEARCH_REPOS`` are searched with
+        the local trigram index; anything else goes through MCP.
+        """
+        from ..codesearch import local_checkout, search_local, search_repos
+
+        if owner or repo:
+            checkout = local_checkout(owner, repo)
+            repos = {f"{owner}/{repo}": checkout} if checkout else {}
+        else:
+            repos = search_repos()
+        if repos:
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    None, lambda: search_local(query, repos, regex=regex, max_results=max_results)
+                )
+            except Exception as e:
+                log.error("Failed to search local code index: %s", e)
+                return []
+
         if not self.is_configured():
             log.warning("MCP GitHub client not configured, skipping code search")
             return []
-            
+        return await self._search_code_remote(query, owner, repo, max_results, regex)
+
+    @recorded("github.search_code")
+    async def _search_code_remote(self, query: str, owner: Optional[str], repo: Optional[str],
+                                  max_results: int, regex: bool) -> List[GitHubFile]:
         try:
-            log.info(f"Searching GitHub code via MCP with query: {query}")
+            log.info("Searching GitHub code via MCP with query: %s", query)
             
             # TODO: Implement actual MCP protocol communication for code search
-            await asyncio.sleep(0.1)  # Simulate network call
+            async with self.limiter:
+                await asyncio.sleep(0.1)  # Simulate network call
             
             return []  # Return empty list for now
             
         except Exception as e:
-            log.error(f"Failed to search code via MCP: {e}")
+            log.error("Failed to search code via MCP: %s", e)
             return []
 
 
@@ -230,8 +521,11 @@ _github_mcp_client: Optional[MCPGitHubClient] = None
 
 
 def get_github_mcp_client() -> MCPGitHubClient:
-    """Get the global MCP GitHub client instance."""
+    """Get the MCP GitHub client of the current tenant, or the global one."""
     global _github_mcp_client
+    connectors = tenant_connectors()
+    if connectors is not None:
+        return connectors.github
     if _github_mcp_client is None:
         _github_mcp_client = MCPGitHubClient()
     return _github_mcp_client
@@ -245,6 +539,16 @@ async def get_github_repository_info(owner: str, repo: str) -> Optional[GitHubRe
 
 async def analyze_github_codebase_for_estimation(owner: str, repo: str, 
                                                 task_description: str) -> Optional[GitHubCodebaseAnalysis]:
-    """Convenience function to analyze GitHub codebase for estimation purposes."""
+    """Convenience function to analyze GitHub codebase for estimation purposes (shared-cache backed).
+
+    Cached per tree SHA, so an analysis is never served after the branch moves.
+    """
     client = get_github_mcp_client()
-    return await client.analyze_codebase_for_task(owner, repo, task_description)
\ No newline at end of file
+    snapshot = await client.get_snapshot(owner, repo)
+    if snapshot is None:
+        return None
+    task_hash = hashlib.sha256(task_description.encode()).hexdigest()
+    return await get_cache().get_or_compute(
+        f"{cache_namespace()}github:analysis:{owner}/{repo}@{snapshot.tree_sha}:{task_hash}",
+        lambda: client.analyze_codebase_for_task(owner, repo, task_description),
+    )
\ No newline at end of file
@@ -0,0 +1,245 @@
+"""Compact records and lazily loaded file content.
+
+Connector records (``GitHubFile``, ``GitHubRepository``, ``JiraTicket``)
+use ``__slots__`` instead of per-instance dicts. File content is not held by
+the record: it is read on demand from a memory-mapped local file or from a
+content-addressed blob cache, capped at ``FILE_CONTENT_MAX_BYTES``. Huge
+files are sampled (head and tail) through the mapping, so only the sampled
+pages are ever read. The blob cache is bounded by ``BLOB_MAX_BYTES``, least
+recently used blobs first.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import mmap
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import settings
+
+log = logging.getLogger(__name__)
+
+
+class Slotted:
+    """Base for slotted records: value equality and a readable repr."""
+
+    __slots__: Tuple[str, ...] = ()
+
+    def _fields(self) -> Tuple[str, ...]:
+        names: Tuple[str, ...] = ()
+        for cls in reversed(type(self).__mro__):
+            names += tuple(getattr(cls, "__slots__", ()))
+        return names
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, n) == getattr(other, n) for n in self._fields())
+
+    __hash__ = None  # mutable, like the dataclasses these replace
+
+    def __repr__(self) -> str:
+        fields = ", ".join(
+            f"{n}={getattr(self, n)!r}" for n in self._fields() if not n.startswith("_")
+        )
+        return f"{type(self).__name__}({fields})"
+
+
+def _marker(omitted: int) -> bytes:
+    return f"\n... [{omitted} bytes omitted] ...\n".encode()
+
+
+def sample(buf, limit: Optional[int]) -> bytes:
+    """``buf`` if it fits in ``limit`` bytes, else its head and tail.
+
+    ``buf`` can be ``bytes`` or an ``mmap``; only the sampled ranges are read.
+    Two thirds of the budget go to the head. Cuts are moved to line breaks
+    where possible.
+    """
+    size = len(buf)
+    if not limit or size <= limit:
+        return bytes(buf[:size])
+    head = bytes(buf[: limit * 2 // 3])
+    tail = bytes(buf[size - limit // 3:])
+    cut = head.rfind(b"\n")
+    if cut > 0:
+        head = head[: cut + 1]
+    cut = tail.find(b"\n")
+    if 0 <= cut < len(tail) - 1:
+        tail = tail[cut + 1:]
+    return head + _marker(size - len(head) - len(tail)) + tail
+
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8", errors="replace")
+
+
+class ContentSource(Slotted):
+    """Where a file's content can be read from."""
+
+    __slots__ = ()
+
+    def read(self, limit: Optional[int] = None) -> str:
+        raise NotImplementedError
+
+
+class LocalFileSource(ContentSource):
+    """Content of a file on local disk, read through a memory map."""
+
+    __slots__ = ("path",)
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def read(self, limit: Optional[int] = None) -> str:
+        try:
+            with open(self.path, "rb") as fh:
+                if os.fstat(fh.fileno()).st_size == 0:
+                    return ""
+                with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return _decode(sample(mapped, limit))
+        except OSError:
+            return ""
+
+
+class BlobSource(LocalFileSource):
+    """Content stored in the blob cache under its SHA-256."""
+
+    __slots__ = ("digest",)
+
+    def __init__(self, path: str, digest: str):
+        super().__init__(path)
+        self.digest = digest
+
+    def read(self, limit: Optional[int] = None) -> str:
+        store = _blob_stores.get(os.path.dirname(os.path.dirname(self.path)))
+        if store is not None:
+            store.touch(self.digest)
+        return super().read(limit)
+
+
+class BlobStore:
+    """Content-addressed blobs under ``root/<aa>/<digest>``.
+
+    Beyond ``max_bytes`` (0: unbounded) the least recently used blobs are
+    removed; use is tracked through the files' mtime, so the order survives
+    restarts. A record whose blob was evicted reads as empty. ``put`` does
+    blocking disk I/O, so async callers run it in an executor. ``_lock``
+    guards the index.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 0):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._index: Optional["OrderedDict[str, int]"] = None  # digest -> size, oldest first
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    @property
+    def size(self) -> int:
+        """Bytes of the blobs stored so far."""
+        return self._total
+
+    def put(self, data: bytes) -> BlobSource:
+        """Store ``data``; raises ``OSError`` when it cannot be written."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        index = self._load()
+        with self._lock:
+            known = digest in index
+        if known:
+            self.touch(digest)
+            return BlobSource(path, digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+        with self._lock:
+            if digest not in index:
+                index[digest] = len(data)
+                self._total += len(data)
+            index.move_to_end(digest)
+            evicted = self._evict()
+        for old in evicted:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+        return BlobSource(path, digest)
+
+    def touch(self, digest: str) -> None:
+        """Mark a blob as just used."""
+        with self._lock:
+            if self._index is not None and digest in self._index:
+                self._index.move_to_end(digest)
+        try:
+            os.utime(self.path(digest))
+        except OSError:
+            pass
+
+    def _load(self) -> "OrderedDict[str, int]":
+        # Scanned once, outside the lock; a concurrent scan loses the race
+        if self._index is None:
+            index = self._scan()
+            with self._lock:
+                if self._index is None:
+                    self._index = index
+                    self._total = sum(index.values())
+        return self._index
+
+    def _scan(self) -> "OrderedDict[str, int]":
+        found = []
+        try:
+            shards = os.listdir(self.root)
+        except OSError:
+            shards = []
+        for shard in shards:
+            try:
+                names = os.listdir(os.path.join(self.root, shard))
+            except OSError:
+                continue
+            for name in names:
+                if name.endswith(".tmp"):
+                    continue
+                try:
+                    st = os.stat(os.path.join(self.root, shard, name))
+                except OSError:
+                    continue
+                found.append((st.st_mtime, name, st.st_size))
+        found.sort()
+        return OrderedDict((name, size) for _, name, size in found)
+
+    def _evict(self) -> List[str]:
+        # Least recently used first, never the newest; called with the lock held
+        evicted = []
+        while self.max_bytes and self._total > self.max_bytes and len(self._index) > 1:
+            digest, size = self._index.popitem(last=False)
+            self._total -= size
+            evicted.append(self.path(digest))
+        if evicted:
+            log.debug("Evicted %d blobs from %s", len(evicted), self.root)
+        return evicted
+
+
+# Global blob store instances, by root
+_blob_stores: Dict[str, BlobStore] = {}
+
+
+def get_blob_store() -> BlobStore:
+    """Get the global blob store under ``settings.DATA_DIR``."""
+    root = settings.BLOB_DIR or os.path.join(settings.DATA_DIR, "blobs")
+    store = _blob_stores.get(root)
+    if store is None:
+        store = _blob_stores.setdefault(root, BlobStore(root))
+    store.max_bytes = settings.BLOB_MAX_BYTES
+    return store
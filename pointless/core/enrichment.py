@@ -0,0 +1,128 @@
+"""Typed context retrieved for a request from Jira, GitHub and local code analysis.
+
+Estimators receive an ``Enrichment`` next to the original
+``EstimationRequest`` and read its fields directly, so retrieved data is
+never rendered into ``mcp_enhanced_context`` and parsed back out, and the
+request is never copied or re-validated.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from .connectors.mcp_atlassian import JiraTicket
+from .connectors.mcp_github import GitHubCodebaseAnalysis
+from .models import EstimationRequest
+
+# Jira priorities that mark a ticket as high priority
+HIGH_PRIORITIES = frozenset({"highest", "high", "critical", "blocker"})
+
+
+@dataclass(frozen=True)
+class Enrichment:
+    """Jira ticket fields and GitHub analysis results for one request."""
+
+    ticket_summary: Optional[str] = None
+    ticket_description: str = ""
+    ticket_status: str = ""
+    ticket_priority: str = ""
+    ticket_type: str = ""
+    repository: Optional[str] = None
+    languages: Tuple[str, ...] = ()
+    complexity_indicators: Tuple[str, ...] = ()
+    architecture_patterns: Tuple[str, ...] = ()
+    relevant_file_count: int = 0
+
+    @classmethod
+    def from_sources(
+        cls,
+        ticket: Optional[JiraTicket],
+        analysis: Optional[GitHubCodebaseAnalysis],
+        local: Optional[GitHubCodebaseAnalysis] = None,
+    ) -> Optional["Enrichment"]:
+        """Build the enrichment for whatever sources returned data, if any.
+
+        ``local`` is the analysis of a local checkout; its measured complexity
+        indicators are added to the GitHub ones.
+        """
+        if ticket is None and analysis is None and local is None:
+            return None
+        fields = {}
+        if ticket is not None:
+            fields.update(
+                ticket_summary=ticket.summary,
+                ticket_description=ticket.description or "",
+                ticket_status=ticket.status or "",
+                ticket_priority=ticket.priority or "",
+                ticket_type=ticket.issue_type or "",
+            )
+        if analysis is not None:
+            fields.update(
+                repository=analysis.repository.full_name,
+                languages=tuple(analysis.languages),
+                complexity_indicators=tuple(analysis.complexity_indicators),
+                architecture_patterns=tuple(analysis.architecture_patterns),
+                relevant_file_count=len(analysis.relevant_files),
+            )
+        if local is not None:
+            fields["complexity_indicators"] = (
+                fields.get("complexity_indicators", ()) + tuple(local.complexity_indicators)
+            )
+            if analysis is None:
+                fields.update(
+                    languages=tuple(local.languages),
+                    relevant_file_count=len(local.relevant_files),
+                )
+        return cls(**fields)
+
+    @property
+    def has_ticket(self) -> bool:
+        return self.ticket_summary is not None
+
+    @property
+    def has_github(self) -> bool:
+        return self.repository is not None
+
+    @property
+    def high_priority(self) -> bool:
+        return self.ticket_priority.lower() in HIGH_PRIORITIES
+
+    def title(self, req: EstimationRequest) -> str:
+        """The request title, or the Jira summary when the request has none."""
+        return req.title or self.ticket_summary or ""
+
+    def description(self, req: EstimationRequest) -> str:
+        """The request description followed by the Jira description."""
+        description = req.description or ""
+        if self.ticket_description:
+            description += f"\n\nJira Description: {self.ticket_description}"
+        return description
+
+    def context_lines(self) -> List[str]:
+        """Human-readable summary, e.g. for an LLM prompt."""
+        lines: List[str] = []
+        if self.has_ticket:
+            lines.append(
+                f"Jira Status: {self.ticket_status}, Priority: {self.ticket_priority}, "
+                f"Type: {self.ticket_type}"
+            )
+        if self.has_github:
+            lines.append(f"GitHub Repository: {self.repository}")
+        if self.languages:
+            lines.append(f"Languages: {', '.join(self.languages)}")
+        if self.complexity_indicators:
+            lines.append(f"Complexity Indicators: {', '.join(self.complexity_indicators)}")
+        if self.architecture_patterns:
+            lines.append(f"Architecture Patterns: {', '.join(self.architecture_patterns)}")
+        if self.relevant_file_count:
+            lines.append(f"Relevant Files: {self.relevant_file_count} files found")
+        return lines
+
+
+def request_title(req: EstimationRequest, enrichment: Optional[Enrichment]) -> str:
+    return enrichment.title(req) if enrichment else req.title
+
+
+def request_description(req: EstimationRequest, enrichment: Optional[Enrichment]) -> str:
+    return enrichment.description(req) if enrichment else (req.description or "")
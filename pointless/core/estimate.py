@@ -1,120 +1,334 @@
 from __future__ import annotations
 import asyncio
-from .estimators import heuristic
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+from .analysis import analyze_local_codebase
+from .cache import get_cache
+from .estimators import heuristic, knn, llm
 from .models import EstimationRequest, EstimationResponse
 from .config import settings
-from .connectors.mcp_atlassian import get_jira_ticket_info
-from .connectors.mcp_github import analyze_github_codebase_for_estimation
+from .connectors.mcp_atlassian import (
+    JiraTicket,
+    estimate_fields,
+    get_jira_ticket_info,
+    get_writeback_queue,
+)
+from .connectors.mcp_github import GitHubCodebaseAnalysis, analyze_github_codebase_for_estimation
+from .enrichment import Enrichment
+from .precompute import content_version, estimator_version, get_estimate_store
+from .similarity import lookup_similar_estimate, remember_estimate
+from .calibration import calibrate, calibration_state
+from .tenants import cache_namespace
+
+log = logging.getLogger(__name__)
+
+
+def _wants_jira(req: EstimationRequest) -> bool:
+    return bool(req.use_mcp and req.jira_ticket_id and settings.MCP_ENABLED)
+
+
+def _wants_github(req: EstimationRequest) -> bool:
+    return bool(
+        req.use_github_mcp and req.github_owner and req.github_repo and settings.MCP_GITHUB_ENABLED
+    )
+
+
+async def _fetch_jira(req: EstimationRequest) -> Optional[JiraTicket]:
+    try:
+        return await get_jira_ticket_info(req.jira_ticket_id)
+    except Exception as e:
+        # Log the error but continue with original request
+        log.warning("Failed to retrieve MCP data: %s", e)
+        return None
+
+
+async def _fetch_github(req: EstimationRequest) -> Optional[GitHubCodebaseAnalysis]:
+    try:
+        task_description = f"{req.title} {req.description or ''}"
+        return await analyze_github_codebase_for_estimation(
+            req.github_owner, req.github_repo, task_description
+        )
+    except Exception as e:
+        # Log the error but continue with original request
+        log.warning("Failed to retrieve GitHub MCP data: %s", e)
+        return None
+
+
+@dataclass
+class LocalScan:
+    """What was found in the local checkout named by ``codebase_context``."""
+
+    hits: List[str]
+    analysis: Optional[GitHubCodebaseAnalysis] = None
+
+
+def _scan_repo(req: EstimationRequest) -> LocalScan:
+    hits = heuristic.scan_repo(req.codebase_context, f"{req.title} {req.description or ''}")
+    if not settings.ANALYSIS_ENABLED:
+        return LocalScan(hits)
+    try:
+        return LocalScan(hits, analyze_local_codebase(req.codebase_context, hits))
+    except Exception as e:
+        log.warning("Failed to analyze local codebase: %s", e)
+        return LocalScan(hits)
+
+
+def _annotate(
+    result: EstimationResponse,
+    ticket: Optional[JiraTicket],
+    github_analysis: Optional[GitHubCodebaseAnalysis],
+    local: Optional[LocalScan] = None,
+) -> EstimationResponse:
+    """Add MCP and local analysis information to the response."""
+    result.mcp_data_used = ticket is not None
+    result.jira_ticket_summary = ticket.summary if ticket else None
+    result.github_data_used = github_analysis is not None
+    result.github_repository = github_analysis.repository.full_name if github_analysis else None
+    result.github_analysis_summary = (
+        f"Analyzed {len(github_analysis.relevant_files)} relevant files, detected {len(github_analysis.complexity_indicators)} complexity indicators"
+        if github_analysis else None
+    )
+
+    if ticket:
+        result.factors.append("Enhanced with Jira ticket data via MCP")
+
+    if github_analysis:
+        result.factors.append("Enhanced with GitHub codebase analysis via MCP")
+
+    if local is not None and local.analysis is not None:
+        result.factors.append(
+            f"Measured complexity of {local.analysis.total_files} local source files"
+        )
+
+    return result
+
+
+def _estimate_key(req: EstimationRequest) -> str:
+    # The estimator and package version are part of the key so a deploy or a
+    # config change never serves results produced by different code
+    payload = f"{estimator_version()}:{req.model_dump_json()}"
+    return cache_namespace() + "estimate:" + hashlib.sha256(payload.encode()).hexdigest()
+
+
+async def _final_estimate(
+    req: EstimationRequest,
+    ticket: Optional[JiraTicket],
+    github_analysis: Optional[GitHubCodebaseAnalysis],
+    local: Optional[LocalScan],
+) -> EstimationResponse:
+    """Uncalibrated estimate from the retrieved context."""
+    enrichment = Enrichment.from_sources(ticket, github_analysis, local.analysis if local else None)
+
+    # Get the base estimation
+    mode = settings.ESTIMATOR
+    if mode == "llm":
+        result = await llm.estimate(req, enrichment)
+    elif mode == "knn":
+        result = knn.estimate(req, enrichment)
+    else:
+        repo_hits = local.hits if local else None
+        result = heuristic.estimate(req, repo_hits=repo_hits, enrichment=enrichment)
+
+    _annotate(result, ticket, github_analysis, local)
+
+    if settings.SIMILARITY_CACHE_ENABLED:
+        remember_estimate(req, result)
+
+    return result
+
+
+def ticket_request(
+    ticket: JiraTicket, labels: Optional[Iterable[str]] = None
+) -> EstimationRequest:
+    """The request that estimates a Jira ticket from its own content."""
+    tags = list(ticket.labels if labels is None else labels)
+    return EstimationRequest(jira_ticket_id=ticket.key, tags=tags, use_mcp=True)
+
+
+async def estimate_ticket_async(
+    ticket: JiraTicket, labels: Optional[Iterable[str]] = None
+) -> EstimationResponse:
+    """Uncalibrated estimate for a ticket whose content is already known."""
+    return await _final_estimate(ticket_request(ticket, labels), ticket, None, None)
+
+
+async def ticket_estimate(ticket_id: str) -> Optional[Tuple[str, EstimationResponse]]:
+    """``(version, estimate)`` for a Jira ticket, None if it is unknown.
+
+    The version is the ticket's content version plus the state of the
+    calibration bucket applied to the estimate, so it changes whenever the
+    returned hours can. With webhooks enabled the store is kept current by
+    the webhook processor and is answered without contacting Jira.
+    Otherwise the ticket is fetched (through the shared cache) to learn its
+    current content version, and estimated and stored if that version has
+    not been estimated yet.
+    """
+    store = get_estimate_store()
+    req = EstimationRequest(jira_ticket_id=ticket_id)
+    found = store.latest(ticket_id) if settings.WEBHOOKS_ENABLED else None
+    fresh = False
+    if found is None:
+        try:
+            ticket = await get_jira_ticket_info(ticket_id)
+        except Exception as e:
+            log.warning("Failed to retrieve Jira ticket %s: %s", ticket_id, e)
+            ticket = None
+        if ticket is None:
+            return None
+        version = content_version(ticket)
+        result = store.get(ticket_id, version)
+        if result is None:
+            result = await estimate_ticket_async(ticket)
+            store.put(ticket_id, version, result)
+            fresh = True
+        found = version, result
+    version, result = found
+    # Read before calibrating: if an actual is recorded in between, the
+    # version is the older one and the next request revalidates
+    version = f"{version}:{calibration_state(req)}"
+    result = _calibrated(req, result)
+    return version, _write_back(req, result) if fresh else result
+
+
+def _is_ticket_lookup(req: EstimationRequest) -> bool:
+    # Only a bare ticket ID may be answered with the ticket's precomputed
+    # estimate; anything else the caller adds would change the result (tags
+    # carry factors such as "urgent", the team picks the calibration bucket)
+    return bool(req.jira_ticket_id) and not (
+        req.title or req.description or req.acceptance_criteria or req.codebase_context
+        or req.mcp_enhanced_context or req.use_github_mcp or req.tags or req.team
+    )
+
+
+def _precomputed(req: EstimationRequest) -> Optional[EstimationResponse]:
+    if not (settings.WEBHOOKS_ENABLED and _is_ticket_lookup(req)):
+        return None
+    found = get_estimate_store().latest(req.jira_ticket_id)
+    return found[1] if found else None
+
 
 async def estimate_effort_async(req: EstimationRequest) -> EstimationResponse:
     """Async version of estimate_effort that supports MCP integration."""
-    # Try to enhance the request with MCP data if enabled and ticket ID provided
-    enhanced_req = req
-    jira_ticket_summary = None
-    mcp_data_used = False
-    github_data_used = False
-    github_repository = None
-    github_analysis_summary = None
-    
-    # Jira MCP integration
-    if req.use_mcp and req.jira_ticket_id and settings.MCP_ENABLED:
-        try:
-            ticket = await get_jira_ticket_info(req.jira_ticket_id)
-            if ticket:
-                # Enhance the request with Jira ticket data
-                enhanced_description = req.description or ""
-                if ticket.description:
-                    enhanced_description += f"\n\nJira Description: {ticket.description}"
-                
-                enhanced_req = EstimationRequest(
-                    title=req.title or ticket.summary,
-                    description=enhanced_description,
-                    acceptance_criteria=req.acceptance_criteria,
-                    jira_ticket_id=req.jira_ticket_id,
-                    codebase_context=req.codebase_context,
-                    tags=req.tags,
-                    use_mcp=req.use_mcp,
-                    mcp_enhanced_context=f"Jira Status: {ticket.status}, Priority: {ticket.priority}, Type: {ticket.issue_type}",
-                    # Preserve GitHub fields
-                    github_owner=req.github_owner,
-                    github_repo=req.github_repo,
-                    use_github_mcp=req.use_github_mcp
+    # Tickets estimated in the background from Jira webhooks are served as is
+    stored = _precomputed(req)
+    if stored is not None:
+        return _calibrated(req, stored)
+
+    # Near-duplicates of already estimated tickets skip the whole pipeline
+    if settings.SIMILARITY_CACHE_ENABLED:
+        reused = lookup_similar_estimate(req)
+        if reused is not None:
+            return _write_back(req, _calibrated(req, reused))
+
+    async def compute() -> EstimationResponse:
+        # Jira and GitHub retrieval are independent, so run them concurrently
+        ticket_fetch = _fetch_jira(req) if _wants_jira(req) else _none()
+        github_fetch = _fetch_github(req) if _wants_github(req) else _none()
+        ticket, github_analysis = await asyncio.gather(ticket_fetch, github_fetch)
+
+        local = None
+        if req.codebase_context:
+            # Scanning and analysis are blocking file-system and CPU work
+            local = await asyncio.get_running_loop().run_in_executor(None, _scan_repo, req)
+        return await _final_estimate(req, ticket, github_analysis, local)
+
+    # Calibration is applied after the cache so newly recorded actuals take
+    # effect immediately, even for cached estimates
+    result = await get_cache().get_or_compute(
+        _estimate_key(req), compute, ttl=settings.CACHE_ESTIMATE_TTL
+    )
+    return _write_back(req, _calibrated(req, result))
+
+
+async def estimate_effort_progressive(
+    req: EstimationRequest,
+) -> AsyncIterator[Tuple[str, EstimationResponse]]:
+    """Yield ``(stage, estimate)`` pairs as retrieval sources complete.
+
+    The first pair ("initial") is a heuristic estimate from the request alone.
+    Each completed source ("jira", "github", "repo") yields a refined heuristic
+    estimate, and the last pair ("final") is identical to what
+    ``estimate_effort_async`` returns for the same request.
+    """
+    stored = _precomputed(req)
+    if stored is not None:
+        yield "final", _calibrated(req, stored)
+        return
+
+    if settings.SIMILARITY_CACHE_ENABLED:
+        reused = lookup_similar_estimate(req)
+        if reused is not None:
+            yield "final", _write_back(req, _calibrated(req, reused))
+            return
+
+    yield "initial", _calibrated(req, heuristic.estimate(req, repo_hits=[]))
+
+    loop = asyncio.get_running_loop()
+    pending = {}
+    if _wants_jira(req):
+        pending[asyncio.ensure_future(_fetch_jira(req))] = "jira"
+    if _wants_github(req):
+        pending[asyncio.ensure_future(_fetch_github(req))] = "github"
+    if req.codebase_context:
+        pending[loop.run_in_executor(None, _scan_repo, req)] = "repo"
+
+    ticket: Optional[JiraTicket] = None
+    github_analysis: Optional[GitHubCodebaseAnalysis] = None
+    local: Optional[LocalScan] = None
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                source = pending.pop(future)
+                value = future.result()
+                if value is None:
+                    continue  # source failed or returned nothing; nothing to refine
+                if source == "jira":
+                    ticket = value
+                elif source == "github":
+                    github_analysis = value
+                else:
+                    local = value
+                refined = heuristic.estimate(
+                    req,
+                    repo_hits=local.hits if local else [],
+                    enrichment=Enrichment.from_sources(
+                        ticket, github_analysis, local.analysis if local else None
+                    ),
                 )
-                jira_ticket_summary = ticket.summary
-                mcp_data_used = True
-        except Exception as e:
-            # Log the error but continue with original request
-            import logging
-            logging.getLogger(__name__).warning(f"Failed to retrieve MCP data: {e}")
-    
-    # GitHub MCP integration
-    if req.use_github_mcp and req.github_owner and req.github_repo and settings.MCP_GITHUB_ENABLED:
+                yield source, _calibrated(req, _annotate(refined, ticket, github_analysis, local))
+    finally:
+        for future in pending:
+            future.cancel()
+
+    final = await _final_estimate(req, ticket, github_analysis, local)
+    yield "final", _write_back(req, _calibrated(req, final))
+
+
+async def _none() -> None:
+    return None
+
+
+def _calibrated(req: EstimationRequest, result: EstimationResponse) -> EstimationResponse:
+    if settings.CALIBRATION_ENABLED:
+        return calibrate(req, result)
+    return result
+
+
+def _write_back(req: EstimationRequest, result: EstimationResponse) -> EstimationResponse:
+    # Only queued here; the write-back thread batches the writes to Jira
+    if settings.JIRA_WRITEBACK_ENABLED and req.jira_ticket_id:
         try:
-            task_description = f"{req.title} {req.description or ''}"
-            github_analysis = await analyze_github_codebase_for_estimation(
-                req.github_owner, req.github_repo, task_description
-            )
-            if github_analysis:
-                # Enhance the request with GitHub codebase data
-                github_context = f"GitHub Repository: {github_analysis.repository.full_name}"
-                github_context += f"\nLanguages: {', '.join(github_analysis.languages)}"
-                github_context += f"\nComplexity Indicators: {', '.join(github_analysis.complexity_indicators)}"
-                github_context += f"\nArchitecture Patterns: {', '.join(github_analysis.architecture_patterns)}"
-                github_context += f"\nRelevant Files: {len(github_analysis.relevant_files)} files found"
-                
-                # Update enhanced context
-                existing_context = enhanced_req.mcp_enhanced_context or ""
-                if existing_context:
-                    existing_context += "\n\n"
-                enhanced_context = existing_context + github_context
-                
-                # Create updated request with GitHub data
-                enhanced_req = EstimationRequest(
-                    title=enhanced_req.title,
-                    description=enhanced_req.description,
-                    acceptance_criteria=enhanced_req.acceptance_criteria,
-                    jira_ticket_id=enhanced_req.jira_ticket_id,
-                    codebase_context=enhanced_req.codebase_context,
-                    tags=enhanced_req.tags,
-                    use_mcp=enhanced_req.use_mcp,
-                    mcp_enhanced_context=enhanced_context,
-                    github_owner=req.github_owner,
-                    github_repo=req.github_repo,
-                    use_github_mcp=req.use_github_mcp
-                )
-                
-                github_data_used = True
-                github_repository = github_analysis.repository.full_name
-                github_analysis_summary = f"Analyzed {len(github_analysis.relevant_files)} relevant files, detected {len(github_analysis.complexity_indicators)} complexity indicators"
-                
+            fields = estimate_fields(result.estimated_hours)
+            get_writeback_queue().enqueue(req.jira_ticket_id, fields)
         except Exception as e:
-            # Log the error but continue with original request
-            import logging
-            logging.getLogger(__name__).warning(f"Failed to retrieve GitHub MCP data: {e}")
-    
-    # Get the base estimation
-    mode = settings.ESTIMATOR
-    if mode == "heuristic":
-        result = heuristic.estimate(enhanced_req)
-    else:
-        # LLM path will plug in here later
-        result = heuristic.estimate(enhanced_req)
-    
-    # Add MCP information to the response
-    result.mcp_data_used = mcp_data_used
-    result.jira_ticket_summary = jira_ticket_summary
-    result.github_data_used = github_data_used
-    result.github_repository = github_repository
-    result.github_analysis_summary = github_analysis_summary
-    
-    if mcp_data_used:
-        result.factors.append("Enhanced with Jira ticket data via MCP")
-    
-    if github_data_used:
-        result.factors.append("Enhanced with GitHub codebase analysis via MCP")
-    
+            # Write-back must never fail the estimate itself
+            log.warning("Failed to queue Jira write-back for %s: %s", req.jira_ticket_id, e)
     return result
 
+
 def estimate_effort(req: EstimationRequest) -> EstimationResponse:
     """Synchronous wrapper that runs the async estimation."""
     return asyncio.run(estimate_effort_async(req))
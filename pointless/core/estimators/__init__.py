@@ -1 +1 @@
-__all__ = ["heuristic"]
+__all__ = ["heuristic", "knn", "llm"]
@@ -2,63 +2,66 @@ from __future__ import annotations
 
 import hashlib
 import logging
-import os
 import random
-from typing import List
+from typing import List, Optional
 
+from pointless.core.config import settings
+from pointless.core.enrichment import Enrichment, request_description, request_title
 from pointless.core.models import EstimationRequest, EstimationResponse, TaskComplexity
+from pointless.core.relevance import rank_local_files
 
 log = logging.getLogger(__name__)
 
+# Matching paths that count towards the repo bump
+_BUMP_FILES = 8
+
 
 def _rng_from_title(title: str) -> random.Random:
     seed = int(hashlib.sha256((title or "pointless").encode()).hexdigest(), 16) % (2**32)
     return random.Random(seed)
 
 
-def _find_relevant_files(root: str, text: str, limit: int = 10) -> List[str]:
-    """
-    Super-cheap path/name match (no parsing). Looks for keywords from the issue text.
-    This is only to make the placeholder feel 'alive' until LLM retrieval lands.
+_COMPLEXITY_ORDER = list(TaskComplexity)
+
+
+def _at_least(complexity: TaskComplexity, floor: TaskComplexity) -> TaskComplexity:
+    return max(complexity, floor, key=_COMPLEXITY_ORDER.index)
+
+
+def scan_repo(root: Optional[str], text: str, limit: Optional[int] = None) -> List[str]:
+    """Repo 'sniff' used by estimate(); callers may run it ahead of time.
+
+    Returns the ``limit`` (default ``settings.MAX_FILES``) files most relevant
+    to the task text, best first, ranked by BM25 over a per-repo term index.
+    Files matching less than ``RELEVANCE_MIN_MATCH`` of the task are left out.
     """
-    if not root or not os.path.isdir(root):
-        return []
-
-    text = (text or "").lower()
-    # crude keyword set
-    kws = {w for w in ("client", "api", "monitor", "domain", "get", "list", "method") if w in text}
-    if not kws:
-        return []
-
-    hits: List[str] = []
-    for dirpath, _, filenames in os.walk(root):
-        for fname in filenames:
-            path = os.path.join(dirpath, fname)
-            rel = os.path.relpath(path, root)
-            low_rel = rel.lower()
-            if any(kw in low_rel for kw in kws):
-                hits.append(rel)
-                if len(hits) >= limit:
-                    return hits
-    return hits
-
-
-def estimate(req: EstimationRequest) -> EstimationResponse:
+    return rank_local_files(root, text or "", limit, settings.RELEVANCE_MIN_MATCH)
+
+
+def estimate(
+    req: EstimationRequest,
+    repo_hits: Optional[List[str]] = None,
+    enrichment: Optional[Enrichment] = None,
+) -> EstimationResponse:
     """
     Deterministic, throwaway baseline. Adds a tiny repo 'sniff' if a local path is provided.
+    Pass ``repo_hits`` to reuse a scan that already ran (``[]`` skips scanning).
+    ``enrichment`` carries retrieved Jira/GitHub data.
     """
-    rnd = _rng_from_title(req.title)
-    text = f"{req.title} {req.description or ''}".lower()
-    
-    # Include MCP enhanced context in analysis
-    if hasattr(req, 'mcp_enhanced_context') and req.mcp_enhanced_context:
+    title = request_title(req, enrichment)
+    description = request_description(req, enrichment)
+    rnd = _rng_from_title(title)
+    text = f"{title} {description}".lower()
+
+    # Caller-supplied context is free text; it only feeds the keyword checks
+    if req.mcp_enhanced_context:
         text += f" {req.mcp_enhanced_context}".lower()
 
     base = 1.0
     factors: List[str] = []
     complexity = TaskComplexity.SIMPLE
 
-    desc_len = len(req.description or "")
+    desc_len = len(description)
     if desc_len > 200:
         base += 3.0
         complexity = TaskComplexity.COMPLEX
@@ -78,65 +81,63 @@ def estimate(req: EstimationRequest) -> EstimationResponse:
     if req.tags and any(t.lower() == "urgent" for t in req.tags):
         base *= 0.9
         factors.append("Urgent tag—risk of optimistic sizing")
-    
-    # Check for priority indicators from MCP data
-    if hasattr(req, 'mcp_enhanced_context') and req.mcp_enhanced_context:
-        if "high" in req.mcp_enhanced_context.lower() or "critical" in req.mcp_enhanced_context.lower():
+
+    if enrichment is not None:
+        if enrichment.high_priority:
             base *= 1.1
             factors.append("High/Critical priority from Jira ticket")
-        
-        # Check for GitHub complexity indicators
-        if "large codebase" in req.mcp_enhanced_context.lower():
+
+        indicators = [i.lower() for i in enrichment.complexity_indicators]
+        if any("large codebase" in i for i in indicators):
             base += 1.0
             complexity = TaskComplexity.COMPLEX
             factors.append("Large codebase detected via GitHub analysis")
-        
-        if "typescript" in req.mcp_enhanced_context.lower():
+
+        # Measured by the local code analysis
+        hotspots = sum(1 for i in indicators if i.startswith("high cyclomatic complexity"))
+        if hotspots:
+            base += min(0.4 * hotspots, 1.2)
+            complexity = _at_least(complexity, TaskComplexity.MODERATE)
+            factors.append(f"Complex functions in relevant code ({hotspots} hotspots)")
+
+        languages = [lang.lower() for lang in enrichment.languages]
+        if "typescript" in languages:
             base += 0.5
             factors.append("TypeScript complexity detected")
-        
-        if "react" in req.mcp_enhanced_context.lower() or "component" in req.mcp_enhanced_context.lower():
+
+        structure = " ".join(indicators + [p.lower() for p in enrichment.architecture_patterns])
+        if "react" in structure or "component" in structure:
             base += 0.3
             factors.append("Frontend framework complexity")
-        
-        # Architecture pattern complexity
-        if "architecture patterns:" in req.mcp_enhanced_context.lower():
-            pattern_count = len([p for p in req.mcp_enhanced_context.split("Architecture Patterns:")[1].split("\\n")[0].split(",") if p.strip()])
-            if pattern_count > 2:
-                base += 0.5
-                factors.append(f"Multiple architecture patterns detected ({pattern_count})")
-        
+
+        pattern_count = len(enrichment.architecture_patterns)
+        if pattern_count > 2:
+            base += 0.5
+            factors.append(f"Multiple architecture patterns detected ({pattern_count})")
+
         # Multiple programming languages increase complexity
-        if "languages:" in req.mcp_enhanced_context.lower():
-            languages_line = req.mcp_enhanced_context.split("Languages:")[1].split("\\n")[0]
-            language_count = len([l for l in languages_line.split(",") if l.strip()])
-            if language_count > 2:
-                base += 0.4
-                complexity = max(complexity, TaskComplexity.MODERATE)
-                factors.append(f"Multi-language codebase ({language_count} languages)")
-        
+        if len(languages) > 2:
+            base += 0.4
+            complexity = _at_least(complexity, TaskComplexity.MODERATE)
+            factors.append(f"Multi-language codebase ({len(languages)} languages)")
+
         # High number of relevant files indicates complexity
-        if "relevant files:" in req.mcp_enhanced_context.lower():
-            try:
-                files_text = req.mcp_enhanced_context.split("Relevant Files:")[1].split("files found")[0].strip()
-                file_count = int(files_text)
-                if file_count > 10:
-                    base += 0.8
-                    complexity = TaskComplexity.COMPLEX
-                    factors.append(f"Many relevant files found ({file_count})")
-                elif file_count > 5:
-                    base += 0.4
-                    complexity = max(complexity, TaskComplexity.MODERATE)
-                    factors.append(f"Several relevant files found ({file_count})")
-            except (ValueError, IndexError):
-                pass  # Ignore parsing errors
+        file_count = enrichment.relevant_file_count
+        if file_count > 10:
+            base += 0.8
+            complexity = TaskComplexity.COMPLEX
+            factors.append(f"Many relevant files found ({file_count})")
+        elif file_count > 5:
+            base += 0.4
+            complexity = _at_least(complexity, TaskComplexity.MODERATE)
+            factors.append(f"Several relevant files found ({file_count})")
 
     # Optional: look at local repo path if provided.
     if req.codebase_context:
-        hits = _find_relevant_files(req.codebase_context, text, limit=8)
+        hits = repo_hits if repo_hits is not None else scan_repo(req.codebase_context, text)
         if hits:
             # nudge estimate a bit, bounded
-            bump = min(0.3 * len(hits), 2.0)
+            bump = min(0.3 * len(hits[:_BUMP_FILES]), 2.0)
             base += bump
             factors.append(f"Found {len(hits)} matching paths in repo (e.g. {hits[0]})")
 
@@ -158,7 +159,7 @@ def estimate(req: EstimationRequest) -> EstimationResponse:
 
     log.info(
         "Heuristic estimate for '%s': hours=%.1f, complexity=%s, confidence=%.2f",
-        req.title, final, complexity.value, confidence,
+        title, final, complexity.value, confidence,
     )
 
     return EstimationResponse(
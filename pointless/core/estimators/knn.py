@@ -0,0 +1,379 @@
+"""k-nearest-neighbour estimator over historical tickets.
+
+Completed tickets (title, description, actual hours) are embedded locally with
+signed hashed n-gram features and stored as a contiguous float32 matrix in a
+``.npy`` file. The index is opened with ``mmap_mode="r"`` so every worker
+process on a host shares the same page-cache copy.
+
+Search is an exact, batched matrix multiply over row chunks. Once the history
+exceeds ``KNN_LSH_MIN_ROWS`` rows the build also writes a random-hyperplane
+LSH table, and lookups only score the rows in the query's bucket and its
+Hamming-distance-1 neighbours.
+
+Every build writes a new version directory under ``versions/`` and then
+switches the ``CURRENT`` pointer file to it with one atomic rename, so
+readers see either the old index or the new one, never a mix. Estimators
+re-read the pointer at most every ``KNN_RELOAD_INTERVAL`` seconds.
+
+Requires numpy (optional dependency); without it the estimator falls back to
+the heuristic.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import shutil
+import time
+import uuid
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from pointless.core.config import settings
+from pointless.core.enrichment import Enrichment, request_description, request_title
+from pointless.core.estimators import heuristic
+from pointless.core.models import EstimationRequest, EstimationResponse, TaskComplexity
+from pointless.core.tenants import current_tenant
+
+log = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]+")
+_CHUNK_ROWS = 65536
+_MANIFEST = "manifest.json"
+_CURRENT = "CURRENT"
+_VERSIONS = "versions"
+# Unfinished builds older than this were abandoned (the builder died)
+_STALE_BUILD_NS = 24 * 3600 * 10**9
+
+
+def _ngrams(text: str) -> Iterator[str]:
+    words = _WORD.findall((text or "").lower())
+    yield from words
+    for a, b in zip(words, words[1:]):
+        yield f"{a} {b}"
+    for word in words:
+        padded = f"#{word}#"
+        for i in range(len(padded) - 2):
+            yield f"c:{padded[i:i + 3]}"
+
+
+def embed(text: str, dim: int) -> "np.ndarray":
+    """L2-normalized signed hashed n-gram vector of ``text``."""
+    indices = []
+    signs = []
+    for gram in _ngrams(text):
+        h = zlib.crc32(gram.encode())
+        indices.append(h % dim)
+        signs.append(1.0 if h & 0x80000000 else -1.0)
+    vec = np.zeros(dim, dtype=np.float32)
+    if indices:
+        np.add.at(vec, np.asarray(indices), np.asarray(signs, dtype=np.float32))
+        norm = float(np.linalg.norm(vec))
+        if norm:
+            vec /= norm
+    return vec
+
+
+def ticket_text(title: str, description: Optional[str]) -> str:
+    return f"{title} {description or ''}"
+
+
+def _lsh_codes(vectors: "np.ndarray", planes: "np.ndarray") -> "np.ndarray":
+    bits = (vectors @ planes.T) > 0
+    weights = (1 << np.arange(planes.shape[0], dtype=np.uint64)).astype(np.uint64)
+    return (bits.astype(np.uint64) * weights).sum(axis=1).astype(np.uint64)
+
+
+def build_history_index(source: str, index_dir: str, dim: int = 256) -> int:
+    """Build an index from an NDJSON file of completed tickets.
+
+    Each line needs ``title`` and ``hours`` (actual effort); ``description``
+    and ``key`` are optional. Returns the number of indexed tickets.
+    """
+    if np is None:
+        raise RuntimeError("Building the history index requires numpy")
+
+    def records() -> Iterator[dict]:
+        with open(source, "r", encoding="utf-8") as fh:
+            for line in fh:
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                if item.get("title") and float(item.get("hours") or 0) > 0:
+                    yield item
+
+    # Two passes keep memory flat: count, then fill a memory-mapped matrix.
+    rows = sum(1 for _ in records())
+    # Each build gets a directory of its own, so concurrent builds never
+    # write into each other's files; dot names are ignored until complete
+    versions = os.path.join(index_dir, _VERSIONS)
+    version = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"  # sorts by build start
+    final_dir, index_dir = index_dir, os.path.join(versions, f".{version}.building")
+    os.makedirs(index_dir)
+    vectors = np.lib.format.open_memmap(
+        os.path.join(index_dir, "vectors.npy"), mode="w+", dtype=np.float32, shape=(rows, dim)
+    )
+    hours = np.zeros(rows, dtype=np.float32)
+    offsets = np.zeros(rows, dtype=np.int64)
+    with open(os.path.join(index_dir, "meta.jsonl"), "wb") as meta:
+        for i, item in enumerate(records()):
+            vectors[i] = embed(ticket_text(item["title"], item.get("description")), dim)
+            hours[i] = float(item["hours"])
+            offsets[i] = meta.tell()
+            line = {"key": item.get("key"), "title": item["title"]}
+            meta.write(json.dumps(line).encode() + b"\n")
+    vectors.flush()
+    np.save(os.path.join(index_dir, "hours.npy"), hours)
+    np.save(os.path.join(index_dir, "offsets.npy"), offsets)
+
+    lsh_bits = 0
+    if rows >= settings.KNN_LSH_MIN_ROWS:
+        # Aim for a few hundred rows per bucket
+        lsh_bits = min(32, max(8, int(math.log2(rows)) - 8))
+        planes = np.random.default_rng(0).standard_normal((lsh_bits, dim)).astype(np.float32)
+        codes = np.concatenate(
+            [
+                _lsh_codes(np.asarray(vectors[start : start + _CHUNK_ROWS]), planes)
+                for start in range(0, rows, _CHUNK_ROWS)
+            ]
+        )
+        order = np.argsort(codes, kind="stable")
+        np.save(os.path.join(index_dir, "lsh_planes.npy"), planes)
+        np.save(os.path.join(index_dir, "lsh_codes.npy"), codes[order])
+        np.save(os.path.join(index_dir, "lsh_order.npy"), order.astype(np.int64))
+
+    with open(os.path.join(index_dir, _MANIFEST), "w", encoding="utf-8") as fh:
+        json.dump({"rows": rows, "dim": dim, "lsh_bits": lsh_bits}, fh)
+
+    os.rename(index_dir, os.path.join(versions, version))
+    _publish(final_dir, version)
+    log.info("Built history index at %s with %d tickets", final_dir, rows)
+    return rows
+
+
+def _current_version(index_dir: str) -> Optional[str]:
+    try:
+        with open(os.path.join(index_dir, _CURRENT), "r", encoding="utf-8") as fh:
+            return fh.read().strip() or None
+    except OSError:
+        return None
+
+
+def _publish(index_dir: str, version: str) -> None:
+    """Point ``index_dir`` at ``version`` and drop versions nobody reads any more."""
+    previous = _current_version(index_dir)
+    tmp = os.path.join(index_dir, f"{_CURRENT}.{uuid.uuid4().hex}.tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(version)
+    os.replace(tmp, os.path.join(index_dir, _CURRENT))
+    _pointers.pop(index_dir, None)
+    # The previous version stays for readers that resolved it just before
+    # the switch; anything older has been unreachable for a whole build
+    versions = os.path.join(index_dir, _VERSIONS)
+    abandoned = f".{time.time_ns() - _STALE_BUILD_NS:020d}"
+    for name in os.listdir(versions):
+        if name.startswith("."):
+            stale = name.endswith(".building") and name < abandoned
+        else:
+            stale = previous is not None and name < previous and name != version
+        if stale:
+            shutil.rmtree(os.path.join(versions, name), ignore_errors=True)
+
+
+def index_files(index_dir: str) -> Optional[str]:
+    """Directory with the live files of the index at ``index_dir``; None if it is not built."""
+    version = _current_version(index_dir)
+    return os.path.join(index_dir, _VERSIONS, version) if version is not None else None
+
+
+# Live version directory by index directory, with when it was read
+_pointers: Dict[str, Tuple[Optional[str], float]] = {}
+
+
+def _live_files(index_dir: str) -> Optional[str]:
+    # ``index_files``, re-reading CURRENT at most every KNN_RELOAD_INTERVAL
+    now = time.monotonic()
+    cached = _pointers.get(index_dir)
+    if cached is not None and now - cached[1] < settings.KNN_RELOAD_INTERVAL:
+        return cached[0]
+    files = index_files(index_dir)
+    _pointers[index_dir] = (files, now)
+    return files
+
+
+class HistoryIndex:
+    """Read-only, memory-mapped history index."""
+
+    def __init__(self, index_dir: str, files: Optional[str] = None):
+        self.index_dir = index_dir
+        files = files or index_files(index_dir)
+        if files is None:
+            raise FileNotFoundError(f"No history index in {index_dir}")
+        # The version directory; a rebuild publishes a different one
+        self.version = files
+        with open(os.path.join(files, _MANIFEST), "r", encoding="utf-8") as fh:
+            manifest = json.load(fh)
+        self.rows = int(manifest["rows"])
+        self.dim = int(manifest["dim"])
+        self.lsh_bits = int(manifest.get("lsh_bits", 0))
+
+        def load(name: str) -> "np.ndarray":
+            return np.load(os.path.join(files, name), mmap_mode="r")
+
+        self.vectors = load("vectors.npy")
+        self.hours = load("hours.npy")
+        self.offsets = load("offsets.npy")
+        if self.lsh_bits:
+            self.planes = np.asarray(load("lsh_planes.npy"))
+            self.codes = load("lsh_codes.npy")
+            self.order = load("lsh_order.npy")
+        self._meta: Optional[mmap.mmap] = None
+        if self.rows:
+            with open(os.path.join(files, "meta.jsonl"), "rb") as fh:
+                self._meta = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def metadata(self, row: int) -> dict:
+        """Key/title of an indexed ticket, read from the mmap'd metadata file."""
+        start = int(self.offsets[row])
+        end = self._meta.find(b"\n", start)
+        return json.loads(self._meta[start:end])
+
+    def search(self, query: "np.ndarray", k: int) -> List[Tuple[int, float]]:
+        """Top-k ``(row, cosine similarity)`` for one query vector."""
+        return self.search_many(query[None, :], k)[0]
+
+    def search_many(self, queries: "np.ndarray", k: int) -> List[List[Tuple[int, float]]]:
+        """Top-k neighbours for a batch of query vectors."""
+        if self.rows == 0:
+            return [[] for _ in range(len(queries))]
+        if self.lsh_bits:
+            return [self._search_lsh(q, k) for q in queries]
+        return self._search_exact(queries, k)
+
+    def _search_exact(self, queries: "np.ndarray", k: int) -> List[List[Tuple[int, float]]]:
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        for start in range(0, self.rows, _CHUNK_ROWS):
+            chunk = np.asarray(self.vectors[start : start + _CHUNK_ROWS])
+            scores = queries @ chunk.T
+            rows = np.broadcast_to(np.arange(start, start + len(chunk)), scores.shape)
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            best_rows = np.concatenate([best_rows, rows], axis=1)
+            if best_scores.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+        return [_ranked(r, s) for r, s in zip(best_rows, best_scores)]
+
+    def _search_lsh(self, query: "np.ndarray", k: int) -> List[Tuple[int, float]]:
+        code = int(_lsh_codes(query[None, :], self.planes)[0])
+        probes = [code] + [code ^ (1 << bit) for bit in range(self.lsh_bits)]
+        candidates = []
+        for probe in probes:
+            lo = np.searchsorted(self.codes, probe, side="left")
+            hi = np.searchsorted(self.codes, probe, side="right")
+            if hi > lo:
+                candidates.append(np.asarray(self.order[lo:hi]))
+        if not candidates:
+            return []
+        rows = np.sort(np.concatenate(candidates))
+        scores = np.asarray(self.vectors[rows]) @ query
+        if len(rows) > k:
+            keep = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[keep], scores[keep]
+        return _ranked(rows, scores)
+
+
+def _ranked(rows: "np.ndarray", scores: "np.ndarray") -> List[Tuple[int, float]]:
+    pairs = sorted(zip(rows.tolist(), scores.tolist()), key=lambda p: (-p[1], p[0]))
+    return [(row, score) for row, score in pairs if score > -np.inf]
+
+
+# Open indexes by directory (one per tenant)
+_history_indexes: Dict[str, HistoryIndex] = {}
+
+
+def history_dir() -> str:
+    """Index directory; each tenant has its own history under ``tenants/``."""
+    base = settings.KNN_INDEX_DIR or os.path.join(settings.DATA_DIR, "history")
+    tenant = current_tenant()
+    return os.path.join(base, "tenants", tenant) if tenant else base
+
+
+def get_history_index() -> Optional[HistoryIndex]:
+    """Get the current tenant's history index, or None if numpy/the index is missing."""
+    if np is None:
+        return None
+    path = history_dir()
+    files = _live_files(path)
+    if files is None:
+        return None
+    index = _history_indexes.get(path)
+    if index is None or index.version != files:
+        index = _history_indexes[path] = HistoryIndex(path, files)
+    return index
+
+
+def _fallback(
+    req: EstimationRequest, enrichment: Optional[Enrichment], reason: str
+) -> EstimationResponse:
+    result = heuristic.estimate(req, enrichment=enrichment)
+    result.factors.append(f"kNN unavailable ({reason}); heuristic fallback")
+    return result
+
+
+def estimate(
+    req: EstimationRequest, enrichment: Optional[Enrichment] = None
+) -> EstimationResponse:
+    """Predict hours from the most similar completed tickets."""
+    index = get_history_index()
+    if index is None:
+        return _fallback(req, enrichment, "no history index")
+
+    text = ticket_text(request_title(req, enrichment), request_description(req, enrichment))
+    query = embed(text, index.dim)
+    neighbours = [
+        (row, sim)
+        for row, sim in index.search(query, settings.KNN_K)
+        if sim >= settings.KNN_MIN_SIMILARITY
+    ]
+    if not neighbours:
+        return _fallback(req, enrichment, "no similar history")
+
+    rows = np.asarray([row for row, _ in neighbours])
+    weights = np.asarray([sim for _, sim in neighbours], dtype=np.float64)
+    log_hours = np.log(np.asarray(index.hours[rows], dtype=np.float64))
+    mean = float((weights * log_hours).sum() / weights.sum())
+    spread = float(math.sqrt((weights * (log_hours - mean) ** 2).sum() / weights.sum()))
+    hours = math.exp(mean)
+    confidence = float(np.clip(weights.mean() * math.exp(-spread), 0.05, 0.95))
+
+    best_row, best_sim = neighbours[0]
+    best = index.metadata(best_row)
+    label = f"{best['key']}: {best['title']}" if best.get("key") else best["title"]
+    factors = [
+        f"Based on {len(neighbours)} similar completed tickets",
+        f"Closest match '{label}' (similarity {best_sim:.2f}, {float(index.hours[best_row]):.1f}h)",
+    ]
+    if spread > 0.5:
+        factors.append("Similar tickets varied widely in effort")
+
+    return EstimationResponse(
+        estimated_hours=max(0.1, round(hours, 1)),
+        complexity=TaskComplexity.from_hours(hours),
+        confidence=round(confidence, 2),
+        reasoning=(
+            "Similarity-weighted geometric mean of the actual hours of the "
+            f"{len(neighbours)} nearest completed tickets."
+        ),
+        factors=factors,
+    )
@@ -0,0 +1,363 @@
+"""LLM estimator backend.
+
+Builds a prompt from the (enriched) request, streams the completion from the
+configured provider and parses it line by line as tokens arrive. Completions
+are cached by a hash of the normalized prompt, and concurrent provider calls
+are bounded per event loop.
+
+The completion format is deliberately line-oriented (``key: value``) so that
+partial output can be parsed without waiting for the full response.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import weakref
+from collections import OrderedDict
+from typing import AsyncIterator, List, Optional, Tuple
+
+from pointless.core.config import settings
+from pointless.core.enrichment import Enrichment, request_description, request_title
+from pointless.core.estimators import heuristic
+from pointless.core.models import EstimationRequest, EstimationResponse, TaskComplexity
+
+log = logging.getLogger(__name__)
+
+_INSTRUCTIONS = (
+    "You are estimating engineering effort for a single task.\n"
+    "Answer with one `key: value` pair per line using these keys:\n"
+    "hours (number), complexity (trivial|simple|moderate|complex|expert), "
+    "confidence (0-1), factor (repeatable) and reasoning (last)."
+)
+
+
+def build_prompt(req: EstimationRequest, enrichment: Optional[Enrichment] = None) -> str:
+    """Render the estimation prompt for a request and its retrieved context."""
+    parts = [_INSTRUCTIONS, "", f"Title: {request_title(req, enrichment)}"]
+    description = request_description(req, enrichment)
+    if description:
+        parts.append(f"Description: {description}")
+    if req.acceptance_criteria:
+        parts.append("Acceptance criteria:")
+        parts.extend(f"- {item}" for item in req.acceptance_criteria)
+    if req.tags:
+        parts.append(f"Tags: {', '.join(req.tags)}")
+    if req.jira_ticket_id:
+        parts.append(f"Jira ticket: {req.jira_ticket_id}")
+    context = enrichment.context_lines() if enrichment else []
+    if req.mcp_enhanced_context:
+        context.append(req.mcp_enhanced_context)
+    if context:
+        parts.append("Context:\n" + "\n\n".join(context))
+    return "\n".join(parts)
+
+
+def prompt_key(prompt: str) -> str:
+    """Cache key for a prompt; whitespace and case differences are ignored."""
+    normalized = " ".join(prompt.split()).casefold()
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+class PromptCache:
+    """Bounded LRU of raw completions keyed by normalized prompt hash."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, str]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        if self.maxsize <= 0:
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CompletionParser:
+    """Incremental parser for the line-oriented completion format."""
+
+    _LINE = re.compile(r"^\s*([a-z_ ]+?)\s*:\s*(.*)$", re.IGNORECASE)
+
+    def __init__(self):
+        self._buffer = ""
+        self._in_reasoning = False
+        self.hours: Optional[float] = None
+        self.complexity: Optional[TaskComplexity] = None
+        self.confidence: Optional[float] = None
+        self.factors: List[str] = []
+        self.reasoning_lines: List[str] = []
+
+    def feed(self, chunk: str) -> None:
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            self._parse_line(line)
+
+    def close(self) -> None:
+        if self._buffer:
+            self._parse_line(self._buffer)
+            self._buffer = ""
+
+    def _parse_line(self, line: str) -> None:
+        match = self._LINE.match(line)
+        key = match.group(1).strip().lower() if match else ""
+        value = match.group(2).strip() if match else ""
+        if key == "hours":
+            self.hours = _to_float(value)
+        elif key == "complexity":
+            try:
+                self.complexity = TaskComplexity(value.lower())
+            except ValueError:
+                pass
+        elif key == "confidence":
+            self.confidence = _to_float(value)
+        elif key == "factor" and value:
+            self.factors.append(value)
+        elif key == "reasoning":
+            self._in_reasoning = True
+            if value:
+                self.reasoning_lines.append(value)
+        elif self._in_reasoning and line.strip():
+            # Free text after "reasoning:" continues the reasoning paragraph
+            self.reasoning_lines.append(line.strip())
+
+    def result(self) -> Optional[EstimationResponse]:
+        """Build a response, or None when required fields are missing/invalid."""
+        if self.hours is None or self.hours <= 0:
+            return None
+        confidence = self.confidence if self.confidence is not None else 0.5
+        return EstimationResponse(
+            estimated_hours=round(self.hours, 1),
+            complexity=self.complexity or TaskComplexity.MODERATE,
+            confidence=round(min(max(confidence, 0.0), 1.0), 2),
+            reasoning=" ".join(self.reasoning_lines) or "LLM estimate",
+            factors=list(self.factors),
+        )
+
+
+def _to_float(value: str) -> Optional[float]:
+    match = re.search(r"-?\d+(?:\.\d+)?", value)
+    return float(match.group()) if match else None
+
+
+def parse_completion(text: str) -> Optional[EstimationResponse]:
+    """Parse a complete completion string."""
+    parser = CompletionParser()
+    parser.feed(text)
+    parser.close()
+    return parser.result()
+
+
+class LLMProvider:
+    """Base class for providers that stream completion tokens."""
+
+    name = "base"
+
+    def stream(self, prompt: str) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+
+class FakeProvider(LLMProvider):
+    """Deterministic local provider for offline runs and load tests.
+
+    The answer is derived from the prompt hash, so identical prompts always
+    produce identical completions. ``latency`` is the delay before the first
+    token and ``token_delay`` the delay between subsequent tokens (seconds).
+    """
+
+    name = "fake"
+
+    def __init__(self, latency: float = 0.0, token_delay: float = 0.0):
+        self.latency = latency
+        self.token_delay = token_delay
+        self.calls = 0
+
+    def completion_for(self, prompt: str) -> str:
+        digest = int(hashlib.sha256(prompt.encode()).hexdigest(), 16)
+        hours = 1.0 + (digest % 320) / 20.0
+        complexity = TaskComplexity.from_hours(hours)
+        confidence = 0.5 + ((digest >> 16) % 40) / 100.0
+        return (
+            f"hours: {hours:.1f}\n"
+            f"complexity: {complexity.value}\n"
+            f"confidence: {confidence:.2f}\n"
+            "factor: Fake LLM provider (deterministic)\n"
+            "reasoning: Deterministic fake completion derived from the prompt hash."
+        )
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for token in re.findall(r"\S+\s*|\s+", self.completion_for(prompt)):
+            yield token
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+
+
+class OpenAIProvider(LLMProvider):
+    """Streams chat completions from the OpenAI API (requires ``httpx``)."""
+
+    name = "openai"
+    url = "https://api.openai.com/v1/chat/completions"
+
+    def __init__(self, api_key: Optional[str], model: str, timeout: float):
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        try:
+            import httpx  # type: ignore
+        except ImportError as e:  # pragma: no cover - optional dependency
+            raise RuntimeError("The openai provider requires httpx") from e
+        if not self.api_key:
+            raise RuntimeError("POINTLESS_OPENAI_API_KEY is not set")
+
+        payload = {
+            "model": self.model,
+            "stream": True,
+            "temperature": 0,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with client.stream(
+                "POST", self.url, json=payload, headers=headers
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    data = line[len("data: ") :]
+                    if data == "[DONE]":
+                        break
+                    choices = json.loads(data).get("choices") or [{}]
+                    delta = choices[0].get("delta", {}).get("content")
+                    if delta:
+                        yield delta
+
+
+def _create_provider(name: str) -> LLMProvider:
+    if name == "fake":
+        return FakeProvider(latency=settings.LLM_FAKE_LATENCY_MS / 1000.0)
+    if name == "openai":
+        return OpenAIProvider(
+            settings.OPENAI_API_KEY, settings.LLM_MODEL, settings.LLM_TIMEOUT
+        )
+    raise ValueError(f"Unknown model provider: {name}")
+
+
+# Global provider/cache instances
+_provider: Optional[LLMProvider] = None
+_cache: Optional[PromptCache] = None
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_provider() -> LLMProvider:
+    """Get the global provider for ``settings.MODEL_PROVIDER``."""
+    global _provider
+    if _provider is None:
+        _provider = _create_provider(settings.MODEL_PROVIDER.lower())
+    return _provider
+
+
+def set_provider(provider: Optional[LLMProvider]) -> None:
+    """Override the global provider (tests, load runs)."""
+    global _provider
+    _provider = provider
+
+
+def get_prompt_cache() -> PromptCache:
+    """Get the global prompt cache instance."""
+    global _cache
+    if _cache is None:
+        _cache = PromptCache(settings.LLM_CACHE_SIZE)
+    return _cache
+
+
+def _semaphore() -> asyncio.Semaphore:
+    # asyncio primitives are bound to a loop, and the sync entry points run a
+    # fresh loop per call, so keep one semaphore per running loop.
+    loop = asyncio.get_running_loop()
+    sem = _semaphores.get(loop)
+    if sem is None:
+        sem = asyncio.Semaphore(max(1, settings.LLM_MAX_CONCURRENCY))
+        _semaphores[loop] = sem
+    return sem
+
+
+async def _complete(
+    provider: LLMProvider, prompt: str
+) -> Tuple[str, Optional[EstimationResponse]]:
+    parser = CompletionParser()
+    chunks: List[str] = []
+    async with _semaphore():
+        async for token in provider.stream(prompt):
+            chunks.append(token)
+            parser.feed(token)
+    parser.close()
+    return "".join(chunks), parser.result()
+
+
+def _fallback(
+    req: EstimationRequest, enrichment: Optional[Enrichment], reason: str
+) -> EstimationResponse:
+    result = heuristic.estimate(req, enrichment=enrichment)
+    result.factors.append(f"LLM unavailable ({reason}); heuristic fallback")
+    return result
+
+
+async def estimate(
+    req: EstimationRequest, enrichment: Optional[Enrichment] = None
+) -> EstimationResponse:
+    """Estimate via the configured LLM provider, with prompt-level caching."""
+    prompt = build_prompt(req, enrichment)
+    key = prompt_key(prompt)
+    cache = get_prompt_cache()
+
+    cached = cache.get(key)
+    if cached is not None:
+        result = parse_completion(cached)
+        if result is not None:
+            result.factors.append("LLM response served from prompt cache")
+            return result
+
+    try:
+        provider = get_provider()
+        text, result = await asyncio.wait_for(
+            _complete(provider, prompt), timeout=settings.LLM_TIMEOUT
+        )
+    except Exception as e:
+        log.warning("LLM provider call failed: %s", e)
+        return _fallback(req, enrichment, "provider error")
+
+    if result is None:
+        log.warning("Could not parse LLM completion for '%s'", req.title)
+        return _fallback(req, enrichment, "unparseable completion")
+
+    cache.put(key, text)
+    log.info(
+        "LLM estimate for '%s': hours=%.1f, complexity=%s, confidence=%.2f",
+        req.title, result.estimated_hours, result.complexity.value, result.confidence,
+    )
+    return result
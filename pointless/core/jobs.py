@@ -0,0 +1,207 @@
+"""In-process asynchronous estimation jobs.
+
+``POST /jobs/estimate`` enqueues a request and returns immediately; a fixed
+pool of worker tasks on the API event loop drains the queue with bounded
+concurrency. Finished jobs are kept for ``JOB_RESULT_TTL`` seconds and then
+dropped, oldest first. A job runs on behalf of the tenant that submitted it
+and is only visible to that tenant.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from .admission import BATCH, admitted
+from .config import settings
+from .estimate import estimate_effort_async
+from .models import EstimationRequest, EstimationResponse, JobInfo, JobStatus
+from .tenants import current_tenant, use_tenant
+
+log = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    """Raised when the job queue has no room for another request."""
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    if ts is None:
+        return None
+    return (
+        datetime.fromtimestamp(ts, timezone.utc)
+        .isoformat(timespec="seconds")
+        .replace("+00:00", "Z")
+    )
+
+
+class Job:
+    """A queued or finished estimation job."""
+
+    def __init__(self, request: EstimationRequest):
+        self.job_id = uuid.uuid4().hex
+        self.request = request
+        self.tenant = current_tenant()
+        self.status = JobStatus.QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[EstimationResponse] = None
+        self.error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+    def info(self) -> JobInfo:
+        return JobInfo(
+            job_id=self.job_id,
+            status=self.status,
+            created_at=_iso(self.created_at),
+            started_at=_iso(self.started_at),
+            finished_at=_iso(self.finished_at),
+            result=self.result,
+            error=self.error,
+        )
+
+
+class JobManager:
+    """Bounded job queue drained by a pool of worker tasks."""
+
+    def __init__(self, workers: int = 4, max_queue: int = 1000, ttl: float = 3600.0):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.ttl = ttl
+        self._jobs: Dict[str, Job] = {}
+        self._finished: "OrderedDict[str, float]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        """Start the worker pool on the running event loop."""
+        if self.running:
+            return
+        self._stopping = False
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [
+            asyncio.create_task(self._worker(i)) for i in range(max(1, self.workers))
+        ]
+        log.info("Started %d estimation job workers", len(self._tasks))
+
+    async def stop(self) -> None:
+        """Cancel workers and any job still running."""
+        self._stopping = True
+        for job in self._jobs.values():
+            if job.task is not None and not job.task.done():
+                job.task.cancel()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    async def submit(self, request: EstimationRequest) -> Job:
+        """Enqueue a request; raises JobQueueFull when the queue is at capacity."""
+        if not self.running:
+            await self.start()
+        self._purge_expired()
+        job = Job(request)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull(f"Job queue is full ({self.max_queue} jobs)")
+        self._jobs[job.job_id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._purge_expired()
+        job = self._jobs.get(job_id)
+        if job is None or job.tenant != current_tenant():
+            return None
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job; finished jobs are left untouched."""
+        job = self.get(job_id)
+        if job is None or job.done:
+            return job
+        if job.task is not None:
+            job.task.cancel()
+        self._finish(job, JobStatus.CANCELLED)
+        return job
+
+    def _finish(self, job: Job, status: JobStatus) -> None:
+        job.status = status
+        job.finished_at = time.time()
+        job.request = None  # release the payload, only the result is served
+        self._finished[job.job_id] = job.finished_at
+
+    def _purge_expired(self) -> None:
+        cutoff = time.time() - self.ttl
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            if finished_at > cutoff:
+                break
+            self._finished.popitem(last=False)
+            self._jobs.pop(job_id, None)
+
+    async def _run(self, job: Job) -> EstimationResponse:
+        # Jobs share the estimation slots with API requests, in the batch
+        # lane; the job queue already bounds how many can wait
+        async with admitted(BATCH, bounded=False):
+            return await estimate_effort_async(job.request)
+
+    async def _worker(self, worker_id: int) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.done:  # cancelled while queued
+                    continue
+                job.status = JobStatus.RUNNING
+                job.started_at = time.time()
+                # Workers outlive requests; the task runs in the submitter's tenant
+                with use_tenant(job.tenant):
+                    job.task = asyncio.create_task(self._run(job))
+                try:
+                    job.result = await job.task
+                    self._finish(job, JobStatus.SUCCEEDED)
+                except asyncio.CancelledError:
+                    if self._stopping:
+                        raise
+                    if not job.done:
+                        self._finish(job, JobStatus.CANCELLED)
+                except Exception as e:
+                    log.warning("Estimation job %s failed: %s", job.job_id, e)
+                    job.error = str(e)
+                    self._finish(job, JobStatus.FAILED)
+                finally:
+                    job.task = None
+            finally:
+                self._queue.task_done()
+
+
+# Global manager instance
+_job_manager: Optional[JobManager] = None
+
+
+def get_job_manager() -> JobManager:
+    """Get the global job manager instance."""
+    global _job_manager
+    if _job_manager is None:
+        _job_manager = JobManager(
+            workers=settings.JOB_WORKERS,
+            max_queue=settings.JOB_QUEUE_SIZE,
+            ttl=settings.JOB_RESULT_TTL,
+        )
+    return _job_manager
@@ -0,0 +1,193 @@
+"""Queue-based logging for the API server.
+
+``configure_logging()`` puts a single non-blocking ``QueueHandler`` on the
+root logger. Request handlers and the event loop only enqueue the record;
+a ``QueueListener`` thread merges the ``%`` arguments, formats (plain text or
+one JSON object per line) and writes to stderr. When the queue is full the
+record is dropped and counted, instead of blocking the caller. Since
+arguments are merged later, log values rather than objects that are about to
+be mutated.
+
+``LOG_SAMPLING`` keeps one in N of the info and debug records of chatty
+loggers, e.g. ``pointless.core.connectors=0.1`` keeps 10% of the connector
+info lines. Warnings and errors are never sampled.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from .config import settings
+
+# Attributes every LogRecord has; anything else was passed with ``extra=``
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with ``extra=`` fields at the top level."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc)
+            .isoformat(timespec="milliseconds")
+            .replace("+00:00", "Z"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+def parse_sampling(spec: Optional[str]) -> Dict[str, float]:
+    """``"logger=rate,..."`` to ``{logger: rate}``; malformed entries are skipped."""
+    rates: Dict[str, float] = {}
+    for part in (spec or "").split(","):
+        name, sep, rate = part.strip().partition("=")
+        try:
+            if sep and name:
+                rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            continue
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps one in ``1/rate`` info and debug records per configured logger.
+
+    A rate applies to the named logger and its children; the most specific
+    configured name wins. Sampling is a counter, not random, so a steady
+    stream keeps an exact fraction.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = dict(rates)
+        self._counts: Dict[str, float] = {}
+        self._resolved: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def _rule(self, name: str) -> Optional[str]:
+        rule = self._resolved.get(name, "")
+        if rule == "":
+            candidates = [n for n in self.rates if name == n or name.startswith(n + ".")]
+            rule = self._resolved[name] = max(candidates, key=len) if candidates else None
+        return rule
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or not self.rates:
+            return True
+        rule = self._rule(record.name)
+        if rule is None:
+            return True
+        rate = self.rates[rule]
+        if rate <= 0.0:
+            return False
+        with self._lock:
+            # Credit accumulates by ``rate`` per record; emit on each whole unit
+            credit = self._counts.get(rule, 1.0 - rate) + rate
+            keep = credit >= 1.0
+            self._counts[rule] = credit - 1.0 if keep else credit
+        return keep
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records as they are, leaving all formatting to the listener."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock handler formats here, on the caller's thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Wait for room rather than fail when the queue is full at shutdown
+        self.queue.put(self._sentinel)
+
+
+class _Pipeline:
+    def __init__(self, handler: _DeferredQueueHandler, listener: _Listener):
+        self.handler = handler
+        self.listener = listener
+
+
+# Global pipeline instance
+_pipeline: Optional[_Pipeline] = None
+
+
+def _formatter(fmt: str) -> logging.Formatter:
+    if fmt == "json":
+        return JsonFormatter()
+    return logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    fmt: Optional[str] = None,
+    sampling: Optional[str] = None,
+    stream=None,
+) -> logging.Handler:
+    """Route the root logger through the queue; returns the queue handler.
+
+    Safe to call more than once: the previous pipeline is stopped (and
+    flushed) first.
+    """
+    global _pipeline
+    shutdown_logging()
+    level = (level or settings.LOG_LEVEL or "INFO").upper()
+    fmt = (fmt or settings.LOG_FORMAT or "text").lower()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(_formatter(fmt))
+    handler = _DeferredQueueHandler(queue.Queue(maxsize=max(0, int(settings.LOG_QUEUE_SIZE))))
+    rates = parse_sampling(settings.LOG_SAMPLING if sampling is None else sampling)
+    if rates:
+        # Filter before enqueueing, so sampled-out records cost nothing more
+        handler.addFilter(SamplingFilter(rates))
+    listener = _Listener(handler.queue, output, respect_handler_level=True)
+
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(level)
+    listener.start()
+    _pipeline = _Pipeline(handler, listener)
+    return handler
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _pipeline
+    if _pipeline is None:
+        return
+    pipeline, _pipeline = _pipeline, None
+    logging.getLogger().removeHandler(pipeline.handler)
+    pipeline.listener.stop()
+    if pipeline.handler.dropped:
+        sys.stderr.write(f"pointless: {pipeline.handler.dropped} log records dropped (queue full)\n")
+
+
+atexit.register(shutdown_logging)
@@ -13,6 +13,19 @@ class TaskComplexity(str, Enum):
     COMPLEX = "complex"
     EXPERT = "expert"
 
+    @classmethod
+    def from_hours(cls, hours: float) -> "TaskComplexity":
+        """Rough complexity bucket for an effort in hours."""
+        if hours < 2:
+            return cls.TRIVIAL
+        if hours < 5:
+            return cls.SIMPLE
+        if hours < 9:
+            return cls.MODERATE
+        if hours < 14:
+            return cls.COMPLEX
+        return cls.EXPERT
+
 
 class EstimationRequest(BaseModel):
     """Input to the estimator. Jira/GitHub wiring comes later."""
@@ -22,6 +35,7 @@ class EstimationRequest(BaseModel):
     jira_ticket_id: Optional[str] = None
     codebase_context: Optional[str] = None  # placeholder until retrieval is wired
     tags: List[str] = Field(default_factory=list)
+    team: Optional[str] = Field(default=None, description="Owning team, used for calibration")
     
     # MCP integration fields
     use_mcp: bool = Field(default=False, description="Whether to use MCP for data retrieval")
@@ -50,8 +64,58 @@ class EstimationResponse(BaseModel):
     github_repository: Optional[str] = Field(default=None, description="GitHub repository analyzed if GitHub MCP was used")
     github_analysis_summary: Optional[str] = Field(default=None, description="Summary of GitHub codebase analysis")
 
+    # Calibration fields
+    uncalibrated_hours: Optional[float] = Field(default=None, description="Estimate before calibration; record actuals against this value")
+
+
+class ActualRecord(BaseModel):
+    """Actual effort for a past estimate, used to calibrate future ones."""
+    estimated_hours: float = Field(..., gt=0, description="Uncalibrated hours that were estimated")
+    actual_hours: float = Field(..., gt=0, description="Hours the work actually took")
+    team: Optional[str] = None
+    project: Optional[str] = Field(default=None, description="Defaults to the Jira ticket's project key")
+    jira_ticket_id: Optional[str] = None
+
+
+class CalibrationStats(BaseModel):
+    """Running calibration statistics for one team/project bucket."""
+    key: str
+    count: int
+    bias: float = Field(..., description="Geometric mean of actual/estimated hours")
+    std_log_ratio: float
+    ratio_p10: Optional[float] = None
+    ratio_p50: Optional[float] = None
+    ratio_p90: Optional[float] = None
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class JobInfo(BaseModel):
+    """Status of an asynchronous estimation job."""
+    job_id: str
+    status: JobStatus
+    created_at: str  # RFC3339/ISO8601 (UTC; ends with 'Z')
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    result: Optional[EstimationResponse] = None
+    error: Optional[str] = None
+
 
 class HealthResponse(BaseModel):
     status: str
     version: str
     timestamp: str  # RFC3339/ISO8601 (UTC; ends with 'Z')
+    ready: bool = True  # false until the startup warm-up has finished
+
+
+class WebhookAck(BaseModel):
+    """What happened to one received webhook event."""
+    event: str
+    ticket_id: Optional[str] = None
+    status: str = Field(..., description="scheduled, unchanged, deleted or ignored")
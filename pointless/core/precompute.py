@@ -0,0 +1,143 @@
+"""Precomputed estimates keyed by Jira ticket and content version.
+
+Estimates computed ahead of time (from Jira webhooks, see ``webhooks``) are
+stored per ticket ID, ticket content version and estimator version, so a
+later interactive request for the ticket is a single indexed lookup. The
+content version is a hash of the ticket fields the estimators read; edits
+that do not touch them (comments, assignee changes) keep the version and the
+stored estimate. Rows of a tenant are keyed under its cache namespace.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, Optional, Tuple
+
+from .. import __version__
+from .config import settings
+from .connectors.mcp_atlassian import JiraTicket
+from .models import EstimationResponse
+from .tenants import cache_namespace
+
+
+def estimator_version() -> str:
+    """Identifies the code and configuration that produce estimates."""
+    return f"{__version__}:{settings.ESTIMATOR}"
+
+
+def content_version(ticket: JiraTicket, labels: Optional[Iterable[str]] = None) -> str:
+    """Short hash of the ticket fields that feed an estimate.
+
+    ``labels`` default to the ticket's own, so tickets fetched from Jira and
+    tickets parsed from webhook payloads get the same version.
+    """
+    fields = [
+        ticket.summary, ticket.description, ticket.status,
+        ticket.priority, ticket.issue_type,
+        sorted(ticket.labels if labels is None else labels),
+    ]
+    payload = json.dumps(fields, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def estimate_etag(version: str) -> str:
+    """Strong ETag for a ticket estimate: content version plus estimator version."""
+    digest = hashlib.sha256(f"{version}:{estimator_version()}".encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """Weak comparison of ``etag`` against an ``If-None-Match`` header."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in ("*", etag):
+            return True
+    return False
+
+
+class EstimateStore:
+    """SQLite table of uncalibrated estimates, latest version per ticket."""
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS estimates ("
+        " ticket_id TEXT NOT NULL, estimator TEXT NOT NULL, version TEXT NOT NULL,"
+        " response TEXT NOT NULL, computed_at REAL NOT NULL,"
+        " PRIMARY KEY (ticket_id, estimator))",
+    )
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        for statement in self._SCHEMA:
+            conn.execute(statement)
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def latest(
+        self, ticket_id: str, estimator: Optional[str] = None
+    ) -> Optional[Tuple[str, EstimationResponse]]:
+        """``(content version, estimate)`` last stored for the ticket."""
+        row = self._conn().execute(
+            "SELECT version, response FROM estimates WHERE ticket_id = ? AND estimator = ?",
+            (cache_namespace() + ticket_id, estimator or estimator_version()),
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], EstimationResponse.model_validate_json(row[1])
+
+    def get(
+        self, ticket_id: str, version: str, estimator: Optional[str] = None
+    ) -> Optional[EstimationResponse]:
+        """The stored estimate if it was computed for exactly this version."""
+        found = self.latest(ticket_id, estimator)
+        if found is None or found[0] != version:
+            return None
+        return found[1]
+
+    def put(
+        self,
+        ticket_id: str,
+        version: str,
+        result: EstimationResponse,
+        estimator: Optional[str] = None,
+    ) -> None:
+        # Only the latest version is kept; older ones can never be served
+        self._conn().execute(
+            "INSERT OR REPLACE INTO estimates VALUES (?, ?, ?, ?, ?)",
+            (cache_namespace() + ticket_id, estimator or estimator_version(), version,
+             result.model_dump_json(), time.time()),
+        )
+
+    def delete(self, ticket_id: str) -> None:
+        self._conn().execute("DELETE FROM estimates WHERE ticket_id = ?", (cache_namespace() + ticket_id,))
+
+
+# Global store instance
+_store: Optional[EstimateStore] = None
+
+
+def get_estimate_store() -> EstimateStore:
+    """Get the global estimate store under ``settings.DATA_DIR``."""
+    global _store
+    path = settings.ESTIMATE_STORE_PATH or os.path.join(settings.DATA_DIR, "estimates.sqlite3")
+    if _store is None or _store.path != path:
+        _store = EstimateStore(path)
+    return _store
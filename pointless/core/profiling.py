@@ -0,0 +1,206 @@
+"""On-demand CPU and memory profiles of a single estimate.
+
+``profile()`` samples the calling thread's stack every
+``PROFILE_INTERVAL_MS`` from a helper thread and traces allocations with
+``tracemalloc`` while the block runs. Both are reported as collapsed stacks
+(``outer;inner;leaf value``, one per line), the input format of
+``flamegraph.pl``, speedscope and similar tools: sample counts for CPU,
+bytes still allocated at the end for memory.
+
+Samples are wall-clock: time an estimate spends waiting on I/O shows up
+under the event loop's selector frames. Pure-Python hot loops hold the GIL,
+so they are sampled at most once per ``sys.getswitchinterval()`` (5 ms). Nothing is installed unless a
+profile is requested, so there is no overhead otherwise. One profile runs at
+a time, since ``tracemalloc`` is process-wide.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterator, Optional
+
+from .config import settings
+
+log = logging.getLogger(__name__)
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a profile is requested while another one is running."""
+
+
+@lru_cache(maxsize=4096)
+def _short_path(filename: str) -> str:
+    # Relative to the longest sys.path entry containing it, like a module path
+    best = ""
+    for entry in sys.path:
+        entry = os.path.join(os.path.abspath(entry or "."), "")
+        if filename.startswith(entry) and len(entry) > len(best):
+            best = entry
+    return filename[len(best):] if best else filename
+
+
+def _label(filename: str, name: str) -> str:
+    # ";" separates frames in collapsed stacks
+    return f"{name} ({_short_path(filename)})".replace(";", ":")
+
+
+def _collapse(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_label(frame.f_code.co_filename, frame.f_code.co_name))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="pointless-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[_collapse(frame)] += 1
+            del frame
+
+    def finish(self) -> None:
+        self._done.set()
+        self.join()
+
+
+class Profile:
+    """Collapsed CPU and allocation stacks of one profiled block."""
+
+    def __init__(self) -> None:
+        self.id = uuid.uuid4().hex[:12]
+        self.duration = 0.0
+        self.cpu: Dict[str, int] = {}
+        self.memory: Dict[str, int] = {}
+        self.peak_bytes = 0
+
+    @property
+    def samples(self) -> int:
+        return sum(self.cpu.values())
+
+    @staticmethod
+    def _folded(stacks: Dict[str, int]) -> str:
+        return "".join(f"{stack} {value}\n" for stack, value in sorted(stacks.items()))
+
+    def cpu_folded(self) -> str:
+        return self._folded(self.cpu)
+
+    def memory_folded(self) -> str:
+        return self._folded(self.memory)
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "id": self.id,
+            "duration_ms": round(self.duration * 1000, 3),
+            "samples": self.samples,
+            "peak_bytes": self.peak_bytes,
+            "cpu": self.cpu_folded(),
+            "memory": self.memory_folded(),
+        }
+
+    def write(self, directory: Optional[str] = None) -> Dict[str, str]:
+        """Write ``<id>.cpu.folded`` and ``<id>.alloc.folded``; returns their paths."""
+        directory = directory or profile_dir()
+        os.makedirs(directory, exist_ok=True)
+        paths = {
+            "cpu": os.path.join(directory, f"{self.id}.cpu.folded"),
+            "memory": os.path.join(directory, f"{self.id}.alloc.folded"),
+        }
+        for kind, text in (("cpu", self.cpu_folded()), ("memory", self.memory_folded())):
+            with open(paths[kind], "w", encoding="utf-8") as fh:
+                fh.write(text)
+        return paths
+
+
+_UNTRACKED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+)
+
+
+def _allocations(
+    snapshot: tracemalloc.Snapshot, baseline: Optional[tracemalloc.Snapshot] = None
+) -> Dict[str, int]:
+    """Bytes still allocated per stack, net of ``baseline`` if tracing was already on."""
+    snapshot = snapshot.filter_traces(_UNTRACKED)
+    if baseline is None:
+        stats = [(stat.traceback, stat.size) for stat in snapshot.statistics("traceback")]
+    else:
+        stats = [
+            (stat.traceback, stat.size_diff)
+            for stat in snapshot.compare_to(baseline.filter_traces(_UNTRACKED), "traceback")
+        ]
+    stacks: Dict[str, int] = {}
+    for traceback, size in stats:
+        if size <= 0:
+            continue
+        # Traceback frames are ordered oldest first; only file and line are known
+        stack = ";".join(f"{_short_path(f.filename)}:{f.lineno}" for f in traceback)
+        stacks[stack] = stacks.get(stack, 0) + size
+    return stacks
+
+
+def profile_dir() -> str:
+    return settings.PROFILE_DIR or os.path.join(settings.DATA_DIR, "profiles")
+
+
+_lock = threading.Lock()
+
+
+@contextmanager
+def profile(interval: Optional[float] = None, memory: bool = True) -> Iterator[Profile]:
+    """Profile the calling thread for the duration of the block.
+
+    The yielded ``Profile`` is filled in when the block exits. Raises
+    ``ProfilerBusy`` if another profile is running.
+    """
+    if not _lock.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running")
+    result = Profile()
+    if interval is None:
+        interval = settings.PROFILE_INTERVAL_MS / 1000
+    started_tracing = memory and not tracemalloc.is_tracing()
+    baseline = None
+    try:
+        if started_tracing:
+            tracemalloc.start(settings.PROFILE_TRACEMALLOC_FRAMES)
+        elif memory:
+            # Tracing was already on (e.g. PYTHONTRACEMALLOC): report the difference
+            baseline = tracemalloc.take_snapshot()
+        sampler = _Sampler(threading.get_ident(), max(interval, 0.0001))
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            yield result
+        finally:
+            sampler.finish()
+            result.duration = time.perf_counter() - start
+            result.cpu = dict(sampler.stacks)
+            if memory:
+                result.peak_bytes = tracemalloc.get_traced_memory()[1]
+                result.memory = _allocations(tracemalloc.take_snapshot(), baseline)
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+        _lock.release()
+    log.info(
+        "Profile %s: %.1f ms, %d samples, peak %d bytes",
+        result.id, result.duration * 1000, result.samples, result.peak_bytes,
+    )
@@ -0,0 +1,309 @@
+"""BM25 ranking of repository files against a task.
+
+Each file is a document made of three weighted fields: the tokens of its
+path, the identifiers it defines and the rest of its content. Postings store
+each term's precomputed BM25 impact per document, so ranking a query is a
+sum over a handful of posting lists followed by a bounded-heap top-k.
+Results are deterministic: ties are broken by path.
+
+Indexes are built once per repository and kept in memory: for a local
+checkout keyed by its path (re-checked every ``RELEVANCE_REFRESH_INTERVAL``
+seconds in the background, re-reading only changed files; at most
+``RELEVANCE_LOCAL_INDEXES`` checkouts, least recently used out), for a
+GitHub snapshot by tree SHA.
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import math
+import os
+import re
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from .analysis.repo import SKIP_DIRS
+from .config import settings
+
+log = logging.getLogger(__name__)
+
+K1 = 1.2
+B = 0.75
+# Field weights: a term in the path or a definition says more than a mention
+PATH_WEIGHT = 3.0
+IDENTIFIER_WEIGHT = 2.0
+CONTENT_WEIGHT = 1.0
+
+_BINARY_SNIFF = 8192
+_WORD = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+_DEFINITION = re.compile(
+    r"\b(?:def|class|function|func|fn|interface|struct|type|enum|trait|module)\s+([A-Za-z_]\w*)"
+)
+_STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "if", "in", "into",
+    "is", "it", "its", "of", "on", "or", "so", "that", "the", "this", "to", "we", "with",
+    "add", "adds", "should", "would", "will", "can", "need", "needs", "new", "make", "when",
+    "via", "use", "using", "all", "any", "some", "also", "not", "no", "but", "our", "your",
+})
+
+
+def _normalize(word: str) -> Optional[str]:
+    word = word.lower()
+    if len(word) < 2 or word.isdigit() or word in _STOPWORDS:
+        return None
+    # Light plural folding, applied to documents and queries alike
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words of ``text``, splitting snake_case and camelCase."""
+    tokens = []
+    for word in _WORD.findall(text):
+        token = _normalize(word)
+        if token is not None:
+            tokens.append(token)
+    return tokens
+
+
+def document_terms(path: str, content: Optional[str] = None) -> Dict[str, float]:
+    """Field-weighted term frequencies of one file."""
+    terms: Dict[str, float] = {}
+    for token in tokenize(path):
+        terms[token] = terms.get(token, 0.0) + PATH_WEIGHT
+    if content:
+        identifiers = Counter(
+            token for name in _DEFINITION.findall(content) for token in tokenize(name)
+        )
+        for token, count in Counter(tokenize(content)).items():
+            defined = min(identifiers.get(token, 0), count)
+            weight = defined * IDENTIFIER_WEIGHT + (count - defined) * CONTENT_WEIGHT
+            terms[token] = terms.get(token, 0.0) + weight
+    return terms
+
+
+class TermIndex:
+    """Immutable BM25 index over ``(path, terms)`` documents."""
+
+    def __init__(self, docs: Iterable[Tuple[str, Dict[str, float]]]):
+        ordered = sorted(docs, key=lambda doc: doc[0])
+        self.paths: List[str] = [path for path, _ in ordered]
+        lengths = [sum(terms.values()) for _, terms in ordered]
+        n = len(ordered)
+        avgdl = (sum(lengths) / n) if n else 1.0
+        norms = [K1 * (1 - B + B * length / (avgdl or 1.0)) for length in lengths]
+
+        ids: Dict[str, array] = {}
+        impacts: Dict[str, array] = {}
+        for doc_id, (_, terms) in enumerate(ordered):
+            norm = norms[doc_id]
+            for term, tf in terms.items():
+                if term not in ids:
+                    ids[term] = array("i")
+                    impacts[term] = array("f")
+                ids[term].append(doc_id)
+                impacts[term].append(tf * (K1 + 1) / (tf + norm))
+
+        self._idf: Dict[str, float] = {
+            term: math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in ids.items()
+        }
+        if np is not None:
+            self._ids = {t: np.frombuffer(a, dtype=np.int32) for t, a in ids.items()}
+            self._impacts = {t: np.frombuffer(a, dtype=np.float32) for t, a in impacts.items()}
+        else:
+            self._ids, self._impacts = ids, impacts
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def ceiling(self, text: str) -> float:
+        """Highest score any document could reach for ``text``.
+
+        Words no document contains count at the idf of an unseen term, so
+        matching one common word of a long, unrelated task stays far below it.
+        """
+        unseen = math.log(1 + (len(self.paths) + 0.5) / 0.5)
+        return sum(self._idf.get(t, unseen) * (K1 + 1) for t in dict.fromkeys(tokenize(text)))
+
+    def search(self, text: str, k: int, min_match: float = 0.0) -> List[Tuple[str, float]]:
+        """The ``k`` best ``(path, score)`` for a query, best first.
+
+        With ``min_match``, documents scoring below that fraction of the
+        query's ``ceiling`` are dropped.
+        """
+        terms = [t for t in dict.fromkeys(tokenize(text)) if t in self._idf]
+        if not terms or k <= 0:
+            return []
+        if np is not None:
+            scored = self._scores_numpy(terms, k)
+        else:
+            scored = self._scores_python(terms)
+        # Bounded heap; lower doc ids (paths in order) win ties
+        top = heapq.nlargest(k, scored, key=lambda item: (item[1], -item[0]))
+        floor = min_match * self.ceiling(text) if min_match else 0.0
+        return [(self.paths[doc_id], round(score, 6)) for doc_id, score in top if score >= floor]
+
+    def _scores_python(self, terms: List[str]) -> Iterator[Tuple[int, float]]:
+        scores: Dict[int, float] = {}
+        for term in terms:
+            idf = self._idf[term]
+            get = scores.get
+            for doc_id, impact in zip(self._ids[term], self._impacts[term]):
+                scores[doc_id] = get(doc_id, 0.0) + idf * impact
+        return iter(scores.items())
+
+    def _scores_numpy(self, terms: List[str], k: int) -> Iterator[Tuple[int, float]]:
+        scores = np.zeros(len(self.paths), dtype=np.float64)
+        for term in terms:
+            # Doc ids are unique within a posting list, so fancy-index add is exact
+            scores[self._ids[term]] += self._idf[term] * self._impacts[term]
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            # Everything scoring at least the k-th best, ties included, goes to the heap
+            kth = np.partition(scores[candidates], len(candidates) - k)[len(candidates) - k]
+            candidates = candidates[scores[candidates] >= kth]
+        return zip(candidates.tolist(), scores[candidates].tolist())
+
+
+def _read_text(path: str, limit: int) -> Optional[str]:
+    try:
+        with open(path, "rb") as fh:
+            data = fh.read(limit)
+    except OSError:
+        return None
+    if b"\0" in data[:_BINARY_SNIFF]:
+        return None
+    return data.decode("utf-8", errors="replace")
+
+
+class LocalRelevanceIndex:
+    """Term index of a local checkout, refreshed from file sizes and mtimes.
+
+    Searches never wait for a refresh: only the first one builds the index,
+    later ones keep using the current ``TermIndex`` while a background
+    thread re-walks the checkout and swaps in the new one. ``_lock``
+    serializes refreshes; ``_scheduled`` is held while a background one is
+    pending.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.index = TermIndex([])
+        self.refreshed_at = 0.0
+        self._docs: Dict[str, Tuple[int, int, Dict[str, float]]] = {}
+        self._lock = threading.Lock()
+        self._scheduled = threading.Lock()
+
+    def _walk(self) -> Iterator[Tuple[str, os.stat_result]]:
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS and not d.startswith(".")]
+            for fname in filenames:
+                path = os.path.join(dirpath, fname)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield os.path.relpath(path, self.root).replace(os.sep, "/"), st
+
+    def refresh(self) -> int:
+        """Re-read new and modified files; returns how many were (re)read."""
+        with self._lock:
+            limit = settings.RELEVANCE_MAX_FILE_BYTES
+            docs: Dict[str, Tuple[int, int, Dict[str, float]]] = {}
+            changed = 0
+            for rel, st in self._walk():
+                old = self._docs.get(rel)
+                if old is not None and old[:2] == (st.st_size, st.st_mtime_ns):
+                    docs[rel] = old
+                    continue
+                content = _read_text(os.path.join(self.root, rel), limit)
+                if content is None:
+                    continue
+                docs[rel] = (st.st_size, st.st_mtime_ns, document_terms(rel, content))
+                changed += 1
+            if changed or len(docs) != len(self._docs):
+                self.index = TermIndex((rel, doc[2]) for rel, doc in docs.items())
+            self._docs = docs
+            self.refreshed_at = time.time()
+            return changed
+
+    def search(self, text: str, k: int, min_match: float = 0.0) -> List[Tuple[str, float]]:
+        if not self.refreshed_at:
+            with self._lock:
+                built = bool(self.refreshed_at)  # by a concurrent first search
+            if not built:
+                self.refresh()
+        elif time.time() - self.refreshed_at >= settings.RELEVANCE_REFRESH_INTERVAL:
+            self._refresh_in_background()
+        return self.index.search(text, k, min_match)
+
+    def _refresh_in_background(self) -> None:
+        if not self._scheduled.acquire(blocking=False):
+            return
+        threading.Thread(
+            target=self._background_refresh, name="pointless-relevance-refresh", daemon=True
+        ).start()
+
+    def _background_refresh(self) -> None:
+        try:
+            self.refresh()
+        except Exception:
+            log.exception("Refreshing the relevance index of %s failed", self.root)
+        finally:
+            self._scheduled.release()
+
+
+# Indexes of local checkouts by path, and of snapshots by tree SHA
+_local_indexes: "OrderedDict[str, LocalRelevanceIndex]" = OrderedDict()
+_snapshot_indexes: "OrderedDict[str, TermIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+_SNAPSHOT_INDEXES = 32
+
+
+def get_local_index(root: str) -> LocalRelevanceIndex:
+    key = os.path.realpath(root)
+    with _indexes_lock:
+        index = _local_indexes.get(key)
+        if index is None:
+            index = _local_indexes[key] = LocalRelevanceIndex(key)
+            while len(_local_indexes) > settings.RELEVANCE_LOCAL_INDEXES:
+                _local_indexes.popitem(last=False)
+        else:
+            _local_indexes.move_to_end(key)
+    return index
+
+
+def rank_local_files(
+    root: Optional[str], text: str, limit: Optional[int] = None, min_match: float = 0.0
+) -> List[str]:
+    """Paths under ``root`` most relevant to ``text``, best first."""
+    if not root or not os.path.isdir(root):
+        return []
+    limit = settings.MAX_FILES if limit is None else limit
+    return [path for path, _ in get_local_index(root).search(text, limit, min_match)]
+
+
+def snapshot_index(tree_sha: str, paths: Sequence[str]) -> TermIndex:
+    """Path-only term index of a repository tree, cached by tree SHA."""
+    with _indexes_lock:
+        index = _snapshot_indexes.get(tree_sha)
+        if index is not None:
+            _snapshot_indexes.move_to_end(tree_sha)
+            return index
+    index = TermIndex((path, document_terms(path)) for path in paths)
+    with _indexes_lock:
+        _snapshot_indexes[tree_sha] = index
+        while len(_snapshot_indexes) > _SNAPSHOT_INDEXES:
+            _snapshot_indexes.popitem(last=False)
+    return index
@@ -0,0 +1,236 @@
+"""Near-duplicate ticket cache.
+
+Many tickets are near-copies of each other ("Add client method to get X" for
+dozens of X). This module keeps MinHash signatures of previously estimated
+tickets in an in-memory LSH index, so a new ticket whose title + description
+is similar enough to a cached one can reuse that estimate instead of running
+the full retrieval and estimation pipeline.
+
+Lookups touch only the LSH buckets of the query signature, so their cost does
+not grow with the number of cached tickets.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .config import settings
+from .models import EstimationRequest, EstimationResponse
+from .tenants import cache_namespace
+
+log = logging.getLogger(__name__)
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Only the candidates sharing the most LSH bands are verified.
+MAX_CANDIDATES = 32
+
+_MERSENNE = (1 << 61) - 1
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _make_permutations(n: int) -> List[Tuple[int, int]]:
+    perms = []
+    for i in range(n):
+        digest = hashlib.blake2b(f"pointless-minhash-{i}".encode(), digest_size=16)
+        a = int.from_bytes(digest.digest()[:8], "little") % _MERSENNE or 1
+        b = int.from_bytes(digest.digest()[8:], "little") % _MERSENNE
+        perms.append((a, b))
+    return perms
+
+
+_PERMUTATIONS = _make_permutations(NUM_PERM)
+
+
+def tokenize(text: str) -> Set[str]:
+    """Lower-cased alphanumeric word tokens."""
+    return set(_TOKEN.findall((text or "").lower()))
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(token.encode(), digest_size=8).digest(), "little"
+    )
+
+
+def minhash(tokens: Iterable[str]) -> Tuple[int, ...]:
+    """MinHash signature of a token set (``NUM_PERM`` values)."""
+    hashes = [_token_hash(t) for t in tokens]
+    if not hashes:
+        return ()
+    return tuple(
+        min((a * h + b) % _MERSENNE for h in hashes) for a, b in _PERMUTATIONS
+    )
+
+
+def signature_similarity(left: Tuple[int, ...], right: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    if not left or not right:
+        return 0.0
+    return sum(1 for x, y in zip(left, right) if x == y) / NUM_PERM
+
+
+@dataclass
+class SimilarMatch:
+    """A cached estimate that matched a lookup."""
+
+    key: str
+    title: str
+    similarity: float
+    response: EstimationResponse
+
+
+@dataclass
+class _Entry:
+    namespace: str
+    title: str
+    signature: Tuple[int, ...]
+    response: EstimationResponse
+
+
+class SimilarityCache:
+    """Bounded MinHash/LSH index of previously estimated tickets.
+
+    Thread-safe: the sync API endpoints estimate in worker threads. Hashing
+    and scoring happen outside the lock.
+    """
+
+    def __init__(self, maxsize: int = 100_000, threshold: float = 0.8):
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, int, Tuple[int, ...]], Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _bands(signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [(i, signature[i * ROWS : (i + 1) * ROWS]) for i in range(BANDS)]
+
+    def add(
+        self, key: str, text: str, response: EstimationResponse,
+        namespace: str = "", title: str = "",
+    ) -> None:
+        """Index ``response`` under the signature of ``text``."""
+        signature = minhash(tokenize(text))
+        if not signature or self.maxsize <= 0:
+            return
+        entry = _Entry(namespace, title, signature, response.model_copy(deep=True))
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            for band, rows in self._bands(signature):
+                self._buckets.setdefault((namespace, band, rows), set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        # Called with the lock held
+        entry = self._entries.pop(key)
+        for band, rows in self._bands(entry.signature):
+            bucket_key = (entry.namespace, band, rows)
+            bucket = self._buckets.get(bucket_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[bucket_key]
+
+    def lookup(self, text: str, namespace: str = "") -> Optional[SimilarMatch]:
+        """Return the most similar cached estimate at or above the threshold."""
+        signature = minhash(tokenize(text))
+        if not signature or not self._entries:
+            return None
+
+        hits: Counter = Counter()
+        with self._lock:
+            for band, rows in self._bands(signature):
+                hits.update(self._buckets.get((namespace, band, rows), ()))
+            candidates = [(key, self._entries[key]) for key, _ in hits.most_common(MAX_CANDIDATES)]
+
+        best: Optional[SimilarMatch] = None
+        for key, entry in candidates:
+            score = signature_similarity(signature, entry.signature)
+            if score >= self.threshold and (best is None or score > best.similarity):
+                best = SimilarMatch(key, entry.title, score, entry.response)
+        if best is not None:
+            best.response = best.response.model_copy(deep=True)
+        return best
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+
+def ticket_text(req: EstimationRequest) -> str:
+    """Text used to compare tickets: title + description."""
+    return f"{req.title} {req.description or ''}"
+
+
+def ticket_namespace(req: EstimationRequest) -> str:
+    """Only requests of one tenant with the same retrieval context may share estimates.
+
+    A ticket fetched from Jira is estimated from its Jira content, which the
+    request text does not show, so its estimate is only reused for itself.
+    """
+    return "|".join(
+        [
+            cache_namespace(),
+            settings.ESTIMATOR,
+            req.codebase_context or "",
+            f"{req.github_owner}/{req.github_repo}" if req.use_github_mcp else "",
+            f"jira:{req.jira_ticket_id}" if req.use_mcp and req.jira_ticket_id else "",
+        ]
+    )
+
+
+# Global cache instance
+_similarity_cache: Optional[SimilarityCache] = None
+
+
+def get_similarity_cache() -> SimilarityCache:
+    """Get the global near-duplicate cache instance."""
+    global _similarity_cache
+    if _similarity_cache is None:
+        _similarity_cache = SimilarityCache(
+            maxsize=settings.SIMILARITY_CACHE_SIZE,
+            threshold=settings.SIMILARITY_THRESHOLD,
+        )
+    return _similarity_cache
+
+
+def lookup_similar_estimate(req: EstimationRequest) -> Optional[EstimationResponse]:
+    """Reuse a cached estimate for a near-duplicate ticket, if any."""
+    match = get_similarity_cache().lookup(ticket_text(req), ticket_namespace(req))
+    if match is None:
+        return None
+    log.info(
+        "Reusing estimate of '%s' for '%s' (similarity %.2f)",
+        match.title, req.title, match.similarity,
+    )
+    result = match.response
+    result.factors.append(
+        f"Reused estimate from similar ticket '{match.title}' "
+        f"(similarity {match.similarity:.2f})"
+    )
+    return result
+
+
+def remember_estimate(req: EstimationRequest, result: EstimationResponse) -> None:
+    """Add a freshly computed estimate to the near-duplicate cache."""
+    key = cache_namespace() + (
+        req.jira_ticket_id or hashlib.sha256(req.model_dump_json().encode()).hexdigest()
+    )
+    get_similarity_cache().add(
+        key, ticket_text(req), result, namespace=ticket_namespace(req), title=req.title
+    )
@@ -0,0 +1,397 @@
+"""Checkpointed, resumable sweeps re-estimating a whole ticket set.
+
+``pointless sweep DIR`` splits the requests into shards of
+``SWEEP_SHARD_SIZE`` and estimates them in a pool of worker processes. The
+sweep directory holds everything, so a sweep survives crashes and can be
+shared by several machines over a common filesystem::
+
+    manifest.json           shard count and size, written once when planning
+    shards/00000.in.ndjson  the shard's requests, {"id", "request"} per line
+    shards/00000.out.<owner>.ndjson
+                            its results, appended by each worker to its own file
+    shards/00000.lease      claim of the process working on it, touched per ticket
+    shards/00000.done       checkpoint: the shard is complete
+    results.ndjson          every result, merged once all shards are done
+
+A worker claims a shard by creating its lease exclusively. A lease not
+touched for ``SWEEP_LEASE_SECONDS`` belongs to a dead worker and is taken
+over; the taker checks that the lease it moved aside really was the stale
+one, and a worker whose lease was taken stops at its next heartbeat. Results
+are appended and flushed per ticket, so a resumed shard skips the tickets
+already estimated by any worker. Processing is at-least-once (a ticket may
+be estimated twice around a takeover); the merge keeps one result per ID.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .config import settings
+from .models import EstimationRequest
+
+log = logging.getLogger(__name__)
+
+_VERSION = 1
+
+
+class SweepError(RuntimeError):
+    """Raised for a sweep directory that cannot be planned or resumed."""
+
+
+def request_id(req: EstimationRequest) -> str:
+    """The Jira key, or a digest of the request for tickets without one."""
+    if req.jira_ticket_id:
+        return req.jira_ticket_id
+    return "req-" + hashlib.sha256(req.model_dump_json().encode()).hexdigest()[:16]
+
+
+def read_requests(path: str) -> Iterator[EstimationRequest]:
+    """Requests from a file with one JSON request or bare Jira key per line."""
+    with open(path, encoding="utf-8") as fh:
+        for number, line in enumerate(fh, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                try:
+                    yield EstimationRequest.model_validate_json(line)
+                except ValueError as e:
+                    raise SweepError(f"{path}:{number}: not an estimation request: {e}")
+            else:
+                yield EstimationRequest(title=line, jira_ticket_id=line, use_mcp=True)
+
+
+def _shard_path(directory: str, shard: int, suffix: str) -> str:
+    return os.path.join(directory, "shards", f"{shard:05d}.{suffix}")
+
+
+def _write_atomic(path: str, data: Dict[str, Any]) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(data, fh)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+def load_manifest(directory: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as fh:
+            manifest = json.load(fh)
+    except FileNotFoundError:
+        return None
+    if manifest.get("version") != _VERSION:
+        raise SweepError(f"{directory} was planned by an incompatible version")
+    return manifest
+
+
+def plan_sweep(
+    directory: str, requests: Iterable[EstimationRequest], shard_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """Partition ``requests`` into shard files; an existing plan is kept as is.
+
+    Shards are written to a private directory and renamed into place, so
+    machines planning the same sweep at once agree on a single plan.
+    """
+    manifest = load_manifest(directory)
+    if manifest is not None:
+        return manifest
+    shard_size = max(1, shard_size or settings.SWEEP_SHARD_SIZE)
+    staging = os.path.join(directory, f".plan-{uuid.uuid4().hex[:12]}")
+    os.makedirs(staging)
+    seen: Set[str] = set()
+    shards = total = 0
+    out = None
+    for req in requests:
+        key = request_id(req)
+        if key in seen:
+            continue
+        seen.add(key)
+        if total % shard_size == 0:
+            if out is not None:
+                out.close()
+            out = open(os.path.join(staging, f"{shards:05d}.in.ndjson"), "w", encoding="utf-8")
+            shards += 1
+        out.write(json.dumps({"id": key, "request": req.model_dump(mode="json")}) + "\n")
+        total += 1
+    if out is not None:
+        out.close()
+    try:
+        os.rename(staging, os.path.join(directory, "shards"))
+    except OSError:
+        # Another planner won the race; use its plan
+        for name in os.listdir(staging):
+            os.remove(os.path.join(staging, name))
+        os.rmdir(staging)
+        return _wait_for_manifest(directory)
+    manifest = {"version": _VERSION, "shards": shards, "shard_size": shard_size,
+                "total": total, "created_at": time.time()}
+    _write_atomic(os.path.join(directory, "manifest.json"), manifest)
+    log.info("Planned sweep of %d requests in %d shards under %s", total, shards, directory)
+    return manifest
+
+
+def _wait_for_manifest(directory: str, timeout: float = 60.0) -> Dict[str, Any]:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        manifest = load_manifest(directory)
+        if manifest is not None:
+            return manifest
+        time.sleep(0.1)
+    raise SweepError(f"{directory} has shards but no manifest")
+
+
+def _owner() -> str:
+    # Also names the worker's output files, so no path separators
+    return f"{socket.gethostname()}-{os.getpid()}".replace(os.sep, "_")
+
+
+def _lease_owner(path: str) -> Optional[str]:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return fh.read()
+    except FileNotFoundError:
+        return None
+
+
+def claim_shard(directory: str, shard: int, lease_seconds: Optional[float] = None) -> bool:
+    """Take the shard's lease; False if it is done or another live worker has it."""
+    if os.path.exists(_shard_path(directory, shard, "done")):
+        return False
+    lease = _shard_path(directory, shard, "lease")
+    lease_seconds = settings.SWEEP_LEASE_SECONDS if lease_seconds is None else lease_seconds
+    try:
+        fd = os.open(lease, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        owner = _lease_owner(lease)
+        try:
+            age = time.time() - os.stat(lease).st_mtime
+        except FileNotFoundError:
+            age = float("inf")  # released meanwhile
+        if age < lease_seconds:
+            return False
+        # Move the stale lease aside (only one worker can), then claim afresh
+        moved = f"{lease}.stale-{uuid.uuid4().hex[:8]}"
+        try:
+            os.rename(lease, moved)
+        except FileNotFoundError:
+            return claim_shard(directory, shard, lease_seconds)
+        # Another worker may have taken the shard over between our check and
+        # the rename, in which case we just moved its fresh lease: put it back
+        if _lease_owner(moved) != owner or time.time() - os.stat(moved).st_mtime < lease_seconds:
+            try:
+                os.link(moved, lease)
+            except FileExistsError:
+                pass
+            os.remove(moved)
+            return False
+        log.warning("Taking over shard %d from %s, idle for %.0fs", shard, owner, age)
+        return claim_shard(directory, shard, lease_seconds)
+    with os.fdopen(fd, "w") as fh:
+        fh.write(_owner())
+    # The shard may have finished between the check and the claim
+    if os.path.exists(_shard_path(directory, shard, "done")):
+        release_shard(directory, shard)
+        return False
+    return True
+
+
+def release_shard(directory: str, shard: int) -> None:
+    try:
+        os.remove(_shard_path(directory, shard, "lease"))
+    except FileNotFoundError:
+        pass
+
+
+def _read_results(path: str) -> Iterator[Dict[str, Any]]:
+    try:
+        fh = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with fh:
+        for line in fh:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue  # a line cut short by a crash
+
+
+def _output_paths(directory: str, shard: int) -> List[str]:
+    """Output files of every worker that has worked on the shard."""
+    prefix = f"{shard:05d}.out."
+    folder = os.path.join(directory, "shards")
+    return sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.startswith(prefix) and name.endswith(".ndjson")
+    )
+
+
+def _recover_output(path: str) -> None:
+    """Drop a torn last line from this worker's own output file."""
+    try:
+        with open(path, "rb+") as fh:
+            data = fh.read()
+            end = data.rfind(b"\n") + 1
+            if end < len(data):
+                fh.truncate(end)
+    except FileNotFoundError:
+        pass
+
+
+class LeaseLost(Exception):
+    """Raised when another worker has taken over the shard being processed."""
+
+
+async def _estimate_shard(directory: str, shard: int) -> Tuple[int, int]:
+    from .estimate import estimate_effort_async
+
+    owner = _owner()
+    out_path = _shard_path(directory, shard, f"out.{owner}.ndjson")
+    lease = _shard_path(directory, shard, "lease")
+    _recover_output(out_path)
+    # Skip what any worker has estimated, including ones that died mid-shard
+    done = {record["id"] for path in _output_paths(directory, shard) for record in _read_results(path)}
+    estimated = errors = 0
+    with open(_shard_path(directory, shard, "in.ndjson"), encoding="utf-8") as src, \
+            open(out_path, "a", encoding="utf-8") as out:
+        for line in src:
+            item = json.loads(line)
+            if item["id"] in done:
+                continue
+            record: Dict[str, Any] = {"id": item["id"]}
+            try:
+                req = EstimationRequest.model_validate(item["request"])
+                result = await estimate_effort_async(req)
+                record["estimate"] = result.model_dump(mode="json")
+                estimated += 1
+            except Exception as e:
+                log.warning("Sweep estimate of %s failed: %s", item["id"], e)
+                record["error"] = str(e)
+                errors += 1
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            if _lease_owner(lease) != owner:
+                raise LeaseLost(f"shard {shard} was taken over")
+            os.utime(lease)  # heartbeat
+        os.fsync(out.fileno())
+    return estimated, errors
+
+
+def process_shard(directory: str, shard: int) -> Tuple[int, int]:
+    """Estimate a claimed shard's remaining requests and checkpoint it."""
+    try:
+        estimated, errors = asyncio.run(_estimate_shard(directory, shard))
+    except LeaseLost:
+        # The new owner finishes it; the lease is no longer ours to release
+        log.warning("Sweep shard %d was taken over by another worker; stopping", shard)
+        return 0, 0
+    except BaseException:
+        release_shard(directory, shard)
+        raise
+    try:
+        _write_atomic(_shard_path(directory, shard, "done"), {
+            "estimated": estimated, "errors": errors, "owner": _owner(), "finished_at": time.time(),
+        })
+    finally:
+        release_shard(directory, shard)
+    log.info("Sweep shard %d done: %d estimated, %d failed", shard, estimated, errors)
+    return estimated, errors
+
+
+def _work(directory: str, worker: int, workers: int, lease_seconds: float) -> int:
+    """Worker: claim and process shards until none are left; returns shards done."""
+    shards = load_manifest(directory)["shards"]
+    # Start at a different shard per worker to avoid contending for leases
+    order = [(worker * shards // workers + i) % shards for i in range(shards)] if shards else []
+    processed = 0
+    for shard in order:
+        if claim_shard(directory, shard, lease_seconds):
+            process_shard(directory, shard)
+            processed += 1
+    return processed
+
+
+def sweep_status(directory: str) -> Dict[str, int]:
+    manifest = load_manifest(directory)
+    if manifest is None:
+        raise SweepError(f"{directory} has no sweep planned")
+    status = {"shards": manifest["shards"], "total": manifest["total"], "done": 0, "leased": 0}
+    for shard in range(manifest["shards"]):
+        if os.path.exists(_shard_path(directory, shard, "done")):
+            status["done"] += 1
+        elif os.path.exists(_shard_path(directory, shard, "lease")):
+            status["leased"] += 1
+    status["pending"] = status["shards"] - status["done"] - status["leased"]
+    return status
+
+
+def merge_results(directory: str) -> int:
+    """Write ``results.ndjson`` from every shard's output, one result per ID.
+
+    An estimate wins over an error for the same ID. Returns the row count.
+    """
+    manifest = load_manifest(directory)
+    if manifest is None:
+        raise SweepError(f"{directory} has no sweep planned")
+    merged: Dict[str, Dict[str, Any]] = {}
+    for shard in range(manifest["shards"]):
+        for out_path in _output_paths(directory, shard):
+            for record in _read_results(out_path):
+                if record["id"] not in merged or "error" in merged[record["id"]]:
+                    merged[record["id"]] = record
+    path = os.path.join(directory, "results.ndjson")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        for record in merged.values():
+            fh.write(json.dumps(record) + "\n")
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+    return len(merged)
+
+
+def run_sweep(
+    directory: str, workers: Optional[int] = None, lease_seconds: Optional[float] = None
+) -> Dict[str, Any]:
+    """Process every shard left in a planned sweep, then merge if all are done.
+
+    Shards still leased by live workers elsewhere are left to them; the run
+    that completes the last shard writes the merged results.
+    """
+    manifest = load_manifest(directory)
+    if manifest is None:
+        raise SweepError(f"{directory} has no sweep planned")
+    workers = max(1, min(workers or settings.SWEEP_WORKERS or os.cpu_count() or 1,
+                         manifest["shards"] or 1))
+    lease_seconds = settings.SWEEP_LEASE_SECONDS if lease_seconds is None else lease_seconds
+    if workers == 1:
+        processed = _work(directory, 0, 1, lease_seconds)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_work, directory, i, workers, lease_seconds) for i in range(workers)]
+            processed = sum(future.result() for future in futures)
+    status: Dict[str, Any] = dict(sweep_status(directory), processed=processed)
+    if status["done"] == status["shards"]:
+        status["results"] = merge_results(directory)
+        status["path"] = os.path.join(directory, "results.ndjson")
+    return status
+
+
+def jira_requests(jql: str, limit: int) -> List[EstimationRequest]:
+    """A request per Jira ticket matching ``jql``, estimated from its fetched fields."""
+    from .connectors.mcp_atlassian import get_mcp_client
+
+    tickets = asyncio.run(get_mcp_client().search_tickets(jql, max_results=limit))
+    return [
+        EstimationRequest(title=ticket.summary or ticket.key, jira_ticket_id=ticket.key, use_mcp=True)
+        for ticket in tickets
+    ]
@@ -0,0 +1,333 @@
+"""Tenant-scoped connectors: several Jira sites and GitHub orgs in one process.
+
+Tenants are configured in the JSON file at ``TENANTS_PATH``::
+
+    {
+      "acme": {
+        "jira": {"server_url": "https://acme.atlassian.net", "email": "bot@acme.io",
+                 "api_token": "env:ACME_JIRA_TOKEN", "requests_per_second": 10},
+        "github": {"server_url": "https://api.github.com", "token": "env:ACME_GH_TOKEN"},
+        "max_concurrency": 4
+      }
+    }
+
+``env:NAME`` values are read from the environment. The tenant of a request
+is held in a context variable (``use_tenant``), set by the API from the
+``X-Pointless-Tenant`` header and by the CLI from ``--tenant``.
+``get_mcp_client()`` and friends then return that tenant's clients, which
+have its credentials, its own concurrency and rate limits (so one busy
+tenant never queues another's calls) and a cache namespace of their own.
+
+Clients are created on first use and evicted after ``TENANT_IDLE_SECONDS``
+without use, or least recently used first beyond ``TENANT_MAX_ACTIVE``.
+Without a tenant the global settings and clients are used, as before.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, Optional
+
+from .config import settings
+from .content import Slotted
+
+log = logging.getLogger(__name__)
+
+_current_tenant: ContextVar[Optional[str]] = ContextVar("pointless_tenant", default=None)
+
+
+class UnknownTenant(KeyError):
+    """Raised for a tenant ID that is not in the tenants file."""
+
+
+def current_tenant() -> Optional[str]:
+    return _current_tenant.get()
+
+
+@contextmanager
+def use_tenant(tenant_id: Optional[str]) -> Iterator[None]:
+    """Run the block (and tasks it creates) on behalf of ``tenant_id``."""
+    token = _current_tenant.set(tenant_id or None)
+    try:
+        yield
+    finally:
+        _current_tenant.reset(token)
+
+
+def cache_namespace() -> str:
+    """Prefix for shared-cache keys holding tenant data; empty without a tenant."""
+    tenant = current_tenant()
+    return f"tenant:{tenant}:" if tenant else ""
+
+
+class RateLimiter:
+    """Concurrency cap plus token-bucket rate limit for one upstream.
+
+    ``async with limiter:`` around each upstream call. Zero disables either
+    limit. Both limits are shared by every thread and event loop (the sync
+    entry points run a fresh loop per call), so waiters are woken on their
+    own loop, as in the admission controller.
+    """
+
+    def __init__(self, max_concurrency: int = 0, rate: float = 0.0, burst: Optional[float] = None):
+        self.max_concurrency = max(0, int(max_concurrency or 0))
+        self.rate = max(0.0, float(rate or 0.0))
+        self.burst = float(burst) if burst else max(1.0, self.rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._active = 0
+        self._waiters: Deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+
+    async def _acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._active < self.max_concurrency and not self._waiters:
+                self._active += 1
+                return
+            waiter = _Waiter(loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    self._waiters.remove(waiter)
+            if granted:
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        # A freed slot goes straight to the next waiter, so it cannot be overtaken
+        with self._lock:
+            if not self._waiters:
+                self._active -= 1
+                return
+            waiter = self._waiters.popleft()
+            waiter.granted = True
+        waiter.loop.call_soon_threadsafe(_wake, waiter.future)
+
+    def _reserve(self) -> float:
+        # Take a token now, going into debt if needed; returns the wait
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1.0
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def __aenter__(self) -> "RateLimiter":
+        if self.max_concurrency:
+            await self._acquire()
+        if self.rate:
+            wait = self._reserve()
+            if wait > 0:
+                try:
+                    await asyncio.sleep(wait)
+                except asyncio.CancelledError:
+                    if self.max_concurrency:
+                        self._release()
+                    raise
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        if self.max_concurrency:
+            self._release()
+
+
+class _Waiter:
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, future: asyncio.Future):
+        self.loop = loop
+        self.future = future
+        self.granted = False
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+# Shared by the global (tenant-less) clients
+UNLIMITED = RateLimiter()
+
+
+def _resolve(value: Any) -> Any:
+    if isinstance(value, str) and value.startswith("env:"):
+        return os.environ.get(value[len("env:"):])
+    return value
+
+
+class TenantConfig(Slotted):
+    """Connector settings of one tenant, from the tenants file."""
+
+    __slots__ = ("tenant_id", "jira", "github", "max_concurrency", "requests_per_second")
+
+    def __init__(self, tenant_id: str, jira: Optional[Dict[str, Any]] = None,
+                 github: Optional[Dict[str, Any]] = None, max_concurrency: int = 0,
+                 requests_per_second: float = 0.0):
+        self.tenant_id = tenant_id
+        self.jira = {k: _resolve(v) for k, v in (jira or {}).items()}
+        self.github = {k: _resolve(v) for k, v in (github or {}).items()}
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+
+    def limiter(self, connector: Dict[str, Any]) -> RateLimiter:
+        """Limits for one connector; its own keys override the tenant's."""
+        return RateLimiter(
+            connector.get("max_concurrency", self.max_concurrency),
+            connector.get("requests_per_second", self.requests_per_second),
+        )
+
+
+def load_tenants(path: str) -> Dict[str, TenantConfig]:
+    import json
+
+    with open(path, encoding="utf-8") as fh:
+        raw = json.load(fh)
+    return {
+        tenant_id: TenantConfig(
+            tenant_id,
+            jira=entry.get("jira"),
+            github=entry.get("github"),
+            max_concurrency=entry.get("max_concurrency", settings.TENANT_MAX_CONCURRENCY),
+            requests_per_second=entry.get("requests_per_second", settings.TENANT_RATE_LIMIT),
+        )
+        for tenant_id, entry in raw.items()
+    }
+
+
+class TenantConnectors:
+    """The lazily created connector clients of one tenant."""
+
+    def __init__(self, config: TenantConfig):
+        self.config = config
+        self.last_used = time.monotonic()
+        self._jira = None
+        self._github = None
+        self._writeback = None
+
+    @property
+    def jira(self):
+        if self._jira is None:
+            from .connectors.mcp_atlassian import MCPAtlassianClient
+
+            self._jira = MCPAtlassianClient(self.config, self.config.limiter(self.config.jira))
+        return self._jira
+
+    @property
+    def github(self):
+        if self._github is None:
+            from .connectors.mcp_github import MCPGitHubClient
+
+            self._github = MCPGitHubClient(self.config, self.config.limiter(self.config.github))
+        return self._github
+
+    @property
+    def writeback(self):
+        if self._writeback is None:
+            from .connectors.mcp_atlassian import new_writeback_queue
+
+            self._writeback = new_writeback_queue(self.jira)
+        return self._writeback
+
+    @property
+    def busy(self) -> bool:
+        return self._writeback is not None and self._writeback.pending > 0
+
+    def close(self, timeout: float = 0.0) -> None:
+        if self._writeback is not None:
+            self._writeback.stop(timeout)
+
+
+class TenantRegistry:
+    """Tenant connectors by tenant ID, bounded by count and idle time."""
+
+    def __init__(self, path: str, max_active: int = 64, idle_seconds: float = 900.0):
+        self.path = path
+        self.max_active = max(1, max_active)
+        self.idle_seconds = idle_seconds
+        self.configs = load_tenants(path)
+        self._active: "OrderedDict[str, TenantConnectors]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, tenant_id: str) -> bool:
+        return tenant_id in self.configs
+
+    @property
+    def active(self) -> int:
+        return len(self._active)
+
+    def get(self, tenant_id: str) -> TenantConnectors:
+        config = self.configs.get(tenant_id)
+        if config is None:
+            raise UnknownTenant(tenant_id)
+        now = time.monotonic()
+        with self._lock:
+            connectors = self._active.get(tenant_id)
+            if connectors is None:
+                connectors = self._active[tenant_id] = TenantConnectors(config)
+                log.info("Created connectors for tenant %s", tenant_id)
+            connectors.last_used = now
+            self._active.move_to_end(tenant_id)
+            evicted = self._evict(now)
+        for old in evicted:
+            old.close()
+        return connectors
+
+    def _evict(self, now: float) -> list:
+        # Idle ones first, then the least recently used beyond max_active;
+        # tenants with writes still queued are kept
+        evicted = []
+        for tenant_id, connectors in list(self._active.items())[:-1]:
+            over = len(self._active) > self.max_active
+            idle = now - connectors.last_used > self.idle_seconds
+            if (over or idle) and not connectors.busy:
+                evicted.append(self._active.pop(tenant_id))
+                log.info("Evicted connectors of tenant %s", tenant_id)
+        return evicted
+
+    def close(self, timeout: float = 0.0) -> None:
+        with self._lock:
+            active, self._active = list(self._active.values()), OrderedDict()
+        for connectors in active:
+            connectors.close(timeout)
+
+
+# Global registry instance
+_registry: Optional[TenantRegistry] = None
+
+
+def get_tenant_registry() -> Optional[TenantRegistry]:
+    """The registry for ``TENANTS_PATH``, or None when tenants are not configured."""
+    global _registry
+    path = settings.TENANTS_PATH
+    if not path:
+        return None
+    if _registry is None or _registry.path != path:
+        _registry = TenantRegistry(
+            path,
+            max_active=settings.TENANT_MAX_ACTIVE,
+            idle_seconds=settings.TENANT_IDLE_SECONDS,
+        )
+    return _registry
+
+
+def tenant_connectors() -> Optional[TenantConnectors]:
+    """Connectors of the current tenant, or None outside of any tenant."""
+    tenant = current_tenant()
+    if tenant is None:
+        return None
+    registry = get_tenant_registry()
+    if registry is None:
+        raise UnknownTenant(tenant)
+    return registry.get(tenant)
@@ -0,0 +1,169 @@
+"""API warm-up before the server reports ready.
+
+With ``WARMUP_ENABLED`` the API lifespan starts a background warm-up: it
+creates the connector clients, imports the modules that are otherwise
+imported on first use, opens the estimator's backing stores, fetches
+snapshots of the ``WARMUP_REPOS`` GitHub repositories and caches the Jira
+tickets matching ``WARMUP_JIRA_JQL``. ``/healthz`` answers 503 until the
+warm-up has finished or ``WARMUP_TIMEOUT`` has passed, so a rolling deploy
+only routes traffic to warm instances. A failing step is logged and skipped;
+it never keeps the instance from becoming ready.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import logging
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from .config import settings
+
+log = logging.getLogger(__name__)
+
+# Imported lazily elsewhere (to avoid cycles or startup cost)
+PRELOAD_MODULES = (
+    "pointless.core.codesearch",
+    "pointless.core.relevance",
+    "pointless.core.analysis.repo",
+    "pointless.core.webhooks",
+)
+
+
+def hot_repositories(spec: Optional[str]) -> List[Tuple[str, str]]:
+    """``"owner/repo,..."`` to ``[(owner, repo), ...]``; malformed entries are skipped."""
+    repos = []
+    for part in (spec or "").split(","):
+        owner, _, repo = part.strip().partition("/")
+        if owner and repo:
+            repos.append((owner, repo))
+    return repos
+
+
+def _open_backends() -> None:
+    # Blocking: imports, index and database opens; run in a worker thread
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name)
+    from .connectors.mcp_atlassian import get_mcp_client
+    from .connectors.mcp_github import get_github_mcp_client
+
+    get_mcp_client()
+    get_github_mcp_client()
+    if settings.ESTIMATOR == "knn":
+        from .estimators.knn import get_history_index
+
+        get_history_index()
+    elif settings.ESTIMATOR == "llm":
+        from .estimators.llm import get_prompt_cache, get_provider
+
+        get_provider()
+        get_prompt_cache()
+    if settings.CALIBRATION_ENABLED:
+        from .calibration import get_calibration_store
+
+        get_calibration_store()
+    if settings.SIMILARITY_CACHE_ENABLED:
+        from .similarity import get_similarity_cache
+
+        get_similarity_cache()
+
+
+async def _prefetch_repositories() -> None:
+    from .connectors.mcp_github import get_github_mcp_client
+    from .relevance import snapshot_index
+
+    client = get_github_mcp_client()
+
+    async def prefetch(owner: str, repo: str) -> None:
+        snapshot = await client.get_snapshot(owner, repo)
+        if snapshot is not None:
+            snapshot_index(f"{snapshot.repository.full_name}@{snapshot.tree_sha}", snapshot.paths)
+
+    await asyncio.gather(*(prefetch(o, r) for o, r in hot_repositories(settings.WARMUP_REPOS)))
+
+
+async def _prefetch_tickets() -> None:
+    if not settings.WARMUP_JIRA_JQL:
+        return
+    from .connectors.mcp_atlassian import prime_jira_tickets
+
+    count = await prime_jira_tickets(settings.WARMUP_JIRA_JQL, settings.WARMUP_JIRA_MAX)
+    log.info("Warm-up cached %d Jira tickets", count)
+
+
+class WarmUp:
+    """State of the warm-up; ``ready`` once it finished, failed or timed out."""
+
+    def __init__(self) -> None:
+        self.status = "idle"  # idle, running, ready, timeout
+        self.duration: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        if self.status == "idle":
+            # Never started: only ready if it is not expected to run
+            return not settings.WARMUP_ENABLED
+        return self.status in ("ready", "timeout")
+
+    async def _step(self, name: str, step: Callable[[], Awaitable[None]]) -> None:
+        start = time.perf_counter()
+        try:
+            await step()
+        except Exception as e:
+            log.warning("Warm-up step %s failed: %s", name, e)
+            return
+        log.info("Warm-up step %s took %.0f ms", name, (time.perf_counter() - start) * 1000)
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        steps = (
+            ("backends", lambda: loop.run_in_executor(None, _open_backends)),
+            ("repositories", _prefetch_repositories),
+            ("tickets", _prefetch_tickets),
+        )
+        await self._step(*steps[0])
+        # Both prefetches only need the clients created above
+        await asyncio.gather(*(self._step(*step) for step in steps[1:]))
+
+    async def _run_with_timeout(self, timeout: float) -> None:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.run(), timeout)
+            self.status = "ready"
+        except asyncio.TimeoutError:
+            self.status = "timeout"
+            log.warning("Warm-up did not finish within %.0fs; reporting ready anyway", timeout)
+        self.duration = time.perf_counter() - start
+        log.info("Warm-up %s after %.0f ms", self.status, self.duration * 1000)
+
+    def start(self, timeout: Optional[float] = None) -> asyncio.Task:
+        """Run the warm-up in the background on the current loop."""
+        self.status = "running"
+        timeout = settings.WARMUP_TIMEOUT if timeout is None else timeout
+        self._task = asyncio.create_task(self._run_with_timeout(float(timeout)))
+        return self._task
+
+    async def wait(self) -> None:
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self.status = "idle"
+
+
+# Global warm-up instance
+_warmup: Optional[WarmUp] = None
+
+
+def get_warmup() -> WarmUp:
+    """Get the global warm-up state."""
+    global _warmup
+    if _warmup is None:
+        _warmup = WarmUp()
+    return _warmup
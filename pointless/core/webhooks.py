@@ -0,0 +1,218 @@
+"""Background re-estimation from Jira webhooks.
+
+``POST /webhooks/jira`` hands issue events to a ``WebhookProcessor`` on the
+API event loop. Bursts of edits to one ticket are debounced: the estimate is
+recomputed once the ticket has been quiet for ``WEBHOOK_DEBOUNCE_SECONDS``
+(or at the latest ``WEBHOOK_MAX_DELAY_SECONDS`` after the first edit), from
+the ticket content carried in the payload, and written to the estimate
+store. Events that leave the estimated fields unchanged are not recomputed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .config import settings
+from .connectors.mcp_atlassian import JiraTicket
+from .estimate import estimate_ticket_async
+from .models import WebhookAck
+from .precompute import EstimateStore, content_version, get_estimate_store
+
+log = logging.getLogger(__name__)
+
+UPSERT_EVENTS = frozenset({"jira:issue_created", "jira:issue_updated"})
+DELETE_EVENTS = frozenset({"jira:issue_deleted"})
+
+
+def verify_signature(secret: str, body: bytes, header: Optional[str]) -> bool:
+    """Check an ``X-Hub-Signature: sha256=<hex>`` HMAC of the raw body."""
+    if not header or not header.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, header[len("sha256="):])
+
+
+def _name(value: Any) -> str:
+    # status, priority and issuetype are objects with a "name"
+    if isinstance(value, dict):
+        return value.get("name") or ""
+    return value or ""
+
+
+def _text(value: Any) -> str:
+    # Descriptions are plain text or, in newer payloads, Atlassian Document Format
+    if isinstance(value, dict):
+        if value.get("type") == "text":
+            return value.get("text", "")
+        parts = [_text(child) for child in value.get("content", [])]
+        separator = "\n" if value.get("type") in ("doc", "bulletList", "orderedList") else ""
+        return separator.join(p for p in parts if p)
+    return value or ""
+
+
+def ticket_from_payload(payload: Dict[str, Any]) -> Optional[Tuple[JiraTicket, List[str]]]:
+    """The ticket and its labels from a Jira issue event, if it has one."""
+    issue = payload.get("issue") or {}
+    key = issue.get("key")
+    if not key:
+        return None
+    fields = issue.get("fields") or {}
+    ticket = JiraTicket(
+        key=key,
+        summary=fields.get("summary") or "",
+        description=_text(fields.get("description")),
+        status=_name(fields.get("status")),
+        priority=_name(fields.get("priority")),
+        issue_type=_name(fields.get("issuetype")),
+        labels=fields.get("labels"),
+    )
+    return ticket, ticket.labels
+
+
+@dataclass
+class _Pending:
+    ticket: JiraTicket
+    labels: List[str]
+    first_seen: float
+    deadline: float
+
+
+class WebhookProcessor:
+    """Debounces ticket events and recomputes estimates in the background."""
+
+    def __init__(
+        self,
+        debounce: float = 5.0,
+        max_delay: float = 60.0,
+        concurrency: int = 2,
+        store: Optional[EstimateStore] = None,
+    ):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.concurrency = concurrency
+        self._store = store
+        self._pending: Dict[str, _Pending] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        # Bumped on every event, so a slow recompute never overwrites the
+        # result of a newer one
+        self._generation: Dict[str, int] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def store(self) -> EstimateStore:
+        return self._store or get_estimate_store()
+
+    @property
+    def running(self) -> bool:
+        return self._semaphore is not None
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    async def start(self) -> None:
+        if not self.running:
+            self._semaphore = asyncio.Semaphore(max(1, self.concurrency))
+
+    async def stop(self) -> None:
+        """Drop pending events and cancel recomputes in progress."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._pending.clear()
+        self._generation.clear()
+        self._semaphore = None
+
+    async def drain(self) -> None:
+        """Wait until every pending event has been processed."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def handle(self, payload: Dict[str, Any]) -> WebhookAck:
+        """Route one webhook payload."""
+        event = payload.get("webhookEvent") or ""
+        parsed = ticket_from_payload(payload)
+        if parsed is None or event not in UPSERT_EVENTS | DELETE_EVENTS:
+            return WebhookAck(event=event, status="ignored")
+        ticket, labels = parsed
+        if event in DELETE_EVENTS:
+            self.forget(ticket.key)
+            return WebhookAck(event=event, ticket_id=ticket.key, status="deleted")
+        status = self.submit(ticket, labels)
+        return WebhookAck(event=event, ticket_id=ticket.key, status=status)
+
+    def submit(self, ticket: JiraTicket, labels: List[str]) -> str:
+        """Schedule a recompute for the ticket; returns the ack status."""
+        key = ticket.key
+        now = asyncio.get_running_loop().time()
+        self._generation[key] = self._generation.get(key, 0) + 1
+        entry = self._pending.get(key)
+        if entry is not None:
+            entry.ticket, entry.labels = ticket, labels
+            entry.deadline = now + self.debounce
+            return "scheduled"
+        if self.store.get(key, content_version(ticket, labels)) is not None:
+            return "unchanged"
+        entry = self._pending[key] = _Pending(ticket, labels, now, now + self.debounce)
+        task = asyncio.create_task(self._debounced(entry))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return "scheduled"
+
+    def forget(self, ticket_id: str) -> None:
+        self._generation[ticket_id] = self._generation.get(ticket_id, 0) + 1
+        self._pending.pop(ticket_id, None)
+        self.store.delete(ticket_id)
+
+    async def _debounced(self, entry: _Pending) -> None:
+        key = entry.ticket.key
+        loop = asyncio.get_running_loop()
+        while True:
+            if self._pending.get(key) is not entry:
+                return  # forgotten (ticket deleted)
+            wait = min(entry.deadline, entry.first_seen + self.max_delay) - loop.time()
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+        del self._pending[key]
+        # Later events start a new debounce window while this one computes
+        await self._recompute(entry.ticket, entry.labels, self._generation[key])
+
+    async def _recompute(self, ticket: JiraTicket, labels: List[str], generation: int) -> None:
+        if self._semaphore is None:
+            await self.start()
+        async with self._semaphore:
+            try:
+                result = await estimate_ticket_async(ticket, labels)
+            except Exception as e:
+                log.warning("Background estimate for %s failed: %s", ticket.key, e)
+                return
+        if self._generation.get(ticket.key) != generation:
+            return  # superseded by a newer event
+        self.store.put(ticket.key, content_version(ticket, labels), result)
+        if ticket.key not in self._pending:
+            self._generation.pop(ticket.key, None)
+        log.info("Precomputed estimate for %s: %.1fh", ticket.key, result.estimated_hours)
+
+
+# Global processor instance
+_processor: Optional[WebhookProcessor] = None
+
+
+def get_webhook_processor() -> WebhookProcessor:
+    """Get the global webhook processor instance."""
+    global _processor
+    if _processor is None:
+        _processor = WebhookProcessor(
+            debounce=settings.WEBHOOK_DEBOUNCE_SECONDS,
+            max_delay=settings.WEBHOOK_MAX_DELAY_SECONDS,
+            concurrency=settings.WEBHOOK_CONCURRENCY,
+        )
+    return _processor
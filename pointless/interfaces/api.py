@@ -1,17 +1,117 @@
 from __future__ import annotations
 
-import logging
+import asyncio
+import contextvars
+import json
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional, Tuple
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.datastructures import Headers
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from .. import __version__
-from ..core.estimate import estimate_effort
-from ..core.models import EstimationRequest, EstimationResponse, HealthResponse
+from ..core.admission import Overloaded, get_admission_controller
+from ..core.calibration import get_calibration_store, record_actual
+from ..core.connectors.mcp_atlassian import get_writeback_queue
+from ..core.estimate import (
+    estimate_effort,
+    estimate_effort_async,
+    estimate_effort_progressive,
+    ticket_estimate,
+)
+from ..core.jobs import JobQueueFull, get_job_manager
+from ..core.logs import configure_logging
+from ..core.precompute import estimate_etag, etag_matches
+from ..core.profiling import Profile, ProfilerBusy, profile
+from ..core.tenants import get_tenant_registry, use_tenant
+from ..core.models import (
+    ActualRecord,
+    CalibrationStats,
+    EstimationRequest,
+    EstimationResponse,
+    HealthResponse,
+    JobInfo,
+    WebhookAck,
+)
 from ..core.config import settings
+from ..core.warmup import get_warmup
+from ..core.webhooks import get_webhook_processor, verify_signature
 
-logging.basicConfig(level=logging.INFO)
-app = FastAPI(title="Pointless API", version=__version__)
+configure_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    jobs = get_job_manager()
+    webhooks = get_webhook_processor()
+    warmup = get_warmup()
+    await jobs.start()
+    await webhooks.start()
+    if settings.WARMUP_ENABLED:
+        warmup.start()
+    yield
+    await warmup.stop()
+    await webhooks.stop()
+    await jobs.stop()
+    loop = asyncio.get_running_loop()
+    if settings.JIRA_WRITEBACK_ENABLED:
+        # Blocking join of the write-back thread; keep it off the event loop
+        await loop.run_in_executor(
+            None, get_writeback_queue().stop, settings.JIRA_WRITEBACK_DRAIN_TIMEOUT
+        )
+    registry = get_tenant_registry()
+    if registry is not None:
+        await loop.run_in_executor(None, registry.close, settings.JIRA_WRITEBACK_DRAIN_TIMEOUT)
+
+
+app = FastAPI(title="Pointless API", version=__version__, lifespan=lifespan)
+
+
+class AdmissionMiddleware:
+    """Runs estimation requests through the admission controller.
+
+    The lane comes from the ``X-Pointless-Priority`` header (default
+    ``ADMISSION_DEFAULT_LANE``). A plain ASGI middleware, so a streamed
+    estimate holds its slot until the last event is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        controller = get_admission_controller()
+        if controller is None or scope["type"] != "http" or not scope["path"].startswith("/estimate"):
+            await self.app(scope, receive, send)
+            return
+        lane = Headers(scope=scope).get("x-pointless-priority")
+        try:
+            async with controller.slot(lane):
+                await self.app(scope, receive, send)
+        except Overloaded as e:
+            response = JSONResponse(
+                {"detail": str(e)}, status_code=429, headers={"Retry-After": str(e.retry_after)}
+            )
+            await response(scope, receive, send)
+
+
+app.add_middleware(AdmissionMiddleware)
+
+
+@app.middleware("http")
+async def tenant_scope(request: Request, call_next):
+    """Serve the request for the tenant named in ``X-Pointless-Tenant``."""
+    tenant = request.headers.get("x-pointless-tenant")
+    if not tenant:
+        return await call_next(request)
+    registry = get_tenant_registry()
+    if registry is None:
+        return JSONResponse({"detail": "Tenants are not configured"}, status_code=400)
+    if tenant not in registry:
+        return JSONResponse({"detail": "Unknown tenant"}, status_code=404)
+    with use_tenant(tenant):
+        return await call_next(request)
 
 
 @app.get("/")
@@ -28,15 +128,189 @@ def root():
 
 
 @app.get("/healthz", response_model=HealthResponse)
-def healthz() -> HealthResponse:
+def healthz(response: Response) -> HealthResponse:
+    """Readiness: 503 while the startup warm-up is still running."""
     ts = (
         datetime.now(timezone.utc)
         .isoformat(timespec="seconds")
         .replace("+00:00", "Z")
     )
+    if not get_warmup().ready:
+        response.status_code = 503
+        return HealthResponse(status="warming_up", version=__version__, timestamp=ts, ready=False)
     return HealthResponse(status="healthy", version=__version__, timestamp=ts)
 
 
 @app.post("/estimate", response_model=EstimationResponse)
-def estimate(req: EstimationRequest) -> EstimationResponse:
-    return estimate_effort(req)
+async def estimate(
+    req: EstimationRequest,
+    response: Response,
+    x_pointless_profile: Optional[str] = Header(default=None),
+):
+    """Estimate a task.
+
+    Runs on the server's event loop, so concurrent requests share the Jira
+    micro-batcher (and its upstream requests) instead of each starting a
+    loop of its own.
+
+    With ``PROFILING_ENABLED``, an ``X-Pointless-Profile`` header profiles
+    this request: ``inline`` returns the collapsed stacks next to the
+    estimate, any other value writes them under ``PROFILE_DIR``.
+    """
+    if not (x_pointless_profile and settings.PROFILING_ENABLED):
+        return await estimate_effort_async(req)
+    try:
+        # The profiler samples one thread, so the profiled estimate gets its own
+        result, prof = await asyncio.get_running_loop().run_in_executor(
+            None, contextvars.copy_context().run, _profiled_estimate, req
+        )
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if x_pointless_profile.strip().lower() == "inline":
+        return JSONResponse({"estimate": result.model_dump(mode="json"), "profile": prof.summary()})
+    prof.write()
+    response.headers["X-Pointless-Profile-Id"] = prof.id
+    return result
+
+
+def _profiled_estimate(req: EstimationRequest) -> Tuple[EstimationResponse, Profile]:
+    with profile() as prof:
+        result = estimate_effort(req)
+    return result, prof
+
+
+async def _estimate_events(req: EstimationRequest) -> AsyncIterator[str]:
+    event_id = 0
+    async for stage, result in estimate_effort_progressive(req):
+        event_id += 1
+        event = stage if stage in ("initial", "final") else "refined"
+        data = json.dumps({"stage": stage, "estimate": result.model_dump(mode="json")})
+        yield f"id: {event_id}\nevent: {event}\ndata: {data}\n\n"
+
+
+def _event_stream(req: EstimationRequest) -> StreamingResponse:
+    return StreamingResponse(
+        _estimate_events(req),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/estimate/stream")
+def estimate_stream_get(
+    title: str = Query(...),
+    description: str = "",
+    jira_ticket_id: Optional[str] = None,
+    tags: List[str] = Query(default=[]),
+    team: Optional[str] = None,
+    codebase_context: Optional[str] = None,
+    use_mcp: bool = False,
+    github_owner: Optional[str] = None,
+    github_repo: Optional[str] = None,
+    use_github_mcp: bool = False,
+) -> StreamingResponse:
+    """Server-Sent Events: initial estimate, one refinement per source, final."""
+    req = EstimationRequest(
+        title=title,
+        description=description,
+        jira_ticket_id=jira_ticket_id,
+        tags=tags,
+        team=team,
+        codebase_context=codebase_context,
+        use_mcp=use_mcp,
+        github_owner=github_owner,
+        github_repo=github_repo,
+        use_github_mcp=use_github_mcp,
+    )
+    return _event_stream(req)
+
+
+@app.post("/estimate/stream")
+def estimate_stream_post(req: EstimationRequest) -> StreamingResponse:
+    """Server-Sent Events for a JSON request body (see GET /estimate/stream)."""
+    return _event_stream(req)
+
+
+@app.get("/estimate/{jira_ticket_id}", response_model=EstimationResponse)
+async def ticket_estimate_get(
+    jira_ticket_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
+):
+    """Latest estimate for a Jira ticket; supports conditional requests."""
+    found = await ticket_estimate(jira_ticket_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    version, result = found
+    headers = {
+        "ETag": estimate_etag(version),
+        # Shared caches may keep it, but separately per tenant
+        "Cache-Control": f"public, max-age={settings.ESTIMATE_MAX_AGE}, must-revalidate",
+        "Vary": "X-Pointless-Tenant",
+    }
+    if etag_matches(headers["ETag"], if_none_match):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return result
+
+
+@app.post("/jobs/estimate", response_model=JobInfo, status_code=202)
+async def submit_estimate_job(req: EstimationRequest) -> JobInfo:
+    """Queue an estimate and return its job ID immediately."""
+    try:
+        job = await get_job_manager().submit(req)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return job.info()
+
+
+# The job endpoints are async so they run on the loop that owns the job tasks
+@app.get("/jobs/{job_id}", response_model=JobInfo)
+async def get_estimate_job(job_id: str) -> JobInfo:
+    """Job status, including the final estimate once it has succeeded."""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job.info()
+
+
+@app.delete("/jobs/{job_id}", response_model=JobInfo)
+async def cancel_estimate_job(job_id: str) -> JobInfo:
+    """Cancel a queued or running job."""
+    job = get_job_manager().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job.info()
+
+
+@app.post("/webhooks/jira", response_model=WebhookAck, status_code=202)
+async def jira_webhook(request: Request) -> WebhookAck:
+    """Jira issue events; edited tickets are re-estimated in the background."""
+    if not settings.WEBHOOKS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    body = await request.body()
+    if settings.WEBHOOK_SECRET and not verify_signature(
+        settings.WEBHOOK_SECRET, body, request.headers.get("X-Hub-Signature")
+    ):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Webhook body is not JSON")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Webhook body is not a JSON object")
+    processor = get_webhook_processor()
+    if not processor.running:
+        await processor.start()
+    return processor.handle(payload)
+
+
+@app.post("/calibration/actuals", response_model=List[CalibrationStats])
+def record_actuals(record: ActualRecord) -> List[CalibrationStats]:
+    """Record actual hours for a past estimate; returns the updated buckets."""
+    return record_actual(record)
+
+
+@app.get("/calibration", response_model=List[CalibrationStats])
+def calibration_summary() -> List[CalibrationStats]:
+    return get_calibration_store().summaries()
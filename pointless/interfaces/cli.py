@@ -6,10 +6,32 @@ from typing import List
 import typer
 
 from pointless import __version__
+from pointless.core.analysis import analyze_repo, complexity_indicators, get_metrics_store
+from pointless.core.calibration import get_calibration_store, record_actual
+from pointless.core.codesearch import get_code_index
 from pointless.core.estimate import estimate_effort
-from pointless.core.models import EstimationRequest
+from pointless.core.estimators.knn import build_history_index, history_dir
+from pointless.core.models import ActualRecord, EstimationRequest
+from pointless.core.profiling import profile as profile_block
+from pointless.core.sweep import jira_requests, load_manifest, plan_sweep, read_requests, run_sweep
+from pointless.core.tenants import get_tenant_registry, use_tenant
 
 app = typer.Typer(help="Pointless: AI effort estimates")
+calibration_app = typer.Typer(help="Record actuals and inspect calibration")
+app.add_typer(calibration_app, name="calibration")
+history_app = typer.Typer(help="Manage the completed-ticket history for the kNN estimator")
+app.add_typer(history_app, name="history")
+search_app = typer.Typer(help="Local trigram code search over checked-out repositories")
+app.add_typer(search_app, name="search")
+
+
+def _tenant_scope(tenant: str):
+    """``use_tenant`` for a ``--tenant`` option, rejecting unknown tenants."""
+    if tenant:
+        registry = get_tenant_registry()
+        if registry is None or tenant not in registry:
+            raise typer.BadParameter(f"unknown tenant {tenant!r}", param_hint="--tenant")
+    return use_tenant(tenant or None)
 
 
 @app.command("estimate")
@@ -19,27 +41,161 @@ def estimate_cmd(
     jira: str = typer.Option("", "--jira", "-j", help="Jira ticket ID (optional)"),
     tags: List[str] = typer.Option(None, "--tag", "-t", help="Repeatable tag, e.g. -t urgent"),
     repo: str = typer.Option("", "--repo", "-r", help="Local repo path to scan (optional)"),
+    team: str = typer.Option("", "--team", help="Owning team, used for calibration"),
     use_mcp: bool = typer.Option(False, "--mcp", help="Use MCP to retrieve Jira ticket data"),
     github_owner: str = typer.Option("", "--github-owner", help="GitHub repository owner"),
     github_repo: str = typer.Option("", "--github-repo", help="GitHub repository name"),
     use_github_mcp: bool = typer.Option(False, "--github-mcp", help="Use GitHub MCP for codebase analysis"),
+    profile: bool = typer.Option(False, "--profile", help="Write CPU and allocation collapsed stacks"),
+    profile_out: str = typer.Option("", "--profile-out", help="Profile directory (default: DATA_DIR/profiles)"),
+    tenant: str = typer.Option("", "--tenant", help="Tenant whose Jira and GitHub connectors to use"),
 ) -> None:
-    """Estimate from CLI; prints JSON to stdout."""
+    """Estimate from CLI; prints JSON to stdout (profile file paths go to stderr)."""
+    scope = _tenant_scope(tenant)
     req = EstimationRequest(
         title=title,
         description=description,
         jira_ticket_id=jira or None,
         tags=tags or [],
+        team=team or None,
         codebase_context=repo or None,
         use_mcp=use_mcp,
         github_owner=github_owner or None,
         github_repo=github_repo or None,
         use_github_mcp=use_github_mcp,
     )
-    res = estimate_effort(req)
+    with scope:
+        if profile:
+            with profile_block() as prof:
+                res = estimate_effort(req)
+            for kind, path in prof.write(profile_out or None).items():
+                typer.echo(f"{kind} profile: {path}", err=True)
+        else:
+            res = estimate_effort(req)
     typer.echo(json.dumps(res.model_dump(), indent=2))
 
 
+@calibration_app.command("record")
+def calibration_record_cmd(
+    estimated_hours: float = typer.Argument(..., help="Uncalibrated estimate in hours"),
+    actual_hours: float = typer.Argument(..., help="Actual hours spent"),
+    team: str = typer.Option("", "--team", help="Owning team"),
+    project: str = typer.Option("", "--project", "-p", help="Project key (defaults to the Jira project)"),
+    jira: str = typer.Option("", "--jira", "-j", help="Jira ticket ID (optional)"),
+    tenant: str = typer.Option("", "--tenant", help="Tenant whose data to use"),
+) -> None:
+    """Record actual hours against a past estimate; prints updated buckets."""
+    record = ActualRecord(
+        estimated_hours=estimated_hours,
+        actual_hours=actual_hours,
+        team=team or None,
+        project=project or None,
+        jira_ticket_id=jira or None,
+    )
+    with _tenant_scope(tenant):
+        stats = record_actual(record)
+    typer.echo(json.dumps([s.model_dump() for s in stats], indent=2))
+
+
+@calibration_app.command("show")
+def calibration_show_cmd(
+    tenant: str = typer.Option("", "--tenant", help="Tenant whose data to use"),
+) -> None:
+    """Print running calibration statistics for every bucket."""
+    with _tenant_scope(tenant):
+        stats = get_calibration_store().summaries()
+    typer.echo(json.dumps([s.model_dump() for s in stats], indent=2))
+
+
+@history_app.command("build")
+def history_build_cmd(
+    source: str = typer.Argument(..., help="NDJSON file with title, description, hours per ticket"),
+    dim: int = typer.Option(256, "--dim", help="Embedding dimensions"),
+    tenant: str = typer.Option("", "--tenant", help="Tenant whose data to use"),
+) -> None:
+    """(Re)build the memory-mapped history index used by POINTLESS_ESTIMATOR=knn."""
+    with _tenant_scope(tenant):
+        index_dir = history_dir()
+    rows = build_history_index(source, index_dir, dim=dim)
+    typer.echo(f"Indexed {rows} tickets into {index_dir}")
+
+
+@search_app.command("index")
+def search_index_cmd(
+    path: str = typer.Argument(..., help="Local checkout to index"),
+) -> None:
+    """Build or incrementally update the code search index of a checkout."""
+    index = get_code_index(path, refresh=False)
+    changed = index.update()
+    typer.echo(f"Indexed {changed} changed files ({len(index.docs)} files total) into {index.index_dir}")
+
+
+@search_app.command("query")
+def search_query_cmd(
+    path: str = typer.Argument(..., help="Local checkout to search"),
+    pattern: str = typer.Argument(..., help="Literal text, or a regex with --regex"),
+    regex: bool = typer.Option(False, "--regex", "-e", help="Treat PATTERN as a regular expression"),
+    case_sensitive: bool = typer.Option(False, "--case-sensitive", "-s"),
+    max_results: int = typer.Option(10, "--max", help="Maximum number of files"),
+) -> None:
+    """Search a checkout, densest matches first."""
+    results = get_code_index(path).search(
+        pattern, regex=regex, case_sensitive=case_sensitive, max_results=max_results
+    )
+    for item in results:
+        typer.echo(item.path)
+        for line in item.content.splitlines():
+            typer.echo(f"  {line}")
+
+
+@app.command("analyze")
+def analyze_cmd(
+    path: str = typer.Argument(..., help="Local repository to analyze"),
+    workers: int = typer.Option(0, "--workers", "-w", help="Parser processes (0: one per CPU)"),
+    top: int = typer.Option(10, "--top", help="Number of most complex files to list"),
+) -> None:
+    """Compute per-file complexity metrics for a local repository."""
+    analysis = analyze_repo(path, workers=workers or None, store=get_metrics_store())
+    hotspots = sorted(analysis.files.values(), key=lambda m: m.max_complexity, reverse=True)
+    typer.echo(json.dumps({
+        "files": len(analysis.files),
+        "lines": analysis.total_lines,
+        "languages": analysis.languages,
+        "complexity_indicators": complexity_indicators(analysis),
+        "hotspots": [
+            {
+                "path": m.path,
+                "max_complexity": m.max_complexity,
+                "functions": m.functions,
+                "fan_in": m.fan_in,
+                "fan_out": m.fan_out,
+                "score": m.score,
+            }
+            for m in hotspots[:top]
+        ],
+    }, indent=2))
+
+
+@app.command("sweep")
+def sweep_cmd(
+    directory: str = typer.Argument(..., help="Sweep directory (shared by every machine in the sweep)"),
+    source: str = typer.Option("", "--input", "-i", help="File with a JSON request or Jira key per line"),
+    jql: str = typer.Option("", "--jql", help="Estimate the Jira tickets matching this query"),
+    max_tickets: int = typer.Option(10000, "--max-tickets", help="Maximum tickets fetched for --jql"),
+    shard_size: int = typer.Option(0, "--shard-size", help="Requests per shard (0: POINTLESS_SWEEP_SHARD_SIZE)"),
+    workers: int = typer.Option(0, "--workers", "-w", help="Worker processes (0: POINTLESS_SWEEP_WORKERS)"),
+) -> None:
+    """Re-estimate a ticket set in checkpointed shards; rerun to resume."""
+    if load_manifest(directory) is None:
+        if bool(source) == bool(jql):
+            raise typer.BadParameter("a new sweep needs exactly one of --input or --jql")
+        requests = read_requests(source) if source else jira_requests(jql, max_tickets)
+        plan_sweep(directory, requests, shard_size or None)
+    elif source or jql:
+        typer.echo(f"Resuming the sweep planned in {directory}; --input/--jql ignored", err=True)
+    typer.echo(json.dumps(run_sweep(directory, workers=workers or None), indent=2))
+
+
 @app.command("version")
 def version_cmd() -> None:
     """Print version and exit."""
@@ -0,0 +1,127 @@
+"""Tests for admission control and priority lanes."""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from pointless.core import admission as admission_module
+from pointless.core.admission import AdmissionController, Overloaded, parse_lanes
+from pointless.interfaces.api import app
+
+
+async def _hold(controller, lane, order, release, bounded=True):
+    async with controller.slot(lane, bounded):
+        order.append(lane)
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_slots_are_shared_by_weight():
+    """Test freed slots go to waiting lanes in proportion to their weights."""
+    controller = AdmissionController(1, parse_lanes("interactive:4:100,batch:1:100"))
+    order = []
+
+    async def work(lane):
+        async with controller.slot(lane):
+            order.append(lane)
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(work(lane) for lane in ["batch"] * 10 + ["interactive"] * 10))
+
+    assert order[1:6].count("interactive") >= 4
+    assert controller.stats()["batch"]["admitted"] == 10
+
+
+@pytest.mark.asyncio
+async def test_full_lane_is_rejected_with_retry_after():
+    """Test a request is refused at once when its lane's queue is full."""
+    controller = AdmissionController(1, parse_lanes("interactive:4:1,batch:1:0"))
+    release = asyncio.Event()
+    order = []
+    running = asyncio.ensure_future(_hold(controller, "interactive", order, release))
+    queued = asyncio.ensure_future(_hold(controller, "interactive", order, release))
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(Overloaded) as excinfo:
+        async with controller.slot("interactive"):
+            pass
+    with pytest.raises(Overloaded):
+        async with controller.slot("batch"):
+            pass
+    unbounded = asyncio.ensure_future(_hold(controller, "batch", order, release, bounded=False))
+    await asyncio.sleep(0.01)
+    release.set()
+    await asyncio.gather(running, queued, unbounded)
+
+    assert excinfo.value.retry_after >= 1
+    assert order == ["interactive", "interactive", "batch"]  # the rejected calls never ran
+    assert controller.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiters_give_their_place_back():
+    """Test cancelling a queued request neither leaks a slot nor blocks the lane."""
+    controller = AdmissionController(1, parse_lanes("interactive:1:10"))
+    release = asyncio.Event()
+    order = []
+    running = asyncio.ensure_future(_hold(controller, "interactive", order, release))
+    cancelled = asyncio.ensure_future(_hold(controller, "interactive", order, release))
+    await asyncio.sleep(0.01)
+    cancelled.cancel()
+    release.set()
+    await running
+    await asyncio.gather(cancelled, return_exceptions=True)
+
+    async with controller.slot():
+        pass
+    assert controller.in_flight == 0
+    assert controller.stats()["interactive"] == {
+        "waiting": 0, "in_flight": 0, "admitted": 2, "rejected": 0
+    }
+
+
+@pytest.mark.asyncio
+async def test_interactive_latency_stays_flat_under_batch_flood():
+    """Test interactive requests wait at most about one estimate behind a batch flood."""
+    controller = AdmissionController(4, parse_lanes("interactive:4:64,batch:1:256:3"))
+
+    async def estimate(lane):
+        start = time.perf_counter()
+        async with controller.slot(lane):
+            waited = time.perf_counter() - start
+            await asyncio.sleep(0.02)
+        return waited
+
+    batch = [asyncio.ensure_future(estimate("batch")) for _ in range(60)]
+    await asyncio.sleep(0.05)
+    interactive = []
+    for _ in range(10):
+        interactive.append(await estimate("interactive"))
+    batch_waits = await asyncio.gather(*batch)
+
+    assert max(interactive) < 0.015  # a slot is always kept free of batch work
+    assert max(batch_waits) > 0.3
+
+
+def test_api_answers_429_when_the_lane_is_full():
+    """Test the API rejects estimates with 429 and Retry-After when their lane is full."""
+    controller = AdmissionController(1, parse_lanes("interactive:4:0,batch:1:0"))
+    client = TestClient(app)
+    body = {"title": "Add login"}
+
+    with patch("pointless.core.config.settings.ADMISSION_ENABLED", True), \
+            patch.object(admission_module, "_controller", controller):
+        controller.in_flight = 1  # an estimate is running
+        rejected = client.post("/estimate", json=body, headers={"X-Pointless-Priority": "batch"})
+        unguarded = client.get("/healthz")
+        controller.in_flight = 0
+        accepted = client.post("/estimate", json=body, headers={"X-Pointless-Priority": "batch"})
+
+    assert rejected.status_code == 429
+    assert int(rejected.headers["Retry-After"]) >= 1
+    assert unguarded.status_code == 200
+    assert accepted.status_code == 200
+    assert controller.stats()["batch"]["admitted"] == 1
@@ -0,0 +1,195 @@
+"""Tests for local code analysis."""
+
+import shutil
+import subprocess
+import textwrap
+from unittest.mock import patch
+
+import pytest
+
+from pointless.core.analysis import (
+    MetricsStore,
+    PythonAnalyzer,
+    analyze_repo,
+    codebase_analysis,
+    complexity_indicators,
+)
+from pointless.core.analysis import repo as repo_module
+from pointless.core.estimate import estimate_effort_async
+from pointless.core.models import EstimationRequest
+
+BRANCHY = textwrap.dedent(
+    """
+    import os
+    from .util import helper
+
+    def route(x, y):
+        if x and y:
+            return 1
+        for i in range(x):
+            if i % 2:
+                continue
+        try:
+            pass
+        except ValueError:
+            pass
+        return [i for i in range(y) if i]
+
+    class Handler:
+        def get(self):
+            return helper()
+    """
+)
+
+
+def _write(root, files):
+    for path, source in files.items():
+        target = root / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(source)
+
+
+def test_python_metrics():
+    """Test function, class, complexity and import counts."""
+    metrics = PythonAnalyzer().analyze(BRANCHY)
+
+    assert metrics.functions == 2
+    assert metrics.classes == 1
+    # 1 + if + `and` + for + if + except + comprehension (+ its if)
+    assert metrics.max_complexity == 8
+    assert metrics.imports == ("os", ".util")
+    assert metrics.error is None
+
+
+def test_syntax_errors_are_reported_not_raised():
+    """Test unparseable files still get size metrics."""
+    metrics = PythonAnalyzer().analyze("def broken(:\n")
+
+    assert metrics.error == "SyntaxError"
+    assert metrics.lines == 1
+
+
+def test_fan_in_resolves_absolute_and_relative_imports(tmp_path):
+    """Test fan-in counts distinct importing files."""
+    _write(tmp_path, {
+        "app/__init__.py": "",
+        "app/util.py": "def helper(): pass\n",
+        "app/api.py": BRANCHY,
+        "app/cli.py": "from app.util import helper\nfrom app import util\n",
+    })
+
+    analysis = analyze_repo(str(tmp_path), workers=1)
+
+    assert analysis.files["app/util.py"].fan_in == 2
+    assert analysis.files["app/api.py"].fan_out == 2
+
+
+def test_results_are_cached_by_content_hash(tmp_path):
+    """Test unchanged files are not parsed again."""
+    _write(tmp_path / "repo", {"a.py": BRANCHY, "b.py": "x = 1\n"})
+    store = MetricsStore(str(tmp_path / "analysis.sqlite3"))
+    first = analyze_repo(str(tmp_path / "repo"), workers=1, store=store)
+
+    (tmp_path / "repo" / "b.py").write_text("x = 2\n")
+    with patch.object(repo_module, "_analyze_paths", wraps=repo_module._analyze_paths) as parse:
+        second = analyze_repo(str(tmp_path / "repo"), workers=1, store=store)
+
+    assert parse.call_args[0][0] == [str(tmp_path / "repo" / "b.py")]
+    assert second.files["a.py"] == first.files["a.py"]
+
+
+def test_process_pool_matches_inline(tmp_path):
+    """Test parallel parsing produces the same metrics as inline parsing."""
+    _write(tmp_path, {f"pkg/m{i}.py": BRANCHY for i in range(6)})
+    inline = analyze_repo(str(tmp_path), workers=1)
+
+    with patch.object(repo_module, "PARALLEL_MIN_FILES", 1):
+        parallel = analyze_repo(str(tmp_path), workers=2)
+        pool = repo_module._pool
+        again = analyze_repo(str(tmp_path), workers=2)
+
+    assert parallel.files == inline.files == again.files
+    assert pool is not None and repo_module._pool is pool  # reused, not restarted
+    assert pool._mp_context.get_start_method() != "fork"
+
+
+def test_indicators_and_scores(tmp_path):
+    """Test hotspots become complexity indicators and file scores."""
+    branches = "".join(f"    if x == {i}:\n        return {i}\n" for i in range(20))
+    _write(tmp_path, {"hot.py": f"def f(x):\n{branches}", "cold.py": "y = 1\n"})
+    analysis = analyze_repo(str(tmp_path), workers=1)
+
+    result = codebase_analysis(analysis, ["hot.py"])
+
+    assert complexity_indicators(analysis) == [
+        "High cyclomatic complexity in hot.py (max 21 per function)"
+    ]
+    assert result.relevant_files[0].complexity_score > 0.5
+    assert result.total_files == 2
+
+
+@pytest.mark.asyncio
+async def test_estimate_uses_local_analysis(tmp_path):
+    """Test measured complexity reaches the estimate when analysis is enabled."""
+    branches = "".join(f"    if x == {i}:\n        return {i}\n" for i in range(20))
+    _write(tmp_path / "repo", {"client.py": f"def f(x):\n{branches}"})
+    req = EstimationRequest(title="Add client method", codebase_context=str(tmp_path / "repo"))
+
+    with patch("pointless.core.config.settings.ANALYSIS_ENABLED", True), \
+            patch("pointless.core.config.settings.ANALYSIS_CACHE_PATH", str(tmp_path / "a.sqlite3")):
+        result = await estimate_effort_async(req)
+
+    assert "Measured complexity of 1 local source files" in result.factors
+    assert "Complex functions in relevant code (1 hotspots)" in result.factors
+    assert not result.github_data_used
+
+
+def _git(root, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+        cwd=root, check=True, capture_output=True,
+    )
+
+
+@pytest.fixture
+def git_repo(tmp_path):
+    if shutil.which("git") is None:
+        pytest.skip("git not installed")
+    root = tmp_path / "repo"
+    _write(root, {"app/__init__.py": "", "app/util.py": "def helper(): pass\n", "app/api.py": BRANCHY})
+    _git(root, "init", "-q")
+    _git(root, "add", ".")
+    _git(root, "commit", "-qm", "init")
+    return root
+
+
+def test_incremental_analysis_follows_git_changes(git_repo, tmp_path):
+    """Test only files changed since the last analyzed commit are re-checked."""
+    store = MetricsStore(str(tmp_path / "analysis.sqlite3"))
+    first = analyze_repo(str(git_repo), workers=1, store=store)
+
+    (git_repo / "app" / "util.py").write_text("def helper():\n    return 1\n")
+    (git_repo / "app" / "cli.py").write_text("from app.util import helper\n")
+    _git(git_repo, "rm", "-q", "app/api.py")
+    _git(git_repo, "add", ".")
+    _git(git_repo, "commit", "-qm", "change")
+    with patch.object(repo_module, "_analyze_keys", wraps=repo_module._analyze_keys) as analyze:
+        second = analyze_repo(str(git_repo), workers=1, store=store)
+
+    assert sorted(first.files) == ["app/__init__.py", "app/api.py", "app/util.py"]
+    assert analyze.call_args[0][1] == ["app/api.py", "app/cli.py", "app/util.py"]
+    assert sorted(second.files) == ["app/__init__.py", "app/cli.py", "app/util.py"]
+    assert second.files["app/util.py"].lines == 2
+    assert second.files["app/util.py"].fan_in == 1
+
+
+def test_incremental_analysis_tracks_working_tree(git_repo, tmp_path):
+    """Test uncommitted edits are analyzed and re-checked once reverted."""
+    store = MetricsStore(str(tmp_path / "analysis.sqlite3"))
+    analyze_repo(str(git_repo), workers=1, store=store)
+
+    (git_repo / "app" / "util.py").write_text("x = 1\ny = 2\nz = 3\n")
+    assert analyze_repo(str(git_repo), workers=1, store=store).files["app/util.py"].lines == 3
+
+    _git(git_repo, "checkout", "-q", "--", "app/util.py")
+    assert analyze_repo(str(git_repo), workers=1, store=store).files["app/util.py"].lines == 1
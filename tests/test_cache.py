@@ -0,0 +1,158 @@
+"""Tests for the shared result cache."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from pointless.core.cache import Cache, MemoryCache, SQLiteCache, get_cache, set_cache
+from pointless.core import estimate
+from pointless.core.models import EstimationRequest
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path):
+    if request.param == "memory":
+        return MemoryCache()
+    return SQLiteCache(str(tmp_path / "cache.sqlite3"))
+
+
+@pytest.fixture
+def global_cache():
+    cache = MemoryCache()
+    set_cache(cache)
+    yield cache
+    set_cache(None)
+
+
+def test_set_get_delete(cache):
+    """Test values round-trip as independent copies."""
+    value = {"files": ["a.py"]}
+    cache.set("k", value)
+    value["files"].append("b.py")
+
+    assert cache.get("k") == {"files": ["a.py"]}
+    cache.delete("k")
+    assert cache.get("k", "missing") == "missing"
+
+
+def test_expired_entries_are_not_returned(cache):
+    """Test an already expired entry is never served."""
+    cache.set("k", 1, ttl=-1)
+
+    assert cache.get("k") is None
+
+
+@pytest.mark.asyncio
+async def test_get_or_compute_skips_none(cache):
+    """Test None results are returned but not cached."""
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        return None
+
+    assert await cache.get_or_compute("k", compute) is None
+    assert await cache.get_or_compute("k", compute) is None
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_sqlite_single_flight_across_instances(tmp_path):
+    """Test concurrent callers on separate connections compute a key once."""
+    path = str(tmp_path / "cache.sqlite3")
+    workers = [SQLiteCache(path, poll_interval=0.005) for _ in range(3)]
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "ticket"
+
+    results = await asyncio.gather(*(w.get_or_compute("jira:ticket:X-1", compute) for w in workers))
+
+    assert results == ["ticket"] * 3
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_sqlite_waiter_recomputes_after_failure(tmp_path):
+    """Test a waiter takes over when the lease holder fails."""
+    path = str(tmp_path / "cache.sqlite3")
+    first, second = SQLiteCache(path, poll_interval=0.005), SQLiteCache(path, poll_interval=0.005)
+
+    async def failing():
+        await asyncio.sleep(0.02)
+        raise RuntimeError("upstream down")
+
+    async def working():
+        return 42
+
+    results = await asyncio.gather(
+        first.get_or_compute("k", failing), second.get_or_compute("k", working),
+        return_exceptions=True,
+    )
+
+    assert isinstance(results[0], RuntimeError)
+    assert results[1] == 42
+
+
+def test_memory_cache_evicts_least_recently_used():
+    """Test the memory backend keeps at most maxsize entries, dropping the unused ones."""
+    cache = MemoryCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert len(cache._data) == 2
+
+
+@pytest.mark.asyncio
+async def test_sqlite_lease_is_renewed_during_long_computations(tmp_path):
+    """Test a computation longer than the lease is not repeated by a waiter."""
+    path = str(tmp_path / "cache.sqlite3")
+    first, second = (SQLiteCache(path, lease_ttl=0.05, poll_interval=0.005) for _ in range(2))
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.2)
+        return "analysis"
+
+    async def later():
+        await asyncio.sleep(0.01)
+        return await second.get_or_compute("github:analysis", compute)
+
+    results = await asyncio.gather(first.get_or_compute("github:analysis", compute), later())
+
+    assert results == ["analysis", "analysis"]
+    assert calls == 1
+
+
+@patch("pointless.core.config.settings.CACHE_BACKEND", "none")
+def test_default_backend_is_noop():
+    """Test caching is off unless a backend is configured."""
+    set_cache(None)
+    try:
+        assert type(get_cache()) is Cache
+    finally:
+        set_cache(None)
+
+
+@pytest.mark.asyncio
+async def test_estimates_are_cached_before_calibration(global_cache):
+    """Test repeated requests reuse the uncalibrated estimate."""
+    req = EstimationRequest(title="Add client method")
+
+    with patch.object(estimate, "_final_estimate", wraps=estimate._final_estimate) as final:
+        first = await estimate.estimate_effort_async(req)
+        second = await estimate.estimate_effort_async(req)
+
+    assert final.call_count == 1
+    assert first.model_dump() == second.model_dump()
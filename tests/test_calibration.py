@@ -0,0 +1,162 @@
+"""Tests for online calibration."""
+
+import math
+import random
+import statistics
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from pointless.core import calibration
+from pointless.core.calibration import (
+    CalibrationStore,
+    P2Quantile,
+    RunningStats,
+    apply_calibration,
+)
+from pointless.core.models import (
+    ActualRecord,
+    EstimationRequest,
+    EstimationResponse,
+    TaskComplexity,
+)
+from pointless.interfaces.api import app
+
+
+@pytest.fixture
+def calibration_path(tmp_path):
+    """Point the global calibration store at a temporary file."""
+    path = str(tmp_path / "calibration.json")
+    with patch("pointless.core.config.settings.CALIBRATION_PATH", path):
+        yield path
+
+
+def _response(hours: float = 4.0, confidence: float = 0.7) -> EstimationResponse:
+    return EstimationResponse(
+        estimated_hours=hours,
+        complexity=TaskComplexity.MODERATE,
+        confidence=confidence,
+        reasoning="test",
+    )
+
+
+def test_p2_quantile_tracks_true_quantiles():
+    """Test the streaming sketch approximates exact quantiles."""
+    rnd = random.Random(7)
+    values = [rnd.lognormvariate(0, 0.5) for _ in range(5000)]
+    sketches = {p: P2Quantile(p) for p in (0.1, 0.5, 0.9)}
+    for v in values:
+        for sketch in sketches.values():
+            sketch.add(v)
+
+    ordered = sorted(values)
+    for p, sketch in sketches.items():
+        exact = ordered[int(p * (len(ordered) - 1))]
+        assert sketch.value() == pytest.approx(exact, rel=0.05)
+
+
+def test_running_stats_match_batch_statistics():
+    """Test Welford updates agree with a batch computation."""
+    pairs = [(2.0, 3.0), (4.0, 4.0), (1.0, 2.5), (8.0, 6.0)]
+    stats = RunningStats()
+    for est, act in pairs:
+        stats.add(est, act)
+
+    logs = [math.log(a / e) for e, a in pairs]
+    assert stats.count == 4
+    assert stats.bias == pytest.approx(math.exp(statistics.mean(logs)))
+    assert stats.std_log == pytest.approx(statistics.stdev(logs))
+
+
+def test_store_persists_and_reloads(tmp_path):
+    """Test calibration state survives a restart."""
+    path = str(tmp_path / "cal.json")
+    store = CalibrationStore(path)
+    for _ in range(6):
+        store.record(ActualRecord(estimated_hours=2, actual_hours=3, team="Core", jira_ticket_id="PROJ-1"))
+
+    reloaded = CalibrationStore(path)
+    keys = {s.key for s in reloaded.summaries()}
+    assert keys == {"team:core/project:PROJ", "team:core", "project:PROJ", "global"}
+    assert reloaded.get("team:core").count == 6
+    assert reloaded.get("team:core").bias == pytest.approx(1.5)
+
+
+def test_concurrent_stores_keep_every_observation(tmp_path):
+    """Test stores in different workers neither lose records nor serve stale buckets."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    path = str(tmp_path / "cal.sqlite3")
+    stores = [CalibrationStore(path) for _ in range(4)]
+    assert stores[0].lookup("core", None) == (None, None)
+
+    def record(store):
+        for _ in range(25):
+            store.record(ActualRecord(estimated_hours=2, actual_hours=3, team="core"))
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(record, stores))
+
+    with patch("pointless.core.config.settings.CALIBRATION_MIN_SAMPLES", 1):
+        key, stats = stores[0].lookup("core", None)
+    assert key == "team:core"
+    assert stats.count == 100  # recorded by the other stores too
+
+
+def test_unusable_store_leaves_estimates_uncalibrated(tmp_path, monkeypatch):
+    """Test an unwritable data directory does not fail the estimate."""
+    from pointless.core.estimate import estimate_effort
+
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    monkeypatch.setattr(calibration, "_calibration_store", None)
+    with patch("pointless.core.config.settings.DATA_DIR", str(blocker / "x")):
+        result = estimate_effort(EstimationRequest(title="Add login"))
+
+    assert result.estimated_hours > 0
+    assert result.uncalibrated_hours is None
+
+
+@patch("pointless.core.config.settings.CALIBRATION_MIN_SAMPLES", 5)
+@patch("pointless.core.config.settings.CALIBRATION_PRIOR_WEIGHT", 0)
+def test_apply_calibration_scales_hours(tmp_path):
+    """Test a consistently underestimating team gets scaled up."""
+    store = CalibrationStore(str(tmp_path / "cal.json"))
+    for _ in range(5):
+        store.record(ActualRecord(estimated_hours=2, actual_hours=4, team="core"))
+
+    result = apply_calibration(store, EstimationRequest(title="x", team="core"), _response(4.0, 0.5))
+
+    assert result.uncalibrated_hours == 4.0
+    assert result.estimated_hours == 8.0
+    assert result.confidence == 1.0  # perfectly consistent history
+    assert any("Calibrated on 5 past tickets (team:core)" in f for f in result.factors)
+
+
+@patch("pointless.core.config.settings.CALIBRATION_MIN_SAMPLES", 5)
+def test_apply_calibration_requires_min_samples(tmp_path):
+    """Test small buckets leave the estimate untouched."""
+    store = CalibrationStore(str(tmp_path / "cal.json"))
+    store.record(ActualRecord(estimated_hours=2, actual_hours=4, team="core"))
+
+    result = apply_calibration(store, EstimationRequest(title="x", team="core"), _response(4.0))
+
+    assert result.estimated_hours == 4.0
+    assert result.uncalibrated_hours is None
+
+
+def test_record_actuals_endpoint(calibration_path):
+    """Test recording actuals through the API."""
+    client = TestClient(app)
+    response = client.post(
+        "/calibration/actuals",
+        json={"estimated_hours": 2, "actual_hours": 3, "jira_ticket_id": "ABC-9"},
+    )
+    assert response.status_code == 200
+    keys = [item["key"] for item in response.json()]
+    assert keys == ["project:ABC", "global"]
+
+    summary = client.get("/calibration").json()
+    assert {item["key"] for item in summary} == {"project:ABC", "global"}
+    assert calibration.get_calibration_store().path == calibration_path
@@ -0,0 +1,135 @@
+"""Tests for record/replay cassettes of connector traffic."""
+
+import shutil
+import time
+from unittest.mock import patch
+
+import pytest
+
+from pointless.core.connectors import cassette as cassette_module
+from pointless.core.connectors.cassette import Cassette, CassetteMiss
+from pointless.core.connectors.mcp_atlassian import MCPAtlassianClient
+from pointless.core.connectors.mcp_github import GitHubFile, MCPGitHubClient
+
+
+@pytest.fixture(autouse=True)
+def fresh_cassette(monkeypatch):
+    monkeypatch.setattr(cassette_module, "_cassette", None)
+    yield
+    if cassette_module._cassette is not None:
+        cassette_module._cassette.close()
+
+
+async def _run_pipeline():
+    github = MCPGitHubClient()
+    jira = MCPAtlassianClient()
+    analysis = await github.analyze_codebase_for_task("org", "app", "Add monitor client method")
+    tickets = await jira.get_tickets(["PROJ-1", "PROJ-2"])
+    return analysis, tickets
+
+
+@pytest.mark.asyncio
+async def test_recorded_pipeline_replays_offline(tmp_path):
+    """Test a recorded run replays identically without credentials or network delays."""
+    path = str(tmp_path / "run.pkl.gz")
+    with patch("pointless.core.config.settings.CASSETTE_MODE", "record"), \
+            patch("pointless.core.config.settings.CASSETTE_PATH", path), \
+            patch("pointless.core.config.settings.MCP_ENABLED", True), \
+            patch("pointless.core.config.settings.MCP_ATLASSIAN_SERVER_URL", "http://jira"), \
+            patch("pointless.core.config.settings.MCP_ATLASSIAN_API_TOKEN", "token"), \
+            patch("pointless.core.config.settings.MCP_ATLASSIAN_EMAIL", "me@example.com"), \
+            patch("pointless.core.config.settings.MCP_GITHUB_ENABLED", True), \
+            patch("pointless.core.config.settings.MCP_GITHUB_SERVER_URL", "http://github"), \
+            patch("pointless.core.config.settings.MCP_GITHUB_TOKEN", "token"):
+        recorded_analysis, recorded_tickets = await _run_pipeline()
+        assert cassette_module.get_cassette().recorded == 4  # snapshot, contents, two tickets
+
+    with patch("pointless.core.config.settings.CASSETTE_MODE", "replay"), \
+            patch("pointless.core.config.settings.CASSETTE_PATH", path):
+        start = time.perf_counter()
+        analysis, tickets = await _run_pipeline()
+        elapsed = time.perf_counter() - start
+
+        with pytest.raises(CassetteMiss):
+            await MCPAtlassianClient()._fetch_tickets(["OTHER-1"])
+
+        with patch("pointless.core.config.settings.CASSETTE_LATENCY", 1.0):
+            start = time.perf_counter()
+            await MCPAtlassianClient().get_tickets(["PROJ-1", "PROJ-2"])
+            delayed = time.perf_counter() - start
+
+    assert tickets == recorded_tickets
+    assert [f.path for f in analysis.relevant_files] == [f.path for f in recorded_analysis.relevant_files]
+    assert analysis.relevant_files[0].content == recorded_analysis.relevant_files[0].content
+    assert elapsed < 0.1  # the live run sleeps 0.1s per call
+    assert delayed >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_repeated_calls_replay_in_order(tmp_path):
+    """Test recordings of one call are served in order, then the last one repeats."""
+    path = str(tmp_path / "calls.pkl")
+    recorder = Cassette(path, "record")
+    for value in (1, 2):
+        async def fetch(value=value):
+            return {"value": value}
+        await recorder.call("svc.get", {"id": 7}, fetch)
+    recorder.close()
+
+    player = Cassette(path, "replay")
+    served = [await player.call("svc.get", {"id": 7}, None) for _ in range(3)]
+    mutated = await player.call("svc.get", {"id": 7}, None)
+    mutated["value"] = 99
+
+    assert served == [{"value": 1}, {"value": 2}, {"value": 2}]
+    assert await player.call("svc.get", {"id": 7}, None) == {"value": 2}
+    with pytest.raises(CassetteMiss):
+        await player.call("svc.get", {"id": 8}, None)
+
+
+@pytest.mark.asyncio
+async def test_bulk_recordings_replay_however_batched(tmp_path):
+    """Test tickets recorded in one bulk call replay on their own and in other batches."""
+    path = str(tmp_path / "jira.pkl")
+    with patch("pointless.core.config.settings.CASSETTE_MODE", "record"), \
+            patch("pointless.core.config.settings.CASSETTE_PATH", path), \
+            patch("pointless.core.config.settings.MCP_ENABLED", True), \
+            patch("pointless.core.config.settings.MCP_ATLASSIAN_SERVER_URL", "http://jira"), \
+            patch("pointless.core.config.settings.MCP_ATLASSIAN_API_TOKEN", "token"), \
+            patch("pointless.core.config.settings.MCP_ATLASSIAN_EMAIL", "me@example.com"):
+        recorded_tickets = await MCPAtlassianClient().get_tickets(["A-1", "A-2", "A-3"])
+        cassette_module.get_cassette().close()
+
+    with patch("pointless.core.config.settings.CASSETTE_MODE", "replay"), \
+            patch("pointless.core.config.settings.CASSETTE_PATH", path):
+        single = await MCPAtlassianClient().get_ticket("A-2")
+        pair = await MCPAtlassianClient().get_tickets(["A-3", "A-1"])
+        with pytest.raises(CassetteMiss):
+            await MCPAtlassianClient()._fetch_tickets(["A-1", "B-1"])
+        with pytest.raises(CassetteMiss):
+            await MCPAtlassianClient().get_ticket("B-1")
+
+    assert single == recorded_tickets["A-2"]
+    assert pair == {"A-3": recorded_tickets["A-3"], "A-1": recorded_tickets["A-1"]}
+
+
+@pytest.mark.asyncio
+async def test_file_contents_are_recorded_not_their_blob_paths(tmp_path):
+    """Test recorded files replay their content without the recording machine's blob cache."""
+    path = str(tmp_path / "files.pkl")
+    text = "x = 1\n" * 2000
+    with patch("pointless.core.config.settings.BLOB_DIR", str(tmp_path / "blobs")):
+        file = GitHubFile(path="big.py", content=text)
+        file.spill()
+        recorder = Cassette(path, "record")
+
+        async def fetch():
+            return [file]
+        await recorder.call("github.file_contents", {"paths": ["big.py"]}, fetch)
+        recorder.close()
+    shutil.rmtree(tmp_path / "blobs")
+
+    replayed = await Cassette(path, "replay").call("github.file_contents", {"paths": ["big.py"]}, None)
+
+    assert replayed[0].content == text
+    assert replayed[0].size == len(text)
@@ -0,0 +1,135 @@
+"""Tests for the local trigram code search index."""
+
+from unittest.mock import patch
+
+import pytest
+
+from pointless.core import codesearch
+from pointless.core.codesearch import CodeSearchIndex, plan_query
+from pointless.core.connectors.mcp_github import MCPGitHubClient
+
+
+@pytest.fixture
+def checkout(tmp_path):
+    root = tmp_path / "repo"
+    (root / "api").mkdir(parents=True)
+    (root / "api" / "routes.py").write_text("def get_user():\n    return fetch_user()\n")
+    (root / "api" / "client.py").write_text(
+        "def fetch_user():\n    pass\n\ndef fetch_user_list():\n    pass\n"
+    )
+    (root / "README.md").write_text("Users are fetched by the API.\n" * 20)
+    (root / "logo.png").write_bytes(b"\x89PNG\0\0fetch_user")
+    (root / "lib").mkdir()
+    for i in range(4):
+        (root / "lib" / f"mod{i}.py").write_text(f"VALUE = {i}\n")
+    return root
+
+
+@pytest.fixture(params=["numpy", "pure-python"])
+def index(request, checkout, tmp_path, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(codesearch, "np", None)
+    idx = CodeSearchIndex(str(checkout), str(tmp_path / "index"))
+    idx.update(workers=1)
+    return idx
+
+
+def test_plan_query_extracts_required_trigrams():
+    """Test literal runs, alternations and unconstrained patterns."""
+    assert plan_query("abcd") == frozenset({0x616263, 0x626364})
+    assert plan_query("Abc") == plan_query("abc")
+    assert plan_query(r"fo+bar|bazz", regex=True)[0] == "or"
+    assert plan_query(r"ab.*", regex=True) is None
+    assert plan_query("(", regex=True) is None
+
+
+def test_literal_search_ranks_by_density(index):
+    """Test results are verified and the densest file comes first."""
+    results = index.search("fetch_user")
+
+    assert [f.path for f in results] == ["api/client.py", "api/routes.py"]
+    assert results[0].content.startswith("1: def fetch_user():")
+    assert results[0].language == "Python"
+
+
+def test_regex_and_case_sensitivity(index):
+    """Test regex queries and case-sensitive verification."""
+    assert [f.path for f in index.search(r"def fetch_\w+_list", regex=True)] == ["api/client.py"]
+    assert [f.path for f in index.search("users are", case_sensitive=False)] == ["README.md"]
+    assert index.search("users are", case_sensitive=True) == []
+
+
+def test_binary_files_are_not_indexed(index):
+    """Test files with NUL bytes never match."""
+    assert "logo.png" not in index.candidates(plan_query("fetch_user"))
+
+
+def test_incremental_update_and_reload(index, checkout):
+    """Test changed, new and deleted files are picked up and persisted."""
+    (checkout / "api" / "routes.py").write_text("def get_account():\n    pass\n")
+    (checkout / "api" / "accounts.py").write_text("def get_account_list():\n    pass\n")
+    (checkout / "README.md").unlink()
+
+    assert index.update(workers=1) == 2
+    assert [f.path for f in index.search("get_account")] == ["api/accounts.py", "api/routes.py"]
+    assert [f.path for f in index.search("fetch_user")] == ["api/client.py"]
+    assert index.search("users are") == []
+
+    reopened = CodeSearchIndex(index.root, index.index_dir)
+    assert reopened.update(workers=1) == 0
+    assert [f.path for f in reopened.search("get_account")] == ["api/accounts.py", "api/routes.py"]
+
+
+@pytest.mark.asyncio
+async def test_search_code_uses_local_checkout(checkout, tmp_path):
+    """Test MCPGitHubClient.search_code is served by the local index."""
+    with patch("pointless.core.config.settings.SEARCH_REPOS", f"org/app={checkout}"), \
+            patch("pointless.core.config.settings.SEARCH_INDEX_DIR", str(tmp_path / "indexes")):
+        results = await MCPGitHubClient().search_code("fetch_user", "org", "app")
+        unknown = await MCPGitHubClient().search_code("fetch_user", "org", "other")
+
+    assert [f.path for f in results] == ["api/client.py", "api/routes.py"]
+    assert unknown == []
+
+
+def test_search_local_merges_repos_by_score(checkout, tmp_path):
+    """Test the best matches across repositories win, not the first repository's."""
+    dense = tmp_path / "dense"
+    dense.mkdir()
+    (dense / "users.py").write_text("fetch_user()\n" * 5)
+    with patch("pointless.core.config.settings.SEARCH_INDEX_DIR", str(tmp_path / "indexes")):
+        results = codesearch.search_local(
+            "fetch_user", {"org/app": str(checkout), "org/dense": str(dense)}, max_results=2
+        )
+
+    assert [f.path for f in results] == ["org/dense:users.py", "org/app:api/client.py"]
+
+
+def test_concurrent_updates_share_one_manifest(index, checkout):
+    """Test threads updating one index never lose each other's segments."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    for i in range(8):
+        (checkout / "lib" / f"new{i}.py").write_text(f"def added_{i}():\n    pass\n")
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        counts = list(pool.map(lambda _: index.update(workers=1), range(4)))
+
+    assert sum(counts) == 8
+    assert len(index.search("def added_", max_results=20)) == 8
+    assert not [p for p in (checkout.parent / "index").iterdir() if p.name.endswith(".tmp")]
+
+
+def test_update_keeps_segments_open_for_running_searches(index, checkout):
+    """Test an update publishes a new snapshot and closes the old one after its readers."""
+    with index._reading() as snapshot:
+        (checkout / "lib" / "late.py").write_text("def fetch_user_late():\n    pass\n")
+        index.update(workers=1)
+
+        assert index._snapshot is not snapshot
+        assert index._evaluate(snapshot, plan_query("fetch_user"))  # still readable
+
+    assert "lib/late.py" in index.candidates(plan_query("fetch_user"))
+    with pytest.raises(ValueError):
+        len(snapshot.segments[0].lex)  # released once the search finished
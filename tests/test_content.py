@@ -0,0 +1,115 @@
+"""Tests for slotted records and lazily loaded file content."""
+
+import os
+import pickle
+import tracemalloc
+from unittest.mock import patch
+
+import pytest
+
+from pointless.core.connectors.mcp_atlassian import JiraTicket
+from pointless.core.connectors.mcp_github import GitHubFile, GitHubRepository, spill_files
+from pointless.core.content import BlobSource, get_blob_store, sample
+
+
+def test_sample_keeps_head_and_tail_on_line_breaks():
+    """Test oversized content is cut to head and tail with a marker."""
+    data = b"".join(b"line %04d\n" % i for i in range(1000))
+
+    sampled = sample(data, 300)
+
+    assert sample(data, len(data)) == data
+    assert sampled.startswith(b"line 0000\n")
+    assert sampled.endswith(b"line 0999\n")
+    assert b"bytes omitted" in sampled
+    assert len(sampled) < 400
+
+
+def test_records_are_slotted_and_picklable():
+    """Test records have no __dict__ and survive a pickle round-trip."""
+    records = [
+        GitHubRepository(name="app", full_name="org/app"),
+        GitHubFile(path="a.py", content="x = 1"),
+        JiraTicket("PROJ-1", "Summary", priority="High"),
+    ]
+
+    for record in records:
+        assert not hasattr(record, "__dict__")
+        assert pickle.loads(pickle.dumps(record)) == record
+
+
+def test_local_content_is_loaded_lazily_and_capped(tmp_path):
+    """Test content follows the file on disk and is sampled when huge."""
+    path = tmp_path / "big.py"
+    path.write_text("# start\n" + "x = 1\n" * 200_000 + "# end\n")
+    file = GitHubFile.from_local(str(path), "big.py")
+
+    with patch("pointless.core.config.settings.FILE_CONTENT_MAX_BYTES", 4096):
+        content = file.content
+
+    assert file.size == path.stat().st_size
+    assert content.startswith("# start") and content.endswith("# end\n")
+    assert len(content) < 4200
+
+    path.write_text("small\n")
+    assert file.content == "small\n"
+
+
+@pytest.mark.asyncio
+async def test_large_inline_content_moves_to_blob_cache(tmp_path):
+    """Test big inline strings are stored content-addressed, not on the record."""
+    text = "y = 2\n" * 2000
+    with patch("pointless.core.config.settings.BLOB_DIR", str(tmp_path / "blobs")):
+        first = GitHubFile(path="a.py", content=text)
+        second = GitHubFile(path="b.py", content=text)
+        assert not (tmp_path / "blobs").exists()  # constructing does no I/O
+        await spill_files([first, second])
+
+    assert isinstance(first._source, BlobSource)
+    assert first._source.digest == second._source.digest
+    assert first.size == len(text)
+    assert first.content == text
+
+
+def test_unwritable_blob_cache_keeps_content_inline(tmp_path):
+    """Test content stays on the record when the blob cache cannot be written."""
+    text = "z = 3\n" * 2000
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    file = GitHubFile(path="c.py", content=text)
+    with patch("pointless.core.config.settings.BLOB_DIR", str(blocker / "blobs")):
+        file.spill()
+
+    assert file._source is None
+    assert file.content == text
+
+
+def test_blob_cache_evicts_least_recently_used(tmp_path):
+    """Test the blob cache stays under its cap, dropping the blobs unused longest."""
+    with patch("pointless.core.config.settings.BLOB_DIR", str(tmp_path / "blobs")), \
+            patch("pointless.core.config.settings.BLOB_MAX_BYTES", 250):
+        store = get_blob_store()
+        first = store.put(b"a" * 100)
+        second = store.put(b"b" * 100)
+        assert first.read() == "a" * 100  # now used more recently than the second
+        third = store.put(b"c" * 100)
+
+    assert store.size == 200
+    assert os.path.exists(first.path) and os.path.exists(third.path)
+    assert not os.path.exists(second.path)
+    assert second.read() == ""
+
+
+def test_many_files_keep_memory_flat(tmp_path):
+    """Test touching many large files does not retain their content."""
+    path = tmp_path / "big.txt"
+    path.write_bytes(b"z" * 2_000_000)
+
+    tracemalloc.start()
+    files = [GitHubFile.from_local(str(path), f"f{i}.txt") for i in range(200)]
+    total = sum(len(f.content) for f in files)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert total > 200 * 60_000
+    assert peak < 2_000_000
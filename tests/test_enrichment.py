@@ -0,0 +1,73 @@
+"""Tests for typed Jira/GitHub enrichment."""
+
+from pointless.core.connectors.mcp_atlassian import JiraTicket
+from pointless.core.connectors.mcp_github import (
+    GitHubCodebaseAnalysis,
+    GitHubFile,
+    GitHubRepository,
+)
+from pointless.core.enrichment import Enrichment
+from pointless.core.estimators import heuristic, llm
+from pointless.core.models import EstimationRequest, TaskComplexity
+
+
+def _analysis(**kwargs):
+    return GitHubCodebaseAnalysis(repository=GitHubRepository(name="app", full_name="org/app"), **kwargs)
+
+
+def test_from_sources_without_data_is_none():
+    """Test no enrichment is built when neither source returned data."""
+    assert Enrichment.from_sources(None, None) is None
+
+
+def test_from_sources_copies_typed_fields():
+    """Test ticket and analysis fields are carried over as-is."""
+    ticket = JiraTicket("PROJ-1", "Summary", "Body", "To Do", "High", "Story")
+    analysis = _analysis(
+        languages=["Python"],
+        relevant_files=[GitHubFile(path=f"f{i}.py") for i in range(3)],
+    )
+
+    enrichment = Enrichment.from_sources(ticket, analysis)
+
+    assert enrichment.has_ticket and enrichment.has_github
+    assert enrichment.high_priority
+    assert enrichment.languages == ("Python",)
+    assert enrichment.relevant_file_count == 3
+
+
+def test_heuristic_reads_typed_fields_without_touching_request():
+    """Test GitHub signals are applied from fields and the request is left unchanged."""
+    req = EstimationRequest(title="Add endpoint")
+    before = req.model_dump()
+    enrichment = Enrichment.from_sources(
+        None,
+        _analysis(
+            languages=["Python", "TypeScript", "Go"],
+            architecture_patterns=["REST API", "MVC", "Microservices"],
+            relevant_files=[GitHubFile(path=f"f{i}.py") for i in range(12)],
+        ),
+    )
+
+    result = heuristic.estimate(req, repo_hits=[], enrichment=enrichment)
+
+    assert "TypeScript complexity detected" in result.factors
+    assert "Multi-language codebase (3 languages)" in result.factors
+    assert "Multiple architecture patterns detected (3)" in result.factors
+    assert "Many relevant files found (12)" in result.factors
+    assert result.complexity == TaskComplexity.COMPLEX
+    assert req.model_dump() == before
+
+
+def test_jira_summary_and_description_fill_in_request():
+    """Test an untitled request uses the Jira summary and description."""
+    req = EstimationRequest(title="", description="Short")
+    enrichment = Enrichment.from_sources(JiraTicket("PROJ-1", "Migrate billing", "x" * 300), None)
+
+    prompt = llm.build_prompt(req, enrichment)
+    result = heuristic.estimate(req, repo_hits=[], enrichment=enrichment)
+
+    assert "Title: Migrate billing" in prompt
+    assert "Jira Description:" in prompt
+    assert "Complex keyword: migrate" in result.factors
+    assert "Long description indicates richer requirements" in result.factors
@@ -0,0 +1,99 @@
+"""Tests for cached repository snapshots in the GitHub connector."""
+
+from unittest.mock import patch
+
+import pytest
+
+from pointless.core.cache import MemoryCache, set_cache
+from pointless.core.connectors import mcp_github
+from pointless.core.connectors.mcp_github import MCPGitHubClient, RepositorySnapshot
+
+
+@pytest.fixture
+def client():
+    with patch("pointless.core.config.settings.MCP_GITHUB_ENABLED", True), \
+            patch("pointless.core.config.settings.MCP_GITHUB_SERVER_URL", "http://localhost:8080"), \
+            patch("pointless.core.config.settings.MCP_GITHUB_TOKEN", "test-token"):
+        client = MCPGitHubClient()
+        with patch.object(client, "_fetch_snapshot", wraps=client._fetch_snapshot) as fetch, \
+                patch.object(client, "get_file_contents", wraps=client.get_file_contents) as contents:
+            client.fetch, client.contents = fetch, contents
+            yield client
+
+
+@pytest.mark.asyncio
+async def test_analyses_share_one_snapshot(client):
+    """Test two tasks on one repo cost one snapshot request plus one content request each."""
+    first = await client.analyze_codebase_for_task("org", "app", "Add monitor client method")
+    second = await client.analyze_codebase_for_task("org", "app", "Add API endpoint for users")
+
+    assert client.fetch.call_count == 1
+    assert client.contents.call_count == 2
+    assert [f.path for f in first.relevant_files][:2] == ["src/api/client.py", "src/services/monitor.py"]
+    assert first.relevant_files[0].content == "# src/api/client.py\n"
+    assert first.relevant_files[0].size == 1200
+    assert first.total_files == 12
+    assert first.languages == ["Python", "TypeScript"]
+    assert "REST API endpoints present" in second.complexity_indicators
+
+
+@pytest.mark.asyncio
+async def test_contents_are_fetched_for_top_candidates_only(client):
+    """Test the content follow-up is bounded by GITHUB_CONTENT_FILES."""
+    with patch("pointless.core.config.settings.GITHUB_CONTENT_FILES", 1):
+        analysis = await client.analyze_codebase_for_task("org", "app", "Add monitor client method")
+
+    assert client.contents.call_args[0][2] == ["src/api/client.py"]
+    assert client.contents.call_args[1]["ref"] == (await client.get_snapshot("org", "app")).tree_sha
+    assert len(analysis.relevant_files) == 2
+
+
+@pytest.mark.asyncio
+async def test_unchanged_tree_reuses_cached_snapshot(client):
+    """Test an expired head check keeps the snapshot while the tree SHA is unchanged."""
+    first = await client.get_snapshot("org", "app")
+    with patch("pointless.core.config.settings.GITHUB_HEAD_TTL", 0):
+        second = await client.get_snapshot("org", "app")
+
+    assert second is first
+    assert client.fetch.call_args[0][2] == first.tree_sha
+
+
+@pytest.mark.asyncio
+async def test_new_tree_replaces_snapshot(client):
+    """Test a moved branch is fetched again and cached under its new tree SHA."""
+    first = await client.get_snapshot("org", "app")
+    moved = RepositorySnapshot(first.repository, "f" * 40, paths=["new.py"], sizes=[10])
+
+    async def fetch_moved(owner, repo, known):
+        return moved.tree_sha, moved
+
+    with patch("pointless.core.config.settings.GITHUB_HEAD_TTL", 0), \
+            patch.object(client, "_fetch_snapshot", fetch_moved):
+        second = await client.get_snapshot("org", "app")
+
+    assert second is moved
+    assert ("org/app", first.tree_sha) in client._snapshots
+
+
+@pytest.mark.asyncio
+async def test_cached_analysis_is_dropped_when_the_branch_moves(client):
+    """Test the shared-cache analysis is keyed by tree SHA, not only by repository."""
+    first = await client.get_snapshot("org", "app")
+    moved = RepositorySnapshot(first.repository, "f" * 40, paths=["new.py"], sizes=[10])
+
+    async def fetch_moved(owner, repo, known):
+        return moved.tree_sha, moved
+
+    set_cache(MemoryCache())
+    try:
+        with patch.object(mcp_github, "get_github_mcp_client", return_value=client):
+            before = await mcp_github.analyze_github_codebase_for_estimation("org", "app", "Add monitor")
+            with patch("pointless.core.config.settings.GITHUB_HEAD_TTL", 0), \
+                    patch.object(client, "_fetch_snapshot", fetch_moved):
+                after = await mcp_github.analyze_github_codebase_for_estimation("org", "app", "Add monitor")
+    finally:
+        set_cache(None)
+
+    assert before.total_files == 12
+    assert after.total_files == 1
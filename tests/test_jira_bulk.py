@@ -0,0 +1,101 @@
+"""Tests for bulk Jira ticket retrieval and micro-batching."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from pointless.core.connectors import mcp_atlassian
+from pointless.core.connectors.mcp_atlassian import MCPAtlassianClient, key_in_jql
+from pointless.interfaces.api import app
+
+
+@pytest.fixture
+def client():
+    with patch("pointless.core.config.settings.JIRA_BULK_SIZE", 100), \
+            patch("pointless.core.config.settings.JIRA_BATCH_WINDOW_MS", 5):
+        client = MCPAtlassianClient()
+    with patch.object(client, "is_configured", return_value=True), \
+            patch.object(client, "_fetch_tickets", wraps=client._fetch_tickets) as fetch:
+        client.fetch = fetch
+        yield client
+
+
+def test_key_in_jql_quotes_keys():
+    """Test keys are quoted so they cannot alter the query."""
+    assert key_in_jql(["PROJ-1", 'X") OR ("1']) == 'key in ("PROJ-1", "X\\") OR (\\"1")'
+
+
+@pytest.mark.asyncio
+async def test_get_tickets_chunks_keys(client):
+    """Test 250 distinct keys take three upstream calls."""
+    keys = [f"PROJ-{i}" for i in range(250)]
+
+    found = await client.get_tickets(keys + keys[:10] + [""])
+
+    assert sorted(found) == sorted(keys)
+    assert [len(call.args[0]) for call in client.fetch.call_args_list] == [100, 100, 50]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_get_ticket_calls_are_merged(client):
+    """Test 300 concurrent single lookups cost a handful of round trips."""
+    keys = [f"PROJ-{i % 150}" for i in range(300)]
+
+    tickets = await asyncio.gather(*(client.get_ticket(k) for k in keys))
+
+    assert [t.key for t in tickets] == keys
+    assert client.fetch.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_window_collects_staggered_calls(client):
+    """Test lookups a moment apart still share one request."""
+    async def lookup(key, delay):
+        await asyncio.sleep(delay)
+        return await client.get_ticket(key)
+
+    tickets = await asyncio.gather(lookup("PROJ-1", 0), lookup("PROJ-2", 0.001), lookup("PROJ-3", 0.002))
+
+    assert [t.key for t in tickets] == ["PROJ-1", "PROJ-2", "PROJ-3"]
+    assert client.fetch.call_count == 1
+
+
+def test_batcher_per_event_loop(client):
+    """Test the sync entry points, each on a fresh loop, keep working."""
+    first = asyncio.run(client.get_ticket("PROJ-1"))
+    second = asyncio.run(client.get_ticket("PROJ-2"))
+
+    assert (first.key, second.key) == ("PROJ-1", "PROJ-2")
+
+
+@pytest.mark.asyncio
+async def test_get_jira_tickets_fetches_misses_in_bulk(client):
+    """Test the cache-backed bulk helper goes through the batcher."""
+    with patch.object(mcp_atlassian, "get_mcp_client", return_value=client):
+        found = await mcp_atlassian.get_jira_tickets(["PROJ-1", "PROJ-2", "PROJ-1"])
+
+    assert sorted(found) == ["PROJ-1", "PROJ-2"]
+    assert client.fetch.call_count == 1
+
+
+def test_concurrent_api_requests_share_one_lookup(client):
+    """Test estimates requested at the same time over HTTP fetch their tickets together."""
+    keys = ["HTTP-1", "HTTP-2", "HTTP-3", "HTTP-4"]
+    client.batch_window = 0.05
+    with patch.object(mcp_atlassian, "get_mcp_client", return_value=client), \
+            patch("pointless.core.config.settings.MCP_ENABLED", True), \
+            patch("pointless.core.config.settings.SIMILARITY_CACHE_ENABLED", False), \
+            TestClient(app) as http, ThreadPoolExecutor(len(keys)) as pool:
+        responses = list(pool.map(
+            lambda key: http.post("/estimate", json={
+                "title": f"Fix {key}", "jira_ticket_id": key, "use_mcp": True,
+            }),
+            keys,
+        ))
+
+    assert [r.status_code for r in responses] == [200] * len(keys)
+    assert client.fetch.call_count == 1
+    assert sorted(client.fetch.call_args.args[0]) == keys
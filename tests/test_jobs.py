@@ -0,0 +1,150 @@
+"""Tests for asynchronous estimation jobs."""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from pointless.core.jobs import JobManager, JobQueueFull
+from pointless.core.models import EstimationRequest, JobStatus
+from pointless.interfaces.api import app
+
+
+async def _wait_for(job, statuses, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while job.status not in statuses:
+        assert time.monotonic() < deadline, f"job stuck in {job.status}"
+        await asyncio.sleep(0.005)
+
+
+@pytest.mark.asyncio
+async def test_job_runs_to_completion():
+    """Test a submitted job produces an estimate."""
+    manager = JobManager(workers=2)
+    job = await manager.submit(EstimationRequest(title="Add client method"))
+    assert job.status == JobStatus.QUEUED
+
+    await _wait_for(job, {JobStatus.SUCCEEDED})
+    await manager.stop()
+
+    assert job.info().result.estimated_hours > 0
+    assert job.request is None  # payload released once finished
+
+
+@pytest.mark.asyncio
+async def test_workers_bound_concurrency():
+    """Test at most `workers` estimates run at the same time."""
+    active = 0
+    peak = 0
+
+    async def slow_estimate(req):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        from pointless.core.estimators import heuristic
+
+        return heuristic.estimate(req)
+
+    with patch("pointless.core.jobs.estimate_effort_async", slow_estimate):
+        manager = JobManager(workers=2)
+        jobs = [await manager.submit(EstimationRequest(title=f"T{i}")) for i in range(6)]
+        for job in jobs:
+            await _wait_for(job, {JobStatus.SUCCEEDED})
+        await manager.stop()
+
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_cancel_running_job():
+    """Test cancelling a job that is already running."""
+
+    async def never_finishes(req):
+        await asyncio.sleep(60)
+
+    with patch("pointless.core.jobs.estimate_effort_async", never_finishes):
+        manager = JobManager(workers=1)
+        running = await manager.submit(EstimationRequest(title="slow"))
+        queued = await manager.submit(EstimationRequest(title="queued"))
+        await _wait_for(running, {JobStatus.RUNNING})
+
+        assert manager.cancel(queued.job_id).status == JobStatus.CANCELLED
+        assert manager.cancel(running.job_id).status == JobStatus.CANCELLED
+        await asyncio.sleep(0.01)
+        await manager.stop()
+
+    assert running.status == JobStatus.CANCELLED
+    assert queued.started_at is None
+
+
+@pytest.mark.asyncio
+async def test_queue_full_and_ttl_expiry():
+    """Test the queue bound and expiry of finished results."""
+
+    async def never_finishes(req):
+        await asyncio.sleep(60)
+
+    with patch("pointless.core.jobs.estimate_effort_async", never_finishes):
+        manager = JobManager(workers=1, max_queue=1, ttl=0)
+        running = await manager.submit(EstimationRequest(title="one"))
+        await _wait_for(running, {JobStatus.RUNNING})
+        queued = await manager.submit(EstimationRequest(title="two"))
+        with pytest.raises(JobQueueFull):
+            await manager.submit(EstimationRequest(title="three"))
+
+        manager.cancel(queued.job_id)
+        assert manager.get(queued.job_id) is None  # ttl=0: expired immediately
+        await manager.stop()
+
+
+def test_jobs_api_round_trip():
+    """Test submit, poll and 404 through the API."""
+    with TestClient(app) as client:
+        response = client.post("/jobs/estimate", json={"title": "Add client method"})
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        deadline = time.monotonic() + 2
+        while True:
+            data = client.get(f"/jobs/{job_id}").json()
+            if data["status"] == "succeeded" or time.monotonic() > deadline:
+                break
+            time.sleep(0.01)
+
+        assert data["status"] == "succeeded"
+        assert data["result"]["estimated_hours"] > 0
+        assert client.get("/jobs/does-not-exist").status_code == 404
+        assert client.delete(f"/jobs/{job_id}").json()["status"] == "succeeded"
+
+
+def test_cancel_running_job_through_the_api():
+    """Test DELETE cancels the worker task on the loop that runs it."""
+    events = []
+
+    async def slow_estimate(request):
+        events.append("started")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            events.append("cancelled")
+            raise
+
+    with patch("pointless.core.jobs.estimate_effort_async", slow_estimate), TestClient(app) as client:
+        job_id = client.post("/jobs/estimate", json={"title": "Add client method"}).json()["job_id"]
+        deadline = time.monotonic() + 2
+        while not events and time.monotonic() < deadline:
+            time.sleep(0.01)
+        cancelled = client.delete(f"/jobs/{job_id}")
+        deadline = time.monotonic() + 2
+        while len(events) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        polled = client.get(f"/jobs/{job_id}").json()
+
+    assert cancelled.status_code == 200
+    assert cancelled.json()["status"] == "cancelled"
+    assert events == ["started", "cancelled"]
+    assert polled["status"] == "cancelled"
@@ -0,0 +1,161 @@
+"""Tests for the k-nearest-neighbour estimator."""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pointless.core.estimate import estimate_effort_async  # noqa: E402
+from pointless.core.estimators import knn  # noqa: E402
+from pointless.core.models import EstimationRequest  # noqa: E402
+
+HISTORY = [
+    {"key": "SDK-1", "title": "Add client method to get domain monitors", "hours": 3},
+    {"key": "SDK-2", "title": "Add client method to get domain alerts", "hours": 4},
+    {"key": "SDK-3", "title": "Add client method to list domain users", "hours": 3.5},
+    {"key": "DB-1", "title": "Migrate billing database to postgres", "hours": 40},
+    {"key": "DB-2", "title": "Migrate reporting database to postgres", "hours": 32},
+    {"key": "UI-1", "title": "Fix typo on login page", "hours": 0.5},
+]
+
+
+@pytest.fixture
+def history_source(tmp_path):
+    path = tmp_path / "history.ndjson"
+    path.write_text("\n".join(json.dumps(item) for item in HISTORY) + "\n")
+    return str(path)
+
+
+@pytest.fixture
+def index_dir(tmp_path, history_source):
+    """Build a small index and point the global estimator at it."""
+    path = str(tmp_path / "history")
+    knn.build_history_index(history_source, path, dim=128)
+    with patch("pointless.core.config.settings.KNN_INDEX_DIR", path):
+        yield path
+
+
+def test_embed_is_normalized_and_deterministic():
+    """Test hashed n-gram embeddings."""
+    first = knn.embed("Add client method", 64)
+    second = knn.embed("Add client method", 64)
+
+    assert first.dtype == np.float32
+    assert np.allclose(first, second)
+    assert np.linalg.norm(first) == pytest.approx(1.0)
+
+
+def test_build_writes_memory_mapped_index(index_dir):
+    """Test the index is a contiguous memory-mapped matrix."""
+    index = knn.HistoryIndex(index_dir)
+
+    assert index.rows == len(HISTORY)
+    assert index.vectors.shape == (len(HISTORY), 128)
+    assert isinstance(index.vectors, np.memmap)
+    assert index.metadata(3) == {"key": "DB-1", "title": "Migrate billing database to postgres"}
+
+
+def test_search_ranks_most_similar_first(index_dir):
+    """Test exact search returns the closest tickets."""
+    index = knn.HistoryIndex(index_dir)
+    query = knn.embed("Migrate accounts database to postgres", index.dim)
+
+    results = index.search(query, k=2)
+
+    assert {index.metadata(row)["key"] for row, _ in results} == {"DB-1", "DB-2"}
+    assert results[0][1] >= results[1][1]
+
+
+def test_lsh_search_agrees_with_exact_search(tmp_path, history_source):
+    """Test the LSH path finds the same nearest neighbour."""
+    path = str(tmp_path / "lsh")
+    with patch("pointless.core.config.settings.KNN_LSH_MIN_ROWS", 1):
+        knn.build_history_index(history_source, path, dim=128)
+    index = knn.HistoryIndex(path)
+    assert index.lsh_bits > 0
+
+    row = 0
+    results = index.search(np.asarray(index.vectors[row]), k=1)
+    assert results[0][0] == row
+    assert results[0][1] == pytest.approx(1.0)
+
+
+def test_rebuild_switches_versions_atomically(index_dir, history_source, tmp_path):
+    """Test a rebuild publishes a new version while open readers keep the old one."""
+    import os
+    from concurrent.futures import ThreadPoolExecutor
+
+    old = knn.get_history_index()
+    bigger = tmp_path / "bigger.ndjson"
+    bigger.write_text(open(history_source).read() + json.dumps(
+        {"key": "UI-2", "title": "Fix typo on signup page", "hours": 0.5}
+    ) + "\n")
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(lambda _: knn.build_history_index(str(bigger), index_dir, dim=128), range(2)))
+    for _ in range(2):
+        knn.build_history_index(str(bigger), index_dir, dim=128)
+    new = knn.get_history_index()
+
+    assert old.rows == len(HISTORY) and old.metadata(0)["key"] == "SDK-1"
+    assert new is not old and new.rows == len(HISTORY) + 1
+    versions = os.listdir(os.path.join(index_dir, "versions"))
+    assert len(versions) == 2  # the live version and the one before it
+    assert not [name for name in versions if name.startswith(".")]
+
+
+def test_rebuild_removes_abandoned_builds(index_dir, history_source):
+    """Test a build cleans up day-old unfinished builds but not running ones."""
+    import os
+    import time
+
+    versions = os.path.join(index_dir, "versions")
+    abandoned = f".{time.time_ns() - 2 * 24 * 3600 * 10**9:020d}-deadbeef.building"
+    running = f".{time.time_ns():020d}-cafebabe.building"
+    os.mkdir(os.path.join(versions, abandoned))
+    os.mkdir(os.path.join(versions, running))
+
+    knn.build_history_index(history_source, index_dir, dim=128)
+
+    names = os.listdir(versions)
+    assert abandoned not in names
+    assert running in names
+
+
+def test_current_pointer_is_cached(index_dir):
+    """Test estimates do not re-read CURRENT until the reload interval passes."""
+    index = knn.get_history_index()
+
+    with patch.object(knn, "_current_version", side_effect=AssertionError("read from disk")):
+        assert knn.get_history_index() is index
+    with patch("pointless.core.config.settings.KNN_RELOAD_INTERVAL", 0), \
+            patch.object(knn, "_current_version", return_value=None):
+        assert knn.get_history_index() is None
+
+
+def test_estimate_uses_similar_history(index_dir):
+    """Test predictions follow the neighbours' actual hours."""
+    small = knn.estimate(EstimationRequest(title="Add client method to get domain tags"))
+    large = knn.estimate(EstimationRequest(title="Migrate orders database to postgres"))
+
+    assert small.estimated_hours < 10 < large.estimated_hours
+    assert any(f.startswith("Based on") for f in small.factors)
+
+
+def test_estimate_falls_back_without_index(tmp_path):
+    """Test a missing index degrades to the heuristic."""
+    with patch("pointless.core.config.settings.KNN_INDEX_DIR", str(tmp_path / "missing")):
+        result = knn.estimate(EstimationRequest(title="Anything"))
+
+    assert result.estimated_hours > 0
+    assert any("no history index" in f for f in result.factors)
+
+
+@pytest.mark.asyncio
+@patch("pointless.core.estimate.settings.ESTIMATOR", "knn")
+async def test_estimate_effort_async_routes_to_knn(index_dir):
+    """Test POINTLESS_ESTIMATOR=knn selects the kNN backend."""
+    result = await estimate_effort_async(EstimationRequest(title="Add client method to get domain tags"))
+
+    assert any("similar completed tickets" in f for f in result.factors)
@@ -0,0 +1,156 @@
+"""Tests for the LLM estimator backend."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from pointless.core.estimate import estimate_effort_async
+from pointless.core.estimators import llm
+from pointless.core.models import EstimationRequest, TaskComplexity
+
+
+@pytest.fixture(autouse=True)
+def fake_provider():
+    """Install a fresh fake provider and empty cache for every test."""
+    provider = llm.FakeProvider()
+    llm.set_provider(provider)
+    llm.get_prompt_cache().clear()
+    yield provider
+    llm.set_provider(None)
+    llm.get_prompt_cache().clear()
+
+
+def test_build_prompt_includes_request_fields():
+    """Test prompt contains the enriched request fields."""
+    req = EstimationRequest(
+        title="Add client method",
+        description="Expose GET /domains",
+        tags=["backend"],
+        mcp_enhanced_context="Jira Status: To Do",
+    )
+    prompt = llm.build_prompt(req)
+
+    assert "Title: Add client method" in prompt
+    assert "Description: Expose GET /domains" in prompt
+    assert "Tags: backend" in prompt
+    assert "Jira Status: To Do" in prompt
+
+
+def test_prompt_key_ignores_whitespace_and_case():
+    """Test prompt normalization before hashing."""
+    assert llm.prompt_key("Title:  Foo\nBar") == llm.prompt_key("title: foo bar")
+    assert llm.prompt_key("a") != llm.prompt_key("b")
+
+
+def test_prompt_cache_evicts_least_recently_used():
+    """Test LRU eviction in the prompt cache."""
+    cache = llm.PromptCache(maxsize=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert len(cache) == 2
+
+
+def test_parser_handles_tokens_split_across_lines():
+    """Test incremental parsing of a streamed completion."""
+    parser = llm.CompletionParser()
+    for chunk in ["hou", "rs: 4", ".5\ncomplexity: mod", "erate\nconf",
+                  "idence: 0.8\nfactor: API", " change\nreasoning: Small", "\nchange"]:
+        parser.feed(chunk)
+    assert parser.hours == 4.5  # parsed before the stream finished
+    parser.close()
+
+    result = parser.result()
+    assert result.complexity == TaskComplexity.MODERATE
+    assert result.confidence == 0.8
+    assert result.factors == ["API change"]
+    assert result.reasoning == "Small change"
+
+
+def test_parser_returns_none_without_hours():
+    """Test unparseable completions are rejected."""
+    assert llm.parse_completion("I cannot estimate this") is None
+
+
+@pytest.mark.asyncio
+async def test_estimate_uses_cache_for_repeated_prompt(fake_provider):
+    """Test identical prompts only hit the provider once."""
+    req = EstimationRequest(title="Add client method", description="sdk")
+
+    first = await llm.estimate(req)
+    second = await llm.estimate(req)
+
+    assert fake_provider.calls == 1
+    assert first.estimated_hours == second.estimated_hours
+    assert "LLM response served from prompt cache" in second.factors
+    assert "LLM response served from prompt cache" not in first.factors
+
+
+@pytest.mark.asyncio
+async def test_estimate_is_deterministic_with_fake_provider():
+    """Test the fake provider returns the same answer for the same prompt."""
+    req = EstimationRequest(title="Deterministic task")
+    first = await llm.estimate(req)
+    llm.get_prompt_cache().clear()
+    second = await llm.estimate(req)
+
+    assert first.model_dump() == second.model_dump()
+    assert "Fake LLM provider (deterministic)" in first.factors
+
+
+@pytest.mark.asyncio
+@patch("pointless.core.config.settings.LLM_MAX_CONCURRENCY", 2)
+async def test_provider_calls_are_bounded():
+    """Test concurrent provider calls never exceed the configured limit."""
+    active = 0
+    peak = 0
+
+    class CountingProvider(llm.FakeProvider):
+        async def stream(self, prompt):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            async for token in super().stream(prompt):
+                yield token
+            active -= 1
+
+    llm.set_provider(CountingProvider())
+    reqs = [EstimationRequest(title=f"Task {i}") for i in range(8)]
+    results = await asyncio.gather(*(llm.estimate(r) for r in reqs))
+
+    assert len(results) == 8
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_estimate_falls_back_to_heuristic_on_provider_error():
+    """Test provider failures degrade to the heuristic estimator."""
+
+    class BrokenProvider(llm.LLMProvider):
+        name = "broken"
+
+        async def stream(self, prompt):
+            raise RuntimeError("boom")
+            yield  # pragma: no cover
+
+    llm.set_provider(BrokenProvider())
+    result = await llm.estimate(EstimationRequest(title="Anything"))
+
+    assert result.estimated_hours > 0
+    assert any("heuristic fallback" in f for f in result.factors)
+
+
+@pytest.mark.asyncio
+@patch("pointless.core.estimate.settings.ESTIMATOR", "llm")
+async def test_estimate_effort_async_routes_to_llm(fake_provider):
+    """Test POINTLESS_ESTIMATOR=llm selects the LLM backend."""
+    result = await estimate_effort_async(EstimationRequest(title="Route me"))
+
+    assert fake_provider.calls == 1
+    assert "Fake LLM provider (deterministic)" in result.factors
@@ -0,0 +1,113 @@
+"""Tests for the queue-based logging pipeline."""
+
+import io
+import json
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+from pointless.core import logs
+from pointless.core.logs import JsonFormatter, SamplingFilter, configure_logging, parse_sampling
+
+
+class Counted:
+    """Counts how often it is rendered into a message."""
+
+    def __init__(self):
+        self.renders = 0
+
+    def __str__(self):
+        self.renders += 1
+        return "counted"
+
+
+@pytest.fixture
+def pipeline():
+    yield io.StringIO()
+    logs.shutdown_logging()
+    configure_logging()
+
+
+@contextmanager
+def only_handler(handler):
+    # Set aside pytest's capture handlers, which format on the caller's thread
+    root = logging.getLogger()
+    saved = [h for h in root.handlers if h is not handler]
+    root.handlers = [handler]
+    try:
+        yield
+    finally:
+        root.handlers = saved
+
+
+def _record(name, level=logging.INFO, msg="hello %s", args=("world",), **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter():
+    """Test records become one JSON object with the merged message and extras."""
+    line = JsonFormatter().format(_record("pointless.core.jobs", ticket="PROJ-1"))
+    entry = json.loads(line)
+
+    assert entry["message"] == "hello world"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "pointless.core.jobs"
+    assert entry["ticket"] == "PROJ-1"
+    assert entry["ts"].endswith("Z")
+
+
+def test_sampling_keeps_exact_fraction_of_info_lines():
+    """Test sampling applies to the most specific logger prefix and spares warnings."""
+    rates = parse_sampling("pointless.core.connectors=0.25, pointless.core.connectors.mcp_github=1,bad")
+    sampler = SamplingFilter(rates)
+
+    kept = sum(sampler.filter(_record("pointless.core.connectors.mcp_atlassian")) for _ in range(100))
+    github = sum(sampler.filter(_record("pointless.core.connectors.mcp_github")) for _ in range(10))
+    warnings = sum(
+        sampler.filter(_record("pointless.core.connectors.mcp_atlassian", logging.WARNING)) for _ in range(10)
+    )
+    other = sum(sampler.filter(_record("pointless.core.estimate")) for _ in range(10))
+
+    assert rates == {"pointless.core.connectors": 0.25, "pointless.core.connectors.mcp_github": 1.0}
+    assert kept == 25
+    assert (github, warnings, other) == (10, 10, 10)
+
+
+def test_records_are_formatted_on_the_listener_thread(pipeline):
+    """Test callers only enqueue; formatting and output happen in the background."""
+    handler = configure_logging(level="INFO", fmt="json", sampling="noisy=0", stream=pipeline)
+    threads = []
+    original = handler.queue.put_nowait
+
+    def spy(record):
+        threads.append(threading.current_thread())
+        assert record.args and "message" not in vars(record)
+        original(record)
+
+    handler.queue.put_nowait = spy
+    noisy, kept = Counted(), Counted()
+    with only_handler(handler):
+        logging.getLogger("noisy.child").info("sampled out %s", noisy)
+        logging.getLogger("pointless.test").info("kept %s", kept)
+        logs.shutdown_logging()
+
+    lines = [json.loads(line) for line in pipeline.getvalue().splitlines()]
+    assert [entry["message"] for entry in lines] == ["kept counted"]
+    assert threads == [threading.current_thread()]
+    assert noisy.renders == 0
+    assert kept.renders == 1
+
+
+def test_full_queue_drops_instead_of_blocking():
+    """Test a full queue never blocks the logging call."""
+    handler = logs._DeferredQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(_record("pointless.test"))
+    handler.handle(_record("pointless.test"))
+
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 1
@@ -0,0 +1,80 @@
+"""Tests for on-demand CPU and memory profiles."""
+
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from typer.testing import CliRunner
+
+from pointless.core.profiling import ProfilerBusy, profile
+from pointless.interfaces.api import app
+from pointless.interfaces.cli import app as cli_app
+
+REQUEST = {"title": "Fix login bug", "description": "Users cannot login on mobile"}
+
+
+def _busy_work():
+    blocks = [bytearray(64 * 1024) for _ in range(16)]
+    deadline = time.perf_counter() + 0.1
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+    return blocks
+
+
+def test_profile_collects_collapsed_stacks():
+    """Test CPU samples and live allocations are attributed to the profiled code."""
+    with profile(interval=0.001) as prof:
+        kept = _busy_work()
+
+    assert prof.samples >= 2
+    assert any("_busy_work (" in stack.split(";")[-1] for stack in prof.cpu)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in prof.cpu_folded().splitlines())
+    assert sum(prof.memory.values()) >= 16 * 64 * 1024
+    assert prof.peak_bytes >= 16 * 64 * 1024
+    del kept
+
+
+def test_one_profile_at_a_time():
+    """Test a second profile while one is running is refused."""
+    with profile():
+        with pytest.raises(ProfilerBusy):
+            with profile():
+                pass
+    with profile():
+        pass
+
+
+def test_api_profile_header(tmp_path):
+    """Test the header is ignored unless enabled, then profiles inline or to a file."""
+    client = TestClient(app)
+    plain = client.post("/estimate", json=REQUEST, headers={"X-Pointless-Profile": "inline"})
+
+    with patch("pointless.core.config.settings.PROFILING_ENABLED", True), \
+            patch("pointless.core.config.settings.PROFILE_DIR", str(tmp_path)):
+        inline = client.post("/estimate", json=REQUEST, headers={"X-Pointless-Profile": "inline"})
+        written = client.post("/estimate", json=REQUEST, headers={"X-Pointless-Profile": "file"})
+
+    assert plain.status_code == 200
+    assert "estimated_hours" in plain.json()
+    assert "X-Pointless-Profile-Id" not in plain.headers
+
+    body = inline.json()
+    assert body["estimate"]["estimated_hours"] == plain.json()["estimated_hours"]
+    assert set(body["profile"]) >= {"cpu", "memory", "samples", "duration_ms"}
+
+    profile_id = written.headers["X-Pointless-Profile-Id"]
+    assert "estimated_hours" in written.json()
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        f"{profile_id}.alloc.folded", f"{profile_id}.cpu.folded",
+    ]
+
+
+def test_cli_profile_option(tmp_path):
+    """Test --profile writes both profiles next to the usual JSON output."""
+    result = CliRunner().invoke(cli_app, ["estimate", "Fix login bug", "--profile", "--profile-out", str(tmp_path)])
+
+    assert result.exit_code == 0, result.output
+    assert '"estimated_hours"' in result.output
+    assert len(list(tmp_path.glob("*.cpu.folded"))) == 1
+    assert len(list(tmp_path.glob("*.alloc.folded"))) == 1
@@ -0,0 +1,146 @@
+"""Tests for BM25 file relevance ranking."""
+
+import os
+import random
+import time
+from unittest.mock import patch
+
+import pytest
+
+from pointless.core import relevance
+from pointless.core.estimators.heuristic import scan_repo
+from pointless.core.relevance import TermIndex, document_terms, get_local_index, tokenize
+
+
+def _write(root, rel, content):
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    return path
+
+
+@pytest.fixture
+def repo(tmp_path):
+    _write(tmp_path, "src/billing/invoice_export.py", "class InvoiceExporter:\n    def to_csv(self): ...\n")
+    _write(tmp_path, "src/billing/invoice.py", "class Invoice:\n    total = 0\n")
+    _write(tmp_path, "src/reports/views.py", "# renders invoices and payments\ndef render(): ...\n")
+    _write(tmp_path, "src/auth/session.py", "def login(user): ...\n")
+    _write(tmp_path, "node_modules/csv/index.js", "function exportCsv() {}\n")
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG\0\0invoice")
+    return tmp_path
+
+
+def test_tokenize_splits_identifiers():
+    """Test snake_case, camelCase and paths become the same lowercased terms."""
+    assert tokenize("src/api/HTTPClient_getUsers.py") == ["src", "api", "http", "client", "get", "user", "py"]
+    assert tokenize("Add a new export for the invoices") == ["export", "invoice"]
+
+
+def test_path_and_definitions_outweigh_mentions(repo):
+    """Test files named or defining the task's terms rank above files mentioning them."""
+    ranked = relevance.rank_local_files(str(repo), "Export invoices as CSV")
+
+    assert ranked[0] == "src/billing/invoice_export.py"
+    assert ranked.index("src/billing/invoice.py") < ranked.index("src/reports/views.py")
+    assert "src/auth/session.py" not in ranked
+    assert not any(p.startswith("node_modules") or p.endswith(".png") for p in ranked)
+    # A passing mention is ranked, but is not a hit of the heuristic's scan
+    assert "src/reports/views.py" not in scan_repo(str(repo), "Export invoices as CSV")
+
+
+def test_ranking_is_deterministic_and_bounded():
+    """Test equal scores are ordered by path and only the top k are returned."""
+    docs = [(f"pkg/mod{i:03d}/handler.py", document_terms(f"pkg/mod{i:03d}/handler.py")) for i in range(200)]
+    random.Random(7).shuffle(docs)
+    index = TermIndex(docs)
+
+    top = index.search("handler", 5)
+    assert [p for p, _ in top] == [f"pkg/mod{i:03d}/handler.py" for i in range(5)]
+    assert top == TermIndex(reversed(docs)).search("handler", 5)
+    with patch("pointless.core.config.settings.MAX_FILES", 3):
+        assert len(relevance.rank_local_files(os.path.dirname(__file__), "test relevance")) == 3
+
+
+def test_local_index_rereads_only_changed_files(repo):
+    """Test a refresh picks up new and edited files without re-reading the rest."""
+    index = get_local_index(str(repo))
+    assert index.refresh() == 4  # the PNG and node_modules are skipped
+    assert index.refresh() == 0
+
+    _write(repo, "src/auth/token_refresh.py", "def refresh_token(): ...\n")
+    assert index.refresh() == 1
+    assert index.search("refresh token", 1)[0][0] == "src/auth/token_refresh.py"
+
+
+def test_stale_index_is_refreshed_without_blocking_searches(repo):
+    """Test a search past the refresh interval answers from the current index at once."""
+    index = get_local_index(str(repo))
+    index.search("invoice", 1)
+    _write(repo, "src/auth/token_refresh.py", "def refresh_token(): ...\n")
+
+    with patch("pointless.core.config.settings.RELEVANCE_REFRESH_INTERVAL", 0):
+        with index._lock:  # a slow refresh in progress
+            hits = index.search("refresh token", 5)
+        assert "src/auth/token_refresh.py" not in [path for path, _ in hits]
+        for _ in range(100):
+            if not index._scheduled.locked():
+                break
+            time.sleep(0.01)
+
+    assert index.search("refresh token", 1)[0][0] == "src/auth/token_refresh.py"
+
+
+def test_local_indexes_are_bounded(tmp_path):
+    """Test only the most recently used checkouts keep an index in memory."""
+    roots = []
+    for i in range(3):
+        roots.append(str(_write(tmp_path, f"repo{i}/main.py", "x = 1\n").parent))
+    with patch("pointless.core.config.settings.RELEVANCE_LOCAL_INDEXES", 2):
+        first = get_local_index(roots[0])
+        get_local_index(roots[1])
+        get_local_index(roots[0])
+        get_local_index(roots[2])
+
+    assert first is get_local_index(roots[0])
+    assert os.path.realpath(roots[1]) not in relevance._local_indexes
+
+
+@pytest.mark.skipif(relevance.np is None, reason="numpy not installed")
+def test_ranks_100k_files_within_budget():
+    """Test a warm index ranks 100k files in under 50 ms."""
+    rng = random.Random(0)
+    words = [f"word{i}" for i in range(5000)] + ["client", "monitor", "api", "domain"]
+    docs = []
+    for i in range(100_000):
+        terms = {word: float(rng.randint(1, 4)) for word in rng.sample(words, 12)}
+        docs.append((f"src/file_{i}.py", terms))
+    index = TermIndex(docs)
+    query = "Add monitor client method to the domain API"
+
+    index.search(query, 20)
+    elapsed = min(_timed(index.search, query, 20) for _ in range(5))
+
+    assert len(index.search(query, 20)) == 20
+    assert elapsed < 0.05
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def test_unrelated_task_gets_no_repo_bump(repo):
+    """Test a task sharing only a common word with the checkout is not bumped."""
+    from pointless.core.estimators import heuristic
+    from pointless.core.models import EstimationRequest
+
+    related = EstimationRequest(title="Export invoices as CSV", codebase_context=str(repo))
+    unrelated = EstimationRequest(
+        title="Build a mobile onboarding flow with push notifications and user login",
+        codebase_context=str(repo),
+    )
+
+    assert scan_repo(str(repo), unrelated.title) == []
+    assert any("matching paths" in f for f in heuristic.estimate(related).factors)
+    assert not any("matching paths" in f for f in heuristic.estimate(unrelated).factors)
@@ -0,0 +1,127 @@
+"""Tests for the near-duplicate ticket cache."""
+
+from unittest.mock import patch
+
+import pytest
+
+from pointless.core import similarity
+from pointless.core.estimate import estimate_effort_async
+from pointless.core.models import EstimationRequest, EstimationResponse, TaskComplexity
+
+
+def _response(hours: float) -> EstimationResponse:
+    return EstimationResponse(
+        estimated_hours=hours,
+        complexity=TaskComplexity.SIMPLE,
+        confidence=0.8,
+        reasoning="cached",
+    )
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    """Start every test with an empty global cache."""
+    similarity.get_similarity_cache().clear()
+    yield
+    similarity.get_similarity_cache().clear()
+
+
+def test_identical_signatures_have_similarity_one():
+    """Test MinHash similarity of identical token sets."""
+    sig = similarity.minhash(similarity.tokenize("Add client method to get monitors"))
+    assert len(sig) == similarity.NUM_PERM
+    assert similarity.signature_similarity(sig, sig) == 1.0
+
+
+def test_lookup_finds_near_duplicate():
+    """Test a near-copy above the threshold reuses the cached estimate."""
+    cache = similarity.SimilarityCache(threshold=0.6)
+    desc = "Expose the GET endpoint via sdk/client.py with pagination and retries"
+    cache.add("A-1", f"Add client method to get domain monitors {desc}", _response(3.0))
+
+    match = cache.lookup(f"Add client method to get domain alerts {desc}")
+
+    assert match is not None
+    assert match.key == "A-1"
+    assert match.similarity >= 0.6
+    assert match.response.estimated_hours == 3.0
+
+
+def test_lookup_ignores_unrelated_and_other_namespaces():
+    """Test dissimilar tickets and other namespaces do not match."""
+    cache = similarity.SimilarityCache(threshold=0.8)
+    cache.add("A-1", "Add client method to get domain monitors", _response(3.0), namespace="x")
+
+    assert cache.lookup("Migrate billing database to postgres", namespace="x") is None
+    assert cache.lookup("Add client method to get domain monitors", namespace="y") is None
+
+
+def test_cache_evicts_oldest_entries():
+    """Test the cache stays within its size bound."""
+    cache = similarity.SimilarityCache(maxsize=2, threshold=0.9)
+    cache.add("1", "alpha beta gamma", _response(1.0))
+    cache.add("2", "delta epsilon zeta", _response(2.0))
+    cache.add("3", "eta theta iota", _response(3.0))
+
+    assert len(cache) == 2
+    assert cache.lookup("alpha beta gamma") is None
+    assert cache.lookup("eta theta iota").key == "3"
+
+
+def test_lookup_returns_independent_copy():
+    """Test callers cannot mutate the cached response."""
+    cache = similarity.SimilarityCache(threshold=0.9)
+    cache.add("1", "alpha beta gamma", _response(1.0))
+
+    cache.lookup("alpha beta gamma").response.factors.append("mutated")
+
+    assert cache.lookup("alpha beta gamma").response.factors == []
+
+
+def test_concurrent_adds_and_lookups_keep_the_index_consistent():
+    """Test threads adding, evicting and looking up never see a half-updated index."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache = similarity.SimilarityCache(maxsize=16, threshold=0.9)
+
+    def work(worker):
+        for i in range(300):
+            text = f"ticket {worker} number {i % 40} touches module {i % 7}"
+            cache.add(f"{worker}-{i % 40}", text, _response(1.0))
+            cache.lookup(text)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(work, range(8)))
+
+    indexed = set().union(*cache._buckets.values())
+    assert len(cache) == 16
+    assert indexed == set(cache._entries)
+
+
+@pytest.mark.asyncio
+@patch("pointless.core.config.settings.SIMILARITY_CACHE_ENABLED", True)
+async def test_estimate_effort_reuses_similar_estimate():
+    """Test the pipeline marks reused estimates in factors."""
+    desc = "Expose GET /domains/{id}/monitors via sdk/client.py with retries"
+    first = await estimate_effort_async(
+        EstimationRequest(title="Add client method to get domain monitors", description=desc)
+    )
+    second = await estimate_effort_async(
+        EstimationRequest(title="Add client method to get domain monitors", description=desc + " ")
+    )
+
+    assert second.estimated_hours == first.estimated_hours
+    assert any("Reused estimate from similar ticket" in f for f in second.factors)
+    assert not any("Reused estimate" in f for f in first.factors)
+
+
+def test_fetched_jira_tickets_do_not_share_estimates():
+    """Test two Jira tickets with the same title never reuse each other's estimate."""
+    title = "Add client method to get domain monitors"
+    first = EstimationRequest(title=title, jira_ticket_id="PROJ-1", use_mcp=True)
+    second = EstimationRequest(title=title, jira_ticket_id="PROJ-2", use_mcp=True)
+
+    similarity.remember_estimate(first, _response(3.0))
+
+    assert similarity.lookup_similar_estimate(second) is None
+    assert similarity.lookup_similar_estimate(first).estimated_hours == 3.0
@@ -0,0 +1,82 @@
+"""Tests for progressive estimates and the SSE endpoint."""
+
+import json
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from pointless.core.connectors.mcp_github import GitHubCodebaseAnalysis, GitHubRepository
+from pointless.core.estimate import estimate_effort_async, estimate_effort_progressive
+from pointless.core.models import EstimationRequest
+from pointless.interfaces.api import app
+
+client = TestClient(app)
+
+
+def _parse_events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+@pytest.mark.asyncio
+async def test_progressive_without_sources_yields_initial_and_final():
+    """Test a request-only estimate streams an initial and a final event."""
+    req = EstimationRequest(title="Add client method", description="Expose GET")
+
+    stages = [stage async for stage, _ in estimate_effort_progressive(req)]
+
+    assert stages == ["initial", "final"]
+
+
+@pytest.mark.asyncio
+@patch("pointless.core.config.settings.MCP_GITHUB_ENABLED", True)
+@patch("pointless.core.estimate.analyze_github_codebase_for_estimation")
+async def test_progressive_refines_per_source_and_matches_final(mock_analyze, tmp_path):
+    """Test each source yields a refinement and the final equals the one-shot path."""
+    (tmp_path / "client.py").write_text("")
+    mock_analyze.return_value = GitHubCodebaseAnalysis(
+        repository=GitHubRepository(name="app", full_name="org/app"),
+        languages=["Python", "TypeScript", "Go"],
+    )
+    req = EstimationRequest(
+        title="Add client method",
+        description="Expose GET via client",
+        codebase_context=str(tmp_path),
+        github_owner="org",
+        github_repo="app",
+        use_github_mcp=True,
+    )
+
+    events = [item async for item in estimate_effort_progressive(req)]
+    stages = [stage for stage, _ in events]
+    one_shot = await estimate_effort_async(req)
+
+    assert stages[0] == "initial"
+    assert sorted(stages[1:-1]) == ["github", "repo"]
+    assert stages[-1] == "final"
+    assert not events[0][1].github_data_used
+    assert events[-1][1].model_dump() == one_shot.model_dump()
+
+
+def test_stream_endpoint_get_emits_sse_events():
+    """Test GET /estimate/stream returns text/event-stream events."""
+    response = client.get("/estimate/stream", params={"title": "Add client method"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _parse_events(response.text)
+    assert [name for name, _ in events] == ["initial", "final"]
+    assert events[-1][1]["estimate"]["estimated_hours"] > 0
+
+
+def test_stream_endpoint_post_accepts_json_body():
+    """Test POST /estimate/stream with an EstimationRequest body."""
+    response = client.post("/estimate/stream", json={"title": "Add client method", "tags": ["urgent"]})
+
+    events = _parse_events(response.text)
+    assert events[0][0] == "initial"
+    assert any("Urgent" in f for f in events[-1][1]["estimate"]["factors"])
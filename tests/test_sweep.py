@@ -0,0 +1,166 @@
+"""Tests for checkpointed, resumable backlog sweeps."""
+
+import json
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from pointless.core.models import EstimationRequest, EstimationResponse, TaskComplexity
+from pointless.core.sweep import (
+    SweepError,
+    claim_shard,
+    merge_results,
+    plan_sweep,
+    read_requests,
+    run_sweep,
+    sweep_status,
+)
+
+
+def _requests(n):
+    return [EstimationRequest(title=f"Task {i}", jira_ticket_id=f"PROJ-{i}") for i in range(n)]
+
+
+def _estimate():
+    return EstimationResponse(
+        estimated_hours=2.0, complexity=TaskComplexity.SIMPLE, confidence=0.5, reasoning="test"
+    )
+
+
+async def _fake_estimate(req):
+    return _estimate()
+
+
+def _results(directory):
+    with open(os.path.join(directory, "results.ndjson")) as fh:
+        return [json.loads(line) for line in fh]
+
+
+def test_sweep_across_processes_merges_every_result(tmp_path):
+    """Test a multi-process sweep checkpoints every shard and merges one result per ticket."""
+    directory = str(tmp_path / "sweep")
+    source = tmp_path / "tickets.txt"
+    source.write_text("PROJ-1\nPROJ-2\n# comment\n\n{\"title\": \"Add login page\"}\nPROJ-1\nPROJ-3\n")
+
+    manifest = plan_sweep(directory, read_requests(str(source)), shard_size=1)
+    status = run_sweep(directory, workers=2)
+
+    assert (manifest["shards"], manifest["total"]) == (4, 4)  # the repeated key is planned once
+    assert (status["done"], status["processed"], status["results"]) == (4, 4, 4)
+    ids = [r["id"] for r in _results(directory)]
+    assert ids[:2] == ["PROJ-1", "PROJ-2"] and ids[2].startswith("req-") and ids[3] == "PROJ-3"
+    assert all("estimate" in r for r in _results(directory))
+
+
+def test_resume_skips_estimated_tickets_and_torn_lines(tmp_path):
+    """Test a resumed sweep only estimates what an interrupted run left undone."""
+    directory = str(tmp_path / "sweep")
+    plan_sweep(directory, _requests(5), shard_size=3)
+    shards = os.path.join(directory, "shards")
+    # The crashed run finished PROJ-0, was writing PROJ-1 and held shard 0's lease
+    with open(os.path.join(shards, "00000.out.crashed-1.ndjson"), "w") as fh:
+        fh.write(json.dumps({"id": "PROJ-0", "estimate": {"estimated_hours": 1}}) + "\n")
+        fh.write('{"id": "PROJ-1", "estim')
+    lease = os.path.join(shards, "00000.lease")
+    with open(lease, "w") as fh:
+        fh.write("crashed-1")
+    os.utime(lease, (time.time() - 120, time.time() - 120))
+
+    seen = []
+
+    async def fake_estimate(req):
+        seen.append(req.jira_ticket_id)
+        if req.jira_ticket_id == "PROJ-4":
+            raise RuntimeError("upstream timeout")
+        return _estimate()
+
+    with patch("pointless.core.estimate.estimate_effort_async", fake_estimate):
+        status = run_sweep(directory, workers=1, lease_seconds=60)
+
+    assert sorted(seen) == ["PROJ-1", "PROJ-2", "PROJ-3", "PROJ-4"]
+    assert status["results"] == 5
+    errors = [r for r in _results(directory) if "error" in r]
+    assert errors == [{"id": "PROJ-4", "error": "upstream timeout"}]
+
+
+def test_live_leases_are_respected(tmp_path):
+    """Test a shard held by a live worker is skipped and the sweep is not merged."""
+    directory = str(tmp_path / "sweep")
+    plan_sweep(directory, _requests(4), shard_size=2)
+    assert claim_shard(directory, 1, lease_seconds=60)
+
+    with patch("pointless.core.estimate.estimate_effort_async", _fake_estimate):
+        status = run_sweep(directory, workers=1, lease_seconds=60)
+
+    assert (status["done"], status["leased"]) == (1, 1)
+    assert "results" not in status
+    assert not claim_shard(directory, 0, lease_seconds=60)  # already done
+    assert sweep_status(directory)["pending"] == 0
+
+
+def test_merge_prefers_estimates_over_errors(tmp_path):
+    """Test a ticket estimated twice after a takeover is merged once, keeping the estimate."""
+    directory = str(tmp_path / "sweep")
+    plan_sweep(directory, _requests(2), shard_size=2)
+    outputs = {
+        "old-1": [{"id": "PROJ-0", "error": "boom"}, {"id": "PROJ-1", "estimate": {}}],
+        "new-2": [{"id": "PROJ-0", "estimate": {}}, {"id": "PROJ-1", "error": "late"}],
+    }
+    for owner, records in outputs.items():
+        with open(os.path.join(directory, "shards", f"00000.out.{owner}.ndjson"), "w") as fh:
+            fh.writelines(json.dumps(record) + "\n" for record in records)
+
+    assert merge_results(directory) == 2
+    assert _results(directory) == [{"id": "PROJ-0", "estimate": {}}, {"id": "PROJ-1", "estimate": {}}]
+    with pytest.raises(SweepError):
+        run_sweep(str(tmp_path / "missing"))
+
+
+def test_takeover_gives_up_on_a_lease_renewed_meanwhile(tmp_path):
+    """Test a worker that moved aside a freshly taken-over lease puts it back."""
+    directory = str(tmp_path / "sweep")
+    plan_sweep(directory, _requests(2), shard_size=2)
+    lease = os.path.join(directory, "shards", "00000.lease")
+    with open(lease, "w") as fh:
+        fh.write("dead-1")
+    os.utime(lease, (time.time() - 120, time.time() - 120))
+    rename = os.rename
+
+    def racing_rename(src, dst):
+        # Another worker takes the shard over just before our rename
+        if src == lease:
+            os.remove(lease)
+            with open(lease, "w") as fh:
+                fh.write("other-2")
+        rename(src, dst)
+
+    with patch("pointless.core.sweep.os.rename", racing_rename):
+        assert not claim_shard(directory, 0, lease_seconds=60)
+
+    with open(lease) as fh:
+        assert fh.read() == "other-2"
+    assert [n for n in os.listdir(os.path.dirname(lease)) if ".stale-" in n] == []
+
+
+def test_worker_stops_when_its_lease_is_taken(tmp_path):
+    """Test a worker whose lease was taken over neither checkpoints nor releases the shard."""
+    from pointless.core.sweep import process_shard
+
+    directory = str(tmp_path / "sweep")
+    plan_sweep(directory, _requests(3), shard_size=3)
+    assert claim_shard(directory, 0, lease_seconds=60)
+    lease = os.path.join(directory, "shards", "00000.lease")
+
+    async def slow_estimate(req):
+        with open(lease, "w") as fh:
+            fh.write("other-2")  # taken over while we were estimating
+        return _estimate()
+
+    with patch("pointless.core.estimate.estimate_effort_async", slow_estimate):
+        assert process_shard(directory, 0) == (0, 0)
+
+    assert not os.path.exists(os.path.join(directory, "shards", "00000.done"))
+    with open(lease) as fh:
+        assert fh.read() == "other-2"
@@ -0,0 +1,224 @@
+"""Tests for tenant-scoped connectors."""
+
+import asyncio
+import json
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from pointless.core import tenants as tenants_module
+from pointless.core.cache import MemoryCache, get_cache, set_cache
+from pointless.core.connectors import mcp_atlassian, mcp_github
+from pointless.core.connectors.mcp_atlassian import get_jira_ticket_info, get_mcp_client
+from pointless.core.connectors.mcp_github import get_github_mcp_client
+from pointless.core.jobs import JobManager
+from pointless.core.models import EstimationRequest
+from pointless.core.tenants import RateLimiter, TenantRegistry, UnknownTenant, use_tenant
+from pointless.interfaces.api import app
+
+
+@pytest.fixture
+def tenants_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("ACME_GH_TOKEN", "acme-secret")
+    path = tmp_path / "tenants.json"
+    path.write_text(json.dumps({
+        "acme": {
+            "jira": {"server_url": "http://acme.jira", "api_token": "a", "email": "bot@acme.io"},
+            "github": {"server_url": "http://github", "token": "env:ACME_GH_TOKEN"},
+            "max_concurrency": 1,
+        },
+        "globex": {
+            "jira": {"server_url": "http://globex.jira", "api_token": "g", "email": "bot@globex.io",
+                     "max_concurrency": 2},
+        },
+    }))
+    monkeypatch.setattr(tenants_module, "_registry", None)
+    monkeypatch.setattr(mcp_atlassian, "_mcp_client", None)
+    monkeypatch.setattr(mcp_github, "_github_mcp_client", None)
+    with patch("pointless.core.config.settings.TENANTS_PATH", str(path)):
+        yield str(path)
+    if tenants_module._registry is not None:
+        tenants_module._registry.close()
+
+
+def test_tenants_get_their_own_credentials(tenants_file):
+    """Test each tenant's clients use only its credentials, never the global ones."""
+    with patch("pointless.core.config.settings.MCP_GITHUB_ENABLED", True), \
+            patch("pointless.core.config.settings.MCP_GITHUB_SERVER_URL", "http://global"), \
+            patch("pointless.core.config.settings.MCP_GITHUB_TOKEN", "global-secret"):
+        with use_tenant("acme"):
+            acme_jira, acme_github = get_mcp_client(), get_github_mcp_client()
+            assert get_mcp_client() is acme_jira
+        with use_tenant("globex"):
+            globex_jira, globex_github = get_mcp_client(), get_github_mcp_client()
+        shared_github = get_github_mcp_client()
+
+    assert (acme_jira.server_url, acme_jira.email) == ("http://acme.jira", "bot@acme.io")
+    assert globex_jira.server_url == "http://globex.jira"
+    assert acme_github.token == "acme-secret"
+    assert globex_github.token is None and not globex_github.is_configured()
+    assert shared_github.token == "global-secret"
+    assert (acme_jira.limiter.max_concurrency, globex_jira.limiter.max_concurrency) == (1, 2)
+    with use_tenant("initech"), pytest.raises(UnknownTenant):
+        get_mcp_client()
+
+
+@pytest.mark.asyncio
+async def test_busy_tenant_does_not_block_another(tenants_file):
+    """Test a tenant at its concurrency limit queues only its own calls."""
+    async def search(tenant):
+        with use_tenant(tenant):
+            start = time.perf_counter()
+            await get_mcp_client().search_tickets("project = X")
+            return time.perf_counter() - start
+
+    with patch("pointless.core.config.settings.MCP_ENABLED", True):
+        timings = await asyncio.gather(
+            *(search("acme") for _ in range(3)), search("globex")
+        )
+
+    assert max(timings[:3]) >= 0.3  # one call at a time for acme
+    assert timings[3] < 0.2
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_spaces_calls():
+    """Test the token bucket lets a burst through and then spaces calls at the rate."""
+    limiter = RateLimiter(rate=50, burst=1)
+
+    async def call():
+        async with limiter:
+            pass
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(5)))
+
+    assert time.perf_counter() - start >= 0.07  # 4 calls waited 20 ms each
+
+
+def test_concurrency_cap_holds_across_event_loops():
+    """Test sync callers, each on its own loop, still share the concurrency cap."""
+    limiter = RateLimiter(max_concurrency=1)
+    active, peak = [0], [0]
+
+    async def call():
+        async with limiter:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await asyncio.sleep(0.05)
+            active[0] -= 1
+
+    threads = [threading.Thread(target=asyncio.run, args=(call(),)) for _ in range(3)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak[0] == 1
+    assert time.perf_counter() - start >= 0.15
+
+
+def test_idle_and_least_recently_used_tenants_are_evicted(tenants_file):
+    """Test the registry keeps at most max_active tenants and drops idle ones."""
+    registry = TenantRegistry(tenants_file, max_active=1, idle_seconds=3600)
+    acme = registry.get("acme")
+    registry.get("globex")
+    assert registry.active == 1
+    assert registry.get("acme") is not acme  # recreated after eviction
+
+    registry.idle_seconds = 0.0
+    registry.get("acme").writeback.enqueue("ACME-1", {"customfield": 1})
+    time.sleep(0.01)
+    registry.max_active = 2
+    registry.get("globex")
+    assert registry.active == 2  # idle, but acme still has a write queued
+    registry.close()
+
+
+@pytest.mark.asyncio
+async def test_cached_tickets_are_per_tenant(tenants_file):
+    """Test the same ticket key is cached separately per tenant."""
+    set_cache(MemoryCache())
+    try:
+        with patch("pointless.core.config.settings.MCP_ENABLED", True):
+            with use_tenant("acme"):
+                await get_jira_ticket_info("PROJ-1")
+            with use_tenant("globex"):
+                await get_jira_ticket_info("PROJ-1")
+        keys = sorted(get_cache()._data)
+    finally:
+        set_cache(None)
+
+    assert keys == ["tenant:acme:jira:ticket:PROJ-1", "tenant:globex:jira:ticket:PROJ-1"]
+
+
+def test_api_rejects_unknown_tenants(tenants_file):
+    """Test the tenant header must name a configured tenant."""
+    client = TestClient(app)
+    body = {"title": "Add login"}
+
+    assert client.post("/estimate", json=body, headers={"X-Pointless-Tenant": "acme"}).status_code == 200
+    assert client.post("/estimate", json=body, headers={"X-Pointless-Tenant": "nope"}).status_code == 404
+    with patch("pointless.core.config.settings.TENANTS_PATH", None):
+        response = client.post("/estimate", json=body, headers={"X-Pointless-Tenant": "acme"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_and_are_visible_in_their_tenant(tenants_file):
+    """Test a job runs with its submitter's tenant and is hidden from others."""
+    seen = []
+
+    async def fake_estimate(request):
+        seen.append(tenants_module.current_tenant())
+
+    manager = JobManager(workers=1)
+    with patch("pointless.core.jobs.estimate_effort_async", fake_estimate):
+        with use_tenant("acme"):
+            job = await manager.submit(EstimationRequest(title="Add login"))
+        while not job.done:
+            await asyncio.sleep(0.01)
+        await manager.stop()
+
+    assert seen == ["acme"]
+    assert manager.get(job.job_id) is None
+    with use_tenant("acme"):
+        assert manager.get(job.job_id) is job
+
+
+def test_estimates_and_calibration_do_not_leak_between_tenants(tenants_file, tmp_path):
+    """Test near-duplicate reuse, calibration buckets and kNN history are per tenant."""
+    from pointless.core import similarity
+    from pointless.core.calibration import CalibrationStore, apply_calibration
+    from pointless.core.estimators.knn import history_dir
+    from pointless.core.models import ActualRecord, EstimationResponse, TaskComplexity
+
+    req = EstimationRequest(title="Add client method to get domain monitors", jira_ticket_id="PROJ-1")
+    result = EstimationResponse(
+        estimated_hours=4.0, complexity=TaskComplexity.MODERATE, confidence=0.7, reasoning="test"
+    )
+    similarity.get_similarity_cache().clear()
+    store = CalibrationStore(str(tmp_path / "calibration.json"))
+    try:
+        with use_tenant("acme"):
+            similarity.remember_estimate(req, result)
+            assert similarity.lookup_similar_estimate(req) is not None
+            for _ in range(6):
+                store.record(ActualRecord(estimated_hours=2, actual_hours=6, jira_ticket_id="PROJ-1"))
+            acme_history = history_dir()
+        with use_tenant("globex"):
+            assert similarity.lookup_similar_estimate(req) is None
+            assert store.summaries() == []
+            calibrated = apply_calibration(store, req, result.model_copy(deep=True))
+            globex_history = history_dir()
+        assert similarity.lookup_similar_estimate(req) is None
+    finally:
+        similarity.get_similarity_cache().clear()
+
+    assert calibrated.estimated_hours == 4.0
+    assert {s.key for s in CalibrationStore(store.path).summaries()} == set()
+    assert acme_history.endswith("tenants/acme") and globex_history.endswith("tenants/globex")
@@ -0,0 +1,125 @@
+"""Tests for GET /estimate/{jira_ticket_id} and its HTTP caching."""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from pointless.core import estimate as estimate_module
+from pointless.core.connectors.mcp_atlassian import JiraTicket
+from pointless.core.models import EstimationResponse, TaskComplexity
+from pointless.core.precompute import get_estimate_store
+from pointless.interfaces.api import app
+
+TICKET = JiraTicket("PROJ-7", "Add CSV export", "Export reports as CSV", "To Do", "Medium", "Story")
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    with patch("pointless.core.config.settings.ESTIMATE_STORE_PATH", str(tmp_path / "e.sqlite3")), \
+            patch("pointless.core.config.settings.CALIBRATION_ENABLED", False):
+        yield
+
+
+def _result(hours):
+    return EstimationResponse(
+        estimated_hours=hours, complexity=TaskComplexity.SIMPLE, confidence=0.7, reasoning="stored",
+    )
+
+
+def test_etag_and_conditional_get(store_path):
+    """Test the ETag follows the content version and If-None-Match gets a 304."""
+    client = TestClient(app)
+    store = get_estimate_store()
+    store.put("PROJ-7", "v1", _result(3.0))
+
+    with patch("pointless.core.config.settings.WEBHOOKS_ENABLED", True):
+        first = client.get("/estimate/PROJ-7")
+        etag = first.headers["ETag"]
+        cached = client.get("/estimate/PROJ-7", headers={"If-None-Match": f'"other", W/{etag}'})
+        store.put("PROJ-7", "v2", _result(5.0))
+        changed = client.get("/estimate/PROJ-7", headers={"If-None-Match": etag})
+        with patch.object(estimate_module, "get_jira_ticket_info", AsyncMock(return_value=None)):
+            missing = client.get("/estimate/PROJ-404")
+
+    assert first.status_code == 200
+    assert first.json()["estimated_hours"] == 3.0
+    assert "public" in first.headers["Cache-Control"]
+    assert first.headers["Vary"] == "X-Pointless-Tenant"
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+    assert changed.status_code == 200
+    assert changed.json()["estimated_hours"] == 5.0
+    assert changed.headers["ETag"] != etag
+    assert missing.status_code == 404
+
+
+def test_estimator_version_is_part_of_the_etag(store_path):
+    """Test switching estimators never revalidates an old estimate."""
+    client = TestClient(app)
+    get_estimate_store().put("PROJ-7", "v1", _result(3.0))
+    with patch("pointless.core.config.settings.WEBHOOKS_ENABLED", True):
+        etag = client.get("/estimate/PROJ-7").headers["ETag"]
+
+    with patch.object(estimate_module, "get_jira_ticket_info", AsyncMock(return_value=TICKET)), \
+            patch("pointless.core.config.settings.ESTIMATOR", "knn"):
+        other = client.get("/estimate/PROJ-7", headers={"If-None-Match": etag})
+
+    assert other.status_code == 200
+    assert other.headers["ETag"] != etag
+
+
+def test_without_webhooks_the_current_version_is_fetched(store_path):
+    """Test a ticket is estimated once per content version."""
+    client = TestClient(app)
+    fetch = AsyncMock(return_value=TICKET)
+    with patch.object(estimate_module, "get_jira_ticket_info", fetch), \
+            patch.object(estimate_module, "estimate_ticket_async",
+                         wraps=estimate_module.estimate_ticket_async) as compute:
+        first = client.get("/estimate/PROJ-7")
+        second = client.get("/estimate/PROJ-7")
+
+    assert first.status_code == second.status_code == 200
+    assert first.headers["ETag"] == second.headers["ETag"]
+    assert first.json()["jira_ticket_summary"] == "Add CSV export"
+    assert fetch.await_count == 2
+    assert compute.await_count == 1
+
+
+def test_recorded_actuals_change_the_etag(store_path, tmp_path):
+    """Test a calibrated estimate is not revalidated after its bucket changes."""
+    from pointless.core.calibration import record_actual
+    from pointless.core.models import ActualRecord
+
+    client = TestClient(app)
+    get_estimate_store().put("PROJ-7", "v1", _result(3.0))
+    with patch("pointless.core.config.settings.WEBHOOKS_ENABLED", True), \
+            patch("pointless.core.config.settings.CALIBRATION_ENABLED", True), \
+            patch("pointless.core.config.settings.CALIBRATION_MIN_SAMPLES", 1), \
+            patch("pointless.core.config.settings.CALIBRATION_PATH", str(tmp_path / "cal.json")):
+        etag = client.get("/estimate/PROJ-7").headers["ETag"]
+        record_actual(ActualRecord(estimated_hours=2, actual_hours=6, jira_ticket_id="PROJ-1"))
+        calibrated = client.get("/estimate/PROJ-7", headers={"If-None-Match": etag})
+
+    assert calibrated.status_code == 200
+    assert calibrated.json()["estimated_hours"] > 3.0
+    assert calibrated.headers["ETag"] != etag
+
+
+def test_fetched_and_webhook_tickets_share_a_content_version():
+    """Test labels fetched with the ticket count like labels from a webhook."""
+    from pointless.core.precompute import content_version
+    from pointless.core.webhooks import ticket_from_payload
+
+    payload = {"webhookEvent": "jira:issue_updated", "issue": {"key": "PROJ-7", "fields": {
+        "summary": TICKET.summary, "description": TICKET.description,
+        "status": {"name": TICKET.status}, "priority": {"name": TICKET.priority},
+        "issuetype": {"name": TICKET.issue_type}, "labels": ["ui", "reports"],
+    }}}
+    parsed, labels = ticket_from_payload(payload)
+    fetched = JiraTicket("PROJ-7", TICKET.summary, TICKET.description, TICKET.status,
+                         TICKET.priority, TICKET.issue_type, labels=["reports", "ui"])
+
+    assert content_version(fetched) == content_version(parsed, labels)
+    assert content_version(fetched) != content_version(TICKET)
@@ -0,0 +1,96 @@
+"""Tests for the API startup warm-up and readiness."""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from pointless.core import warmup as warmup_module
+from pointless.core.cache import MemoryCache, set_cache
+from pointless.core.connectors import mcp_atlassian, mcp_github
+from pointless.core.connectors.mcp_atlassian import JiraTicket, get_jira_ticket_info, prime_jira_tickets
+from pointless.core.warmup import WarmUp, hot_repositories
+from pointless.interfaces.api import app
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(warmup_module, "_warmup", None)
+    monkeypatch.setattr(mcp_github, "_github_mcp_client", None)
+    monkeypatch.setattr(mcp_atlassian, "_mcp_client", None)
+
+
+def test_ready_without_warmup():
+    """Test /healthz is ready when warm-up is disabled, even without a lifespan."""
+    response = TestClient(app).get("/healthz")
+
+    assert response.status_code == 200
+    assert response.json()["ready"] is True
+
+
+def test_not_ready_until_warmup_finishes():
+    """Test /healthz answers 503 during warm-up, then 200 with hot repositories prefetched."""
+    async def slow_tickets():
+        await asyncio.sleep(0.3)
+
+    with patch("pointless.core.config.settings.WARMUP_ENABLED", True), \
+            patch("pointless.core.config.settings.WARMUP_REPOS", "org/app, bad-entry"), \
+            patch("pointless.core.config.settings.MCP_GITHUB_ENABLED", True), \
+            patch("pointless.core.config.settings.MCP_GITHUB_SERVER_URL", "http://github"), \
+            patch("pointless.core.config.settings.MCP_GITHUB_TOKEN", "token"), \
+            patch.object(warmup_module, "_prefetch_tickets", slow_tickets), \
+            TestClient(app) as client:
+        early = client.get("/healthz")
+        deadline = time.monotonic() + 5
+        while client.get("/healthz").status_code != 200:
+            assert time.monotonic() < deadline, "never became ready"
+            time.sleep(0.02)
+        snapshots = list(mcp_github.get_github_mcp_client()._snapshots)
+
+    assert early.status_code == 503
+    assert early.json()["status"] == "warming_up"
+    assert [name for name, _ in snapshots] == ["org/app"]
+    assert warmup_module.get_warmup().status == "idle"  # reset at shutdown
+
+
+@pytest.mark.asyncio
+async def test_timeout_and_failures_still_become_ready():
+    """Test a hanging or failing step never keeps the instance out of rotation."""
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def fail():
+        raise RuntimeError("jira down")
+
+    with patch("pointless.core.config.settings.WARMUP_ENABLED", True):
+        with patch.object(warmup_module, "_prefetch_repositories", hang):
+            slow = WarmUp()
+            await slow.start(timeout=0.05)
+        with patch.object(warmup_module, "_prefetch_tickets", fail):
+            broken = WarmUp()
+            await broken.start(timeout=5)
+
+    assert (slow.status, slow.ready) == ("timeout", True)
+    assert (broken.status, broken.ready) == ("ready", True)
+    assert hot_repositories("a/b,,c, d/e ") == [("a", "b"), ("d", "e")]
+
+
+@pytest.mark.asyncio
+async def test_prime_jira_tickets_fills_the_cache():
+    """Test recently updated tickets are served from the cache on first lookup."""
+    ticket = JiraTicket("PROJ-9", "Hot ticket", status="In Progress")
+    set_cache(MemoryCache())
+    try:
+        client = mcp_atlassian.get_mcp_client()
+        with patch.object(client, "search_tickets", AsyncMock(return_value=[ticket])) as search, \
+                patch.object(client, "get_ticket", AsyncMock()) as fetch:
+            assert await prime_jira_tickets("updated >= -1d", limit=10) == 1
+            cached = await get_jira_ticket_info("PROJ-9")
+    finally:
+        set_cache(None)
+
+    search.assert_awaited_once_with("updated >= -1d", max_results=10)
+    fetch.assert_not_awaited()
+    assert cached == ticket
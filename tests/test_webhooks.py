@@ -0,0 +1,151 @@
+"""Tests for Jira webhooks and precomputed ticket estimates."""
+
+import asyncio
+import copy
+import hashlib
+import hmac
+import json
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from pointless.core import estimate as estimate_module
+from pointless.core import webhooks
+from pointless.core.precompute import EstimateStore, content_version
+from pointless.core.webhooks import WebhookProcessor, ticket_from_payload
+from pointless.interfaces.api import app
+
+FIXTURES = Path(__file__).parent / "fixtures" / "jira_webhooks"
+
+
+def _payload(name):
+    return json.loads((FIXTURES / f"{name}.json").read_text())
+
+
+@pytest.fixture
+def store(tmp_path):
+    return EstimateStore(str(tmp_path / "estimates.sqlite3"))
+
+
+def test_payload_parsing_and_content_version():
+    """Test ticket fields are read from plain and rich-text payloads."""
+    created, _ = ticket_from_payload(_payload("issue_created"))
+    updated, labels = ticket_from_payload(_payload("issue_updated"))
+
+    assert updated.key == "PROJ-42"
+    assert updated.priority == "High"
+    assert updated.description == (
+        "Throttle anonymous clients per IP.\nAdd monthly quotas per API key."
+    )
+    assert labels == ["api", "security"]
+    assert content_version(updated, labels) == content_version(updated, reversed(labels))
+    assert content_version(created) != content_version(updated)
+
+
+@pytest.mark.asyncio
+async def test_bursts_are_debounced_to_one_recompute(store):
+    """Test rapid edits to one ticket are estimated once, from the last edit."""
+    processor = WebhookProcessor(debounce=0.05, store=store)
+    edits = []
+    for i in range(5):
+        payload = copy.deepcopy(_payload("issue_updated"))
+        payload["issue"]["fields"]["summary"] += f" (rev {i})"
+        edits.append(payload)
+
+    with patch.object(webhooks, "estimate_ticket_async", wraps=webhooks.estimate_ticket_async) as compute:
+        for payload in edits:
+            assert processor.handle(payload).status == "scheduled"
+            await asyncio.sleep(0.01)
+        await processor.drain()
+
+    assert compute.call_count == 1
+    assert compute.call_args[0][0].summary.endswith("(rev 4)")
+    ticket, labels = ticket_from_payload(edits[-1])
+    assert store.get("PROJ-42", content_version(ticket, labels)) is not None
+
+
+@pytest.mark.asyncio
+async def test_unchanged_content_and_other_events_skip_recompute(store):
+    """Test repeats of an estimated version and non-issue events do no work."""
+    processor = WebhookProcessor(debounce=0, store=store)
+    processor.handle(_payload("issue_updated"))
+    await processor.drain()
+
+    assert processor.handle(_payload("issue_updated")).status == "unchanged"
+    assert processor.handle(_payload("comment_created")).status == "ignored"
+    assert processor.pending == 0
+
+    deleted = dict(_payload("issue_updated"), webhookEvent="jira:issue_deleted")
+    assert processor.handle(deleted).status == "deleted"
+    assert store.latest("PROJ-42") is None
+
+
+@pytest.mark.asyncio
+async def test_max_delay_bounds_continuous_edits(store):
+    """Test a ticket edited non-stop is still estimated after max_delay."""
+    processor = WebhookProcessor(debounce=0.05, max_delay=0.1, store=store)
+    payload = _payload("issue_updated")
+    deadline = time.monotonic() + 0.4
+    while store.latest("PROJ-42") is None:
+        assert time.monotonic() < deadline, "never recomputed"
+        processor.handle(payload)
+        await asyncio.sleep(0.02)
+    await processor.stop()
+
+
+def test_webhook_precomputes_then_serves_ticket_instantly(tmp_path, monkeypatch):
+    """Test a posted webhook payload makes the next ticket request a store lookup."""
+    monkeypatch.setattr(webhooks, "_processor", WebhookProcessor(debounce=0.01))
+    with patch("pointless.core.config.settings.WEBHOOKS_ENABLED", True), \
+            patch("pointless.core.config.settings.ESTIMATE_STORE_PATH", str(tmp_path / "e.sqlite3")), \
+            TestClient(app) as client:
+        response = client.post("/webhooks/jira", json=_payload("issue_updated"))
+        assert response.status_code == 202
+        assert response.json() == {
+            "event": "jira:issue_updated", "ticket_id": "PROJ-42", "status": "scheduled",
+        }
+
+        store = webhooks.get_webhook_processor().store
+        deadline = time.monotonic() + 5
+        while store.latest("PROJ-42") is None:
+            assert time.monotonic() < deadline, "estimate was not precomputed"
+            time.sleep(0.01)
+
+        with patch.object(estimate_module, "_final_estimate") as compute:
+            served = client.post("/estimate", json={"jira_ticket_id": "PROJ-42"})
+        compute.assert_not_called()
+
+    assert served.status_code == 200
+    assert served.json()["jira_ticket_summary"] == "Add rate limiting and quotas to the public API"
+
+
+def test_only_bare_ticket_lookups_use_the_precomputed_estimate():
+    """Test tags or a team on the request bypass the stored webhook estimate."""
+    from pointless.core.models import EstimationRequest
+
+    assert estimate_module._is_ticket_lookup(EstimationRequest(jira_ticket_id="PROJ-42"))
+    assert not estimate_module._is_ticket_lookup(
+        EstimationRequest(jira_ticket_id="PROJ-42", tags=["urgent"])
+    )
+    assert not estimate_module._is_ticket_lookup(
+        EstimationRequest(jira_ticket_id="PROJ-42", team="platform")
+    )
+
+
+def test_webhook_signature_and_disabled_endpoint():
+    """Test the endpoint is hidden when disabled and checks signatures."""
+    body = json.dumps(_payload("comment_created")).encode()
+    signature = "sha256=" + hmac.new(b"s3cret", body, hashlib.sha256).hexdigest()
+    client = TestClient(app)
+
+    assert client.post("/webhooks/jira", content=body).status_code == 404
+    with patch("pointless.core.config.settings.WEBHOOKS_ENABLED", True), \
+            patch("pointless.core.config.settings.WEBHOOK_SECRET", "s3cret"):
+        assert client.post("/webhooks/jira", content=body).status_code == 401
+        accepted = client.post("/webhooks/jira", content=body, headers={"X-Hub-Signature": signature})
+
+    assert accepted.status_code == 202
+    assert accepted.json()["status"] == "ignored"
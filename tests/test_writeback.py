@@ -0,0 +1,132 @@
+"""Tests for batched, coalesced Jira write-back."""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from pointless.core import estimate as estimate_module
+from pointless.core.connectors.mcp_atlassian import JiraWriteBackQueue, estimate_fields
+from pointless.core.estimate import estimate_effort_async
+from pointless.core.models import EstimationRequest
+
+
+class FakeJira:
+    """Stands in for MCPAtlassianClient.update_tickets and records every call."""
+
+    def __init__(self, failures=None, latency=0.0):
+        self.failures = dict(failures or {})  # ticket -> number of calls to fail
+        self.latency = latency
+        self.calls = []
+        self.fields = {}
+
+    async def update_tickets(self, updates):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.calls.append({key: dict(fields) for key, fields in updates.items()})
+        errors = {}
+        for key, fields in updates.items():
+            if self.failures.get(key, 0) > 0:
+                self.failures[key] -= 1
+                errors[key] = "503 Service Unavailable"
+            else:
+                self.fields.setdefault(key, {}).update(fields)
+        return errors
+
+
+def _wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+def test_writes_are_coalesced_and_sent_at_batch_size():
+    """Test repeated writes to a ticket collapse and a full batch is sent at once."""
+    jira = FakeJira()
+    queue = JiraWriteBackQueue(jira, batch_size=3, flush_interval=60)
+    for hours in (1, 2, 3, 4):
+        queue.enqueue("PROJ-1", {"customfield_10016": hours, "labels": ["estimated"]})
+    queue.enqueue("PROJ-2", {"customfield_10016": 5})
+    assert jira.calls == []
+    queue.enqueue("PROJ-3", {"customfield_10016": 8})
+
+    _wait_until(lambda: jira.calls)
+    queue.stop()
+
+    assert len(jira.calls) == 1
+    assert jira.calls[0]["PROJ-1"] == {"customfield_10016": 4, "labels": ["estimated"]}
+    assert sorted(jira.calls[0]) == ["PROJ-1", "PROJ-2", "PROJ-3"]
+
+
+def test_partial_batches_are_sent_after_the_interval():
+    """Test a write waits at most flush_interval seconds."""
+    jira = FakeJira()
+    queue = JiraWriteBackQueue(jira, batch_size=100, flush_interval=0.05)
+    queue.enqueue("PROJ-1", {"customfield_10016": 2})
+
+    _wait_until(lambda: jira.calls)
+    queue.stop()
+
+    assert jira.fields == {"PROJ-1": {"customfield_10016": 2}}
+
+
+def test_failures_are_retried_with_backoff_then_dropped():
+    """Test failed tickets are retried, and given up after max_attempts."""
+    jira = FakeJira(failures={"PROJ-1": 2, "PROJ-2": 99})
+    queue = JiraWriteBackQueue(jira, batch_size=2, flush_interval=0.01, max_attempts=3, backoff=0.02)
+    queue.enqueue("PROJ-1", {"customfield_10016": 1})
+    queue.enqueue("PROJ-2", {"customfield_10016": 2})
+
+    _wait_until(lambda: queue.pending == 0)
+    queue.stop()
+
+    assert jira.fields == {"PROJ-1": {"customfield_10016": 1}}
+    assert (queue.sent, queue.dropped) == (1, 1)
+    assert len(jira.calls) == 3
+
+
+def test_newer_writes_win_over_a_failed_batch():
+    """Test a retry carries fields written while the failed batch was in flight."""
+    jira = FakeJira(failures={"PROJ-1": 1}, latency=0.05)
+    queue = JiraWriteBackQueue(jira, batch_size=1, flush_interval=0, backoff=0.01)
+    queue.enqueue("PROJ-1", {"customfield_10016": 1})
+    _wait_until(lambda: queue.pending == 0)  # first batch in flight
+    queue.enqueue("PROJ-1", {"customfield_10016": 2})
+
+    _wait_until(lambda: jira.fields)
+    queue.stop()
+
+    assert jira.fields == {"PROJ-1": {"customfield_10016": 2}}
+
+
+def test_stop_drains_pending_writes():
+    """Test shutdown sends writes that were still waiting for the interval."""
+    jira = FakeJira()
+    queue = JiraWriteBackQueue(jira, batch_size=100, flush_interval=60)
+    queue.enqueue("PROJ-1", {"customfield_10016": 3})
+
+    queue.stop(timeout=2)
+
+    assert jira.fields == {"PROJ-1": {"customfield_10016": 3}}
+    assert queue.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_estimates_do_not_wait_for_write_back():
+    """Test estimating with write-back enabled only queues the write."""
+    jira = FakeJira(latency=0.5)
+    queue = JiraWriteBackQueue(jira, batch_size=1, flush_interval=0)
+    req = EstimationRequest(title="Add client method", jira_ticket_id="PROJ-9")
+
+    with patch("pointless.core.config.settings.JIRA_WRITEBACK_ENABLED", True), \
+            patch.object(estimate_module, "get_writeback_queue", return_value=queue):
+        started = time.perf_counter()
+        result = await estimate_effort_async(req)
+        elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.25
+    await asyncio.get_running_loop().run_in_executor(None, queue.stop, 2.0)
+    assert jira.fields == {"PROJ-9": estimate_fields(result.estimated_hours)}
+    assert jira.fields["PROJ-9"]["timetracking"]["originalEstimate"].endswith("m")